@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Мікробенчмарк реєстрації нових користувачів (get_or_create_user для нового telegram_id).
+
+Порівнює попередню реалізацію (дефолтні категорії вантажаться як ORM-об'єкти,
+копіюються по одній, два commit і refresh) з поточною: INSERT користувача і
+один багаторядковий INSERT категорій з набору в пам'яті в одній транзакції.
+Виводить кількість SQL-запитів на реєстрацію та пропускну здатність.
+
+Запуск: python benchmark_signup.py [реєстрацій] [rtt_мс]
+Для PostgreSQL вкажіть BENCHMARK_DATABASE_URL (таблиці мають бути створені).
+rtt_мс додає штучну паузу на кожен запит, щоб змоделювати віддалений сервер.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, User, Category
+from database.cache import user_record
+from database import db_operations
+from benchmark_stats_queries import measure
+
+# Такий самий набір, як у database.models.init_db
+DEFAULT_CATEGORIES = [
+    ("Продукти", "expense", "🛒"), ("Транспорт", "expense", "🚗"), ("Розваги", "expense", "🎮"),
+    ("Кафе і ресторани", "expense", "🍽"), ("Покупки", "expense", "🛍"), ("Комунальні послуги", "expense", "🏠"),
+    ("Здоров'я", "expense", "💊"), ("Освіта", "expense", "📚"), ("Інше", "expense", "📌"),
+    ("Зарплата", "income", "💰"), ("Фріланс", "income", "💻"), ("Подарунки", "income", "🎁"),
+    ("Інвестиції", "income", "📈"), ("Інше", "income", "📌"),
+]
+
+telegram_ids = itertools.count(3 * 10**9)
+
+def legacy_create_user(session):
+    user = User(telegram_id=next(telegram_ids))
+    session.add(user)
+    session.commit()
+    default_categories = session.query(Category).filter(Category.is_default == True).all()
+    for default_cat in default_categories:
+        session.add(Category(
+            user_id=user.id, name=default_cat.name, type=default_cat.type,
+            icon=default_cat.icon, is_default=False
+        ))
+    session.commit()
+    session.refresh(user)
+    return user_record(user)
+
+def create_user(session):
+    return db_operations._create_user(session, next(telegram_ids))
+
+def main():
+    signups = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rtt_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    db_path = None
+    database_url = os.getenv('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        database_url = f"sqlite:///{db_path}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        session = Session()
+        if not session.query(Category).filter(Category.is_default == True).count():
+            session.add_all([Category(name=n, type=t, icon=i, is_default=True) for n, t, i in DEFAULT_CATEGORIES])
+            session.commit()
+        db_operations._load_default_categories(session)
+        session.close()
+
+        print(f"{signups} реєстрацій, {engine.dialect.name}, rtt {rtt_ms} мс")
+        old_queries, old_ms = measure(engine, Session, legacy_create_user, repeats=signups, rtt_ms=rtt_ms)
+        new_queries, new_ms = measure(engine, Session, create_user, repeats=signups, rtt_ms=rtt_ms)
+        print(f"запитів на реєстрацію {old_queries} -> {new_queries}, "
+              f"{old_ms:.2f} мс -> {new_ms:.2f} мс, "
+              f"{1000 / old_ms:.0f} -> {1000 / new_ms:.0f} реєстрацій/с")
+    finally:
+        engine.dispose()
+        if db_path:
+            os.remove(db_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Мікробенчмарк агрегатних запитів статистики.
+
+Порівнює попередні реалізації get_monthly_stats / get_accounts_statistics
+(окремі запити на кожну суму) з поточними однопрохідними: кількість SQL
+запитів та середній час виклику.
+
+Запуск: python benchmark_stats_queries.py [кількість_транзакцій] [повтори] [rtt_мс]
+За замовчуванням використовується тимчасова SQLite база; для PostgreSQL
+вкажіть BENCHMARK_DATABASE_URL (таблиці мають бути створені). Локальна
+SQLite не має мережевої затримки, тому rtt_мс додає штучну паузу на кожен
+запит, щоб змоделювати round-trip до віддаленого сервера.
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+import calendar
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, User, Category, Transaction, TransactionType, Account, AccountType
+from database import db_operations
+
+# ==================== ПОПЕРЕДНІ РЕАЛІЗАЦІЇ ====================
+
+def legacy_monthly_stats(session, user_id, year, month):
+    start_date = datetime(year, month, 1)
+    end_date = datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, 59)
+    expenses = session.query(func.sum(Transaction.amount))\
+        .filter(Transaction.user_id == user_id,
+                Transaction.type == TransactionType.EXPENSE,
+                Transaction.transaction_date.between(start_date, end_date))\
+        .scalar() or 0
+    income = session.query(func.sum(Transaction.amount))\
+        .filter(Transaction.user_id == user_id,
+                Transaction.type == TransactionType.INCOME,
+                Transaction.transaction_date.between(start_date, end_date))\
+        .scalar() or 0
+    top = session.query(Category.name, Category.icon, func.sum(Transaction.amount).label('total'))\
+        .join(Transaction, Transaction.category_id == Category.id)\
+        .filter(Transaction.user_id == user_id,
+                Transaction.type == TransactionType.EXPENSE,
+                Transaction.transaction_date.between(start_date, end_date))\
+        .group_by(Category.name, Category.icon)\
+        .order_by(func.sum(Transaction.amount).desc())\
+        .limit(5).all()
+    return expenses, income, [(c.name, c.icon, c.total) for c in top]
+
+def legacy_accounts_statistics(session, user_id):
+    accounts = session.query(Account).filter(Account.user_id == user_id, Account.is_active == True).all()
+    month_ago = datetime.utcnow() - timedelta(days=30)
+    count = session.query(Transaction).filter(
+        Transaction.user_id == user_id, Transaction.transaction_date >= month_ago).count()
+    income = session.query(func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id, Transaction.type == TransactionType.INCOME,
+        Transaction.transaction_date >= month_ago).scalar() or 0.0
+    expenses = session.query(func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id, Transaction.type == TransactionType.EXPENSE,
+        Transaction.transaction_date >= month_ago).scalar() or 0.0
+    return len(accounts), sum(a.balance for a in accounts), count, income - expenses
+
+# ==================== ДАНІ ====================
+
+def seed(Session, transactions_count):
+    session = Session()
+    user = User(telegram_id=random.randint(10**9, 2 * 10**9))
+    session.add(user)
+    session.flush()
+    categories = [Category(user_id=user.id, name=f"Категорія {i}", type="expense", icon="📦") for i in range(15)]
+    session.add_all(categories)
+    session.add_all([
+        Account(user_id=user.id, name=f"Рахунок {i}", account_type=random.choice(list(AccountType)), balance=1000.0)
+        for i in range(4)
+    ])
+    session.flush()
+    now = datetime.utcnow()
+    session.bulk_save_objects([
+        Transaction(
+            user_id=user.id,
+            category_id=random.choice(categories).id,
+            amount=round(random.uniform(10, 2000), 2),
+            type=random.choice([TransactionType.EXPENSE, TransactionType.INCOME]),
+            transaction_date=now - timedelta(days=random.randint(0, 60)),
+        )
+        for _ in range(transactions_count)
+    ])
+    session.commit()
+    user_id = user.id
+    session.close()
+    return user_id
+
+def measure(engine, Session, func_, *args, repeats=50, rtt_ms=0.0):
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        if rtt_ms:
+            time.sleep(rtt_ms / 1000)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        started = time.perf_counter()
+        for _ in range(repeats):
+            session = Session()
+            try:
+                func_(session, *args)
+            finally:
+                session.close()
+        elapsed = (time.perf_counter() - started) / repeats * 1000
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements) // repeats, elapsed
+
+def main():
+    transactions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rtt_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+
+    db_path = None
+    database_url = os.getenv('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        database_url = f"sqlite:///{db_path}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        user_id = seed(Session, transactions_count)
+        now = datetime.utcnow()
+
+        cases = [
+            ("get_monthly_stats", legacy_monthly_stats, db_operations._get_monthly_stats, (user_id, now.year, now.month)),
+            ("get_accounts_statistics", legacy_accounts_statistics, db_operations._get_accounts_statistics, (user_id,)),
+        ]
+        print(f"{transactions_count} транзакцій, {repeats} повторів, {engine.dialect.name}, rtt {rtt_ms} мс")
+        for name, legacy, current, args in cases:
+            old_queries, old_ms = measure(engine, Session, legacy, *args, repeats=repeats, rtt_ms=rtt_ms)
+            new_queries, new_ms = measure(engine, Session, current, *args, repeats=repeats, rtt_ms=rtt_ms)
+            print(f"{name}: запитів {old_queries} -> {new_queries}, "
+                  f"{old_ms:.2f} мс -> {new_ms:.2f} мс ({old_ms / new_ms:.1f}x)")
+    finally:
+        engine.dispose()
+        if db_path:
+            os.remove(db_path)
+
+if __name__ == "__main__":
+    main()
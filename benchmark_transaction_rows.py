@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Мікробенчмарк читання транзакцій.
+
+Порівнює get_transactions (ORM-об'єкти з joinedload категорії) з
+get_transaction_rows (TransactionRow): середній час вибірки та пам'ять,
+яку займає отриманий список (tracemalloc, пік під час виклику).
+
+Запуск: python benchmark_transaction_rows.py [кількість_транзакцій] [повтори]
+Для PostgreSQL вкажіть BENCHMARK_DATABASE_URL (таблиці мають бути створені).
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base
+from database import db_operations
+from benchmark_stats_queries import seed
+
+def measure(Session, func_, user_id, limit, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        session = Session()
+        try:
+            func_(session, user_id, limit=limit)
+        finally:
+            session.close()
+    elapsed = (time.perf_counter() - started) / repeats * 1000
+
+    session = Session()
+    try:
+        tracemalloc.start()
+        rows = func_(session, user_id, limit=limit)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        session.close()
+    return len(rows), elapsed, peak
+
+def main():
+    transactions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    db_path = None
+    database_url = os.getenv('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        database_url = f"sqlite:///{db_path}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        user_id = seed(Session, transactions_count)
+        print(f"{transactions_count} транзакцій, {repeats} повторів, {engine.dialect.name}")
+        results = {}
+        for name, func_ in (("get_transactions", db_operations._get_transactions),
+                            ("get_transaction_rows", db_operations._get_transaction_rows)):
+            count, ms, peak = measure(Session, func_, user_id, transactions_count, repeats)
+            results[name] = (ms, peak)
+            print(f"{name}: {count} рядків, {ms:.1f} мс, пік пам'яті {peak / 1024:.0f} КБ "
+                  f"({peak / max(count, 1):.0f} Б/рядок)")
+        (old_ms, old_peak), (new_ms, new_peak) = results.values()
+        print(f"час {old_ms / new_ms:.1f}x, пам'ять {old_peak / new_peak:.1f}x")
+    finally:
+        engine.dispose()
+        if db_path:
+            os.remove(db_path)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import sys
@@ -29,7 +30,14 @@ from handlers.setup_callbacks import (
 )
 from handlers.ai_assistant_handler import handle_ai_question, WAITING_AI_QUESTION
 from database.session import init_db
+from database.engine import dispose_async_engine
+from database.async_db_operations import flush_last_active, flush_last_active_periodically
+from database.unit_of_work import UnitOfWorkUpdateProcessor, rollback_on_error
+from database.query_stats import label_handlers
+from database.partitions import maintain_partitions_periodically
+from database.archive import archive_periodically
 from database.cleanup import clear_all_tables, reset_database
+from handlers.budget_callbacks import send_budget_alerts_periodically
 from services.statement_parser import StatementParser, ReceiptProcessor
 from services.ml_categorizer import TransactionCategorizer
 from services.openai_service import OpenAIService
@@ -58,6 +66,25 @@ openai_service = OpenAIService(OPENAI_API_KEY)
 analytics_service = AnalyticsService()
 tavria_receipt_parser = TavriaReceiptParser()
 
+async def start_background_tasks(application):
+    """Запускає фонові задачі після ініціалізації застосунку"""
+    application.bot_data['last_active_flusher'] = asyncio.create_task(flush_last_active_periodically())
+    application.bot_data['partition_maintainer'] = asyncio.create_task(maintain_partitions_periodically())
+    application.bot_data['archiver'] = asyncio.create_task(archive_periodically())
+    application.bot_data['budget_alerts'] = asyncio.create_task(send_budget_alerts_periodically(application.bot))
+
+async def stop_background_tasks(application):
+    """Зупиняє фонові задачі та дописує буфер last_active перед виходом"""
+    for name in ('last_active_flusher', 'partition_maintainer', 'archiver', 'budget_alerts'):
+        task = application.bot_data.pop(name, None)
+        if task:
+            task.cancel()
+    try:
+        await flush_last_active()
+    except Exception as e:
+        logger.error(f"Не вдалося записати last_active при зупинці: {e}")
+    await dispose_async_engine()
+
 def main():
     """Запуск бота"""
     # Запускаємо health server для Render (опціонально)
@@ -87,7 +114,12 @@ def main():
     init_db()
     
     # Створюємо застосунок
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    application = Application.builder()\
+        .token(TELEGRAM_TOKEN)\
+        .concurrent_updates(UnitOfWorkUpdateProcessor())\
+        .post_init(start_background_tasks)\
+        .post_shutdown(stop_background_tasks)\
+        .build()
     
     # Додаємо обробники команд
     application.add_handler(get_setup_handler())  # Обробник налаштування
@@ -145,6 +177,12 @@ def main():
     # Обробник колбеків від інлайн-кнопок
     application.add_handler(CallbackQueryHandler(callback_handler.handle_callback))
     
+    # Помилка обробника відкочує незафіксовані зміни сесії оновлення
+    application.add_error_handler(rollback_on_error)
+    
+    # Запити в статистиці (/metrics) приписуються колбеку, що їх виконав
+    label_handlers(application)
+    
     # Запускаємо бота
     logger.info("FinAssistAI Bot started successfully! Press Ctrl+C to stop.")
     application.run_polling()
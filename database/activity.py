@@ -0,0 +1,38 @@
+"""
+Відкладений запис User.last_active.
+
+get_or_create_user викликається майже на кожне натискання кнопки. Замість
+окремої транзакції на кожен виклик час активності складається в буфер у
+пам'яті, а flush_last_active (database.db_operations) записує його одним
+пакетним UPDATE раз на LAST_ACTIVE_FLUSH_INTERVAL секунд і при зупинці бота.
+"""
+
+import threading
+from datetime import datetime
+
+_pending = {}
+_lock = threading.Lock()
+
+def touch_user(user_id, when=None):
+    """Запам'ятовує час останньої активності користувача"""
+    when = when or datetime.utcnow()
+    with _lock:
+        if _pending.get(user_id) is None or _pending[user_id] < when:
+            _pending[user_id] = when
+
+def take_pending():
+    """Забирає накопичені значення {user_id: last_active}, очищаючи буфер"""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    return pending
+
+def restore_pending(pending):
+    """Повертає незаписані значення в буфер (після помилки запису)"""
+    for user_id, when in pending.items():
+        touch_user(user_id, when)
+
+def pending_count():
+    """Кількість користувачів, чия активність ще не записана"""
+    with _lock:
+        return len(_pending)
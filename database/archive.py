@@ -0,0 +1,308 @@
+"""
+Архів старих транзакцій у стиснених колонкових файлах.
+
+Транзакції, старші за ARCHIVE_AFTER_DAYS днів (цілими місяцями), раз на добу
+переносяться з таблиці transactions у файли ARCHIVE_DIR/user_<id>/<рік>-<місяць>.npz —
+кожна колонка окремим стисненим масивом numpy. Денні агрегати
+(transaction_daily_rollup) при цьому не змінюються, тож статистика за
+будь-який період і далі читається з них без звернення до архіву.
+
+Читання прозоре: get_transactions, get_transaction_rows і count_transactions
+(а з ними експорт CSV і річна аналітика) додають архівні транзакції, якщо
+період запиту сягає архівних місяців. Запити за недавній період архів не
+відкривають. Архівні транзакції доступні лише для читання.
+
+Файли пишуться до видалення рядків з БД; якщо видалення не відбулося,
+наступний запуск перезапише місяць, а читач пропускає архівні id, що є і в БД.
+
+Ручний запуск:
+    python -m database.archive [days] [user_id]
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import re
+import shutil
+import sys
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select, delete
+
+from database.config import ARCHIVE_DIR, ARCHIVE_AFTER_DAYS, IMPORT_CHUNK_SIZE
+from database.models import Transaction, TransactionType
+
+logger = logging.getLogger(__name__)
+
+# Раз на добу переносимо в архів місяці, що вийшли за горизонт
+ARCHIVE_INTERVAL = 24 * 60 * 60
+
+ArchivedTransaction = namedtuple('ArchivedTransaction', [
+    'id', 'user_id', 'transaction_date', 'amount', 'type', 'category_id',
+    'description', 'account_id', 'source', 'created_at'
+])
+
+# Тип колонки у файлі; None у nullable-колонках зберігається окремою маскою <name>_null
+_COLUMNS = {
+    'id': 'int', 'user_id': 'int', 'transaction_date': 'datetime', 'amount': 'float',
+    'type': 'str', 'category_id': 'int', 'description': 'str', 'account_id': 'int',
+    'source': 'str', 'created_at': 'datetime',
+}
+
+_FILL = {'int': 0, 'float': 0.0, 'str': '', 'datetime': datetime(1970, 1, 1)}
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def _as_datetime(value):
+    return value if isinstance(value, datetime) else datetime.combine(value, datetime.min.time())
+
+_MONTH_FILE = re.compile(r'^(\d{4})-(\d{2})\.npz$')
+
+def _user_dir(user_id):
+    return os.path.join(ARCHIVE_DIR, f"user_{user_id}")
+
+def _month_path(user_id, month):
+    return os.path.join(_user_dir(user_id), f"{month.year}-{month.month:02d}.npz")
+
+def archived_months(user_id):
+    """Перші числа архівних місяців користувача за зростанням"""
+    try:
+        names = os.listdir(_user_dir(user_id))
+    except FileNotFoundError:
+        return []
+    months = []
+    for name in names:
+        # Лише готові файли місяців: незавершений запис (.part) пропускаємо
+        match = _MONTH_FILE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def archive_boundary(user_id):
+    """Дата, з якої всі транзакції користувача в БД (None, якщо архіву немає)"""
+    months = archived_months(user_id)
+    return _as_datetime(_next_month(months[-1])) if months else None
+
+# ==================== ФАЙЛИ ====================
+
+def _pack(rows):
+    arrays = {}
+    for name, kind in _COLUMNS.items():
+        values = [getattr(row, name) for row in rows]
+        nulls = np.array([value is None for value in values], dtype=bool)
+        values = [_FILL[kind] if value is None else value for value in values]
+        if kind == 'int':
+            arrays[name] = np.array(values, dtype=np.int64)
+        elif kind == 'float':
+            arrays[name] = np.array(values, dtype=np.float64)
+        elif kind == 'datetime':
+            arrays[name] = np.array(values, dtype='datetime64[us]')
+        else:
+            arrays[name] = np.array(values, dtype=np.str_)
+        if nulls.any():
+            arrays[f"{name}_null"] = nulls
+    return arrays
+
+def _write_month(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Запис у тимчасовий файл і атомарна заміна; через файловий об'єкт numpy не додає .npz до імені
+    temp_path = path + '.part'
+    with open(temp_path, 'wb') as file:
+        np.savez_compressed(file, **_pack(rows))
+    os.replace(temp_path, path)
+
+@functools.lru_cache(maxsize=64)
+def _load_arrays(path, mtime_ns):
+    # mtime_ns у ключі кешу: перезаписаний файл читається заново
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+def _read_arrays(path):
+    return _load_arrays(path, os.stat(path).st_mtime_ns)
+
+def _unpack(arrays, mask=None):
+    """Рядки ArchivedTransaction для позицій mask (всі, якщо mask=None)"""
+    columns = {}
+    for name, kind in _COLUMNS.items():
+        values = arrays[name] if mask is None else arrays[name][mask]
+        if kind == 'datetime':
+            values = values.astype('datetime64[us]').astype(object)
+        else:
+            values = values.tolist()
+        nulls = arrays.get(f"{name}_null")
+        if nulls is not None:
+            nulls = nulls if mask is None else nulls[mask]
+            values = [None if null else value for value, null in zip(values, nulls)]
+        columns[name] = values
+    return [ArchivedTransaction(*row) for row in zip(*(columns[name] for name in _COLUMNS))]
+
+def _read_month(user_id, month):
+    path = _month_path(user_id, month)
+    return _unpack(_read_arrays(path)) if os.path.exists(path) else []
+
+# ==================== ЧИТАННЯ ====================
+
+def _months_in_range(user_id, start_date=None, end_date=None):
+    return [
+        month for month in archived_months(user_id)
+        if (start_date is None or _as_datetime(_next_month(month)) > _as_datetime(start_date))
+        and (end_date is None or _as_datetime(month) <= _as_datetime(end_date))
+    ]
+
+def _match(arrays, category_id=None, transaction_type=None, start_date=None, end_date=None, after=None):
+    """Маска рядків під фільтри списку транзакцій — по колонках, без створення рядків"""
+    mask = np.ones(len(arrays['id']), dtype=bool)
+    if category_id:
+        mask &= arrays['category_id'] == category_id
+        if 'category_id_null' in arrays:
+            mask &= ~arrays['category_id_null']
+    if transaction_type:
+        mask &= arrays['type'] == getattr(transaction_type, 'value', transaction_type)
+    dates = arrays['transaction_date']
+    if start_date:
+        mask &= dates >= np.datetime64(start_date, 'us')
+    if end_date:
+        mask &= dates <= np.datetime64(end_date, 'us')
+    if after is not None:
+        after_date, after_id = np.datetime64(after[0], 'us'), after[1]
+        mask &= (dates < after_date) | ((dates == after_date) & (arrays['id'] < after_id))
+    return mask
+
+def read_archived(user_id, category_id=None, transaction_type=None, start_date=None, end_date=None, after=None):
+    """Архівні транзакції під фільтри, від найновішої до найстарішої"""
+    rows = []
+    for month in _months_in_range(user_id, start_date, end_date):
+        arrays = _read_arrays(_month_path(user_id, month))
+        rows.extend(_unpack(arrays, _match(arrays, category_id, transaction_type, start_date, end_date, after)))
+    rows.sort(key=lambda row: (row.transaction_date, row.id), reverse=True)
+    return rows
+
+def count_archived(user_id, category_id=None, transaction_type=None, start_date=None, end_date=None):
+    total = 0
+    for month in _months_in_range(user_id, start_date, end_date):
+        arrays = _read_arrays(_month_path(user_id, month))
+        total += int(_match(arrays, category_id, transaction_type, start_date, end_date).sum())
+    return total
+
+def reaches_archive(user_id, start_date=None, hot_rows=None, limit=None):
+    """Чи може архів додати транзакції до результату запиту з БД.
+
+    Ні, якщо архіву немає, період починається після архівних місяців або
+    сторінка з БД повна і закінчується новішою за архів транзакцією.
+    """
+    boundary = archive_boundary(user_id)
+    if boundary is None or (start_date is not None and _as_datetime(start_date) >= boundary):
+        return False
+    if hot_rows is not None and limit is not None and len(hot_rows) == limit:
+        last = hot_rows[-1].transaction_date
+        return last is None or last < boundary
+    return True
+
+def merge_newest_first(hot_rows, archived_rows):
+    """Об'єднує рядки з БД та архіву за (дата, id) від новіших; рядок з БД має перевагу"""
+    hot_ids = {row.id for row in hot_rows}
+    rows = list(hot_rows) + [row for row in archived_rows if row.id not in hot_ids]
+    rows.sort(key=lambda row: (row.transaction_date or datetime.min, row.id), reverse=True)
+    return rows
+
+# ==================== АРХІВАЦІЯ ====================
+
+def archive_cutoff(days, today=None):
+    """Перше число місяця, старші за який транзакції переносяться в архів"""
+    today = today or date.today()
+    return _as_datetime(_month_start(today - timedelta(days=days)))
+
+def archive_user_transactions(session, user_id, before):
+    """Переносить транзакції користувача, старші за before, в архів. Повертає кількість"""
+    T = Transaction
+    result = session.execute(
+        select(*(getattr(T, name) for name in _COLUMNS))
+        .where(T.user_id == user_id, T.transaction_date < before)
+    )
+    rows = [ArchivedTransaction(*row[:4], row.type.value if row.type else None, *row[5:]) for row in result]
+    if not rows:
+        return 0
+
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(_month_start(row.transaction_date), []).append(row)
+    for month, month_rows in by_month.items():
+        # Місяць міг бути заархівований раніше (наприклад, імпорт старої виписки)
+        ids = {row.id for row in month_rows}
+        existing = [row for row in _read_month(user_id, month) if row.id not in ids]
+        _write_month(_month_path(user_id, month), existing + month_rows)
+
+    # Core DELETE в обхід ORM: агрегати лишаються, статистика за архівні дні не змінюється.
+    # Видаляємо саме перенесені id пачками, щоб не впертися в ліміт параметрів запиту
+    moved_ids = [row.id for row in rows]
+    for start in range(0, len(moved_ids), IMPORT_CHUNK_SIZE):
+        session.execute(delete(T).where(T.id.in_(moved_ids[start:start + IMPORT_CHUNK_SIZE])))
+    session.commit()
+    logger.info(f"✅ Користувач {user_id}: в архів перенесено {len(rows)} транзакцій ({len(by_month)} міс.)")
+    return len(rows)
+
+def archive_old_transactions(days=None, user_id=None, today=None):
+    """Архівує транзакції, старші за days днів, для всіх або одного користувача"""
+    from database.models import Session
+
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    before = archive_cutoff(days, today)
+    session = Session()
+    try:
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = session.execute(
+                select(Transaction.user_id).where(Transaction.transaction_date < before).distinct()
+            ).scalars().all()
+        return sum(archive_user_transactions(session, uid, before) for uid in user_ids if uid is not None)
+    finally:
+        session.close()
+
+def delete_user_archive(user_id):
+    """Видаляє всі архівні файли користувача"""
+    shutil.rmtree(_user_dir(user_id), ignore_errors=True)
+
+def archived_rollup_rows(user_id=None):
+    """Архівні транзакції як словники колонок — для перебудови денних агрегатів"""
+    if user_id is not None:
+        user_ids = [user_id]
+    elif os.path.isdir(ARCHIVE_DIR):
+        user_ids = [int(name[len('user_'):]) for name in os.listdir(ARCHIVE_DIR) if name.startswith('user_')]
+    else:
+        user_ids = []
+    for uid in user_ids:
+        for month in archived_months(uid):
+            for row in _read_month(uid, month):
+                yield {
+                    'user_id': row.user_id, 'transaction_date': row.transaction_date,
+                    'type': TransactionType(row.type), 'category_id': row.category_id,
+                    'account_id': row.account_id, 'amount': row.amount,
+                }
+
+async def archive_periodically(interval=ARCHIVE_INTERVAL):
+    """Фонова задача: раз на interval секунд переносить старі транзакції в архів"""
+    if not ARCHIVE_AFTER_DAYS:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(archive_old_transactions)
+        except Exception as e:
+            logger.error(f"Не вдалося заархівувати старі транзакції: {e}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    target_user = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if not days:
+        sys.exit("Вкажіть горизонт архівації в днях (ARCHIVE_AFTER_DAYS або аргумент)")
+    moved = archive_old_transactions(days, target_user)
+    logger.info(f"Перенесено в архів: {moved} транзакцій")
@@ -0,0 +1,295 @@
+"""
+Асинхронний доступ до бази даних для обробників бота.
+
+Кожна функція має ту ж сигнатуру, що й відповідна функція з
+database.db_operations, але виконує запит через асинхронний драйвер
+(asyncpg для PostgreSQL, aiosqlite для SQLite) і не блокує цикл подій
+python-telegram-bot. Логіка запитів спільна з синхронною версією:
+AsyncSession.run_sync виконує ті ж _operation(session, ...) функції.
+
+Синхронні функції з database.db_operations залишаються для скриптів і тестів.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.activity import touch_user, take_pending, restore_pending
+from database.cache import user_cache, category_cache, MISSING
+from database.frame_cache import frame_cache
+from database.config import IMPORT_CHUNK_SIZE, LAST_ACTIVE_FLUSH_INTERVAL
+from database.engine import get_async_engine
+from database.unit_of_work import current_unit_of_work
+from database import db_operations as ops, replica
+
+logger = logging.getLogger(__name__)
+
+# expire_on_commit=False: об'єкти, повернуті з функцій, мають залишатися
+# доступними після commit, бо ліниве завантаження в asyncio недоступне
+_session_factory = async_sessionmaker(expire_on_commit=False)
+
+def AsyncSession(**kwargs):
+    """Нова асинхронна сесія на поточному спільному двигуні.
+
+    Двигун береться при кожному виклику, а не при імпорті: після
+    dispose_async_engine сесії отримують новий пул, і get_pool_stats
+    показує саме той пул, з якого вони беруть з'єднання.
+    """
+    return _session_factory(bind=get_async_engine(), **kwargs)
+
+async def _run_in_session(operation, *args, **kwargs):
+    """Виконує operation(session, ...) в асинхронній сесії оновлення або в новій сесії"""
+    uow = current_unit_of_work()
+    if uow is None:
+        async with AsyncSession() as session:
+            return await session.run_sync(operation, *args, **kwargs)
+
+    # Операція лише робить flush; фіксує (або відкочує) її UnitOfWork
+    async with uow.async_operation(AsyncSession) as session:
+        return await session.run_sync(operation, *args, **kwargs)
+
+async def _run_read(operation, *args, from_replica=False, **kwargs):
+    """Як _run_in_session; з from_replica=True читає з репліки, якщо вона є (database/replica.py)"""
+    return await replica.run_read_async(operation, _run_in_session, *args, from_replica=from_replica, **kwargs)
+
+async def run_blocking(func, *args, **kwargs):
+    """Виконує синхронний виклик (наприклад, методи BudgetManager) у пулі потоків"""
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+# ==================== КОРИСТУВАЧІ ====================
+
+async def get_or_create_user(telegram_id, username=None, first_name=None, last_name=None):
+    """Отримує або створює запис користувача в базі даних (UserRecord, з кешу якщо є)"""
+    record = user_cache.get(telegram_id)
+    if record is not MISSING and record is not None:
+        touch_user(record.id)
+        return record
+    record = await _run_in_session(ops._get_or_create_user, telegram_id, username, first_name, last_name)
+    user_cache.set(telegram_id, record)
+    return record
+
+async def get_user(telegram_id):
+    """Отримує користувача за telegram_id (UserRecord, з кешу якщо є)"""
+    record = user_cache.get(telegram_id)
+    if record is MISSING:
+        record = await _run_in_session(ops._get_user, telegram_id)
+        if record is not None:
+            user_cache.set(telegram_id, record)
+    return record
+
+async def update_user_settings(telegram_id, **settings):
+    """Оновлення налаштувань користувача"""
+    return await _run_in_session(ops._update_user_settings, telegram_id, **settings)
+
+async def flush_last_active():
+    """Записує накопичені значення last_active одним пакетним UPDATE"""
+    pending = take_pending()
+    if not pending:
+        return 0
+    try:
+        return await _run_in_session(ops._flush_last_active, pending)
+    except Exception:
+        restore_pending(pending)
+        raise
+
+async def flush_last_active_periodically(interval=LAST_ACTIVE_FLUSH_INTERVAL):
+    """Фонова задача: записує буфер last_active кожні interval секунд"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_last_active()
+        except Exception as e:
+            logger.error(f"Не вдалося записати last_active: {e}")
+
+async def get_alert_recipients(user_ids):
+    """telegram_id користувачів з увімкненими сповіщеннями: {user_id: telegram_id}"""
+    return await _run_in_session(ops._get_alert_recipients, list(user_ids))
+
+# ==================== ТРАНЗАКЦІЇ ====================
+
+async def add_transaction(user_id, amount, description, category_id, transaction_type, account_id=None, transaction_date=None, source="manual", receipt_image=None):
+    """Додає нову транзакцію до бази даних"""
+    return await _run_in_session(
+        ops._add_transaction, user_id, amount, description, category_id, transaction_type,
+        account_id=account_id, transaction_date=transaction_date, source=source, receipt_image=receipt_image
+    )
+
+async def get_period_summary(user_id, start_date, end_date, top=0, from_replica=False):
+    """Підсумки за період з денних агрегатів (див. db_operations.get_period_summary)"""
+    return await _run_read(ops._get_period_summary, user_id, start_date, end_date, top, from_replica=from_replica)
+
+async def compare_periods(user_id, periods, top=5, from_replica=False):
+    """Підсумки кількох періодів одним запитом (див. db_operations.compare_periods)"""
+    if not periods:
+        return []
+    return await _run_read(ops._compare_periods, user_id, periods, top, from_replica=from_replica)
+
+async def get_transactions(user_id, limit=10, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None, after=None,
+                           from_replica=False):
+    """Отримує список транзакцій з фільтрами (after — keyset-курсор, див. db_operations)"""
+    return await _run_read(
+        ops._get_transactions, user_id, limit=limit, offset=offset, category_id=category_id,
+        transaction_type=transaction_type, start_date=start_date, end_date=end_date, after=after,
+        from_replica=from_replica
+    )
+
+async def get_transaction_rows(user_id, limit=None, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None,
+                               from_replica=False):
+    """Транзакції для читання (TransactionRow), див. db_operations.get_transaction_rows"""
+    return await _run_read(
+        ops._get_transaction_rows, user_id, limit=limit, offset=offset, category_id=category_id,
+        transaction_type=transaction_type, start_date=start_date, end_date=end_date, from_replica=from_replica
+    )
+
+async def get_transaction_frame(user_id, start_date=None, end_date=None):
+    """Транзакції за період як TransactionFrame, див. db_operations.get_transaction_frame"""
+    frame = frame_cache.get(user_id)
+    if frame is None:
+        version = frame_cache.version(user_id)
+        frame = await _run_in_session(ops._load_transaction_frame, user_id)
+        frame_cache.set(user_id, version, frame)
+    return frame.between(start_date, end_date)
+
+async def count_transactions(user_id, category_id=None, transaction_type=None, start_date=None, end_date=None, from_replica=False):
+    """Повертає кількість транзакцій з тими ж фільтрами, що й get_transactions"""
+    return await _run_read(
+        ops._count_transactions, user_id, category_id=category_id, transaction_type=transaction_type,
+        start_date=start_date, end_date=end_date, from_replica=from_replica
+    )
+
+# Alias for backward compatibility
+get_user_transactions = get_transactions
+
+async def get_transaction_by_id(transaction_id, user_id):
+    """Отримує транзакцію за ID (з перевіркою належності користувачу)"""
+    return await _run_in_session(ops._get_transaction_by_id, transaction_id, user_id)
+
+async def update_transaction(transaction_id, user_id, **updates):
+    """Оновлює транзакцію"""
+    return await _run_in_session(ops._update_transaction, transaction_id, user_id, **updates)
+
+async def delete_transaction(transaction_id, user_id):
+    """Видаляє транзакцію"""
+    return await _run_in_session(ops._delete_transaction, transaction_id, user_id)
+
+async def clear_user_transactions(user_id):
+    """Видаляє всі транзакції користувача разом з агрегатами; повертає кількість видалених"""
+    return await _run_in_session(ops._clear_user_transactions, user_id)
+
+async def get_monthly_stats(user_id, year=None, month=None, from_replica=False):
+    """Повертає статистику за місяць"""
+    return await _run_read(ops._get_monthly_stats, user_id, year, month, from_replica=from_replica)
+
+async def bulk_insert_transactions(user_id, rows, account_id=None, chunk_size=None, progress=None):
+    """Масово додає транзакції пачками; після кожної пачки чекає await progress(вставлено, всього)"""
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    prepared = await _run_in_session(ops._prepare_import_rows, user_id, rows, account_id)
+    inserted = 0
+    for start in range(0, len(prepared), chunk_size):
+        inserted += await _run_in_session(ops._insert_transaction_chunk, prepared[start:start + chunk_size])
+        if progress:
+            await progress(inserted, len(prepared))
+    return inserted
+
+# ==================== КАТЕГОРІЇ ====================
+
+async def get_user_categories(user_id, category_type=None):
+    """Отримує список категорій користувача (CategoryRecord, з кешу якщо є)"""
+    records = category_cache.get(user_id)
+    if records is MISSING:
+        records = await _run_in_session(ops._get_user_categories, user_id)
+        category_cache.set(user_id, records)
+    return ops._filter_categories(records, category_type)
+
+async def get_category_by_id(category_id):
+    """Отримує категорію за ID"""
+    return await _run_in_session(ops._get_category_by_id, category_id)
+
+async def get_category_by_name(user_id, category_name):
+    """Отримує категорію за назвою для конкретного користувача"""
+    return await _run_in_session(ops._get_category_by_name, user_id, category_name)
+
+async def create_category(user_id, category_name, category_type=None, icon=None):
+    """Створює нову категорію для користувача"""
+    return await _run_in_session(ops._create_category, user_id, category_name, category_type, icon)
+
+async def create_categories(user_id, categories):
+    """Створює кілька категорій користувача однією транзакцією; categories — (назва, тип, іконка)"""
+    return await _run_in_session(ops._create_categories, user_id, list(categories))
+
+async def rename_category(category_id, user_id, new_name):
+    """Перейменовує категорію користувача; повертає стару назву або None"""
+    return await _run_in_session(ops._rename_category, category_id, user_id, new_name)
+
+async def delete_category(category_id):
+    """Видаляє категорію (транзакції лишаються без категорії); повертає її назву або None"""
+    return await _run_in_session(ops._delete_category, category_id)
+
+# ==================== БЮДЖЕТИ ТА ПОРАДИ ====================
+
+async def create_or_update_budget(user_id, name, total_budget, start_date, end_date, category_budgets=None):
+    """Створює або оновлює бюджетний план"""
+    return await _run_in_session(
+        ops._create_or_update_budget, user_id, name, total_budget, start_date, end_date,
+        category_budgets=category_budgets
+    )
+
+async def save_financial_advice(user_id, advice_text, category):
+    """Зберігає надану фінансову пораду в базу даних"""
+    return await _run_in_session(ops._save_financial_advice, user_id, advice_text, category)
+
+# ==================== РАХУНКИ ====================
+
+async def create_account(user_id, name, account_type, balance=0.0, currency='UAH', is_main=False, icon=None, description=None):
+    """Створює новий рахунок для користувача"""
+    if balance < 0:
+        raise ValueError("Баланс не може бути від'ємним")
+
+    return await _run_in_session(
+        ops._create_account, user_id, name, account_type, balance=balance, currency=currency,
+        is_main=is_main, icon=icon, description=description
+    )
+
+async def get_user_accounts(user_id, include_inactive=False):
+    """Отримує список рахунків користувача"""
+    return await _run_in_session(ops._get_user_accounts, user_id, include_inactive)
+
+async def get_account_by_id(account_id):
+    """Отримує рахунок за ID"""
+    return await _run_in_session(ops._get_account_by_id, account_id)
+
+async def get_main_account(user_id):
+    """Отримує головний рахунок користувача"""
+    return await _run_in_session(ops._get_main_account, user_id)
+
+async def get_user_main_account_id(user_id):
+    """Отримує ID головного рахунку користувача"""
+    return await _run_in_session(ops._get_user_main_account_id, user_id)
+
+async def update_account_balance(account_id, new_balance):
+    """Оновлює баланс рахунку"""
+    return await _run_in_session(ops._update_account_balance, account_id, new_balance)
+
+async def adjust_account_balance(account_id, amount):
+    """Змінює баланс рахунку на amount (від'ємне значення — списання)"""
+    return await _run_in_session(ops._adjust_account_balance, account_id, amount)
+
+async def get_total_balance(user_id):
+    """Отримує загальний баланс всіх активних рахунків користувача"""
+    return await _run_in_session(ops._get_total_balance, user_id)
+
+async def get_accounts_count(user_id, include_inactive=False):
+    """Отримує кількість рахунків користувача"""
+    return await _run_in_session(ops._get_accounts_count, user_id, include_inactive)
+
+async def transfer_between_accounts(from_account_id, to_account_id, amount, description="Переказ між рахунками"):
+    """Здійснює переказ між рахунками"""
+    if amount <= 0:
+        return False, "Сума повинна бути більше нуля"
+
+    return await _run_in_session(ops._transfer_between_accounts, from_account_id, to_account_id, amount, description)
+
+async def get_accounts_statistics(user_id, from_replica=False):
+    """Отримує статистику по рахунках"""
+    return await _run_read(ops._get_accounts_statistics, user_id, from_replica=from_replica)
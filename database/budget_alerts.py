@@ -0,0 +1,167 @@
+"""
+Лічильники витрат бюджетів категорій і сповіщення про пороги.
+
+CategoryBudget.spent_amount — сума витрат категорії за період плану. Вона
+змінюється в тій самій транзакції БД, що й самі транзакції: слухач агрегатів
+(database/rollup.py) і масовий імпорт передають сюди ті самі зміни
+{ключ: [сума, кількість]}, тож на один запис припадає один SELECT бюджетів
+і один пакетний UPDATE незалежно від історії користувача.
+
+CategoryBudget.alert_level — найвищий уже досягнутий поріг (0, 80 або 100 %).
+Коли запис піднімає лічильник через поріг поточного плану, сповіщення
+чекає коміту і потрапляє в буфер процесу; бот забирає його через
+take_pending_alerts і надсилає користувачу (якщо надіслати не вдалося —
+повертає через restore_pending_alerts). Відкат транзакції сповіщень
+не лишає. Повернення нижче порогу знижує рівень без сповіщення.
+
+Нові бюджети категорій і змінені дати плану перераховуються з денних
+агрегатів (recount_budget_spending) також без сповіщень.
+"""
+
+import threading
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, func, select, update, case, bindparam, Date
+from sqlalchemy.orm import Session as OrmSession
+
+from database.models import (
+    BudgetPlan, CategoryBudget, Category, TransactionDailyRollup, TransactionType
+)
+
+# Пороги використання бюджету категорії, %
+ALERT_LEVELS = (80, 100)
+
+BudgetAlert = namedtuple('BudgetAlert', [
+    'user_id', 'category_id', 'category_name', 'category_icon', 'level', 'spent', 'allocated'
+])
+
+_pending = []
+_lock = threading.Lock()
+
+def _alert_level(spent, allocated):
+    """Найвищий досягнутий поріг для суми витрат"""
+    if not allocated or allocated <= 0:
+        return 0
+    for level in reversed(ALERT_LEVELS):
+        if spent >= allocated * level / 100:
+            return level
+    return 0
+
+def _is_expense(transaction_type):
+    return transaction_type in (TransactionType.EXPENSE, TransactionType.EXPENSE.value)
+
+def _plan_day(column):
+    return func.date(column, type_=Date)
+
+def apply_budget_deltas(session, deltas):
+    """Переносить зміни агрегатів {ключ: [сума, кількість]} у лічильники бюджетів категорій"""
+    spending = defaultdict(list)
+    for (user_id, day, transaction_type, category_id, _), (total, _) in deltas.items():
+        if category_id is not None and total and _is_expense(transaction_type):
+            spending[(user_id, category_id)].append((day, total))
+    if not spending:
+        return
+
+    days = [day for changes in spending.values() for day, _ in changes]
+    P, CB = BudgetPlan, CategoryBudget
+    connection = session.connection()
+    rows = connection.execute(
+        select(CB.id, CB.category_id, CB.allocated_amount, CB.spent_amount, CB.alert_level,
+               P.user_id, _plan_day(P.start_date).label('first_day'), _plan_day(P.end_date).label('last_day'),
+               Category.name, Category.icon)
+        .join(P, CB.budget_plan_id == P.id)
+        .outerjoin(Category, CB.category_id == Category.id)
+        .where(P.user_id.in_({key[0] for key in spending}),
+               CB.category_id.in_({key[1] for key in spending}),
+               _plan_day(P.start_date) <= max(days),
+               _plan_day(P.end_date) >= min(days))
+    ).all()
+
+    today = datetime.utcnow().date()
+    updates, alerts = [], []
+    for row in rows:
+        delta = sum(total for day, total in spending[(row.user_id, row.category_id)]
+                    if row.first_day <= day <= row.last_day)
+        if not delta:
+            continue
+        spent = (row.spent_amount or 0.0) + delta
+        level = _alert_level(spent, row.allocated_amount)
+        updates.append({'target_id': row.id, 'delta': delta, 'level': level})
+        # Сповіщаємо лише про поточний план і лише при переході через поріг вгору
+        if level > (row.alert_level or 0) and row.first_day <= today <= row.last_day:
+            alerts.append(BudgetAlert(row.user_id, row.category_id, row.name, row.icon,
+                                      level, spent, row.allocated_amount))
+
+    if updates:
+        connection.execute(
+            update(CB).where(CB.id == bindparam('target_id')).values(
+                spent_amount=CB.spent_amount + bindparam('delta'), alert_level=bindparam('level')
+            ),
+            updates
+        )
+    if alerts:
+        session.info.setdefault('budget_alerts', []).extend(alerts)
+
+def recount_budget_spending(connection, plan_ids=None):
+    """Перераховує лічильники бюджетів категорій з денних агрегатів (для всіх або вказаних планів)"""
+    R, P, CB = TransactionDailyRollup, BudgetPlan, CategoryBudget
+    spent = select(func.coalesce(func.sum(R.total), 0.0))\
+        .where(P.id == CB.budget_plan_id,
+               R.user_id == P.user_id,
+               R.category_id == CB.category_id,
+               R.type == TransactionType.EXPENSE,
+               R.day >= _plan_day(P.start_date),
+               R.day <= _plan_day(P.end_date))\
+        .scalar_subquery()
+    level = case(
+        *((CB.spent_amount >= CB.allocated_amount * threshold / 100, threshold)
+          for threshold in reversed(ALERT_LEVELS)),
+        else_=0
+    )
+
+    statements = [update(CB).values(spent_amount=spent),
+                  update(CB).values(alert_level=case((CB.allocated_amount > 0, level), else_=0))]
+    for statement in statements:
+        if plan_ids is not None:
+            statement = statement.where(CB.budget_plan_id.in_(plan_ids))
+        connection.execute(statement)
+
+def take_pending_alerts():
+    """Забирає закомічені сповіщення про пороги, очищаючи буфер"""
+    global _pending
+    with _lock:
+        alerts, _pending = _pending, []
+    return alerts
+
+def restore_pending_alerts(alerts):
+    """Повертає не надіслані сповіщення в буфер (після помилки надсилання)"""
+    if alerts:
+        with _lock:
+            _pending[:0] = alerts
+
+# ==================== СЛУХАЧІ СЕСІЇ ====================
+
+@event.listens_for(OrmSession, 'after_flush')
+def _recount_changed_budgets(session, flush_context):
+    plan_ids = set()
+    for obj in list(session.new) + list(session.dirty):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, CategoryBudget) and obj.budget_plan_id is not None:
+            plan_ids.add(obj.budget_plan_id)
+        elif isinstance(obj, BudgetPlan) and obj.id is not None:
+            plan_ids.add(obj.id)
+    if plan_ids:
+        recount_budget_spending(session.connection(), plan_ids)
+
+@event.listens_for(OrmSession, 'after_commit')
+def _queue_budget_alerts(session):
+    alerts = session.info.pop('budget_alerts', None)
+    if alerts:
+        with _lock:
+            _pending.extend(alerts)
+
+@event.listens_for(OrmSession, 'after_rollback')
+def _discard_budget_alerts(session):
+    session.info.pop('budget_alerts', None)
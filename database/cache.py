@@ -0,0 +1,139 @@
+"""
+Кеш користувачів і категорій у пам'яті процесу.
+
+get_user / get_or_create_user кешуються за telegram_id, get_user_categories —
+за user_id. Записи мають TTL і обмежену кількість (LRU), а замість
+від'єднаних ORM-об'єктів повертаються незмінні легкі записи (namedtuple).
+
+Інвалідація прив'язана до сесії: будь-який commit, що змінює, додає або
+видаляє User чи Category (update_user_settings, create_category, перейменування
+та видалення категорій у налаштуваннях, зміна валюти, майстер налаштування),
+скидає відповідні ключі одразу після фіксації транзакції.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm.attributes import get_history
+
+from database.config import CACHE_TTL, CACHE_MAX_SIZE
+from database.models import User, Category
+
+# Поля записів збігаються з колонками таблиць
+UserRecord = namedtuple('UserRecord', [column.key for column in User.__table__.columns])
+CategoryRecord = namedtuple('CategoryRecord', [column.key for column in Category.__table__.columns])
+
+MISSING = object()
+
+class TTLCache:
+    """Потокобезпечний LRU-кеш з обмеженим часом життя записів"""
+
+    def __init__(self, name, maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 3) if total else 0.0
+            }
+
+user_cache = TTLCache('users')
+category_cache = TTLCache('categories')
+
+def user_record(user):
+    """Незмінний запис користувача (None, якщо користувача немає)"""
+    if user is None:
+        return None
+    return UserRecord(*(getattr(user, field) for field in UserRecord._fields))
+
+def category_records(categories):
+    return tuple(CategoryRecord(*(getattr(c, field) for field in CategoryRecord._fields)) for c in categories)
+
+def clear_caches():
+    """Очищає всі кеші (тести, ручне скидання)"""
+    from database.frame_cache import frame_cache
+    user_cache.clear()
+    category_cache.clear()
+    frame_cache.clear()
+
+def get_cache_stats():
+    """Лічильники влучань/промахів для /metrics"""
+    from database.frame_cache import frame_cache
+    stats = {cache.name: cache.stats() for cache in (user_cache, category_cache)}
+    stats['transaction_frames'] = frame_cache.stats()
+    return stats
+
+# ==================== ІНВАЛІДАЦІЯ ====================
+
+def _values(obj, attr):
+    """Поточне і попереднє значення атрибута (ключ міг змінитись у цьому flush)"""
+    history = get_history(obj, attr)
+    values = set(history.added) | set(history.deleted) | set(history.unchanged)
+    values.add(getattr(obj, attr, None))
+    values.discard(None)
+    return values
+
+@event.listens_for(OrmSession, 'after_flush')
+def _collect_invalidations(session, flush_context):
+    users, category_owners = session.info.setdefault('cache_invalidations', (set(), set()))
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            users.update(_values(obj, 'telegram_id'))
+        elif isinstance(obj, Category):
+            category_owners.update(_values(obj, 'user_id'))
+
+@event.listens_for(OrmSession, 'after_commit')
+def _apply_invalidations(session):
+    users, category_owners = session.info.pop('cache_invalidations', (set(), set()))
+    for telegram_id in users:
+        user_cache.invalidate(telegram_id)
+    for user_id in category_owners:
+        category_cache.invalidate(user_id)
+
+@event.listens_for(OrmSession, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('cache_invalidations', None)
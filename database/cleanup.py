@@ -1,6 +1,7 @@
 """
 Функції для очищення бази даних під час розробки
 """
+from sqlalchemy import inspect
 from sqlalchemy.sql import text
 from database.session import engine
 from database.models import Base
@@ -19,9 +20,16 @@ def clear_all_tables():
     with conn.begin() as transaction:
         try:
             # Перевіряємо, чи існують таблиці перед очищенням
-            inspector = engine.dialect.inspector(engine)
+            inspector = inspect(conn)
             existing_tables = inspector.get_table_names()
             
+            # TRUNCATE ... CASCADE та послідовності є лише в PostgreSQL
+            if conn.dialect.name != 'postgresql':
+                _delete_all_rows(conn, existing_tables)
+                transaction.commit()
+                logger.info("База даних успішно очищена.")
+                return
+            
             # Вимикаємо перевірку обмежень зовнішніх ключів
             conn.execute(text("BEGIN;"))
             
@@ -60,11 +68,23 @@ def clear_all_tables():
             logger.info("База даних успішно очищена.")
         except Exception as e:
             logger.error(f"Помилка при очищенні бази даних: {e}")
-            conn.execute(text("ROLLBACK;"))
+            transaction.rollback()
             raise
         finally:
             conn.close()
 
+def _delete_all_rows(conn, existing_tables):
+    """Очищення для SQLite: DELETE від залежних таблиць до батьківських, стандартні категорії лишаються"""
+    for table in reversed(Base.metadata.sorted_tables):
+        if table.name not in existing_tables:
+            continue
+        if table.name == 'categories':
+            conn.execute(text("DELETE FROM categories WHERE is_default = FALSE OR user_id IS NOT NULL;"))
+        else:
+            conn.execute(table.delete())
+    if 'sqlite_sequence' in existing_tables:
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name != 'categories';"))
+
 def reset_database():
     """
     Повне очищення і перестворення бази даних.
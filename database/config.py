@@ -8,6 +8,15 @@ load_dotenv()
 # Спочатку перевіряємо чи є DATABASE_URL (для Render/Heroku)
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Профіль SQLite без зовнішнього сервера (бенчмарки, навантажувальні тести, CI):
+# SQLITE_PATH=finassist.db — файл, SQLITE_PATH=:memory: — база в пам'яті процесу
+SQLITE_PATH = os.getenv('SQLITE_PATH')
+# Скільки секунд з'єднання SQLite чекає на блокування запису іншим з'єднанням
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 30))
+
+if not DATABASE_URL and SQLITE_PATH:
+    DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
+
 if not DATABASE_URL:
     # Якщо DATABASE_URL не встановлено, будуємо з окремих параметрів
     DB_USER = os.getenv('DB_USER', 'abobina')
@@ -17,6 +26,49 @@ if not DATABASE_URL:
     DB_NAME = os.getenv('DB_NAME', 'finance_bot')
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Необов'язкова репліка для читань аналітики, звітів та експорту (database/replica.py).
+# Репліка використовується, поки відстає не більше ніж на READ_REPLICA_MAX_LAG секунд;
+# після помилки читання READ_REPLICA_RETRY_INTERVAL секунд ідуть на основну БД
+READ_DATABASE_URL = os.getenv('READ_DATABASE_URL')
+READ_REPLICA_MAX_LAG = float(os.getenv('READ_REPLICA_MAX_LAG', 30))
+READ_REPLICA_RETRY_INTERVAL = float(os.getenv('READ_REPLICA_RETRY_INTERVAL', 30))
+
+# Налаштування пулу з'єднань (спільний для всього процесу, див. database/engine.py)
+# Сумарно процес тримає до DB_POOL_SIZE + DB_MAX_OVERFLOW з'єднань на кожен пул
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 300))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+# Розмір пачки при масовому імпорті транзакцій (bulk_insert_transactions)
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 500))
+
+# Як часто (секунди) буфер User.last_active записується в БД (database/activity.py)
+LAST_ACTIVE_FLUSH_INTERVAL = float(os.getenv('LAST_ACTIVE_FLUSH_INTERVAL', 60))
+
+# Як часто (секунди) бот надсилає сповіщення про пороги бюджетів категорій (database/budget_alerts.py)
+BUDGET_ALERT_INTERVAL = float(os.getenv('BUDGET_ALERT_INTERVAL', 10))
+
+# Кеш користувачів і категорій у пам'яті процесу (database/cache.py)
+CACHE_TTL = float(os.getenv('CACHE_TTL', 60))
+CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', 1024))
+
+# Колонковий кеш транзакцій для аналітики (database/frame_cache.py): сумарний розмір масивів у байтах
+FRAME_CACHE_MAX_BYTES = int(os.getenv('FRAME_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+# Запити, довші за SLOW_QUERY_MS мілісекунд, пишуться в лог (database/query_stats.py)
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+
+# Секціонування transactions за місяцями, лише PostgreSQL (database/partitions.py)
+TRANSACTIONS_PARTITIONING = os.getenv('TRANSACTIONS_PARTITIONING', 'false').lower() == 'true'
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+
+# Архів старих транзакцій (database/archive.py): транзакції, старші за
+# ARCHIVE_AFTER_DAYS днів, переносяться у файли в ARCHIVE_DIR; 0 — архівація вимкнена
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 0))
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+
 # Налаштування Telegram бота
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 
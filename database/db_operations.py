@@ -1,94 +1,177 @@
-from database.models import Session, User, Category, Transaction, BudgetPlan, CategoryBudget, FinancialAdvice, TransactionType, Account, AccountType
-from sqlalchemy import func
+from database.models import Session, User, Category, Transaction, BudgetPlan, CategoryBudget, FinancialAdvice, TransactionType, Account, AccountType, TransactionDailyRollup
+from sqlalchemy import func, tuple_, case, and_, true, insert, update, select, literal, union_all, Date
+from sqlalchemy.orm import aliased
+from database.config import IMPORT_CHUNK_SIZE
+from database.rollup import apply_rollup_deltas, rollup_deltas_for_rows
+from database.budget_alerts import apply_budget_deltas, recount_budget_spending
+from database import archive, replica
+from database.frame_cache import TransactionFrame, frame_cache
+from database.activity import touch_user, take_pending, restore_pending
+from database.cache import user_cache, category_cache, user_record, category_records, MISSING
+from database.unit_of_work import session_scope, commit_session
 from datetime import datetime, timedelta
 import calendar
 import logging
+from collections import namedtuple
 
 logger = logging.getLogger(__name__)
 
-def get_or_create_user(telegram_id, username=None, first_name=None, last_name=None):
-    """Отримує або створює запис користувача в базі даних"""
-    session = Session()
+# Кожна операція складається з двох частин:
+#   _operation(session, ...) — сама робота з БД в межах переданої сесії;
+#   operation(...)           — синхронна обгортка, що бере сесію поточного
+#                              оновлення (database.unit_of_work) або відкриває власну.
+#                              Операції лише для читання йдуть через _run_read; з
+#                              from_replica=True (аналітика, звіти) — на репліці.
+# Асинхронні версії (database.async_db_operations) виконують ті ж _operation
+# через AsyncSession.run_sync, тож логіка запитів існує в одному місці.
+
+def _run_in_session(operation, *args, **kwargs):
+    """Виконує operation(session, ...) у сесії оновлення або в новій сесії, яку потім закриває.
+
+    В оновленні зміни операції фіксує (або при помилці відкочує) UnitOfWork.
+    """
+    with session_scope(Session) as session:
+        return operation(session, *args, **kwargs)
+
+def _run_read(operation, *args, from_replica=False, **kwargs):
+    """Як _run_in_session; з from_replica=True читає з репліки, якщо вона є (database/replica.py)"""
+    return replica.run_read(operation, _run_in_session, *args, from_replica=from_replica, **kwargs)
+
+# Дефолтні категорії під час роботи не змінюються, тож читаються один раз
+# (load_default_categories при старті) і далі копіюються новим користувачам з пам'яті
+_default_categories = None
+
+def _load_default_categories(session):
+    global _default_categories
+    _default_categories = tuple(
+        session.query(Category.name, Category.type, Category.icon)
+        .filter(Category.is_default == True).order_by(Category.id).all()
+    )
+    return _default_categories
+
+def load_default_categories():
+    """Завантажує набір дефолтних категорій у пам'ять (викликається при старті)"""
+    return _run_in_session(_load_default_categories)
+
+def _create_user(session, telegram_id, username=None, first_name=None, last_name=None):
+    """Новий користувач з копією дефолтних категорій в одній транзакції:
+    INSERT користувача і один багаторядковий INSERT категорій"""
+    user = User(telegram_id=telegram_id, username=username, first_name=first_name, last_name=last_name)
+    session.add(user)
+    session.flush()
+
+    defaults = _default_categories if _default_categories is not None else _load_default_categories(session)
+    categories = ()
+    if defaults:
+        categories = session.scalars(
+            insert(Category).returning(Category),
+            [
+                {'user_id': user.id, 'name': name, 'type': category_type, 'icon': icon, 'is_default': False}
+                for name, category_type, icon in defaults
+            ]
+        ).all()
+
+    record, categories = user_record(user), category_records(categories)
+    commit_session(session)
+    # Категорії нового користувача вже відомі — наступний get_user_categories їх не читає
+    category_cache.set(record.id, categories)
+    return record
+
+def _get_or_create_user(session, telegram_id, username=None, first_name=None, last_name=None):
     user = session.query(User).filter(User.telegram_id == telegram_id).first()
-    
+
     if not user:
-        user = User(
-            telegram_id=telegram_id,
-            username=username,
-            first_name=first_name,
-            last_name=last_name
-        )
-        session.add(user)
-        session.commit()
-        
-        # Копіюємо дефолтні категорії для нового користувача
-        default_categories = session.query(Category).filter(Category.is_default == True).all()
-        for default_cat in default_categories:
-            user_cat = Category(
-                user_id=user.id,
-                name=default_cat.name,
-                type=default_cat.type,
-                icon=default_cat.icon,
-                is_default=False
-            )
-            session.add(user_cat)
-        session.commit()
-    else:
-        # Оновлюємо останню активність
-        user.last_active = datetime.utcnow()
-        session.commit()
-        
-    session.refresh(user)
-    session.close()
-    return user
+        return _create_user(session, telegram_id, username, first_name, last_name)
 
-def update_user_settings(telegram_id, **settings):
-    """Оновлення налаштувань користувача"""
-    session = Session()
+    # Остання активність пишеться відкладено пакетом (database/activity.py),
+    # тож для наявного користувача це лише читання
+    touch_user(user.id)
+    return user_record(user)
+
+def get_or_create_user(telegram_id, username=None, first_name=None, last_name=None):
+    """Отримує або створює запис користувача в базі даних (UserRecord, з кешу якщо є)"""
+    record = user_cache.get(telegram_id)
+    if record is not MISSING and record is not None:
+        touch_user(record.id)
+        return record
+    record = _run_in_session(_get_or_create_user, telegram_id, username, first_name, last_name)
+    user_cache.set(telegram_id, record)
+    return record
+
+def _flush_last_active(session, pending):
+    # Один UPDATE за первинним ключем, виконаний як executemany
+    session.execute(
+        update(User),
+        [{'id': user_id, 'last_active': when} for user_id, when in pending.items()]
+    )
+    commit_session(session)
+    return len(pending)
+
+def flush_last_active():
+    """Записує накопичені значення last_active одним пакетним UPDATE"""
+    pending = take_pending()
+    if not pending:
+        return 0
+    try:
+        return _run_in_session(_flush_last_active, pending)
+    except Exception:
+        restore_pending(pending)
+        raise
+
+def _get_alert_recipients(session, user_ids):
+    rows = session.query(User.id, User.telegram_id)\
+        .filter(User.id.in_(user_ids), User.notification_enabled.isnot(False))\
+        .all()
+    return {user_id: telegram_id for user_id, telegram_id in rows}
+
+def get_alert_recipients(user_ids):
+    """telegram_id користувачів з увімкненими сповіщеннями: {user_id: telegram_id}"""
+    return _run_in_session(_get_alert_recipients, list(user_ids))
+
+def _update_user_settings(session, telegram_id, **settings):
     user = session.query(User).filter(User.telegram_id == telegram_id).first()
-    
+
     if not user:
-        session.close()
         return None
-    
+
     # Оновлюємо доступні налаштування
     if 'initial_balance' in settings:
         user.initial_balance = settings['initial_balance']
-    
+
     if 'currency' in settings:
         user.currency = settings['currency']
-    
+
     if 'monthly_budget' in settings:
         user.monthly_budget = settings['monthly_budget']
-    
+
     if 'notification_enabled' in settings:
         user.notification_enabled = settings['notification_enabled']
-    
+
     if 'setup_step' in settings:
         user.setup_step = settings['setup_step']
-    
+
     if 'is_setup_completed' in settings:
         user.is_setup_completed = settings['is_setup_completed']
-    
+
     user.last_active = datetime.utcnow()
-    
-    session.commit()
+
+    commit_session(session)
     session.refresh(user)
-    session.close()
-    
-    return user
 
-def add_transaction(user_id, amount, description, category_id, transaction_type, account_id=None, transaction_date=None, source="manual", receipt_image=None):
-    """Додає нову транзакцію до бази даних"""
-    session = Session()
-    
+    return user_record(user)
+
+def update_user_settings(telegram_id, **settings):
+    """Оновлення налаштувань користувача"""
+    return _run_in_session(_update_user_settings, telegram_id, **settings)
+
+def _add_transaction(session, user_id, amount, description, category_id, transaction_type, account_id=None, transaction_date=None, source="manual", receipt_image=None):
     if transaction_date is None:
         transaction_date = datetime.utcnow()
-    
+
     # Якщо account_id не вказано, використовуємо головний рахунок користувача
     if account_id is None:
-        account_id = get_user_main_account_id(user_id)
-    
+        account_id = _get_user_main_account_id(session, user_id)
+
     transaction = Transaction(
         user_id=user_id,
         category_id=category_id,
@@ -100,74 +183,153 @@ def add_transaction(user_id, amount, description, category_id, transaction_type,
         source=source,
         receipt_image=receipt_image
     )
-    
+
     session.add(transaction)
-    session.commit()
+    commit_session(session)
     session.refresh(transaction)
-    session.close()
-    
+
     return transaction
 
+def add_transaction(user_id, amount, description, category_id, transaction_type, account_id=None, transaction_date=None, source="manual", receipt_image=None):
+    """Додає нову транзакцію до бази даних"""
+    return _run_in_session(
+        _add_transaction, user_id, amount, description, category_id, transaction_type,
+        account_id=account_id, transaction_date=transaction_date, source=source, receipt_image=receipt_image
+    )
+
+def _prepare_import_rows(session, user_id, rows, account_id=None):
+    # Рахунок і категорії резолвимо один раз на весь імпорт, а не на кожен рядок
+    if account_id is None:
+        account_id = _get_user_main_account_id(session, user_id)
+
+    categories = {
+        (name.lower(), category_type): category_id
+        for category_id, name, category_type in session.query(Category.id, Category.name, Category.type)
+            .filter(Category.user_id == user_id)
+    }
+
+    now = datetime.utcnow()
+    prepared = []
+    for row in rows:
+        transaction_type = row['type']
+        if isinstance(transaction_type, str):
+            transaction_type = TransactionType(transaction_type)
+
+        category_id = row.get('category_id')
+        if category_id is None and row.get('category_name'):
+            category_id = categories.get((row['category_name'].lower(), transaction_type.value))
+
+        transaction_date = row.get('transaction_date') or now
+        if not isinstance(transaction_date, datetime):
+            transaction_date = datetime.combine(transaction_date, datetime.min.time())
+
+        prepared.append({
+            'user_id': user_id,
+            'account_id': row.get('account_id', account_id),
+            'category_id': category_id,
+            'amount': row['amount'],
+            'description': row.get('description'),
+            'transaction_date': transaction_date,
+            'created_at': now,
+            'type': transaction_type,
+            'source': row.get('source', 'import'),
+        })
+    return prepared
+
+def _insert_transaction_chunk(session, chunk):
+    # executemany одним INSERT на пачку (на PostgreSQL — insertmanyvalues) без ORM-об'єктів;
+    # денні агрегати та лічильники бюджетів оновлюються в тій самій транзакції
+    session.execute(insert(Transaction), chunk)
+    deltas = rollup_deltas_for_rows(chunk)
+    apply_rollup_deltas(session.connection(), deltas)
+    apply_budget_deltas(session, deltas)
+    commit_session(session)
+    return len(chunk)
+
+def bulk_insert_transactions(user_id, rows, account_id=None, chunk_size=None, progress=None):
+    """Масово додає транзакції (імпорт виписок) пачками по chunk_size рядків.
+
+    rows — словники з amount, type, description, transaction_date та category_id
+    або category_name. Кожна пачка комітиться окремо; після неї викликається
+    progress(вставлено, всього). Повертає кількість вставлених транзакцій.
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    prepared = _run_in_session(_prepare_import_rows, user_id, rows, account_id)
+    inserted = 0
+    for start in range(0, len(prepared), chunk_size):
+        inserted += _run_in_session(_insert_transaction_chunk, prepared[start:start + chunk_size])
+        if progress:
+            progress(inserted, len(prepared))
+    return inserted
+
+def _get_user_categories(session, user_id):
+    # Завжди вантажимо всі категорії користувача: кешується повний список,
+    # а фільтр за типом застосовується вже до записів у пам'яті
+    return category_records(session.query(Category).filter(Category.user_id == user_id).all())
+
+def _filter_categories(records, category_type=None):
+    return [category for category in records if not category_type or category.type == category_type]
+
 def get_user_categories(user_id, category_type=None):
-    """Отримує список категорій користувача"""
-    session = Session()
-    query = session.query(Category).filter(Category.user_id == user_id)
-    
-    if category_type:
-        query = query.filter(Category.type == category_type)
-        
-    categories = query.all()
-    session.close()
-    return categories
-
-def get_monthly_stats(user_id, year=None, month=None):
-    """Повертає статистику за місяць"""
-    session = Session()
-    
+    """Отримує список категорій користувача (CategoryRecord, з кешу якщо є)"""
+    records = category_cache.get(user_id)
+    if records is MISSING:
+        records = _run_in_session(_get_user_categories, user_id)
+        category_cache.set(user_id, records)
+    return _filter_categories(records, category_type)
+
+def _signed_sums():
+    """Умовні суми витрат і доходів для агрегації за один прохід по транзакціях"""
+    expense_amount = case((Transaction.type == TransactionType.EXPENSE, Transaction.amount), else_=0)
+    income_amount = case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=0)
+    return func.sum(expense_amount), func.sum(income_amount)
+
+def _get_monthly_stats(session, user_id, year=None, month=None):
     if year is None or month is None:
         now = datetime.utcnow()
         year = now.year
         month = now.month
-        
+
     # Отримуємо початок і кінець місяця
     start_date = datetime(year, month, 1)
     last_day = calendar.monthrange(year, month)[1]
     end_date = datetime(year, month, last_day, 23, 59, 59)
-    
-    # Отримуємо суму витрат за місяць
-    expenses = session.query(func.sum(Transaction.amount))\
-        .filter(Transaction.user_id == user_id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.transaction_date.between(start_date, end_date))\
-        .scalar() or 0
-    
-    # Отримуємо суму доходів за місяць
-    income = session.query(func.sum(Transaction.amount))\
-        .filter(Transaction.user_id == user_id,
-                Transaction.type == TransactionType.INCOME,
-                Transaction.transaction_date.between(start_date, end_date))\
-        .scalar() or 0
-    
-    # Отримуємо топ категорій витрат
-    top_categories_query = session.query(
-            Category.name, 
-            Category.icon,
-            func.sum(Transaction.amount).label('total')
+
+    # Один запит: суми по категоріях, загальні суми через віконні функції
+    # та позиція категорії в топі витрат
+    expense_sum, income_sum = _signed_sums()
+    # Категорії без назви (транзакції без категорії) або без витрат у топ не потрапляють
+    not_ranked = case((and_(Category.name.isnot(None), expense_sum > 0), 0), else_=1)
+
+    per_category = session.query(
+            Category.name.label('name'),
+            Category.icon.label('icon'),
+            expense_sum.label('total'),
+            func.sum(expense_sum).over().label('expenses'),
+            func.sum(income_sum).over().label('income'),
+            func.row_number().over(order_by=(not_ranked, expense_sum.desc())).label('position'),
         )\
-        .join(Transaction, Transaction.category_id == Category.id)\
+        .select_from(Transaction)\
+        .outerjoin(Category, Transaction.category_id == Category.id)\
         .filter(Transaction.user_id == user_id,
-                Transaction.type == TransactionType.EXPENSE,
                 Transaction.transaction_date.between(start_date, end_date))\
         .group_by(Category.name, Category.icon)\
-        .order_by(func.sum(Transaction.amount).desc())\
-        .limit(5)\
+        .subquery()
+
+    rows = session.query(per_category)\
+        .filter(per_category.c.position <= 5)\
+        .order_by(per_category.c.position)\
         .all()
-    
+
+    expenses = (rows[0].expenses if rows else 0) or 0
+    income = (rows[0].income if rows else 0) or 0
+
     # Конвертуємо результати в прості кортежі, щоб уникнути проблем з сесіями
-    top_categories = [(cat.name, cat.icon, cat.total) for cat in top_categories_query]
-    
-    session.close()
-    
+    top_categories = [
+        (row.name, row.icon, row.total) for row in rows
+        if row.name is not None and row.total
+    ]
+
     return {
         'expenses': expenses,
         'income': income,
@@ -177,32 +339,235 @@ def get_monthly_stats(user_id, year=None, month=None):
         'month': month
     }
 
-def get_transactions(user_id, limit=10, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None):
-    """Отримує список транзакцій з фільтрами"""
-    from sqlalchemy.orm import joinedload
-    
-    session = Session()
-    query = session.query(Transaction)\
-        .options(joinedload(Transaction.category))\
-        .filter(Transaction.user_id == user_id)
-    
+def get_monthly_stats(user_id, year=None, month=None, from_replica=False):
+    """Повертає статистику за місяць"""
+    return _run_read(_get_monthly_stats, user_id, year, month, from_replica=from_replica)
+
+def _get_period_summary(session, user_id, start_date, end_date, top=0):
+    R = TransactionDailyRollup
+    rows = session.query(
+            R.type,
+            Category.name,
+            Category.icon,
+            func.sum(R.total).label('total'),
+            func.sum(R.count).label('count'),
+        )\
+        .outerjoin(Category, R.category_id == Category.id)\
+        .filter(R.user_id == user_id,
+                R.day >= start_date.date(),
+                R.day <= end_date.date())\
+        .group_by(R.type, Category.name, Category.icon)\
+        .all()
+
+    income = sum(row.total or 0 for row in rows if row.type == TransactionType.INCOME)
+    expenses = sum(row.total or 0 for row in rows if row.type == TransactionType.EXPENSE)
+
+    expense_categories = [
+        {'name': row.name, 'icon': row.icon, 'amount': row.total, 'count': row.count}
+        for row in rows
+        if row.type == TransactionType.EXPENSE and row.name is not None and row.count > 0
+    ]
+    expense_categories.sort(key=lambda c: c['amount'], reverse=True)
+
+    summary = {
+        'income': income,
+        'expenses': expenses,
+        'balance': income - expenses,
+        'transactions_count': sum(row.count or 0 for row in rows),
+        'expense_categories': expense_categories
+    }
+    if top:
+        summary.update(_get_period_top(session, user_id, start_date, end_date, top))
+    return summary
+
+def _get_period_top(session, user_id, start_date, end_date, top):
+    # Ті самі цілі дні, що й у денних агрегатах
+    start = datetime.combine(start_date.date(), datetime.min.time())
+    end = datetime.combine(end_date.date() + timedelta(days=1), datetime.min.time())
+
+    # Найбільші операції кожного типу одним запитом: позиція в межах типу за сумою
+    position = func.row_number().over(
+        partition_by=Transaction.type,
+        order_by=(Transaction.amount.desc(), Transaction.id.desc())
+    ).label('position')
+    ranked = session.query(
+            Transaction.id,
+            Transaction.transaction_date,
+            Transaction.amount,
+            Transaction.type,
+            Transaction.category_id,
+            Category.name.label('category_name'),
+            Category.icon.label('category_icon'),
+            Transaction.description,
+            Transaction.account_id,
+            Transaction.source,
+            position,
+        )\
+        .outerjoin(Category, Transaction.category_id == Category.id)\
+        .filter(Transaction.user_id == user_id,
+                Transaction.transaction_date >= start,
+                Transaction.transaction_date < end)\
+        .subquery()
+    columns = [ranked.c[name] for name in TransactionRow._fields]
+    rows = [
+        TransactionRow._make(row) for row in
+        session.query(*columns).filter(ranked.c.position <= top).order_by(ranked.c.amount.desc(), ranked.c.id.desc())
+    ]
+
+    if archive.reaches_archive(user_id, start):
+        archived = []
+        for transaction_type in (TransactionType.EXPENSE, TransactionType.INCOME):
+            candidates = [
+                row for row in archive.read_archived(user_id, None, transaction_type, start, end)
+                if row.transaction_date < end
+            ]
+            archived.extend(sorted(candidates, key=lambda row: (row.amount, row.id), reverse=True)[:top])
+        rows = archive.merge_newest_first(rows, _archived_transaction_rows(session, archived))
+        rows.sort(key=lambda row: (row.amount, row.id), reverse=True)
+
+    # Найактивніші дні — з денних агрегатів (архівація їх не змінює)
+    R = TransactionDailyRollup
+    day_count = func.sum(R.count)
+    busiest_days = session.query(R.day, day_count)\
+        .filter(R.user_id == user_id,
+                R.day >= start_date.date(),
+                R.day <= end_date.date())\
+        .group_by(R.day)\
+        .having(day_count > 0)\
+        .order_by(day_count.desc(), R.day.desc())\
+        .limit(top)\
+        .all()
+
+    return {
+        'top_expenses': [row for row in rows if row.type == TransactionType.EXPENSE][:top],
+        'top_incomes': [row for row in rows if row.type == TransactionType.INCOME][:top],
+        'busiest_days': [(row[0], int(row[1])) for row in busiest_days],
+    }
+
+def get_period_summary(user_id, start_date, end_date, top=0, from_replica=False):
+    """Підсумки за період з денних агрегатів: доходи, витрати, кількість операцій і витрати по категоріях.
+
+    Період рахується цілими днями від start_date до end_date включно.
+    top > 0 додає top_expenses і top_incomes — по top найбільших операцій
+    (TransactionRow) кожного типу — та busiest_days — top днів (день, кількість
+    операцій) з найбільшою кількістю операцій. Обсяг результату не залежить від
+    кількості транзакцій: сортування й ліміти виконує БД.
+    """
+    return _run_read(_get_period_summary, user_id, start_date, end_date, top, from_replica=from_replica)
+
+def _compare_periods(session, user_id, periods, top=5):
+    R = TransactionDailyRollup
+    # Періоди — рядки (номер, перший день, останній день), до яких приєднуються денні агрегати;
+    # періоди можуть перетинатися, тож CASE за датою тут не підходить
+    bounds = [
+        select(literal(index).label('period'),
+               literal(start.date(), Date).label('first_day'),
+               literal(end.date(), Date).label('last_day'))
+        for index, (start, end) in enumerate(periods)
+    ]
+    bounds = (union_all(*bounds) if len(bounds) > 1 else bounds[0]).subquery('periods')
+
+    per_category = session.query(
+            bounds.c.period,
+            R.type,
+            R.category_id,
+            func.sum(R.total).label('amount'),
+            func.sum(R.count).label('count'),
+        )\
+        .select_from(R)\
+        .join(bounds, R.day.between(bounds.c.first_day, bounds.c.last_day))\
+        .filter(R.user_id == user_id)\
+        .group_by(bounds.c.period, R.type, R.category_id)\
+        .having(func.sum(R.count) > 0)\
+        .subquery()
+
+    # Суми за тип і позиція категорії в межах (період, тип) — віконними функціями;
+    # операції без категорії в топ не потрапляють
+    partition = (per_category.c.period, per_category.c.type)
+    not_ranked = case((Category.name.isnot(None), 0), else_=1)
+    ranked = session.query(
+            per_category.c.period,
+            per_category.c.type,
+            per_category.c.amount,
+            Category.name.label('name'),
+            Category.icon.label('icon'),
+            func.sum(per_category.c.amount).over(partition_by=partition).label('type_total'),
+            func.sum(per_category.c.count).over(partition_by=partition).label('type_count'),
+            func.row_number().over(
+                partition_by=partition, order_by=(not_ranked, per_category.c.amount.desc())
+            ).label('position'),
+        )\
+        .outerjoin(Category, per_category.c.category_id == Category.id)\
+        .subquery()
+
+    rows = session.query(ranked)\
+        .filter(ranked.c.position <= max(top, 1))\
+        .order_by(ranked.c.period, ranked.c.type, ranked.c.position)\
+        .all()
+
+    result = [
+        {'start': start, 'end': end, 'income': 0, 'expenses': 0, 'transactions_count': 0, 'top_categories': []}
+        for start, end in periods
+    ]
+    for row in rows:
+        summary = result[row.period]
+        if row.position == 1:
+            summary['income' if row.type == TransactionType.INCOME else 'expenses'] = row.type_total or 0
+            summary['transactions_count'] += int(row.type_count or 0)
+        if row.type == TransactionType.EXPENSE and row.name is not None and row.position <= top:
+            summary['top_categories'].append({'name': row.name, 'icon': row.icon, 'amount': row.amount})
+    for summary in result:
+        summary['balance'] = summary['income'] - summary['expenses']
+    return result
+
+def compare_periods(user_id, periods, top=5, from_replica=False):
+    """Підсумки кількох періодів одним запитом до денних агрегатів.
+
+    periods — список (start, end); кожен рахується цілими днями включно, періоди
+    можуть перетинатися. Для кожного повертає start, end, income, expenses, balance,
+    transactions_count і top_categories — до top категорій витрат (name, icon, amount)
+    за спаданням суми.
+    """
+    if not periods:
+        return []
+    return _run_read(_compare_periods, user_id, periods, top, from_replica=from_replica)
+
+def _filter_transactions(query, user_id, category_id=None, transaction_type=None, start_date=None, end_date=None):
+    """Застосовує до запиту спільні фільтри списку транзакцій"""
+    query = query.filter(Transaction.user_id == user_id)
+
     if category_id:
         query = query.filter(Transaction.category_id == category_id)
-    
+
     if transaction_type:
         query = query.filter(Transaction.type == transaction_type)
-    
-    if start_date and end_date:
-        query = query.filter(Transaction.transaction_date >= start_date)\
-                    .filter(Transaction.transaction_date <= end_date)
-    elif start_date:
+
+    if start_date:
         query = query.filter(Transaction.transaction_date >= start_date)
-    elif end_date:
+
+    if end_date:
         query = query.filter(Transaction.transaction_date <= end_date)
-    
-    transactions = query.order_by(Transaction.transaction_date.desc())\
-        .limit(limit).offset(offset).all()
-    
+
+    return query
+
+def _get_transactions(session, user_id, limit=10, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None, after=None):
+    from sqlalchemy.orm import joinedload
+
+    query = _filter_transactions(
+        session.query(Transaction).options(joinedload(Transaction.category)),
+        user_id, category_id, transaction_type, start_date, end_date
+    )
+
+    if after is not None:
+        # Keyset-пагінація: продовжуємо одразу після останньої показаної транзакції,
+        # тож вартість сторінки не залежить від того, наскільки глибоко гортає користувач
+        after_date, after_id = after
+        query = query.filter(tuple_(Transaction.transaction_date, Transaction.id) < tuple_(after_date, after_id))
+        offset = None
+
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+    transactions = query.limit(limit).offset(offset).all()
+
     # Detach objects from session to avoid lazy loading issues
     for transaction in transactions:
         if transaction.category:
@@ -210,37 +575,189 @@ def get_transactions(user_id, limit=10, offset=0, category_id=None, transaction_
             transaction.category_name = transaction.category.name
         else:
             transaction.category_name = None
-    session.close()
+
+    if archive.reaches_archive(user_id, start_date, transactions, limit):
+        archived = archive.read_archived(user_id, category_id, transaction_type, start_date, end_date, after)
+        hot = transactions if not offset else query.limit(_page_end(limit, offset)).all()
+        archived = _archived_transactions(session, archived[:_page_end(limit, offset)])
+        transactions = archive.merge_newest_first(hot, archived)[offset or 0:_page_end(limit, offset)]
     return transactions
 
+def get_transactions(user_id, limit=10, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None, after=None,
+                     from_replica=False):
+    """Отримує список транзакцій з фільтрами
+
+    after — курсор (transaction_date, id) останньої транзакції попередньої сторінки;
+    якщо вказаний, offset ігнорується і сторінка вибирається за курсором.
+    """
+    return _run_read(
+        _get_transactions, user_id, limit=limit, offset=offset, category_id=category_id,
+        transaction_type=transaction_type, start_date=start_date, end_date=end_date, after=after,
+        from_replica=from_replica
+    )
+
+# Легкий рядок транзакції для read-only коду (аналітика, експорт, звіти): лише потрібні
+# колонки, без ORM-стану, identity map і lazy-зв'язків
+TransactionRow = namedtuple('TransactionRow', [
+    'id', 'transaction_date', 'amount', 'type', 'category_id', 'category_name',
+    'category_icon', 'description', 'account_id', 'source'
+])
+
+def _get_transaction_rows(session, user_id, limit=None, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None):
+    query = _filter_transactions(
+        session.query(
+            Transaction.id,
+            Transaction.transaction_date,
+            Transaction.amount,
+            Transaction.type,
+            Transaction.category_id,
+            Category.name,
+            Category.icon,
+            Transaction.description,
+            Transaction.account_id,
+            Transaction.source,
+        ).outerjoin(Category, Transaction.category_id == Category.id),
+        user_id, category_id, transaction_type, start_date, end_date
+    ).order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+    rows = [TransactionRow._make(row) for row in query.limit(limit).offset(offset or None)]
+
+    if archive.reaches_archive(user_id, start_date, rows, limit):
+        archived = archive.read_archived(user_id, category_id, transaction_type, start_date, end_date)
+        if offset:
+            rows = [TransactionRow._make(row) for row in query.limit(_page_end(limit, offset))]
+        archived = _archived_transaction_rows(session, archived[:_page_end(limit, offset)])
+        rows = archive.merge_newest_first(rows, archived)[offset or 0:_page_end(limit, offset)]
+    return rows
+
+def get_transaction_rows(user_id, limit=None, offset=0, category_id=None, transaction_type=None, start_date=None, end_date=None,
+                         from_replica=False):
+    """Транзакції для читання (TransactionRow) з тими ж фільтрами, що й get_transactions.
+
+    На відміну від get_transactions ліміт за замовчуванням не встановлений:
+    повертаються всі транзакції, що підходять під фільтри.
+    """
+    return _run_read(
+        _get_transaction_rows, user_id, limit=limit, offset=offset, category_id=category_id,
+        transaction_type=transaction_type, start_date=start_date, end_date=end_date, from_replica=from_replica
+    )
+
+def _load_transaction_frame(session, user_id):
+    # Одна проекція з потрібними аналітиці колонками, плюс архівні місяці
+    rows = session.query(
+        Transaction.id,
+        Transaction.transaction_date,
+        Transaction.amount,
+        Transaction.type,
+        Transaction.category_id,
+        Category.name,
+    ).outerjoin(Category, Transaction.category_id == Category.id)\
+        .filter(Transaction.user_id == user_id).all()
+
+    archived = archive.read_archived(user_id)
+    if archived:
+        categories = _archived_categories(session, archived)
+        rows.extend(
+            (row.id, row.transaction_date, row.amount, row.type, row.category_id,
+             categories[row.category_id].name if row.category_id in categories else None)
+            for row in archived
+        )
+    return TransactionFrame.from_rows(rows)
+
+def get_transaction_frame(user_id, start_date=None, end_date=None):
+    """Транзакції користувача за період як TransactionFrame (колонковий кеш, database/frame_cache.py).
+
+    Кадр завантажується з основної БД: його версія рахується за комітами на ній.
+    """
+    frame = frame_cache.get(user_id)
+    if frame is None:
+        version = frame_cache.version(user_id)
+        frame = _run_in_session(_load_transaction_frame, user_id)
+        frame_cache.set(user_id, version, frame)
+    return frame.between(start_date, end_date)
+
+def _count_transactions(session, user_id, category_id=None, transaction_type=None, start_date=None, end_date=None):
+    query = _filter_transactions(
+        session.query(func.count(Transaction.id)),
+        user_id, category_id, transaction_type, start_date, end_date
+    )
+    count = query.scalar() or 0
+    if archive.reaches_archive(user_id, start_date):
+        count += archive.count_archived(user_id, category_id, transaction_type, start_date, end_date)
+    return count
+
+def count_transactions(user_id, category_id=None, transaction_type=None, start_date=None, end_date=None, from_replica=False):
+    """Повертає кількість транзакцій з тими ж фільтрами, що й get_transactions (SELECT COUNT(*))"""
+    return _run_read(
+        _count_transactions, user_id, category_id=category_id, transaction_type=transaction_type,
+        start_date=start_date, end_date=end_date, from_replica=from_replica
+    )
+
+# Транзакції, перенесені в архів (database/archive.py), додаються до списків,
+# якщо період запиту сягає архівних місяців
+
+def _page_end(limit, offset):
+    return None if limit is None else (offset or 0) + limit
+
+def _archived_categories(session, rows):
+    ids = {row.category_id for row in rows if row.category_id is not None}
+    if not ids:
+        return {}
+    return {c.id: c for c in session.query(Category.id, Category.name, Category.icon).filter(Category.id.in_(ids))}
+
+def _archived_transaction_rows(session, rows):
+    categories = _archived_categories(session, rows)
+    result = []
+    for row in rows:
+        category = categories.get(row.category_id)
+        result.append(TransactionRow(
+            row.id, row.transaction_date, row.amount, TransactionType(row.type), row.category_id,
+            category.name if category else None, category.icon if category else None,
+            row.description, row.account_id, row.source
+        ))
+    return result
+
+def _archived_transactions(session, rows):
+    """Архівні транзакції як від'єднані Transaction (лише для читання, в сесію не додаються)"""
+    categories = _archived_categories(session, rows)
+    result = []
+    for row in rows:
+        category = categories.get(row.category_id)
+        transaction = Transaction(
+            id=row.id, user_id=row.user_id, transaction_date=row.transaction_date, amount=row.amount,
+            type=TransactionType(row.type), category_id=row.category_id, description=row.description,
+            account_id=row.account_id, source=row.source, created_at=row.created_at
+        )
+        if category:
+            transaction.category = Category(id=category.id, name=category.name, icon=category.icon)
+        transaction.category_name = category.name if category else None
+        result.append(transaction)
+    return result
+
 # Alias for backward compatibility
 get_user_transactions = get_transactions
 
-def save_financial_advice(user_id, advice_text, category):
-    """Зберігає надану фінансову пораду в базу даних"""
-    session = Session()
-    
+def _save_financial_advice(session, user_id, advice_text, category):
     advice = FinancialAdvice(
         user_id=user_id,
         advice_text=advice_text,
         category=category
     )
-    
+
     session.add(advice)
-    session.commit()
-    session.close()
-    
+    commit_session(session)
+
     return advice
 
-def create_or_update_budget(user_id, name, total_budget, start_date, end_date, category_budgets=None):
-    """Створює або оновлює бюджетний план"""
-    session = Session()
-    
+def save_financial_advice(user_id, advice_text, category):
+    """Зберігає надану фінансову пораду в базу даних"""
+    return _run_in_session(_save_financial_advice, user_id, advice_text, category)
+
+def _create_or_update_budget(session, user_id, name, total_budget, start_date, end_date, category_budgets=None):
     # Перевіряємо чи існує бюджет з таким ім'ям для користувача
     budget = session.query(BudgetPlan)\
         .filter(BudgetPlan.user_id == user_id, BudgetPlan.name == name)\
         .first()
-    
+
     if not budget:
         budget = BudgetPlan(
             user_id=user_id,
@@ -255,14 +772,14 @@ def create_or_update_budget(user_id, name, total_budget, start_date, end_date, c
         budget.total_budget = total_budget
         budget.start_date = start_date
         budget.end_date = end_date
-    
+
     # Якщо вказані бюджети для категорій
     if category_budgets:
         # Видаляємо старі записи бюджету по категоріям
         session.query(CategoryBudget)\
             .filter(CategoryBudget.budget_plan_id == budget.id)\
             .delete()
-        
+
         # Додаємо нові бюджети по категоріям
         for cat_budget in category_budgets:
             category_budget = CategoryBudget(
@@ -271,47 +788,48 @@ def create_or_update_budget(user_id, name, total_budget, start_date, end_date, c
                 allocated_amount=cat_budget['amount']
             )
             session.add(category_budget)
-    
-    session.commit()
+
+    commit_session(session)
     session.refresh(budget)
-    session.close()
-    
+
     return budget
 
-def get_transaction_by_id(transaction_id, user_id):
-    """Отримує транзакцію за ID (з перевіркою належності користувачу)"""
-    session = Session()
+def create_or_update_budget(user_id, name, total_budget, start_date, end_date, category_budgets=None):
+    """Створює або оновлює бюджетний план"""
+    return _run_in_session(
+        _create_or_update_budget, user_id, name, total_budget, start_date, end_date,
+        category_budgets=category_budgets
+    )
+
+def _get_transaction_by_id(session, transaction_id, user_id):
     transaction = session.query(Transaction)\
         .filter(Transaction.id == transaction_id, Transaction.user_id == user_id)\
         .first()
-    
+
     if transaction and transaction.category:
         # Зберігаємо назву категорії
         transaction.category_name = transaction.category.name
         transaction.category_icon = transaction.category.icon
-    
-    session.close()
+
     return transaction
 
-def update_transaction(transaction_id, user_id, **updates):
-    """Оновлює транзакцію"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
+def get_transaction_by_id(transaction_id, user_id):
+    """Отримує транзакцію за ID (з перевіркою належності користувачу)"""
+    return _run_in_session(_get_transaction_by_id, transaction_id, user_id)
+
+def _update_transaction(session, transaction_id, user_id, **updates):
     logger.info(f"update_transaction called: transaction_id={transaction_id}, user_id={user_id}, updates={updates}")
-    
-    session = Session()
+
     transaction = session.query(Transaction)\
         .filter(Transaction.id == transaction_id, Transaction.user_id == user_id)\
         .first()
-    
+
     if not transaction:
         logger.error(f"Transaction not found: id={transaction_id}, user_id={user_id}")
-        session.close()
         return None
-    
+
     logger.info(f"Found transaction: id={transaction.id}, current_type={transaction.type}, current_amount={transaction.amount}")
-    
+
     # Оновлюємо тільки ті поля, які передані
     if 'amount' in updates:
         logger.info(f"Updating amount from {transaction.amount} to {updates['amount']}")
@@ -326,85 +844,100 @@ def update_transaction(transaction_id, user_id, **updates):
     if 'type' in updates:
         logger.info(f"Updating type from {transaction.type} to {updates['type']}")
         transaction.type = updates['type']
-    
+
     try:
-        session.commit()
+        commit_session(session)
         session.refresh(transaction)
         logger.info(f"Transaction updated successfully: id={transaction.id}, new_type={transaction.type}, new_amount={transaction.amount}")
-        session.close()
         return transaction
     except Exception as e:
         logger.error(f"Error updating transaction: {e}")
         session.rollback()
-        session.close()
         return None
 
-def delete_transaction(transaction_id, user_id):
-    """Видаляє транзакцію"""
-    session = Session()
+def update_transaction(transaction_id, user_id, **updates):
+    """Оновлює транзакцію"""
+    return _run_in_session(_update_transaction, transaction_id, user_id, **updates)
+
+def _delete_transaction(session, transaction_id, user_id):
     transaction = session.query(Transaction)\
         .filter(Transaction.id == transaction_id, Transaction.user_id == user_id)\
         .first()
-    
+
     if not transaction:
-        session.close()
         return False
-    
+
     session.delete(transaction)
-    session.commit()
-    session.close()
-    
+    commit_session(session)
+
     return True
 
+def delete_transaction(transaction_id, user_id):
+    """Видаляє транзакцію"""
+    return _run_in_session(_delete_transaction, transaction_id, user_id)
+
+def _clear_user_transactions(session, user_id):
+    deleted = session.query(Transaction).filter(Transaction.user_id == user_id).delete()
+    # Масове видалення оминає ORM, тож агрегати й лічильники бюджетів оновлюємо явно
+    session.query(TransactionDailyRollup).filter(TransactionDailyRollup.user_id == user_id).delete()
+    recount_budget_spending(session.connection(), select(BudgetPlan.id).where(BudgetPlan.user_id == user_id))
+    commit_session(session)
+    return deleted
+
+def clear_user_transactions(user_id):
+    """Видаляє всі транзакції користувача разом з агрегатами; повертає кількість видалених"""
+    return _run_in_session(_clear_user_transactions, user_id)
+
+def _get_user(session, telegram_id):
+    return user_record(session.query(User).filter(User.telegram_id == telegram_id).first())
+
 def get_user(telegram_id):
-    """Отримує користувача за telegram_id"""
-    session = Session()
-    user = session.query(User).filter(User.telegram_id == telegram_id).first()
-    session.close()
-    return user
+    """Отримує користувача за telegram_id (UserRecord, з кешу якщо є)"""
+    record = user_cache.get(telegram_id)
+    if record is MISSING:
+        record = _run_in_session(_get_user, telegram_id)
+        if record is not None:
+            user_cache.set(telegram_id, record)
+    return record
+
+def _get_category_by_id(session, category_id):
+    category = session.query(Category).filter(Category.id == category_id).first()
+    if category:
+        # Detach the object from session to avoid lazy loading issues
+        session.expunge(category)
+    return category
 
 def get_category_by_id(category_id):
     """Отримує категорію за ID"""
-    session = Session()
-    try:
-        category = session.query(Category).filter(Category.id == category_id).first()
-        if category:
-            # Detach the object from session to avoid lazy loading issues
-            session.expunge(category)
-        return category
-    finally:
-        session.close()
+    return _run_in_session(_get_category_by_id, category_id)
+
+def _get_category_by_name(session, user_id, category_name):
+    category = session.query(Category).filter(
+        Category.user_id == user_id,
+        func.lower(Category.name) == func.lower(category_name)
+    ).first()
+    if category:
+        # Detach the object from session to avoid lazy loading issues
+        session.expunge(category)
+    return category
 
 def get_category_by_name(user_id, category_name):
     """Отримує категорію за назвою для конкретного користувача"""
-    session = Session()
-    try:
-        category = session.query(Category).filter(
-            Category.user_id == user_id,
-            func.lower(Category.name) == func.lower(category_name)
-        ).first()
-        if category:
-            # Detach the object from session to avoid lazy loading issues
-            session.expunge(category)
-        return category
-    finally:
-        session.close()
+    return _run_in_session(_get_category_by_name, user_id, category_name)
 
-def create_category(user_id, category_name, category_type=None, icon=None):
-    """Створює нову категорію для користувача"""
-    session = Session()
+def _create_category(session, user_id, category_name, category_type=None, icon=None):
     try:
         # If category type not specified, guess based on name
         if not category_type:
-            income_keywords = ["дохід", "доход", "зарплата", "виплата", "стипендія", 
+            income_keywords = ["дохід", "доход", "зарплата", "виплата", "стипендія",
                               "income", "salary", "payment", "dividend"]
             is_income = any(keyword in category_name.lower() for keyword in income_keywords)
             category_type = TransactionType.INCOME if is_income else TransactionType.EXPENSE
-        
+
         # If icon not specified, use default
         if not icon:
             default_icon = "💰" if category_type == TransactionType.INCOME else "🛒"
-        
+
         category = Category(
             user_id=user_id,
             name=category_name,
@@ -413,7 +946,7 @@ def create_category(user_id, category_name, category_type=None, icon=None):
             is_default=False
         )
         session.add(category)
-        session.commit()
+        commit_session(session)
         session.refresh(category)
         # Detach the object from session to avoid lazy loading issues
         session.expunge(category)
@@ -421,20 +954,56 @@ def create_category(user_id, category_name, category_type=None, icon=None):
     except Exception as e:
         session.rollback()
         raise e
-    finally:
-        session.close()
+
+def create_category(user_id, category_name, category_type=None, icon=None):
+    """Створює нову категорію для користувача"""
+    return _run_in_session(_create_category, user_id, category_name, category_type, icon)
+
+def _create_categories(session, user_id, categories):
+    # ORM-об'єкти, а не insert(): after_flush бачить їх і скидає кеш категорій
+    session.add_all([
+        Category(user_id=user_id, name=name, type=category_type, icon=icon, is_default=False)
+        for name, category_type, icon in categories
+    ])
+    commit_session(session)
+    return len(categories)
+
+def create_categories(user_id, categories):
+    """Створює кілька категорій користувача однією транзакцією; categories — (назва, тип, іконка)"""
+    return _run_in_session(_create_categories, user_id, list(categories))
+
+def _rename_category(session, category_id, user_id, new_name):
+    category = session.query(Category)\
+        .filter(Category.id == category_id, Category.user_id == user_id)\
+        .first()
+    if not category:
+        return None
+    old_name = category.name
+    category.name = new_name
+    commit_session(session)
+    return old_name
+
+def rename_category(category_id, user_id, new_name):
+    """Перейменовує категорію користувача; повертає стару назву або None"""
+    return _run_in_session(_rename_category, category_id, user_id, new_name)
+
+def _delete_category(session, category_id):
+    category = session.query(Category).filter(Category.id == category_id).first()
+    if not category:
+        return None
+    name = category.name
+    # Через ORM: транзакції категорії лишаються без категорії, агрегати переносяться слухачами
+    session.delete(category)
+    commit_session(session)
+    return name
+
+def delete_category(category_id):
+    """Видаляє категорію (транзакції лишаються без категорії); повертає її назву або None"""
+    return _run_in_session(_delete_category, category_id)
 
 # ==================== ФУНКЦІЇ ДЛЯ РОБОТИ З РАХУНКАМИ ====================
 
-def create_account(user_id, name, account_type, balance=0.0, currency='UAH', is_main=False, icon=None, description=None):
-    """Створює новий рахунок для користувача"""
-    from database.models import Account, AccountType
-    
-    # Валідація балансу
-    if balance < 0:
-        raise ValueError("Баланс не може бути від'ємним")
-    
-    session = Session()
+def _create_account(session, user_id, name, account_type, balance=0.0, currency='UAH', is_main=False, icon=None, description=None):
     try:
         # Якщо це буде головний рахунок, скидаємо is_main для інших рахунків
         if is_main:
@@ -444,7 +1013,7 @@ def create_account(user_id, name, account_type, balance=0.0, currency='UAH', is_
             ).all()
             for account in existing_accounts:
                 account.is_main = False
-        
+
         # Встановлюємо іконку за замовчуванням залежно від типу
         if not icon:
             type_icons = {
@@ -456,7 +1025,7 @@ def create_account(user_id, name, account_type, balance=0.0, currency='UAH', is_
                 AccountType.OTHER: '🏦'
             }
             icon = type_icons.get(account_type, '💳')
-        
+
         account = Account(
             user_id=user_id,
             name=name,
@@ -467,251 +1036,267 @@ def create_account(user_id, name, account_type, balance=0.0, currency='UAH', is_
             icon=icon,
             description=description
         )
-        
+
         session.add(account)
-        session.commit()
+        commit_session(session)
         session.refresh(account)
         session.expunge(account)
         return account
     except Exception as e:
         session.rollback()
         raise e
-    finally:
-        session.close()
+
+def create_account(user_id, name, account_type, balance=0.0, currency='UAH', is_main=False, icon=None, description=None):
+    """Створює новий рахунок для користувача"""
+    # Валідація балансу
+    if balance < 0:
+        raise ValueError("Баланс не може бути від'ємним")
+
+    return _run_in_session(
+        _create_account, user_id, name, account_type, balance=balance, currency=currency,
+        is_main=is_main, icon=icon, description=description
+    )
+
+def _get_user_accounts(session, user_id, include_inactive=False):
+    query = session.query(Account).filter(Account.user_id == user_id)
+
+    if not include_inactive:
+        query = query.filter(Account.is_active == True)
+
+    accounts = query.order_by(Account.is_main.desc(), Account.created_at.asc()).all()
+
+    # Detach objects from session
+    for account in accounts:
+        session.expunge(account)
+
+    return accounts
 
 def get_user_accounts(user_id, include_inactive=False):
     """Отримує список рахунків користувача"""
-    from database.models import Account
-    
-    session = Session()
-    try:
-        query = session.query(Account).filter(Account.user_id == user_id)
-        
-        if not include_inactive:
-            query = query.filter(Account.is_active == True)
-        
-        accounts = query.order_by(Account.is_main.desc(), Account.created_at.asc()).all()
-        
-        # Detach objects from session
-        for account in accounts:
-            session.expunge(account)
-            
-        return accounts
-    finally:
-        session.close()
+    return _run_in_session(_get_user_accounts, user_id, include_inactive)
+
+def _get_account_by_id(session, account_id):
+    account = session.query(Account).filter(Account.id == account_id).first()
+    if account:
+        session.expunge(account)
+    return account
 
 def get_account_by_id(account_id):
     """Отримує рахунок за ID"""
-    from database.models import Account
-    
-    session = Session()
-    try:
-        account = session.query(Account).filter(Account.id == account_id).first()
-        if account:
-            session.expunge(account)
-        return account
-    finally:
-        session.close()
+    return _run_in_session(_get_account_by_id, account_id)
+
+def _get_main_account(session, user_id):
+    account = session.query(Account).filter(
+        Account.user_id == user_id,
+        Account.is_main == True,
+        Account.is_active == True
+    ).first()
+
+    if account:
+        session.expunge(account)
+    return account
 
 def get_main_account(user_id):
     """Отримує головний рахунок користувача"""
-    from database.models import Account
-    
-    session = Session()
-    try:
-        account = session.query(Account).filter(
-            Account.user_id == user_id,
-            Account.is_main == True,
-            Account.is_active == True
-        ).first()
-        
-        if account:
-            session.expunge(account)
-        return account
-    finally:
-        session.close()
+    return _run_in_session(_get_main_account, user_id)
+
+def _update_account_balance(session, account_id, new_balance):
+    # Один UPDATE без попереднього читання рахунку
+    result = session.execute(
+        update(Account).where(Account.id == account_id)
+        .values(balance=new_balance, updated_at=datetime.utcnow())
+    )
+    commit_session(session)
+    return result.rowcount > 0
 
 def update_account_balance(account_id, new_balance):
     """Оновлює баланс рахунку"""
-    from database.models import Account
-    
-    session = Session()
-    try:
-        account = session.query(Account).filter(Account.id == account_id).first()
-        if account:
-            account.balance = new_balance
-            account.updated_at = datetime.utcnow()
-            session.commit()
-            return True
-        return False
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()
+    return _run_in_session(_update_account_balance, account_id, new_balance)
+
+def _adjust_account_balance(session, account_id, amount):
+    # Відносна зміна в самому UPDATE: паралельні зміни одного рахунку не губляться
+    result = session.execute(
+        update(Account).where(Account.id == account_id)
+        .values(balance=Account.balance + amount, updated_at=datetime.utcnow())
+    )
+    commit_session(session)
+    return result.rowcount > 0
+
+def adjust_account_balance(account_id, amount):
+    """Змінює баланс рахунку на amount (від'ємне значення — списання)"""
+    return _run_in_session(_adjust_account_balance, account_id, amount)
+
+def _get_total_balance(session, user_id):
+    total = session.query(func.sum(Account.balance)).filter(
+        Account.user_id == user_id,
+        Account.is_active == True
+    ).scalar()
+
+    return total or 0.0
 
 def get_total_balance(user_id):
     """Отримує загальний баланс всіх активних рахунків користувача"""
-    from database.models import Account
-    
-    session = Session()
-    try:
-        total = session.query(func.sum(Account.balance)).filter(
-            Account.user_id == user_id,
-            Account.is_active == True
-        ).scalar()
-        
-        return total or 0.0
-    finally:
-        session.close()
+    return _run_in_session(_get_total_balance, user_id)
+
+def _get_accounts_count(session, user_id, include_inactive=False):
+    query = session.query(Account).filter(Account.user_id == user_id)
+
+    if not include_inactive:
+        query = query.filter(Account.is_active == True)
+
+    return query.count()
 
 def get_accounts_count(user_id, include_inactive=False):
     """Отримує кількість рахунків користувача"""
-    from database.models import Account
-    
-    session = Session()
-    try:
-        query = session.query(Account).filter(Account.user_id == user_id)
-        
-        if not include_inactive:
-            query = query.filter(Account.is_active == True)
-        
-        return query.count()
-    finally:
-        session.close()
+    return _run_in_session(_get_accounts_count, user_id, include_inactive)
 
-def transfer_between_accounts(from_account_id, to_account_id, amount, description="Переказ між рахунками"):
-    """Здійснює переказ між рахунками"""
-    from database.models import Account, Transaction, TransactionType
-    
-    # Перевіряємо валідність суми
-    if amount <= 0:
-        return False, "Сума повинна бути більше нуля"
-    
-    session = Session()
+def _transfer_between_accounts(session, from_account_id, to_account_id, amount, description="Переказ між рахунками"):
     try:
-        # Отримуємо рахунки
-        from_account = session.query(Account).filter(Account.id == from_account_id).first()
-        to_account = session.query(Account).filter(Account.id == to_account_id).first()
-        
+        # Блокуємо обидва рахунки в порядку id: зустрічні перекази між тією самою
+        # парою беруть блокування в однаковому порядку і не потрапляють у deadlock
+        accounts = {
+            account.id: account for account in session.execute(
+                select(Account.id, Account.user_id, Account.name)
+                .where(Account.id.in_({from_account_id, to_account_id}))
+                .order_by(Account.id)
+                .with_for_update()
+            )
+        }
+        from_account, to_account = accounts.get(from_account_id), accounts.get(to_account_id)
+
         if not from_account or not to_account:
+            session.rollback()
             return False, "Рахунок не знайдено"
-        
-        if from_account.balance < amount:
+
+        # Баланси змінюються в самих UPDATE (balance ± amount), без читання в Python;
+        # списання відбувається, лише якщо коштів достатньо
+        now = datetime.utcnow()
+        debited = session.execute(
+            update(Account)
+            .where(Account.id == from_account_id, Account.balance >= amount)
+            .values(balance=Account.balance - amount, updated_at=now)
+        ).rowcount
+        if not debited:
+            session.rollback()
             return False, "Недостатньо коштів на рахунку"
-        
-        # Оновлюємо баланси
-        from_account.balance -= amount
-        to_account.balance += amount
-        from_account.updated_at = datetime.utcnow()
-        to_account.updated_at = datetime.utcnow()
-        
-        # Створюємо транзакції
-        expense_transaction = Transaction(
-            user_id=from_account.user_id,
-            account_id=from_account_id,
-            amount=amount,
-            type=TransactionType.EXPENSE,
-            description=f"{description} → {to_account.name}",
-            transaction_date=datetime.utcnow()
-        )
-        
-        income_transaction = Transaction(
-            user_id=to_account.user_id,
-            account_id=to_account_id,
-            amount=amount,
-            type=TransactionType.INCOME,
-            description=f"{description} ← {from_account.name}",
-            transaction_date=datetime.utcnow()
+
+        session.execute(
+            update(Account).where(Account.id == to_account_id)
+            .values(balance=Account.balance + amount, updated_at=now)
         )
-        
-        session.add(expense_transaction)
-        session.add(income_transaction)
-        session.commit()
-        
+
+        # Обидві частини переказу — одним INSERT разом з оновленням денних агрегатів
+        legs = [
+            {
+                'user_id': from_account.user_id,
+                'account_id': from_account_id,
+                'amount': amount,
+                'type': TransactionType.EXPENSE,
+                'description': f"{description} → {to_account.name}",
+                'transaction_date': now,
+            },
+            {
+                'user_id': to_account.user_id,
+                'account_id': to_account_id,
+                'amount': amount,
+                'type': TransactionType.INCOME,
+                'description': f"{description} ← {from_account.name}",
+                'transaction_date': now,
+            },
+        ]
+        session.execute(insert(Transaction), legs)
+        apply_rollup_deltas(session.connection(), rollup_deltas_for_rows(legs))
+        commit_session(session)
+
         return True, "Переказ виконано успішно"
     except Exception as e:
         session.rollback()
         return False, f"Помилка переказу: {str(e)}"
-    finally:
-        session.close()
 
-def get_accounts_statistics(user_id):
-    """Отримує статистику по рахунках"""
-    from database.models import Account, Transaction
-    
-    session = Session()
-    try:
-        accounts = session.query(Account).filter(
-            Account.user_id == user_id,
-            Account.is_active == True
-        ).all()
-        
-        if not accounts:
-            return {
-                'total_accounts': 0,
-                'active_accounts': 0,
-                'total_balance': 0.0,
-                'by_type': {},
-                'monthly_growth': 0.0,
-                'monthly_transactions': 0
-            }
-        
-        total_balance = sum(account.balance for account in accounts)
-        
-        # Статистика по типах рахунків
-        by_type = {}
-        for account in accounts:
-            account_type_name = account.account_type.value.replace('_', ' ').title()
-            if account_type_name not in by_type:
-                by_type[account_type_name] = {
-                    'count': 0,
-                    'balance': 0.0,
-                    'icon': account.icon
-                }
-            by_type[account_type_name]['count'] += 1
-            by_type[account_type_name]['balance'] += account.balance
-        
-        # Підрахунок транзакцій за місяць (приблизно)
-        from datetime import datetime, timedelta
-        month_ago = datetime.utcnow() - timedelta(days=30)
-        
-        monthly_transactions = session.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.transaction_date >= month_ago
-        ).count()
-        
-        # Підрахунок зростання за місяць (спрощено)
-        monthly_income = session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.INCOME,
-            Transaction.transaction_date >= month_ago
-        ).scalar() or 0.0
-        
-        monthly_expenses = session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.transaction_date >= month_ago
-        ).scalar() or 0.0
-        
-        monthly_growth = monthly_income - monthly_expenses
-        
+def transfer_between_accounts(from_account_id, to_account_id, amount, description="Переказ між рахунками"):
+    """Здійснює переказ між рахунками"""
+    # Перевіряємо валідність суми
+    if amount <= 0:
+        return False, "Сума повинна бути більше нуля"
+
+    return _run_in_session(_transfer_between_accounts, from_account_id, to_account_id, amount, description)
+
+def _get_accounts_statistics(session, user_id):
+    # Підрахунок транзакцій за місяць (приблизно) — однорядковий агрегат,
+    # який приєднується до кожної групи рахунків
+    month_ago = datetime.utcnow() - timedelta(days=30)
+    expense_sum, income_sum = _signed_sums()
+    monthly = session.query(
+            func.count(Transaction.id).label('transactions'),
+            func.coalesce(income_sum, 0).label('income'),
+            func.coalesce(expense_sum, 0).label('expenses'),
+        )\
+        .filter(Transaction.user_id == user_id,
+                Transaction.transaction_date >= month_ago)\
+        .subquery()
+
+    # Іконка типу — іконка першого рахунку цього типу (найменший id), як у списку рахунків
+    first = aliased(Account)
+    icon = session.query(first.icon)\
+        .filter(first.user_id == user_id,
+                first.is_active == True,
+                first.account_type == Account.account_type)\
+        .order_by(first.id)\
+        .limit(1)\
+        .scalar_subquery()
+
+    # Статистика по типах рахунків разом з місячними сумами — один запит
+    rows = session.query(
+            Account.account_type,
+            func.count(Account.id).label('count'),
+            func.coalesce(func.sum(Account.balance), 0.0).label('balance'),
+            icon.label('icon'),
+            monthly.c.transactions,
+            monthly.c.income,
+            monthly.c.expenses,
+        )\
+        .join(monthly, true())\
+        .filter(Account.user_id == user_id,
+                Account.is_active == True)\
+        .group_by(Account.account_type, monthly.c.transactions, monthly.c.income, monthly.c.expenses)\
+        .all()
+
+    if not rows:
         return {
-            'total_accounts': len(accounts),
-            'active_accounts': len(accounts),
-            'total_balance': total_balance,
-            'by_type': by_type,
-            'monthly_growth': monthly_growth,
-            'monthly_transactions': monthly_transactions
+            'total_accounts': 0,
+            'active_accounts': 0,
+            'total_balance': 0.0,
+            'by_type': {},
+            'monthly_growth': 0.0,
+            'monthly_transactions': 0
         }
-    finally:
-        session.close()
 
-def get_user_main_account_id(user_id):
-    """Отримує ID головного рахунку користувача"""
-    from database.models import Account
-    
-    session = Session()
+    by_type = {}
+    for row in rows:
+        account_type_name = row.account_type.value.replace('_', ' ').title()
+        by_type[account_type_name] = {
+            'count': row.count,
+            'balance': row.balance,
+            'icon': row.icon
+        }
+
+    total_accounts = sum(row.count for row in rows)
+
+    return {
+        'total_accounts': total_accounts,
+        'active_accounts': total_accounts,
+        'total_balance': sum(row.balance for row in rows),
+        'by_type': by_type,
+        # Зростання за місяць (спрощено)
+        'monthly_growth': rows[0].income - rows[0].expenses,
+        'monthly_transactions': rows[0].transactions
+    }
+
+def get_accounts_statistics(user_id, from_replica=False):
+    """Отримує статистику по рахунках"""
+    return _run_read(_get_accounts_statistics, user_id, from_replica=from_replica)
+
+def _get_user_main_account_id(session, user_id):
     try:
         # Спочатку шукаємо головний рахунок
         main_account = session.query(Account).filter(
@@ -719,24 +1304,26 @@ def get_user_main_account_id(user_id):
             Account.is_main == True,
             Account.is_active == True
         ).first()
-        
+
         if main_account:
             return main_account.id
-        
+
         # Якщо головного рахунку немає, беремо перший активний
         first_account = session.query(Account).filter(
             Account.user_id == user_id,
             Account.is_active == True
         ).first()
-        
+
         if first_account:
             return first_account.id
-        
+
         # Якщо рахунків взагалі немає, повертаємо None
         return None
-        
+
     except Exception as e:
         logger.error(f"Error getting main account ID: {e}")
         return None
-    finally:
-        session.close()
+
+def get_user_main_account_id(user_id):
+    """Отримує ID головного рахунку користувача"""
+    return _run_in_session(_get_user_main_account_id, user_id)
@@ -0,0 +1,234 @@
+"""
+Єдина фабрика двигунів SQLAlchemy для всього процесу.
+
+models, session, migrations, cleanup та асинхронний шар отримують двигун
+звідси, тож процес тримає один пул з'єднань (плюс один асинхронний), а не
+окремий пул на кожен модуль. Розмір пулу, overflow, pre-ping і recycle
+налаштовуються через змінні середовища (див. database/config.py).
+
+Пули ведуть метрики очікування з'єднання та зайнятості — get_pool_stats()
+повертає їх для health-сервера, щоб підбирати DB_POOL_SIZE відносно
+max_connections у PostgreSQL. Кожен двигун також рахує запити
+(database/query_stats.py).
+
+Крім PostgreSQL підтримується профіль SQLite (SQLITE_PATH або
+DATABASE_URL=sqlite:///...) для бенчмарків і локальних навантажувальних
+тестів. З'єднання SQLite вмикають зовнішні ключі, чекають на блокування
+SQLITE_BUSY_TIMEOUT секунд, файлова база працює в режимі WAL. База в пам'яті
+(sqlite:// або :memory:) відкривається як одна іменована база процесу,
+тож синхронний пул, потоки та асинхронний двигун бачать ті самі дані.
+"""
+
+import threading
+import time
+import logging
+import sqlite3
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from database.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, SQLITE_BUSY_TIMEOUT
+)
+from database.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Асинхронні драйвери для діалектів, які використовує проект
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+class PoolStats:
+    """Лічильники очікування та використання з'єднань одного пулу"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+    def record_checkout(self, wait, checked_out):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self, wait):
+        with self._lock:
+            self.timeouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+                'peak_checked_out': self.peak_checked_out,
+            }
+
+class _CheckoutTimingMixin:
+    """Заміряє, скільки часу запит чекав на вільне з'єднання з пулу"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - started)
+            raise
+        self.stats.record_checkout(time.perf_counter() - started, self.checkedout())
+        return connection
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+# ==================== SQLITE ====================
+
+# Ім'я спільної бази в пам'яті, на яку відображається sqlite:// та :memory:
+SQLITE_MEMORY_NAME = 'finassist'
+
+# Відкриті з'єднання, що тримають бази в пам'яті живими, поки живе процес
+_memory_keepers = {}
+
+def is_sqlite_memory(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('vfs') == 'memdb'
+    )
+
+def _sqlite_url(url):
+    """Переводить базу в пам'яті на спільну іменовану (VFS memdb), інші URL не змінює.
+
+    На відміну від cache=shared, memdb блокує всю базу як звичайний файл, тож
+    конкурентні записи чекають busy_timeout замість помилки "table is locked".
+    """
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        return url
+    return url.set(database=f"file:/{SQLITE_MEMORY_NAME}", query={'vfs': 'memdb', 'uri': 'true'})
+
+def _keep_memory_database(url):
+    """База в пам'яті зникає з останнім з'єднанням — тримаємо одне відкритим"""
+    uri = f"{url.database}?vfs=memdb"
+    if uri not in _memory_keepers:
+        _memory_keepers[uri] = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    # WAL: читання не блокуються записом (для бази в пам'яті режим не змінюється)
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def _sqlite_options(url):
+    """Параметри підключення SQLite: з'єднання пулу переходять між потоками"""
+    if url.get_backend_name() != 'sqlite':
+        return {}
+    if is_sqlite_memory(url):
+        _keep_memory_database(url)
+    return {'connect_args': {'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT}}
+
+def _pool_options(poolclass):
+    """Параметри пулу з налаштувань проекту (DB_POOL_*)"""
+    return {
+        'poolclass': poolclass,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+def _engine_options(url, poolclass, overrides):
+    options = _pool_options(poolclass)
+    options.update(_sqlite_options(url))
+    options.update(overrides)
+    return options
+
+# ==================== ДВИГУНИ ====================
+
+def create_db_engine(database_url=None, **overrides):
+    """Створює синхронний двигун з налаштуваннями пулу проекту"""
+    url = _sqlite_url(make_url(database_url or DATABASE_URL))
+    engine = create_engine(url, echo=False, **_engine_options(url, InstrumentedQueuePool, overrides))
+    if url.get_backend_name() == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+def to_async_url(database_url):
+    """Перетворює синхронний DATABASE_URL на URL з асинхронним драйвером"""
+    url = _sqlite_url(make_url(database_url))
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Немає асинхронного драйвера для бази даних '{backend}'")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_db_engine(database_url=None, **overrides):
+    """Створює асинхронний двигун з тими ж налаштуваннями пулу"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = to_async_url(database_url or DATABASE_URL)
+    engine = create_async_engine(url, echo=False, **_engine_options(url, InstrumentedAsyncQueuePool, overrides))
+    if url.get_backend_name() == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', _sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+# Спільний синхронний двигун процесу
+engine = create_db_engine()
+
+_async_engine = None
+
+def get_async_engine():
+    """Повертає спільний асинхронний двигун (створюється при першому зверненні)"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+    return _async_engine
+
+async def dispose_async_engine():
+    """Закриває з'єднання асинхронного пулу (потоки aiosqlite інакше тримають процес при виході)"""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+def _describe_pool(pool):
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'pool_size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+        })
+    if isinstance(pool, _CheckoutTimingMixin):
+        stats.update(pool.stats.as_dict())
+    return stats
+
+def get_pool_stats():
+    """Метрики пулів з'єднань: зайнятість та час очікування checkout"""
+    result = {'sync': _describe_pool(engine.pool)}
+    if _async_engine is not None:
+        result['async'] = _describe_pool(_async_engine.sync_engine.pool)
+    return result
@@ -0,0 +1,319 @@
+"""
+Колонковий кеш транзакцій користувача для аналітики.
+
+Сервіси аналітики (TrendAnalyzer, AdvancedAnalytics, AnalyticsService,
+FinancialInsightsEngine) та екрани analytics_handler працюють з однаковим
+набором колонок: дата, сума, тип, категорія. Замість того щоб на кожен запит
+читати транзакції з БД і будувати DataFrame зі списку словників, процес
+тримає для кожного користувача TransactionFrame — масиви NumPy, завантажені
+одним запитом з проекцією лише цих колонок (разом з архівом).
+
+Кожен користувач має версію даних. Коміт, що змінює, видаляє або масово
+вставляє транзакції користувача чи змінює його категорії, підвищує версію, і
+кадр перезавантажується при наступному зверненні. Транзакції, додані через
+ORM (add_transaction), дописуються в кешований кадр без перезавантаження.
+
+Кеш обмежений за пам'яттю (FRAME_CACHE_MAX_BYTES, LRU).
+"""
+
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm.attributes import get_history
+
+from database.config import FRAME_CACHE_MAX_BYTES
+from database.models import Transaction, Category, TransactionType
+
+UNCATEGORIZED = 'Без категорії'
+
+# Коди типів у масиві types
+TYPE_CODES = {TransactionType.EXPENSE: 0, TransactionType.INCOME: 1}
+TYPE_NAMES = np.array([TransactionType.EXPENSE.value, TransactionType.INCOME.value], dtype=object)
+
+def _type_code(value):
+    if isinstance(value, str):
+        value = TransactionType(value.lower()) if value.lower() in ('expense', 'income') else TransactionType[value]
+    return TYPE_CODES[value]
+
+def _as_datetime64(value):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return np.datetime64(value, 'us')
+
+class TransactionFrame:
+    """Транзакції користувача колонками NumPy, відсортовані за датою.
+
+    categories — коди в category_ids / category_names (-1 — без категорії).
+    """
+
+    __slots__ = ('ids', 'dates', 'amounts', 'types', 'categories', 'category_ids', 'category_names', '_codes')
+
+    def __init__(self, ids, dates, amounts, types, categories, category_ids=(), category_names=()):
+        self.ids = ids
+        self.dates = dates
+        self.amounts = amounts
+        self.types = types
+        self.categories = categories
+        self.category_ids = tuple(category_ids)
+        self.category_names = tuple(category_names)
+        self._codes = {category_id: code for code, category_id in enumerate(self.category_ids)}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Кадр з рядків (id, transaction_date, amount, type, category_id, category_name).
+
+        Рядки без дати (transaction_date може бути NULL) не належать жодному періоду і пропускаються.
+        """
+        rows = sorted((row for row in rows if row[1] is not None), key=lambda row: (row[1], row[0]))
+        category_ids, category_names, codes = [], [], {}
+        for row in rows:
+            if row[4] is not None and row[4] not in codes:
+                codes[row[4]] = len(category_ids)
+                category_ids.append(row[4])
+                category_names.append(row[5] or UNCATEGORIZED)
+
+        count = len(rows)
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        dates = np.array([row[1] for row in rows], dtype='datetime64[us]').reshape(count)
+        amounts = np.fromiter((row[2] or 0.0 for row in rows), dtype=np.float64, count=count)
+        types = np.fromiter((_type_code(row[3]) for row in rows), dtype=np.int8, count=count)
+        categories = np.fromiter(
+            (codes[row[4]] if row[4] is not None else -1 for row in rows), dtype=np.int32, count=count
+        )
+        return cls(ids, dates, amounts, types, categories, category_ids, category_names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.ids, self.dates, self.amounts, self.types, self.categories))
+
+    def _take(self, selector):
+        return TransactionFrame(
+            self.ids[selector], self.dates[selector], self.amounts[selector], self.types[selector],
+            self.categories[selector], self.category_ids, self.category_names
+        )
+
+    def between(self, start_date=None, end_date=None):
+        """Транзакції з start_date по end_date включно (зріз без копіювання)"""
+        start = 0 if start_date is None else np.searchsorted(self.dates, _as_datetime64(start_date), 'left')
+        end = len(self) if end_date is None else np.searchsorted(self.dates, _as_datetime64(end_date), 'right')
+        return self._take(slice(start, end))
+
+    def of_type(self, transaction_type):
+        return self._take(self.types == _type_code(transaction_type))
+
+    def knows_category(self, category_id):
+        return category_id is None or category_id in self._codes
+
+    def appended(self, rows):
+        """Новий кадр з доданими рядками (категорії рядків мають бути відомі кадру)"""
+        # Рядок уже може бути в кадрі, якщо кадр читали в тій самій сесії до коміту
+        known = set(self.ids[np.isin(self.ids, [row[0] for row in rows])].tolist())
+        rows = sorted((row for row in rows if row[0] not in known and row[1] is not None),
+                      key=lambda row: (row[1], row[0]))
+        dates = np.array([row[1] for row in rows], dtype='datetime64[us]').reshape(len(rows))
+        positions = np.searchsorted(self.dates, dates, 'right')
+        return TransactionFrame(
+            np.insert(self.ids, positions, [row[0] for row in rows]),
+            np.insert(self.dates, positions, dates),
+            np.insert(self.amounts, positions, [row[2] or 0.0 for row in rows]),
+            np.insert(self.types, positions, [_type_code(row[3]) for row in rows]),
+            np.insert(self.categories, positions, [self._codes.get(row[4], -1) for row in rows]),
+            self.category_ids, self.category_names
+        )
+
+    def category_labels(self):
+        """Назви категорій для кожного рядка"""
+        names = np.array(self.category_names + (UNCATEGORIZED,), dtype=object)
+        return names[self.categories]
+
+    def to_dataframe(self):
+        """DataFrame з колонками date, amount, type ('income'/'expense'), category"""
+        return pd.DataFrame({
+            'id': self.ids,
+            'date': self.dates,
+            'amount': self.amounts,
+            'type': TYPE_NAMES[self.types],
+            'category': self.category_labels(),
+        })
+
+def as_dataframe(transactions):
+    """DataFrame (date, amount, type, category) з TransactionFrame або списку словників.
+
+    Словники — у форматі обробників: transaction_date, amount, type, category_name.
+    """
+    if isinstance(transactions, TransactionFrame):
+        return transactions.to_dataframe()
+    if isinstance(transactions, pd.DataFrame):
+        return transactions
+    df = pd.DataFrame({
+        'date': pd.to_datetime([t['transaction_date'] for t in transactions]),
+        'amount': [t['amount'] for t in transactions],
+        'type': [getattr(t['type'], 'value', t['type']) for t in transactions],
+        'category': [t.get('category_name') or UNCATEGORIZED for t in transactions],
+    })
+    return df
+
+# ==================== КЕШ ====================
+
+class FrameCache:
+    """LRU кадрів за user_id з обмеженням сумарного розміру масивів"""
+
+    def __init__(self, max_bytes=FRAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = defaultdict(int)
+        self._generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.appends = 0
+
+    def version(self, user_id):
+        """Поточна версія даних користувача (фіксується перед завантаженням кадру)"""
+        with self._lock:
+            return (self._generation, self._versions[user_id])
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == (self._generation, self._versions[user_id]):
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, user_id, version, frame):
+        """Зберігає кадр, завантажений при версії version (якщо дані не змінились за час завантаження)"""
+        with self._lock:
+            if version != (self._generation, self._versions[user_id]):
+                return
+            self._store(user_id, version, frame)
+
+    def _store(self, user_id, version, frame):
+        self._discard(user_id)
+        if frame.nbytes > self.max_bytes:
+            return
+        self._entries[user_id] = (version, frame)
+        self.bytes += frame.nbytes
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    def _discard(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.bytes -= entry[1].nbytes
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[user_id] += 1
+            self._discard(user_id)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def append(self, user_id, rows):
+        """Дописує додані транзакції в кадр; якщо кадр неактуальний — лише підвищує версію"""
+        with self._lock:
+            current = (self._generation, self._versions[user_id])
+            self._versions[user_id] += 1
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != current or not all(entry[1].knows_category(row[4]) for row in rows):
+                self._discard(user_id)
+                return
+            self._store(user_id, (self._generation, self._versions[user_id]), entry[1].appended(rows))
+            self.appends += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._generation += 1
+            self.bytes = 0
+            self.hits = self.misses = self.appends = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'appends': self.appends,
+            }
+
+frame_cache = FrameCache()
+
+# ==================== ІНВАЛІДАЦІЯ ====================
+
+def _pending(session):
+    return session.info.setdefault('frame_changes', (defaultdict(list), set(), [False]))
+
+def _user_ids(obj):
+    history = get_history(obj, 'user_id')
+    values = set(history.added) | set(history.deleted) | set(history.unchanged)
+    values.add(obj.user_id)
+    values.discard(None)
+    return values
+
+@event.listens_for(OrmSession, 'after_flush')
+def _collect_frame_changes(session, flush_context):
+    added, changed, _ = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, Transaction) and obj.user_id is not None:
+            added[obj.user_id].append(
+                (obj.id, obj.transaction_date, obj.amount, obj.type, obj.category_id)
+            )
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Transaction, Category)) and (obj in session.deleted or session.is_modified(obj)):
+            changed.update(_user_ids(obj))
+    for obj in session.new:
+        if isinstance(obj, Category):
+            changed.update(_user_ids(obj))
+
+@event.listens_for(OrmSession, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    """INSERT/UPDATE/DELETE транзакцій в обхід ORM-об'єктів (імпорт, перекази, архів)"""
+    statement = orm_execute_state.statement
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if getattr(statement.table, 'name', None) != Transaction.__tablename__:
+        return
+    _, changed, everyone = _pending(orm_execute_state.session)
+    parameters = orm_execute_state.parameters
+    if orm_execute_state.is_insert and parameters:
+        rows = parameters if isinstance(parameters, list) else [parameters]
+        changed.update(row['user_id'] for row in rows if row.get('user_id') is not None)
+    else:
+        everyone[0] = True
+
+@event.listens_for(OrmSession, 'after_commit')
+def _apply_frame_changes(session):
+    added, changed, everyone = session.info.pop('frame_changes', (None, None, None))
+    if added is None:
+        return
+    if everyone[0]:
+        frame_cache.invalidate_all()
+    for user_id in changed:
+        frame_cache.invalidate(user_id)
+    for user_id, rows in added.items():
+        if user_id not in changed:
+            frame_cache.append(user_id, rows)
+
+@event.listens_for(OrmSession, 'after_rollback')
+def _discard_frame_changes(session):
+    session.info.pop('frame_changes', None)
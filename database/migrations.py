@@ -1,29 +1,216 @@
-from sqlalchemy import create_engine, Column, Float, String, Boolean
+"""
+Версіоновані міграції бази даних.
+
+Кожна міграція має номер версії; застосовані версії записуються в таблицю
+schema_version, тож при старті виконуються лише нові міграції.
+
+Міграції з online=True виконуються поза транзакцією (AUTOCOMMIT). На
+PostgreSQL вони створюють індекси через CREATE INDEX CONCURRENTLY, що не
+блокує запис у велику таблицю transactions під час оновлення.
+
+Міграція може повернути SKIPPED, якщо зараз вона не застосовна (інша СУБД,
+вимкнений прапорець) — тоді версія записується зі статусом 'skipped', тож
+пропущену міграцію видно поруч із застосованими наступними. Пропущені
+міграції перевіряються знову при кожному запуску, а після застосування
+отримують статус 'applied'.
+
+Запуск вручну: python -m database.migrations
+"""
+
+import logging
+from collections import namedtuple
+
+from sqlalchemy import inspect
 from sqlalchemy.sql import text
-from database.config import DATABASE_URL
-
-def run_migrations():
-    """Запуск міграцій бази даних"""
-    engine = create_engine(DATABASE_URL)
-    
-    # Створюємо з'єднання
-    with engine.connect() as connection:
-        columns = [
-            "ADD COLUMN IF NOT EXISTS initial_balance FLOAT DEFAULT 0.0",
-            "ADD COLUMN IF NOT EXISTS currency VARCHAR(10) DEFAULT 'UAH'",
-            "ADD COLUMN IF NOT EXISTS is_setup_completed BOOLEAN DEFAULT FALSE",
-            "ADD COLUMN IF NOT EXISTS monthly_budget FLOAT",
-            "ADD COLUMN IF NOT EXISTS notification_enabled BOOLEAN DEFAULT TRUE",
-            "ADD COLUMN IF NOT EXISTS setup_step VARCHAR(50) DEFAULT 'start'"
-        ]
-        for col in columns:
-            try:
-                connection.execute(text(f"ALTER TABLE users {col}"))
-                connection.commit()
-                print(f"✅ {col} додано")
-            except Exception as e:
-                print(f"❌ Помилка при {col}: {str(e)}")
-                connection.rollback()
+from database.engine import engine
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'description', 'apply', 'online'])
+
+# Результат міграції, яку зараз застосовувати не треба
+SKIPPED = object()
+
+# Статуси версій у schema_version
+STATUS_APPLIED = 'applied'
+STATUS_SKIPPED = 'skipped'
+
+# ==================== МІГРАЦІЇ ====================
+
+def _add_user_settings_columns(connection):
+    """Колонки налаштувань користувача, яких не було в перших версіях таблиці users"""
+    columns = {
+        'initial_balance': "FLOAT DEFAULT 0.0",
+        'currency': "VARCHAR(10) DEFAULT 'UAH'",
+        'is_setup_completed': "BOOLEAN DEFAULT FALSE",
+        'monthly_budget': "FLOAT",
+        'notification_enabled': "BOOLEAN DEFAULT TRUE",
+        'setup_step': "VARCHAR(50) DEFAULT 'start'",
+    }
+    existing = {column['name'] for column in inspect(connection).get_columns('users')}
+    for name, definition in columns.items():
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE users ADD COLUMN {name} {definition}"))
+            logger.info(f"✅ users.{name} додано")
+
+# Складені індекси під гарячі запити: фільтр за користувачем і діапазоном дат,
+# часто ще за типом або категорією (get_transactions, get_monthly_stats, бюджети)
+TRANSACTION_INDEXES = {
+    'ix_transactions_user_date': ('user_id', 'transaction_date'),
+    'ix_transactions_user_type_date': ('user_id', 'type', 'transaction_date'),
+    'ix_transactions_user_category_date': ('user_id', 'category_id', 'transaction_date'),
+}
+
+def _drop_invalid_index(connection, name):
+    """Видаляє індекс, що залишився невалідним після перерваного CREATE INDEX CONCURRENTLY"""
+    invalid = connection.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        logger.warning(f"Індекс {name} невалідний, створюємо заново")
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def _create_transaction_indexes(connection):
+    """Створює складені індекси таблиці transactions (онлайн на PostgreSQL)"""
+    is_postgres = connection.dialect.name == 'postgresql'
+    for name, columns in TRANSACTION_INDEXES.items():
+        column_list = ', '.join(columns)
+        if is_postgres:
+            _drop_invalid_index(connection, name)
+            connection.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON transactions ({column_list})"
+            ))
+        else:
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {name} ON transactions ({column_list})"
+            ))
+        logger.info(f"✅ Індекс {name} ({column_list}) готовий")
+
+def _create_daily_rollup(connection):
+    """Таблиця денних агрегатів транзакцій із заповненням з наявної історії"""
+    from database.models import TransactionDailyRollup
+    from database.rollup import rebuild_daily_rollup
+
+    TransactionDailyRollup.__table__.create(connection, checkfirst=True)
+    rows = rebuild_daily_rollup(connection)
+    logger.info(f"✅ transaction_daily_rollup заповнено: {rows} рядків")
+
+def _partition_transactions(connection):
+    """Секціонування transactions за місяцями (PostgreSQL з TRANSACTIONS_PARTITIONING=true)"""
+    from database import partitions
+
+    if not partitions.TRANSACTIONS_PARTITIONING or not partitions.partitioning_supported(connection):
+        return SKIPPED
+    partitions.partition_transactions(connection)
+
+def _add_budget_counters(connection):
+    """Лічильники витрат і рівні сповіщень бюджетів категорій із заповненням з денних агрегатів"""
+    from database.budget_alerts import recount_budget_spending
+
+    columns = {
+        'spent_amount': "FLOAT NOT NULL DEFAULT 0",
+        'alert_level': "INTEGER NOT NULL DEFAULT 0",
+    }
+    existing = {column['name'] for column in inspect(connection).get_columns('category_budgets')}
+    for name, definition in columns.items():
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE category_budgets ADD COLUMN {name} {definition}"))
+            logger.info(f"✅ category_budgets.{name} додано")
+    recount_budget_spending(connection)
+
+MIGRATIONS = [
+    Migration(1, "Колонки налаштувань користувача", _add_user_settings_columns, online=False),
+    Migration(2, "Складені індекси транзакцій", _create_transaction_indexes, online=True),
+    Migration(3, "Денні агрегати транзакцій", _create_daily_rollup, online=False),
+    Migration(4, "Секціонування transactions за місяцями", _partition_transactions, online=False),
+    Migration(5, "Лічильники витрат бюджетів категорій", _add_budget_counters, online=False),
+]
+
+# ==================== ЗАПУСК ====================
+
+def _ensure_schema_version_table(bind):
+    with bind.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR(255), "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+            f"status VARCHAR(20) DEFAULT '{STATUS_APPLIED}')"
+        ))
+        # Таблиця з версій без статусу: усі записані версії були застосовані
+        existing = {column['name'] for column in inspect(connection).get_columns('schema_version')}
+        if 'status' not in existing:
+            connection.execute(text(
+                f"ALTER TABLE schema_version ADD COLUMN status VARCHAR(20) DEFAULT '{STATUS_APPLIED}'"
+            ))
+
+def get_migration_statuses(bind=None):
+    """Повертає {версія: статус} для всіх записаних міграцій"""
+    bind = bind or engine
+    _ensure_schema_version_table(bind)
+    with bind.connect() as connection:
+        return {row[0]: row[1] or STATUS_APPLIED
+                for row in connection.execute(text("SELECT version, status FROM schema_version"))}
+
+def get_applied_versions(bind=None):
+    """Повертає множину вже застосованих версій міграцій"""
+    return {version for version, status in get_migration_statuses(bind).items() if status == STATUS_APPLIED}
+
+def _record_migration(bind, migration, status, recorded):
+    with bind.begin() as connection:
+        if migration.version in recorded:
+            connection.execute(
+                text("UPDATE schema_version SET status = :status, applied_at = CURRENT_TIMESTAMP "
+                     "WHERE version = :version"),
+                {'version': migration.version, 'status': status}
+            )
+        else:
+            connection.execute(
+                text("INSERT INTO schema_version (version, description, status) "
+                     "VALUES (:version, :description, :status)"),
+                {'version': migration.version, 'description': migration.description, 'status': status}
+            )
+
+def get_schema_version(bind=None):
+    """Поточна версія схеми (0, якщо міграції ще не застосовувались)"""
+    return max(get_applied_versions(bind), default=0)
+
+def run_migrations(bind=None):
+    """Застосовує всі нові міграції по порядку"""
+    bind = bind or engine
+    recorded = get_migration_statuses(bind)
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        status = recorded.get(migration.version)
+        if status == STATUS_APPLIED:
+            continue
+
+        logger.info(f"Міграція {migration.version}: {migration.description}...")
+        if migration.online:
+            # CREATE INDEX CONCURRENTLY не може виконуватись всередині транзакції
+            with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                result = migration.apply(connection)
+        else:
+            with bind.begin() as connection:
+                result = migration.apply(connection)
+
+        if result is SKIPPED:
+            if status is None:
+                _record_migration(bind, migration, STATUS_SKIPPED, recorded)
+            logger.info(f"Міграцію {migration.version} пропущено")
+            continue
+
+        _record_migration(bind, migration, STATUS_APPLIED, recorded)
+        logger.info(f"✅ Міграцію {migration.version} застосовано")
+
+    # Секції на наступні місяці (нічого не робить без секціонування)
+    from database.partitions import ensure_transaction_partitions
+    ensure_transaction_partitions(bind)
+
+    return get_schema_version(bind)
 
 if __name__ == "__main__":
-    run_migrations() 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    version = run_migrations()
+    logger.info(f"Поточна версія схеми: {version}")
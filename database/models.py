@@ -1,13 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Table, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Text, Table, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 import datetime
 import enum
 
-from database.config import DATABASE_URL
+from database.engine import engine
 
-# Ініціалізація бази даних
-engine = create_engine(DATABASE_URL)
+# Ініціалізація бази даних (двигун спільний для всього процесу)
 Base = declarative_base()
 Session = sessionmaker(bind=engine)
 
@@ -77,6 +76,12 @@ class Category(Base):
 class Transaction(Base):
     """Модель фінансової транзакції"""
     __tablename__ = 'transactions'
+    # Складені індекси під запити "користувач + діапазон дат" (див. міграцію 2)
+    __table_args__ = (
+        Index('ix_transactions_user_date', 'user_id', 'transaction_date'),
+        Index('ix_transactions_user_type_date', 'user_id', 'type', 'transaction_date'),
+        Index('ix_transactions_user_category_date', 'user_id', 'category_id', 'transaction_date'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -99,6 +104,29 @@ class Transaction(Base):
     def __repr__(self):
         return f"<Transaction(id={self.id}, amount={self.amount}, type={self.type})>"
 
+class TransactionDailyRollup(Base):
+    """Денні агрегати транзакцій: сума і кількість за (користувач, день, тип, категорія, рахунок).
+
+    Підтримується автоматично при кожному flush сесії (див. database/rollup.py),
+    тож статистика за період читає кілька сотень рядків замість усієї історії.
+    """
+    __tablename__ = 'transaction_daily_rollup'
+    __table_args__ = (
+        Index('ix_transaction_daily_rollup_key', 'user_id', 'day', 'type', 'category_id', 'account_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    day = Column(Date, nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    category_id = Column(Integer, ForeignKey('categories.id'), nullable=True)
+    account_id = Column(Integer, ForeignKey('accounts.id'), nullable=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TransactionDailyRollup(user_id={self.user_id}, day={self.day}, type={self.type}, total={self.total})>"
+
 class BudgetPlan(Base):
     """Модель бюджетного плану"""
     __tablename__ = 'budget_plans'
@@ -126,6 +154,10 @@ class CategoryBudget(Base):
     budget_plan_id = Column(Integer, ForeignKey('budget_plans.id'))
     category_id = Column(Integer, ForeignKey('categories.id'))
     allocated_amount = Column(Float, nullable=False)
+    # Лічильник витрат категорії за період плану та найвищий повідомлений поріг
+    # (0, 80 або 100 %); підтримуються при кожному записі транзакцій (database/budget_alerts.py)
+    spent_amount = Column(Float, nullable=False, default=0.0)
+    alert_level = Column(Integer, nullable=False, default=0)
     
     # Зв'язки
     budget_plan = relationship("BudgetPlan", back_populates="category_budgets")
@@ -214,4 +246,8 @@ def init_db():
             session.add(category)
     
     session.commit()
-    session.close()
\ No newline at end of file
+    session.close()
+# Слухачі подій сесії: денні агрегати транзакцій та інвалідація кешу користувачів/категорій
+# (імпорт після оголошення моделей)
+import database.rollup  # noqa: E402,F401
+import database.cache  # noqa: E402,F401
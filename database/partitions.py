@@ -0,0 +1,241 @@
+"""
+Секціонування таблиці transactions за місяцями (лише PostgreSQL).
+
+Вмикається змінною TRANSACTIONS_PARTITIONING=true. Тоді міграція 4
+перетворює transactions на таблицю PARTITION BY RANGE (transaction_date):
+по одній секції на місяць (transactions_y2024m05) плюс секція DEFAULT для
+дат поза створеними місяцями. Первинний ключ стає (id, transaction_date) —
+PostgreSQL вимагає, щоб ключ секціонування входив у унікальні обмеження.
+
+Секції наперед на PARTITION_MONTHS_AHEAD місяців створює
+ensure_transaction_partitions — після міграцій при старті бота і раз на добу
+у фоновій задачі. Рядки, що вже потрапили в DEFAULT, переносяться в нову
+секцію в тій самій транзакції.
+
+Запити з фільтром за діапазоном transaction_date (get_transactions,
+get_monthly_stats, бюджети) читають лише секції свого періоду;
+scanned_partitions показує, які секції зачіпає конкретна операція.
+
+На SQLite і з вимкненим прапорцем усе працює без змін.
+
+Ручний запуск:
+    python -m database.partitions ensure           # створити майбутні секції
+    python -m database.partitions check <user_id>  # які секції читають запити
+"""
+
+import asyncio
+import json
+import logging
+import sys
+from datetime import date
+
+from sqlalchemy import event, text
+
+from database.config import TRANSACTIONS_PARTITIONING, PARTITION_MONTHS_AHEAD
+from database.engine import engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = 'transactions_default'
+
+# Раз на добу перевіряємо, чи є секції на наступні місяці
+MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+def partitioning_supported(bind):
+    return bind.dialect.name == 'postgresql'
+
+def partition_name(month):
+    return f"transactions_y{month.year}m{month.month:02d}"
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_range(first, last):
+    """Перші числа всіх місяців від first до last включно"""
+    month = month_start(first)
+    last = month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+def is_partitioned(connection):
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'transactions'"
+    )).first() is not None
+
+def existing_partitions(connection):
+    return {row[0] for row in connection.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = 'transactions'"
+    ))}
+
+def create_month_partition(connection, month, has_default=True):
+    """Створює секцію місяця; рядки цього місяця з DEFAULT переносяться в неї"""
+    start, end = month_start(month), add_months(month_start(month), 1)
+    period = {'start': start, 'end': end}
+    if has_default:
+        # Нова секція не може перекрити рядки, що вже лежать у DEFAULT
+        connection.execute(text(
+            f"CREATE TEMP TABLE moved_transactions AS SELECT * FROM {DEFAULT_PARTITION} "
+            "WHERE transaction_date >= :start AND transaction_date < :end"
+        ), period)
+        connection.execute(text(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE transaction_date >= :start AND transaction_date < :end"
+        ), period)
+    connection.execute(text(
+        f"CREATE TABLE {partition_name(start)} PARTITION OF transactions "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    if has_default:
+        connection.execute(text("INSERT INTO transactions SELECT * FROM moved_transactions"))
+        connection.execute(text("DROP TABLE moved_transactions"))
+
+def partition_transactions(connection, months_ahead=None, today=None):
+    """Перетворює transactions на секціоновану за місяцями таблицю, переносячи дані"""
+    from database.migrations import TRANSACTION_INDEXES
+
+    months_ahead = PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    today = today or date.today()
+    if is_partitioned(connection):
+        return 0
+
+    # Ключ секціонування входить у первинний ключ, тож дата обов'язкова
+    connection.execute(text(
+        "UPDATE transactions SET transaction_date = COALESCE(created_at, now()) WHERE transaction_date IS NULL"
+    ))
+    first, last = connection.execute(text(
+        "SELECT min(transaction_date), max(transaction_date) FROM transactions"
+    )).first()
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence('transactions', 'id')")).scalar()
+
+    connection.execute(text("ALTER TABLE transactions RENAME TO transactions_legacy"))
+    connection.execute(text("ALTER TABLE transactions_legacy RENAME CONSTRAINT transactions_pkey TO transactions_legacy_pkey"))
+    for name in TRANSACTION_INDEXES:
+        connection.execute(text(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_legacy"))
+
+    connection.execute(text(
+        "CREATE TABLE transactions (LIKE transactions_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (transaction_date)"
+    ))
+    connection.execute(text("ALTER TABLE transactions ALTER COLUMN transaction_date SET NOT NULL"))
+    connection.execute(text("ALTER TABLE transactions ADD CONSTRAINT transactions_pkey PRIMARY KEY (id, transaction_date)"))
+    for column, target in (('user_id', 'users'), ('category_id', 'categories'), ('account_id', 'accounts')):
+        connection.execute(text(
+            f"ALTER TABLE transactions ADD CONSTRAINT transactions_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {target} (id)"
+        ))
+    for name, columns in TRANSACTION_INDEXES.items():
+        connection.execute(text(f"CREATE INDEX {name} ON transactions ({', '.join(columns)})"))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY transactions.id"))
+
+    months = list(month_range(first or today, max(last.date() if last else today, add_months(today, months_ahead))))
+    for month in months:
+        create_month_partition(connection, month, has_default=False)
+    connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF transactions DEFAULT"))
+
+    moved = connection.execute(text("INSERT INTO transactions SELECT * FROM transactions_legacy")).rowcount
+    connection.execute(text("DROP TABLE transactions_legacy"))
+    logger.info(f"✅ transactions секціоновано: {len(months)} місячних секцій, перенесено {moved} рядків")
+    return moved
+
+def ensure_transaction_partitions(bind=None, months_ahead=None, today=None):
+    """Створює відсутні секції від поточного місяця на months_ahead наперед"""
+    bind = bind or engine
+    if not partitioning_supported(bind):
+        return []
+    months_ahead = PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    today = today or date.today()
+
+    created = []
+    with bind.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        existing = existing_partitions(connection)
+        for month in month_range(today, add_months(today, months_ahead)):
+            if partition_name(month) not in existing:
+                create_month_partition(connection, month, has_default=DEFAULT_PARTITION in existing)
+                created.append(partition_name(month))
+    if created:
+        logger.info(f"✅ Створено секції transactions: {', '.join(created)}")
+    return created
+
+async def maintain_partitions_periodically(interval=MAINTENANCE_INTERVAL):
+    """Фонова задача: раз на interval секунд створює секції на наступні місяці"""
+    if not TRANSACTIONS_PARTITIONING or not partitioning_supported(engine):
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(ensure_transaction_partitions)
+        except Exception as e:
+            logger.error(f"Не вдалося створити секції transactions: {e}")
+
+# ==================== ПЕРЕВІРКА PRUNING ====================
+
+def _relations(plan):
+    relations = set()
+    if 'Relation Name' in plan:
+        relations.add(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        relations |= _relations(child)
+    return relations
+
+def scanned_partitions(bind, operation, *args, **kwargs):
+    """Виконує operation і повертає секції transactions, які читав кожен її запит.
+
+    Кожен запит, що звертається до transactions, повторно проганяється через
+    EXPLAIN з тими ж параметрами. Повертає список множин назв секцій.
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'transactions' in statement and not statement.lstrip().upper().startswith('EXPLAIN'):
+            statements.append((statement, parameters))
+
+    event.listen(bind, 'before_cursor_execute', capture)
+    try:
+        operation(*args, **kwargs)
+    finally:
+        event.remove(bind, 'before_cursor_execute', capture)
+
+    scanned = []
+    with bind.connect() as connection:
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            relations = _relations(plan[0]['Plan'])
+            scanned.append({name for name in relations if name.startswith('transactions_')})
+    return scanned
+
+def _check(user_id):
+    from datetime import datetime
+    from database import db_operations
+    from services.budget_manager import BudgetManager
+
+    now = datetime.now()
+    checks = [
+        ("get_transactions (місяць)", db_operations.get_transactions,
+         (user_id,), {'start_date': datetime(now.year, now.month, 1), 'end_date': now}),
+        ("get_monthly_stats", db_operations.get_monthly_stats, (user_id,), {}),
+        ("BudgetManager.get_budget_status", BudgetManager(user_id).get_budget_status, (), {}),
+    ]
+    for name, operation, args, kwargs in checks:
+        for partitions in scanned_partitions(engine, operation, *args, **kwargs):
+            print(f"{name}: {', '.join(sorted(partitions)) or '-'}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else 'ensure'
+    if command == 'check':
+        _check(int(sys.argv[2]))
+    else:
+        ensure_transaction_partitions()
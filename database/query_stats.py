@@ -0,0 +1,267 @@
+"""
+Інструментування SQL-запитів.
+
+Слухачі before/after_cursor_execute на спільних двигунах (database/engine.py)
+рахують кількість запитів, сумарний час у БД та найповільніший запит — для
+кожного оновлення Telegram і для кожного обробника (колбека python-telegram-bot,
+у якому виконано запит; label_handlers позначає всі зареєстровані колбеки). Запити, довші за SLOW_QUERY_MS, пишуться в
+лог разом з формою параметрів (лише типи, без значень). Зведення віддає
+health-сервер на GET /metrics, тож N+1 у якомусь обробнику видно одразу за
+max_queries_per_update.
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from database.config import SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+# Запити поза обробниками (фонові задачі, скрипти, міграції)
+BACKGROUND = '-'
+RECENT_UPDATES = 50
+MAX_STATEMENT_LENGTH = 300
+
+_current_update = ContextVar('query_stats_update', default=None)
+_current_handler = ContextVar('query_stats_handler', default=None)
+
+class QueryCounter:
+    """Кількість запитів, сумарний час і найповільніший запит"""
+
+    def __init__(self):
+        self.queries = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement, elapsed_ms):
+        self.queries += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'total_ms': round(self.total_ms, 2),
+            'slowest_ms': round(self.slowest_ms, 2),
+            'slowest_statement': _shorten(self.slowest_statement),
+        }
+
+class HandlerStats(QueryCounter):
+    """Накопичені запити одного обробника за весь час роботи процесу"""
+
+    def __init__(self):
+        super().__init__()
+        self.updates = 0
+        self.max_queries_per_update = 0
+
+    def as_dict(self):
+        result = super().as_dict()
+        result['updates'] = self.updates
+        result['max_queries_per_update'] = self.max_queries_per_update
+        return result
+
+class UpdateStats:
+    """Запити одного оновлення з розбивкою за обробниками"""
+
+    def __init__(self, label):
+        self.label = label
+        self.total = QueryCounter()
+        self.handlers = {}
+
+    def add(self, handler, statement, elapsed_ms):
+        self.total.add(statement, elapsed_ms)
+        self.handlers.setdefault(handler, QueryCounter()).add(statement, elapsed_ms)
+
+    def as_dict(self):
+        result = self.total.as_dict()
+        result['update'] = self.label
+        result['handlers'] = {name: counter.queries for name, counter in self.handlers.items()}
+        return result
+
+_lock = threading.Lock()
+_totals = QueryCounter()
+_handlers = {}
+_recent = deque(maxlen=RECENT_UPDATES)
+_slow_queries = 0
+
+# ==================== ОБРОБНИКИ ТА ОНОВЛЕННЯ ====================
+
+def handler_name(callback):
+    """Назва обробника для статистики: модуль (без префікса handlers.) і ім'я функції"""
+    module = getattr(callback, '__module__', None) or ''
+    if module.startswith('handlers.'):
+        module = module[len('handlers.'):]
+    return f"{module}.{getattr(callback, '__qualname__', type(callback).__name__)}"
+
+def current_handler():
+    return _current_handler.get() or BACKGROUND
+
+@contextmanager
+def handled_by(name):
+    """Приписує запити всередині блоку обробнику name"""
+    token = _current_handler.set(name)
+    try:
+        yield
+    finally:
+        _current_handler.reset(token)
+
+def track_handler(callback):
+    """Обгортає асинхронний колбек: запити всередині нього приписуються йому.
+
+    Назва зберігається в contextvar, тож її бачать і запити з asyncio.to_thread,
+    і асинхронні сесії, що виконуються в окремому greenlet.
+    """
+    name = handler_name(callback)
+
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        with handled_by(name):
+            return await callback(*args, **kwargs)
+    wrapper.tracked_handler = name
+    return wrapper
+
+def _track_callbacks(handlers):
+    for handler in handlers:
+        # ConversationHandler сам колбека не має — позначаємо вкладені обробники
+        if hasattr(handler, 'entry_points'):
+            _track_callbacks(handler.entry_points)
+            for state_handlers in handler.states.values():
+                _track_callbacks(state_handlers)
+            _track_callbacks(handler.fallbacks)
+            continue
+        callback = getattr(handler, 'callback', None)
+        if callback is not None and not hasattr(callback, 'tracked_handler'):
+            handler.callback = track_handler(callback)
+
+def label_handlers(application):
+    """Обгортає колбеки всіх зареєстрованих в application обробників у track_handler"""
+    for handlers in application.handlers.values():
+        _track_callbacks(handlers)
+
+def describe_update(update):
+    """Коротка назва оновлення: callback_data, команда або тип повідомлення"""
+    callback_query = getattr(update, 'callback_query', None)
+    if callback_query is not None:
+        return f"callback:{callback_query.data}"
+    message = getattr(update, 'message', None)
+    if message is not None:
+        text = message.text or ''
+        if text.startswith('/'):
+            return text.split()[0]
+        if message.photo:
+            return 'message:photo'
+        if message.document:
+            return 'message:document'
+        return 'message:text'
+    return type(update).__name__
+
+@contextmanager
+def track_update(label):
+    """Збирає запити одного оновлення; після завершення оновлює підсумки обробників"""
+    stats = UpdateStats(label)
+    token = _current_update.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_update.reset(token)
+        _finish_update(stats)
+
+def _finish_update(stats):
+    with _lock:
+        for name, counter in stats.handlers.items():
+            handler = _handlers.setdefault(name, HandlerStats())
+            handler.updates += 1
+            handler.max_queries_per_update = max(handler.max_queries_per_update, counter.queries)
+        if stats.total.queries:
+            _recent.append(stats.as_dict())
+    if stats.total.queries:
+        logger.debug(f"{stats.label}: {stats.total.queries} запитів, {stats.total.total_ms:.1f} мс")
+
+# ==================== ЗАПИТИ ====================
+
+def _shorten(statement):
+    if statement is None:
+        return None
+    statement = ' '.join(statement.split())
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH] + '…'
+    return statement
+
+def parameter_shape(parameters, executemany=False):
+    """Форма параметрів запиту: типи значень без самих значень"""
+    if executemany and parameters:
+        return f"{len(parameters)} × {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+def record_query(statement, parameters, elapsed_ms, executemany=False):
+    global _slow_queries
+    handler = current_handler()
+    update = _current_update.get()
+    with _lock:
+        _totals.add(statement, elapsed_ms)
+        _handlers.setdefault(handler, HandlerStats()).add(statement, elapsed_ms)
+        if update is not None:
+            update.add(handler, statement, elapsed_ms)
+        slow = elapsed_ms >= SLOW_QUERY_MS
+        if slow:
+            _slow_queries += 1
+    if slow:
+        logger.warning(
+            f"Повільний запит {elapsed_ms:.1f} мс ({handler}): {_shorten(statement)} "
+            f"параметри: {parameter_shape(parameters, executemany)}"
+        )
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    record_query(statement, parameters, (time.perf_counter() - started) * 1000, executemany)
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+def instrument_engine(engine):
+    """Підключає лічильники запитів до двигуна (синхронного або асинхронного)"""
+    engine = getattr(engine, 'sync_engine', engine)
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    return engine
+
+def get_query_stats():
+    """Зведення запитів для /metrics: загалом, за обробниками та останні оновлення"""
+    with _lock:
+        return {
+            'slow_query_ms': SLOW_QUERY_MS,
+            'slow_queries': _slow_queries,
+            'total': _totals.as_dict(),
+            'handlers': {name: stats.as_dict() for name, stats in _handlers.items()},
+            'recent_updates': list(_recent),
+        }
+
+def reset_query_stats():
+    """Обнуляє накопичені лічильники (тести, ручне скидання)"""
+    global _totals, _slow_queries
+    with _lock:
+        _totals = QueryCounter()
+        _handlers.clear()
+        _recent.clear()
+        _slow_queries = 0
@@ -0,0 +1,236 @@
+"""
+Маршрутизація читань аналітики на репліку (READ_DATABASE_URL).
+
+Довгі діапазонні читання — аналітика, звіти, AI-профіль користувача та
+експорт — не повинні конкурувати з додаванням та імпортом транзакцій на
+основній БД. Якщо задано READ_DATABASE_URL, операції лише для читання
+(db_operations._run_read та асинхронний аналог) виконуються на репліці,
+коли викликач явно передає from_replica=True: аналітика, звіти, експорт і
+AI-профіль, яким не потрібні щойно записані дані. FinancialReport відкриває
+сесію репліки через open_replica_session. Решта читань, а також усі записи
+завжди йдуть на основну БД.
+
+Репліка використовується, лише поки її відставання не перевищує
+READ_REPLICA_MAX_LAG секунд (перевіряється не частіше ніж раз на
+LAG_CHECK_INTERVAL). Якщо репліка відстає або недоступна, читання
+автоматично виконується на основній БД, а репліка пропускається на
+READ_REPLICA_RETRY_INTERVAL секунд.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import exc, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.config import READ_DATABASE_URL, READ_REPLICA_MAX_LAG, READ_REPLICA_RETRY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+LAG_CHECK_INTERVAL = 5.0
+
+# Відставання в секундах; 0, якщо сервер не в режимі відновлення або вже все застосував
+PG_LAG_QUERY = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+class ReplicaRouter:
+    """Двигуни репліки, її стан і лічильники читань"""
+
+    def __init__(self, url=None, max_lag=READ_REPLICA_MAX_LAG, retry_interval=READ_REPLICA_RETRY_INTERVAL):
+        self.url = url
+        self.max_lag = max_lag
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._engine = None
+        self._async_engine = None
+        self._session_factory = None
+        self._async_session_factory = None
+        self.lag = None
+        self.checked_at = None
+        self.down_until = 0.0
+        self.reads = 0
+        self.fallbacks = 0
+        self.last_error = None
+
+    @property
+    def configured(self):
+        return bool(self.url)
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                from database.engine import create_db_engine
+                self._engine = create_db_engine(self.url)
+                self._session_factory = sessionmaker(bind=self._engine)
+            return self._engine
+
+    @property
+    def async_engine(self):
+        with self._lock:
+            if self._async_engine is None:
+                from database.engine import create_async_db_engine
+                self._async_engine = create_async_db_engine(self.url)
+                self._async_session_factory = async_sessionmaker(self._async_engine, expire_on_commit=False)
+            return self._async_engine
+
+    def session(self):
+        if self._session_factory is None:
+            self.engine
+        return self._session_factory()
+
+    def async_session(self):
+        if self._async_session_factory is None:
+            self.async_engine
+        return self._async_session_factory()
+
+    # ---------- стан ----------
+
+    def _lag_is_fresh(self):
+        return self.checked_at is not None and time.monotonic() - self.checked_at < LAG_CHECK_INTERVAL
+
+    def _record_lag(self, lag):
+        self.lag, self.checked_at = lag, time.monotonic()
+        if lag > self.max_lag:
+            logger.warning(f"Репліка відстає на {lag:.1f} с (допустимо {self.max_lag} с), читання йдуть на основну БД")
+
+    def _lag_acceptable(self):
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def mark_failed(self, error):
+        """Репліка недоступна: наступні retry_interval секунд читаємо з основної БД"""
+        self.down_until = time.monotonic() + self.retry_interval
+        self.checked_at = None
+        self.last_error = str(error)
+        logger.warning(f"Репліка недоступна, читання йдуть на основну БД: {error}")
+
+    def _usable(self):
+        return self.configured and time.monotonic() >= self.down_until
+
+    def available(self):
+        """Чи можна зараз читати з репліки (перевіряє відставання синхронно)"""
+        if not self._usable():
+            return False
+        if not self._lag_is_fresh():
+            try:
+                with self.engine.connect() as connection:
+                    self._record_lag(_measure_lag(connection))
+            except Exception as e:
+                self.mark_failed(e)
+                return False
+        return self._lag_acceptable()
+
+    async def available_async(self):
+        """Те саме, що available, через асинхронний двигун"""
+        if not self._usable():
+            return False
+        if not self._lag_is_fresh():
+            try:
+                async with self.async_engine.connect() as connection:
+                    self._record_lag(await connection.run_sync(_measure_lag))
+            except Exception as e:
+                self.mark_failed(e)
+                return False
+        return self._lag_acceptable()
+
+    def dispose(self):
+        """Закриває з'єднання синхронного пулу (асинхронний закривається через dispose_async)"""
+        if self._engine is not None:
+            self._engine.dispose()
+        self._engine = self._session_factory = None
+
+    async def dispose_async(self):
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        self._async_engine = self._async_session_factory = None
+
+    def stats(self):
+        return {
+            'configured': self.configured,
+            'lag_seconds': self.lag,
+            'max_lag_seconds': self.max_lag,
+            'down': time.monotonic() < self.down_until,
+            'reads': self.reads,
+            'fallbacks': self.fallbacks,
+            'last_error': self.last_error,
+        }
+
+def _measure_lag(connection):
+    if connection.dialect.name != 'postgresql':
+        return 0.0
+    return float(connection.execute(text(PG_LAG_QUERY)).scalar() or 0.0)
+
+router = ReplicaRouter(READ_DATABASE_URL)
+
+def configure_replica(url, max_lag=READ_REPLICA_MAX_LAG, retry_interval=READ_REPLICA_RETRY_INTERVAL):
+    """Замінює репліку (тести, ручне перемикання); url=None вимикає маршрутизацію"""
+    global router
+    old = router
+    router = ReplicaRouter(url, max_lag, retry_interval)
+    old.dispose()
+    return router
+
+def get_replica_stats():
+    """Стан репліки для /metrics"""
+    return router.stats()
+
+def open_replica_session():
+    """Сесія репліки для коду, що лише читає; None — читати з основної БД.
+
+    Сесію закриває викликач (FinancialReport тримає її на весь звіт).
+    """
+    if not router.configured:
+        return None
+    if not router.available():
+        router.fallbacks += 1
+        return None
+    router.reads += 1
+    return router.session()
+
+def run_read(operation, fallback, *args, from_replica=False, **kwargs):
+    """Виконує operation(session, ...) на репліці, якщо from_replica=True і репліка доступна.
+
+    Інакше, а також при помилці БД на репліці — fallback(operation, ...) на основній БД.
+    """
+    replica = router
+    if not from_replica or not replica.configured:
+        return fallback(operation, *args, **kwargs)
+    if not replica.available():
+        replica.fallbacks += 1
+        return fallback(operation, *args, **kwargs)
+
+    session = replica.session()
+    try:
+        result = operation(session, *args, **kwargs)
+    except exc.DBAPIError as e:
+        replica.mark_failed(e)
+        replica.fallbacks += 1
+        return fallback(operation, *args, **kwargs)
+    finally:
+        session.close()
+    replica.reads += 1
+    return result
+
+async def run_read_async(operation, fallback, *args, from_replica=False, **kwargs):
+    """Асинхронний run_read: fallback — асинхронний _run_in_session"""
+    replica = router
+    if not from_replica or not replica.configured:
+        return await fallback(operation, *args, **kwargs)
+    if not await replica.available_async():
+        replica.fallbacks += 1
+        return await fallback(operation, *args, **kwargs)
+
+    try:
+        async with replica.async_session() as session:
+            result = await session.run_sync(operation, *args, **kwargs)
+    except exc.DBAPIError as e:
+        replica.mark_failed(e)
+        replica.fallbacks += 1
+        return await fallback(operation, *args, **kwargs)
+    replica.reads += 1
+    return result
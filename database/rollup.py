@@ -0,0 +1,228 @@
+"""
+Денні агрегати транзакцій (таблиця transaction_daily_rollup).
+
+Слухач after_flush переносить зміни транзакцій в агрегати в тій самій
+транзакції БД: нова транзакція додає свою суму, видалена — віднімає, змінена
+переносить суму зі старого ключа на новий. Тому add/update/delete, перекази
+та імпорт виписок через ORM підтримують агрегати без додаткових викликів.
+Видалення категорії переносить її агрегати в "без категорії" ще до DELETE,
+бо агрегати посилаються на categories зовнішнім ключем.
+
+Рядків з однаковим ключем може бути кілька (паралельні вставки), тому
+читачі завжди підсумовують агрегати через SUM ... GROUP BY.
+
+Масові вставки в обхід ORM (bulk_insert_transactions) застосовують агрегати
+явно через rollup_deltas_for_rows + apply_rollup_deltas.
+
+Ті самі зміни оновлюють лічильники бюджетів категорій (database/budget_alerts.py);
+перебудова агрегатів їх не чіпає.
+
+Перебудова з нуля: python -m database.rollup [user_id]
+"""
+
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, select, insert, update, delete, bindparam
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm.attributes import get_history
+
+from database.models import Transaction, TransactionDailyRollup, Category
+from database.budget_alerts import apply_budget_deltas
+
+logger = logging.getLogger(__name__)
+
+_KEY_ATTRS = ('user_id', 'transaction_date', 'type', 'category_id', 'account_id')
+
+def _rollup_key(user_id, transaction_date, transaction_type, category_id, account_id):
+    """Ключ агрегату: (користувач, день, тип, категорія, рахунок)"""
+    day = transaction_date.date() if isinstance(transaction_date, datetime) else transaction_date
+    return (user_id, day, transaction_type, category_id, account_id)
+
+def _committed_value(transaction, attr):
+    """Значення атрибута до поточного flush"""
+    history = get_history(transaction, attr)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(transaction, attr)
+
+def _current(transaction):
+    key = _rollup_key(*(getattr(transaction, attr) for attr in _KEY_ATTRS))
+    return key, transaction.amount
+
+def _committed(transaction):
+    key = _rollup_key(*(_committed_value(transaction, attr) for attr in _KEY_ATTRS))
+    return key, _committed_value(transaction, 'amount')
+
+class _Deltas:
+    """Накопичує зміни {ключ: [сума, кількість]}"""
+
+    def __init__(self, deleted_categories=()):
+        self.items = defaultdict(lambda: [0.0, 0])
+        self.deleted_categories = deleted_categories
+
+    def add(self, key, amount, count):
+        user_id, day, transaction_type, category_id = key[:4]
+        if user_id is None or day is None or transaction_type is None:
+            return
+        if category_id in self.deleted_categories:
+            key = key[:3] + (None,) + key[4:]
+        self.items[key][0] += amount or 0.0
+        self.items[key][1] += count
+
+    def result(self):
+        return {key: delta for key, delta in self.items.items() if delta[0] or delta[1]}
+
+def _collect_deltas(session):
+    """Збирає зміни сум і кількостей за ключами агрегатів для поточного flush"""
+    # Агрегати видаленої категорії вже перенесені в "без категорії" (_move_category_rollup),
+    # тож обнулення category_id її транзакцій не переносить суми вдруге
+    deltas = _Deltas(deleted_categories={obj.id for obj in session.deleted if isinstance(obj, Category)})
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            deltas.add(*_current(obj), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            key, amount = _committed(obj)
+            deltas.add(key, -(amount or 0.0), -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj):
+            old_key, old_amount = _committed(obj)
+            new_key, new_amount = _current(obj)
+            if old_key != new_key or old_amount != new_amount:
+                deltas.add(old_key, -(old_amount or 0.0), -1)
+                deltas.add(new_key, new_amount, 1)
+
+    return deltas.result()
+
+def rollup_deltas_for_rows(rows):
+    """Зміни агрегатів для нових транзакцій, вставлених в обхід ORM (словники колонок)"""
+    deltas = _Deltas()
+    for row in rows:
+        key = _rollup_key(row['user_id'], row['transaction_date'], row['type'],
+                          row.get('category_id'), row.get('account_id'))
+        deltas.add(key, row['amount'], 1)
+    return deltas.result()
+
+def _apply_rollup_delta(connection, key, total, count):
+    R = TransactionDailyRollup
+    user_id, day, transaction_type, category_id, account_id = key
+    conditions = (
+        R.user_id == user_id,
+        R.day == day,
+        R.type == transaction_type,
+        R.category_id == category_id if category_id is not None else R.category_id.is_(None),
+        R.account_id == account_id if account_id is not None else R.account_id.is_(None),
+    )
+    # Оновлюємо рівно один рядок ключа, навіть якщо їх кілька
+    target = select(func.min(R.id)).where(*conditions).scalar_subquery()
+    result = connection.execute(
+        update(R).where(R.id == target).values(total=R.total + total, count=R.count + count)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(R).values(
+            user_id=user_id, day=day, type=transaction_type,
+            category_id=category_id, account_id=account_id,
+            total=total, count=count
+        ))
+
+def apply_rollup_deltas(connection, deltas):
+    """Застосовує зміни {ключ: [сума, кількість]} до таблиці агрегатів.
+
+    Один ключ (звичайна транзакція) — один UPDATE. Для багатьох ключів
+    (імпорт, масові зміни) кількість запитів не залежить від кількості ключів:
+    один SELECT наявних рядків, один пакетний UPDATE і один пакетний INSERT.
+    """
+    if len(deltas) == 1:
+        (key, (total, count)), = deltas.items()
+        _apply_rollup_delta(connection, key, total, count)
+        return
+
+    R = TransactionDailyRollup
+    existing = connection.execute(
+        select(func.min(R.id), R.user_id, R.day, R.type, R.category_id, R.account_id)
+        .where(R.user_id.in_({key[0] for key in deltas}), R.day.in_({key[1] for key in deltas}))
+        .group_by(R.user_id, R.day, R.type, R.category_id, R.account_id)
+    )
+    targets = {tuple(row[1:]): row[0] for row in existing}
+
+    updates, inserts = [], []
+    for key, (total, count) in deltas.items():
+        if key in targets:
+            updates.append({'target_id': targets[key], 'delta_total': total, 'delta_count': count})
+        else:
+            user_id, day, transaction_type, category_id, account_id = key
+            inserts.append({
+                'user_id': user_id, 'day': day, 'type': transaction_type,
+                'category_id': category_id, 'account_id': account_id,
+                'total': total, 'count': count
+            })
+
+    if updates:
+        connection.execute(
+            update(R).where(R.id == bindparam('target_id')).values(
+                total=R.total + bindparam('delta_total'), count=R.count + bindparam('delta_count')
+            ),
+            updates
+        )
+    if inserts:
+        connection.execute(insert(R), inserts)
+
+@event.listens_for(Category, 'before_delete')
+def _move_category_rollup(mapper, connection, category):
+    """Перед видаленням категорії її агрегати переходять у "без категорії" (як і транзакції)"""
+    R = TransactionDailyRollup
+    connection.execute(update(R).where(R.category_id == category.id).values(category_id=None))
+
+@event.listens_for(OrmSession, 'after_flush')
+def _update_rollup_after_flush(session, flush_context):
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+        apply_budget_deltas(session, deltas)
+
+def rebuild_daily_rollup(connection, user_id=None):
+    """Перераховує агрегати з таблиці transactions і архіву (для всіх або одного користувача)"""
+    R = TransactionDailyRollup
+    clear = delete(R)
+    if user_id is not None:
+        clear = clear.where(R.user_id == user_id)
+    connection.execute(clear)
+
+    day = func.date(Transaction.transaction_date)
+    source = select(
+            Transaction.user_id, day, Transaction.type, Transaction.category_id, Transaction.account_id,
+            func.sum(Transaction.amount), func.count(Transaction.id)
+        )\
+        .where(Transaction.user_id.isnot(None), Transaction.transaction_date.isnot(None))\
+        .group_by(Transaction.user_id, day, Transaction.type, Transaction.category_id, Transaction.account_id)
+    if user_id is not None:
+        source = source.where(Transaction.user_id == user_id)
+
+    result = connection.execute(insert(R).from_select(
+        ['user_id', 'day', 'type', 'category_id', 'account_id', 'total', 'count'], source
+    ))
+
+    # Транзакції, перенесені в архів, теж входять в агрегати
+    from database.archive import archived_rollup_rows
+    archived = rollup_deltas_for_rows(archived_rollup_rows(user_id))
+    if archived:
+        apply_rollup_deltas(connection, archived)
+    return result.rowcount + len(archived)
+
+if __name__ == "__main__":
+    from database.engine import engine
+
+    logging.basicConfig(level=logging.INFO)
+    target_user = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    TransactionDailyRollup.__table__.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        rows = rebuild_daily_rollup(connection, target_user)
+    logger.info(f"✅ Денні агрегати перебудовано: {rows} рядків")
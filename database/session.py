@@ -1,22 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from database.config import DATABASE_URL
+from database.engine import engine
+from database.models import Session
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Створюємо двигун бази даних з оптимізацією для продакшену
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=False  # Вимикаємо SQL логування для продакшену
-)
-
-# Створюємо фабрику сесій
-Session = sessionmaker(bind=engine)
+# Двигун і фабрика сесій спільні з database.models — окремого пулу тут немає.
+# Налаштування пулу задаються змінними середовища DB_POOL_* (database/config.py)
 
 def init_db():
     """Ініціалізація бази даних"""
@@ -34,6 +23,10 @@ def init_db():
         run_migrations()
         logger.info("Міграції виконано успішно")
         
+        # Набір дефолтних категорій для нових користувачів тримаємо в пам'яті
+        from database.db_operations import load_default_categories
+        load_default_categories()
+        
     except Exception as e:
         logger.error(f"Помилка ініціалізації бази даних: {e}")
         raise 
\ No newline at end of file
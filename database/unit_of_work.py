@@ -0,0 +1,201 @@
+"""
+Одна сесія БД на одне оновлення Telegram (unit of work).
+
+Без цього кожна функція db_operations відкриває власну Session(), і один
+обробник створює 4–8 сесій. UnitOfWorkUpdateProcessor обгортає обробку
+кожного Update: поки вона триває, поточний UnitOfWork доступний через
+contextvar, а _run_in_session (синхронний і асинхронний), BudgetManager та
+FinancialReport беруть сесію з нього. Сесії створюються ліниво — оновлення,
+що не звертаються до БД, з'єднання не займають.
+
+Транзакціями керує лише UnitOfWork: операції в його сесії викликають
+commit_session, що робить тільки flush, а фіксує зміни UnitOfWork, коли
+завершується зовнішня операція (session_scope або асинхронний
+_run_in_session), і відкочує їх, якщо операція впала. Після кожної
+операції з'єднання повертається в пул, тож обробник не тримає його, поки
+чекає на Telegram чи інші мережеві виклики. Наприкінці оновлення
+UnitOfWork фіксує залишок (FinancialReport читає без session_scope) або
+відкочує його, якщо обробник завершився помилкою.
+
+Поза оновленням (скрипти, тести, фонові задачі) все працює як раніше:
+session_scope і acquire_session дають нову сесію, commit_session робить
+commit, а release_session (або вихід з session_scope) закриває сесію.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from telegram.ext import SimpleUpdateProcessor
+
+from database.query_stats import track_update, describe_update
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('unit_of_work', default=None)
+
+class UnitOfWork:
+    """Синхронна та асинхронна сесії одного оновлення"""
+
+    def __init__(self):
+        self._session = None
+        self._async_session = None
+        self._depth = 0
+        self.rollback_only = False
+
+    def session(self, factory):
+        """Синхронна сесія оновлення; створюється factory() під час першого звернення"""
+        if self._session is None:
+            self._session = factory()
+            # Операції фіксуються по одній, а їхні результати використовуються й після коміту
+            self._session.expire_on_commit = False
+        return self._session
+
+    def async_session(self, factory):
+        """Асинхронна сесія оновлення; створюється factory() під час першого звернення"""
+        if self._async_session is None:
+            self._async_session = factory()
+        return self._async_session
+
+    def owns(self, session):
+        """Чи належить сесія оновленню (для асинхронної — її синхронна сесія з run_sync)"""
+        if session is None:
+            return False
+        return session is self._session or (
+            self._async_session is not None and session is self._async_session.sync_session
+        )
+
+    @contextmanager
+    def operation(self, factory):
+        """Синхронна сесія оновлення на час однієї операції.
+
+        Коли завершується зовнішня операція, зміни фіксуються; виняток на
+        будь-якому рівні відкочує транзакцію, щоб сесія лишалась придатною.
+        """
+        session = self.session(factory)
+        self._depth += 1
+        try:
+            yield session
+        except BaseException:
+            self._depth -= 1
+            session.rollback()
+            raise
+        self._depth -= 1
+        if not self._depth:
+            session.commit()
+
+    @asynccontextmanager
+    async def async_operation(self, factory):
+        """Асинхронна сесія оновлення на час однієї операції (commit після неї, rollback при винятку)"""
+        session = self.async_session(factory)
+        try:
+            yield session
+        except BaseException:
+            await session.rollback()
+            raise
+        await session.commit()
+
+    async def finish(self, commit=True):
+        """Фіксує (або відкочує) і закриває сесії оновлення"""
+        session, async_session = self._session, self._async_session
+        self._session = self._async_session = None
+        try:
+            # Синхронна сесія блокує на мережевому запиті — виконуємо його в пулі потоків,
+            # щоб не зупиняти цикл подій (contextvars, а з ними і query_stats, копіюються)
+            if commit:
+                if session is not None:
+                    await asyncio.to_thread(session.commit)
+                if async_session is not None:
+                    await async_session.commit()
+            else:
+                if session is not None:
+                    await asyncio.to_thread(session.rollback)
+                if async_session is not None:
+                    await async_session.rollback()
+        finally:
+            if session is not None:
+                await asyncio.to_thread(session.close)
+            if async_session is not None:
+                await async_session.close()
+
+def current_unit_of_work():
+    """UnitOfWork поточного оновлення або None поза ним"""
+    return _current.get()
+
+@asynccontextmanager
+async def unit_of_work():
+    """Відкриває UnitOfWork на час блоку; commit при успіху, rollback при помилці"""
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        try:
+            yield uow
+        except BaseException:
+            await uow.finish(commit=False)
+            raise
+        await uow.finish(commit=not uow.rollback_only)
+    finally:
+        _current.reset(token)
+
+def acquire_session(factory=None):
+    """Сесія поточного оновлення або нова сесія, якщо оновлення немає"""
+    if factory is None:
+        from database.models import Session as factory
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.session(factory)
+    return factory()
+
+def release_session(session):
+    """Закриває сесію, якщо вона не належить поточному оновленню"""
+    uow = current_unit_of_work()
+    if uow is None or not uow.owns(session):
+        session.close()
+
+@contextmanager
+def session_scope(factory=None):
+    """Сесія для однієї операції: в оновленні її фіксує UnitOfWork, поза ним сесія закривається"""
+    if factory is None:
+        from database.models import Session as factory
+    uow = current_unit_of_work()
+    if uow is not None:
+        with uow.operation(factory) as session:
+            yield session
+        return
+    session = factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+def commit_session(session):
+    """Завершує зміни операції: у сесії оновлення лише flush (фіксує UnitOfWork), інакше commit"""
+    uow = current_unit_of_work()
+    if uow is not None and uow.owns(session):
+        session.flush()
+    else:
+        session.commit()
+
+class UnitOfWorkUpdateProcessor(SimpleUpdateProcessor):
+    """Обробляє кожне оновлення всередині unit_of_work() і рахує його запити (query_stats).
+
+    З max_concurrent_updates=1 (за замовчуванням) порядок обробки такий самий,
+    як у стандартного процесора python-telegram-bot.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, max_concurrent_updates=1):
+        super().__init__(max_concurrent_updates)
+
+    async def do_process_update(self, update, coroutine):
+        with track_update(describe_update(update)):
+            async with unit_of_work():
+                await coroutine
+
+async def rollback_on_error(update, context):
+    """Обробник помилок: незафіксовані зміни оновлення, в якому впав обробник, відкочуються"""
+    logger.error("Помилка під час обробки оновлення", exc_info=context.error)
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.rollback_only = True
@@ -7,7 +7,7 @@ from datetime import datetime
 from datetime import datetime
 import logging
 
-from database.db_operations import get_or_create_user, get_user_accounts, get_total_balance, get_accounts_count, create_account, transfer_between_accounts
+from database.async_db_operations import get_or_create_user, get_user_accounts, get_total_balance, get_accounts_count, create_account, transfer_between_accounts
 from database.models import AccountType
 
 logger = logging.getLogger(__name__)
@@ -15,11 +15,11 @@ logger = logging.getLogger(__name__)
 async def show_accounts_menu(query, context):
     """Показує головне меню управління рахунками"""
     try:
-        user = get_or_create_user(query.from_user.id)
+        user = await get_or_create_user(query.from_user.id)
         
         # Отримуємо рахунки користувача
-        accounts_count = get_accounts_count(user.id)
-        total_balance = get_total_balance(user.id)
+        accounts_count = await get_accounts_count(user.id)
+        total_balance = await get_total_balance(user.id)
         
         currency = user.currency or "UAH"
         currency_symbol = {"UAH": "₴", "USD": "$", "EUR": "€", "GBP": "£"}.get(currency, currency)
@@ -62,8 +62,8 @@ async def show_accounts_menu(query, context):
 async def show_accounts_list(query, context):
     """Показує список рахунків користувача"""
     try:
-        user = get_or_create_user(query.from_user.id)
-        accounts = get_user_accounts(user.id)
+        user = await get_or_create_user(query.from_user.id)
+        accounts = await get_user_accounts(user.id)
         
         currency = user.currency or "UAH"
         currency_symbol = {"UAH": "₴", "USD": "$", "EUR": "€", "GBP": "£"}.get(currency, currency)
@@ -161,8 +161,8 @@ async def show_add_account_form(query, context):
 
 async def show_account_transfer(query, context):
     """Показує форму для переказу між рахунками"""
-    user = get_or_create_user(query.from_user.id)
-    accounts = get_user_accounts(user.id)
+    user = await get_or_create_user(query.from_user.id)
+    accounts = await get_user_accounts(user.id)
     
     if len(accounts) < 2:
         message = "💸 **Переказ між рахунками**\n\n"
@@ -223,8 +223,8 @@ async def show_account_transfer(query, context):
 
 async def show_transfer_destination(query, context, from_account_id):
     """Показує список рахунків для вибору призначення переказу"""
-    user = get_or_create_user(query.from_user.id)
-    accounts = get_user_accounts(user.id)
+    user = await get_or_create_user(query.from_user.id)
+    accounts = await get_user_accounts(user.id)
     
     # Знаходимо рахунок-джерело
     from_account = next((acc for acc in accounts if acc.id == from_account_id), None)
@@ -278,8 +278,8 @@ async def show_transfer_destination(query, context, from_account_id):
 
 async def show_transfer_amount_input(query, context, from_account_id, to_account_id):
     """Показує форму для введення суми переказу"""
-    user = get_or_create_user(query.from_user.id)
-    accounts = get_user_accounts(user.id)
+    user = await get_or_create_user(query.from_user.id)
+    accounts = await get_user_accounts(user.id)
     
     from_account = next((acc for acc in accounts if acc.id == from_account_id), None)
     to_account = next((acc for acc in accounts if acc.id == to_account_id), None)
@@ -331,8 +331,8 @@ async def show_transfer_amount_input(query, context, from_account_id, to_account
 async def execute_transfer(query, context, from_account_id, to_account_id, amount):
     """Виконує переказ між рахунками"""
     try:
-        user = get_or_create_user(query.from_user.id)
-        accounts = get_user_accounts(user.id)
+        user = await get_or_create_user(query.from_user.id)
+        accounts = await get_user_accounts(user.id)
         
         from_account = next((acc for acc in accounts if acc.id == from_account_id), None)
         to_account = next((acc for acc in accounts if acc.id == to_account_id), None)
@@ -348,7 +348,7 @@ async def execute_transfer(query, context, from_account_id, to_account_id, amoun
             return
         
         # Виконуємо переказ
-        success, message_text = transfer_between_accounts(
+        success, message_text = await transfer_between_accounts(
             from_account_id=from_account_id,
             to_account_id=to_account_id,
             amount=amount,
@@ -360,7 +360,7 @@ async def execute_transfer(query, context, from_account_id, to_account_id, amoun
         
         if success:
             # Оновлюємо дані рахунків після переказу
-            updated_accounts = get_user_accounts(user.id)
+            updated_accounts = await get_user_accounts(user.id)
             updated_from = next((acc for acc in updated_accounts if acc.id == from_account_id), None)
             updated_to = next((acc for acc in updated_accounts if acc.id == to_account_id), None)
             
@@ -535,7 +535,7 @@ async def show_account_balance_input(query, context):
     account_name = account_data.get('name', 'Новий рахунок')
     icon = account_data.get('icon', '💳')
     
-    user = get_or_create_user(query.from_user.id)
+    user = await get_or_create_user(query.from_user.id)
     currency = user.currency or "UAH"
     currency_symbol = {"UAH": "₴", "USD": "$", "EUR": "€", "GBP": "£"}.get(currency, currency)
     
@@ -569,7 +569,7 @@ async def show_account_balance_input(query, context):
 async def create_account_with_balance(query, context, account_name, balance):
     """Створює рахунок з вказаною назвою та балансом"""
     try:
-        user = get_or_create_user(query.from_user.id)
+        user = await get_or_create_user(query.from_user.id)
         account_data = context.user_data.get('account_creation', {})
         
         # Мапимо типи з тих, що використовуються в UI, на AccountType з моделі
@@ -587,7 +587,7 @@ async def create_account_with_balance(query, context, account_name, balance):
         account_type = type_mapping.get(account_type_key, AccountType.OTHER)
         
         # Створюємо рахунок в базі даних
-        new_account = create_account(
+        new_account = await create_account(
             user_id=user.id,
             name=account_name,
             account_type=account_type,
@@ -799,8 +799,8 @@ async def handle_account_text_input(message, context):
                 return True
             
             # Перевіряємо доступний баланс
-            user = get_or_create_user(message.from_user.id)
-            accounts = get_user_accounts(user.id)
+            user = await get_or_create_user(message.from_user.id)
+            accounts = await get_user_accounts(user.id)
             from_account = next((acc for acc in accounts if acc.id == transfer_data.get('from_account_id')), None)
             
             if not from_account:
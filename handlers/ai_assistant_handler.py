@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ConversationHandler
 
-from database.db_operations import get_user_transactions, get_user
+from database.async_db_operations import get_transaction_rows, get_user
 from database.models import TransactionType
 from services.openai_service import OpenAIService
 from database.config import OPENAI_API_KEY
@@ -77,7 +77,7 @@ async def handle_ai_advice(query, context):
         )
         
         logger.debug("Getting user by telegram ID")
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             logger.warning(f"User not found for telegram ID: {query.from_user.id}")
             await query.edit_message_text(
@@ -96,7 +96,7 @@ async def handle_ai_advice(query, context):
         start_date = now - timedelta(days=30)
         logger.debug(f"Date range: {start_date} to {now}")
         
-        transactions = get_user_transactions(user.id, limit=1000, start_date=start_date, end_date=now)
+        transactions = await get_transaction_rows(user.id, limit=1000, start_date=start_date, end_date=now)
         logger.info(f"Retrieved {len(transactions)} transactions")
         
         if not transactions:
@@ -126,7 +126,7 @@ async def handle_ai_advice(query, context):
                 
                 # Детальне логування полів транзакції
                 logger.debug(f"Transaction attributes: {dir(t)}")
-                for attr in ['amount', 'transaction_date', 'category', 'type', 'description']:
+                for attr in ['amount', 'transaction_date', 'category_name', 'type', 'description']:
                     if hasattr(t, attr):
                         value = getattr(t, attr)
                         logger.debug(f"  {attr}: {value} (type: {type(value)})")
@@ -179,11 +179,8 @@ async def handle_ai_advice(query, context):
                 
                 # Безпечна обробка категорії
                 category_name = 'Без категорії'
-                if hasattr(t, 'category') and t.category:
-                    if hasattr(t.category, 'name'):
-                        category_name = t.category.name
-                    else:
-                        category_name = str(t.category)
+                if t.category_name:
+                    category_name = t.category_name
                 
                 # Безпечна обробка типу
                 transaction_type = 'expense'
@@ -262,7 +259,7 @@ async def handle_ai_forecast(query, context):
             "⏳ *Аналізую ваші фінансові паттерни*"
         )
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text(
                 "❌ Користувач не знайдений",
@@ -275,7 +272,7 @@ async def handle_ai_forecast(query, context):
         # Отримуємо транзакції за останні 60 днів для більш точного прогнозу
         now = datetime.now()
         start_date = now - timedelta(days=60)
-        transactions = get_user_transactions(user.id, limit=1000, start_date=start_date, end_date=now)
+        transactions = await get_transaction_rows(user.id, limit=1000, start_date=start_date, end_date=now)
         
         if len(transactions) < 5:
             await query.edit_message_text(
@@ -328,7 +325,7 @@ async def handle_ai_forecast(query, context):
                 
                 transaction_data.append({
                     'amount': amount,
-                    'category': t.category.name if t.category else 'Без категорії',
+                    'category': t.category_name or 'Без категорії',
                     'type': 'expense' if t.type == TransactionType.EXPENSE else 'income',
                     'date': date_str,
                     'description': t.description or ''
@@ -414,7 +411,7 @@ async def handle_ai_question(update, context):
     """Обробляє кастомне питання до AI"""
     try:
         user_question = update.message.text
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         
         if not user:
             await update.message.reply_text(
@@ -434,7 +431,7 @@ async def handle_ai_question(update, context):
         # Отримуємо транзакції для контексту
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, limit=1000, start_date=start_date, end_date=now)
+        transactions = await get_transaction_rows(user.id, limit=1000, start_date=start_date, end_date=now)
         
         # Підготовляємо дані
         transaction_data = []
@@ -474,7 +471,7 @@ async def handle_ai_question(update, context):
                 
                 transaction_data.append({
                     'amount': amount,
-                    'category': t.category.name if t.category else 'Без категорії',
+                    'category': t.category_name or 'Без категорії',
                     'type': 'expense' if t.type == TransactionType.EXPENSE else 'income',
                     'date': date_str,
                     'description': t.description or ''
@@ -16,7 +16,7 @@ import io
 import matplotlib.pyplot as plt
 import numpy as np
 
-from database.db_operations import get_user, get_monthly_stats, get_user_transactions, get_user_categories
+from database.async_db_operations import get_user, get_monthly_stats, get_transaction_rows, get_transaction_frame, get_user_categories, get_period_summary, compare_periods
 from database.models import TransactionType
 from services.financial_advisor import get_financial_advice
 # Нові імпорти для розширеної аналітики
@@ -31,7 +31,7 @@ logger = logging.getLogger(__name__)
 async def show_analytics_main_menu(query, context):
     """Показує головне меню аналітики з інформацією про доступні опції"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -113,7 +113,7 @@ async def show_expense_statistics(query, context):
 async def show_period_statistics(query, context, period_type, chart_type=None):
     """Показує статистику за обраний період з опціональними графіками"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -142,30 +142,14 @@ async def show_period_statistics(query, context, period_type, chart_type=None):
             start_date = now - timedelta(days=30)
             period_name = "останні 30 днів"
         
-        # Отримуємо транзакції за період
-        transactions = get_user_transactions(
-            user.id,
-            limit=1000,
-            start_date=start_date,
-            end_date=now
-        )
+        # Підсумки за період з денних агрегатів
+        summary = await get_period_summary(user.id, start_date, now, from_replica=True)
+        total_income = summary['income']
+        total_expenses = summary['expenses']
+        balance = summary['balance']
         
-        # Розраховуємо статистику
-        total_income = sum(t.amount for t in transactions if t.type == TransactionType.INCOME)
-        total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
-        balance = total_income - total_expenses
-        
-        # Статистика по категоріях
-        categories_stats = {}
-        for transaction in transactions:
-            if transaction.type == TransactionType.EXPENSE and getattr(transaction, 'category_name', None):
-                cat_name = transaction.category_name
-                if cat_name not in categories_stats:
-                    categories_stats[cat_name] = 0
-                categories_stats[cat_name] += transaction.amount
-        
-        # Сортуємо категорії за сумою
-        sorted_categories = sorted(categories_stats.items(), key=lambda x: x[1], reverse=True)
+        # Категорії вже відсортовані за сумою
+        sorted_categories = [(c['name'], c['amount']) for c in summary['expense_categories']]
         
         # Формуємо текст статистики
         text = f"📈 **Статистика за {period_name}**\n\n"
@@ -185,7 +169,7 @@ async def show_period_statistics(query, context, period_type, chart_type=None):
                 percentage = (amount / total_expenses * 100) if total_expenses > 0 else 0
                 text += f"{i}. {category}: `{amount:.2f} грн` ({percentage:.1f}%)\n"
         
-        text += f"\n📊 Всього операцій: {len(transactions)}"
+        text += f"\n📊 Всього операцій: {summary['transactions_count']}"
         
         # Додаємо кнопки для графіків і розподілу
         keyboard = [
@@ -244,7 +228,7 @@ async def show_period_statistics(query, context, period_type, chart_type=None):
 async def show_ai_recommendations(query, context):
     """Показує AI рекомендації"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -252,7 +236,7 @@ async def show_ai_recommendations(query, context):
         # Отримуємо дані для аналізу
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date, now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         # Формуємо запит до AI
         total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
@@ -261,8 +245,8 @@ async def show_ai_recommendations(query, context):
         # Категорії витрат
         expense_categories = {}
         for t in transactions:
-            if t.type == TransactionType.EXPENSE and t.category:
-                cat = t.category.name
+            if t.type == TransactionType.EXPENSE and t.category_name:
+                cat = t.category_name
                 expense_categories[cat] = expense_categories.get(cat, 0) + t.amount
         
         # Отримуємо поради від AI
@@ -411,7 +395,7 @@ async def show_period_comparison(query, context):
 async def show_detailed_categories(query, context, period_type):
     """Показує детальний розподіл по категоріях"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -434,29 +418,18 @@ async def show_detailed_categories(query, context, period_type):
             start_date = now - timedelta(days=30)
             period_name = "30 днів"
         
-        # Отримуємо транзакції
-        transactions = get_user_transactions(user.id, start_date, now)
-        expense_transactions = [t for t in transactions if t.type == TransactionType.EXPENSE]
-        
-        # Групуємо по категоріях
-        categories_stats = {}
-        total_expenses = 0
-        for transaction in expense_transactions:
-            if transaction.category:
-                cat_name = transaction.category.name
-                cat_icon = getattr(transaction.category, 'icon', '💸')
-                if cat_name not in categories_stats:
-                    categories_stats[cat_name] = {'amount': 0, 'count': 0, 'icon': cat_icon}
-                categories_stats[cat_name]['amount'] += transaction.amount
-                categories_stats[cat_name]['count'] += 1
-                total_expenses += transaction.amount
-        
-        # Сортуємо по сумі
-        sorted_categories = sorted(categories_stats.items(), key=lambda x: x[1]['amount'], reverse=True)
+        # Витрати по категоріях з денних агрегатів (вже відсортовані за сумою)
+        summary = await get_period_summary(user.id, start_date, now, from_replica=True)
+        sorted_categories = [
+            (c['name'], {'amount': c['amount'], 'count': c['count'], 'icon': c['icon'] or '💸'})
+            for c in summary['expense_categories']
+        ]
+        total_expenses = sum(stats['amount'] for _, stats in sorted_categories)
+        expense_count = sum(stats['count'] for _, stats in sorted_categories)
         
         text = f"📊 **Розподіл по категоріях ({period_name})**\n\n"
         text += f"💸 *Загальні витрати:* `{total_expenses:.2f} грн`\n"
-        text += f"📋 *Операцій:* {len(expense_transactions)}\n\n"
+        text += f"📋 *Операцій:* {expense_count}\n\n"
         
         if sorted_categories:
             for i, (category, stats) in enumerate(sorted_categories[:10], 1):
@@ -499,7 +472,7 @@ async def show_detailed_categories(query, context, period_type):
 async def show_top_transactions(query, context, period_type):
     """Показує топ операцій за період"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -522,24 +495,11 @@ async def show_top_transactions(query, context, period_type):
             start_date = now - timedelta(days=30)
             period_name = "30 днів"
         
-        # Отримуємо транзакції
-        transactions = get_user_transactions(user.id, start_date, now)
-        
-        # Розділяємо на доходи та витрати
-        expenses = [t for t in transactions if t.type == TransactionType.EXPENSE]
-        incomes = [t for t in transactions if t.type == TransactionType.INCOME]
-        
-        # Сортуємо за сумою
-        top_expenses = sorted(expenses, key=lambda x: x.amount, reverse=True)[:5]
-        top_incomes = sorted(incomes, key=lambda x: x.amount, reverse=True)[:5]
-        
-        # Аналіз найактивніших днів
-        daily_counts = {}
-        for t in transactions:
-            date_key = t.transaction_date.strftime("%Y-%m-%d")
-            daily_counts[date_key] = daily_counts.get(date_key, 0) + 1
-        
-        most_active_days = sorted(daily_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+        # Найбільші операції та найактивніші дні рахує БД (ORDER BY … LIMIT)
+        summary = await get_period_summary(user.id, start_date, now, top=5, from_replica=True)
+        top_expenses = summary['top_expenses']
+        top_incomes = summary['top_incomes']
+        most_active_days = summary['busiest_days'][:3]
         
         text = f"🏆 **Топ операцій ({period_name})**\n\n"
         
@@ -548,7 +508,7 @@ async def show_top_transactions(query, context, period_type):
             text += "💸 *5 найбільших витрат:*\n"
             for i, transaction in enumerate(top_expenses, 1):
                 date_str = transaction.transaction_date.strftime("%d.%m")
-                category = transaction.category.name if transaction.category else "Без категорії"
+                category = transaction.category_name or "Без категорії"
                 desc = transaction.description[:20] + "..." if len(transaction.description) > 20 else transaction.description
                 text += f"{i}. `{transaction.amount:.2f} грн` — {category}\n"
                 text += f"   📅 {date_str} | {desc}\n\n"
@@ -558,7 +518,7 @@ async def show_top_transactions(query, context, period_type):
             text += "💰 *5 найбільших доходів:*\n"
             for i, transaction in enumerate(top_incomes, 1):
                 date_str = transaction.transaction_date.strftime("%d.%m")
-                category = transaction.category.name if transaction.category else "Без категорії"
+                category = transaction.category_name or "Без категорії"
                 desc = transaction.description[:20] + "..." if len(transaction.description) > 20 else transaction.description
                 text += f"{i}. `{transaction.amount:.2f} грн` — {category}\n"
                 text += f"   📅 {date_str} | {desc}\n\n"
@@ -566,8 +526,7 @@ async def show_top_transactions(query, context, period_type):
         # Найактивніші дні
         if most_active_days:
             text += "📈 *Найактивніші дні:*\n"
-            for date_str, count in most_active_days:
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+            for date_obj, count in most_active_days:
                 formatted_date = date_obj.strftime("%d.%m.%Y")
                 weekday = calendar.day_name[date_obj.weekday()]
                 text += f"📅 {formatted_date} ({weekday[:3]}) — {count} операцій\n"
@@ -604,7 +563,7 @@ async def show_top_transactions(query, context, period_type):
 async def show_ai_savings_tips(query, context):
     """Показує AI поради з економії"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -612,14 +571,14 @@ async def show_ai_savings_tips(query, context):
         # Отримуємо дані за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date, now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         # Аналізуємо категорії витрат
         categories_stats = {}
         total_expenses = 0
         for t in transactions:
-            if t.type == TransactionType.EXPENSE and t.category:
-                cat_name = t.category.name
+            if t.type == TransactionType.EXPENSE and t.category_name:
+                cat_name = t.category_name
                 categories_stats[cat_name] = categories_stats.get(cat_name, 0) + t.amount
                 total_expenses += t.amount
         
@@ -895,7 +854,7 @@ async def show_export_settings(query, context):
 async def show_ai_analysis_for_period(query, context, period_type):
     """Показує AI аналіз для обраного періоду"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -919,7 +878,7 @@ async def show_ai_analysis_for_period(query, context, period_type):
             period_name = "30 днів"
 
         # Отримуємо транзакції
-        transactions = get_user_transactions(user.id, start_date, now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         # Формуємо AI аналіз
         total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
@@ -940,8 +899,8 @@ async def show_ai_analysis_for_period(query, context, period_type):
         # Аналіз категорій
         categories_analysis = {}
         for transaction in transactions:
-            if transaction.type == TransactionType.EXPENSE and transaction.category:
-                cat_name = transaction.category.name
+            if transaction.type == TransactionType.EXPENSE and transaction.category_name:
+                cat_name = transaction.category_name
                 if cat_name not in categories_analysis:
                     categories_analysis[cat_name] = []
                 categories_analysis[cat_name].append(transaction.amount)
@@ -997,54 +956,52 @@ async def show_ai_analysis_for_period(query, context, period_type):
 
 # ==================== ПОРІВНЯННЯ ПЕРІОДІВ ДЕТАЛЬНО ====================
 
-async def show_period_comparison_detail(query, context, period_type):
+async def show_period_comparison_detail(query, context, period_type="month"):
     """Детальне порівняння періодів"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
 
         now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Визначаємо поточний та попередній періоди
+        # Визначаємо поточний та попередній періоди (цілими днями)
         if period_type == "week":
-            # Поточний тиждень - останні 7 днів
-            current_start = (now - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
-            current_end = now
-            # Попередній тиждень - 7 днів перед поточним
-            prev_start = (now - timedelta(days=13)).replace(hour=0, minute=0, second=0, microsecond=0)
-            prev_end = (now - timedelta(days=7)).replace(hour=23, minute=59, second=59, microsecond=999999)
+            # Останні 7 днів і 7 днів перед ними
+            current_start, current_end = today - timedelta(days=6), now
+            prev_start, prev_end = today - timedelta(days=13), today - timedelta(days=7)
             period_name = "7 днів"
         elif period_type == "month":
-            current_start = now.replace(day=1)
-            current_end = now
-            # Попередній місяць
-            if now.month == 1:
-                prev_start = now.replace(year=now.year-1, month=12, day=1)
-                prev_end = now.replace(day=1) - timedelta(days=1)
-            else:
-                prev_start = now.replace(month=now.month-1, day=1)
-                # Останній день попереднього місяця
-                prev_end = now.replace(day=1) - timedelta(days=1)
+            # Поточний місяць і весь попередній місяць
+            current_start, current_end = today.replace(day=1), now
+            prev_end = current_start - timedelta(days=1)
+            prev_start = prev_end.replace(day=1)
             period_name = "місяць"
+        elif period_type == "quarter":
+            # Поточний квартал і весь попередній квартал
+            current_start, current_end = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1), now
+            prev_end = current_start - timedelta(days=1)
+            prev_start = prev_end.replace(month=(prev_end.month - 1) // 3 * 3 + 1, day=1)
+            period_name = "квартал"
+        elif period_type == "year":
+            # Рік до року: з початку року по сьогодні і той самий відрізок минулого року
+            current_start, current_end = today.replace(month=1, day=1), now
+            prev_start = current_start.replace(year=today.year - 1)
+            prev_end = today.replace(year=today.year - 1, day=28 if (today.month, today.day) == (2, 29) else today.day)
+            period_name = "рік"
         else:  # 30 днів
-            current_start = now - timedelta(days=30)
-            current_end = now
-            prev_start = now - timedelta(days=60)
-            prev_end = now - timedelta(days=30)
+            current_start, current_end = today - timedelta(days=29), now
+            prev_start, prev_end = today - timedelta(days=59), today - timedelta(days=30)
             period_name = "30 днів"
         
-        # Отримуємо транзакції для обох періодів
-        current_transactions = get_user_transactions(user.id, current_start, current_end)
-        prev_transactions = get_user_transactions(user.id, prev_start, prev_end)
-        
-        # Розраховуємо статистику
-        current_income = sum(t.amount for t in current_transactions if t.type == TransactionType.INCOME)
-        current_expenses = sum(t.amount for t in current_transactions if t.type == TransactionType.EXPENSE)
-        
-        prev_income = sum(t.amount for t in prev_transactions if t.type == TransactionType.INCOME)
-        prev_expenses = sum(t.amount for t in prev_transactions if t.type == TransactionType.EXPENSE)
+        # Обидва періоди одним запитом до денних агрегатів
+        current, previous = await compare_periods(
+            user.id, [(current_start, current_end), (prev_start, prev_end)], top=3, from_replica=True
+        )
+        current_income, current_expenses = current['income'], current['expenses']
+        prev_income, prev_expenses = previous['income'], previous['expenses']
         
         # Розраховуємо зміни
         income_change = current_income - prev_income
@@ -1069,6 +1026,16 @@ async def show_period_comparison_detail(query, context, period_type):
         text += f"Попередній: `{prev_expenses:.2f} грн`\n"
         text += f"Зміна: {expenses_emoji} `{expenses_change:+.2f} грн ({expenses_change_percent:+.1f}%)`\n\n"
         
+        if current['top_categories']:
+            previous_amounts = {c['name']: c['amount'] for c in previous['top_categories']}
+            text += f"🏆 **ТОП КАТЕГОРІЙ ВИТРАТ:**\n"
+            for i, category in enumerate(current['top_categories'], 1):
+                text += f"{i}. {category['icon'] or '💸'} {category['name']}: `{category['amount']:.2f} грн`"
+                if category['name'] in previous_amounts:
+                    text += f" (було `{previous_amounts[category['name']]:.2f} грн`)"
+                text += "\n"
+            text += "\n"
+        
         # Висновки
         text += f"📝 **ВИСНОВКИ:**\n"
         if income_change > 0 and expenses_change < 0:
@@ -1153,7 +1120,7 @@ async def show_category_limits_settings(query, context):
 async def show_ai_budget_planning(query, context):
     """AI планування бюджету"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1161,15 +1128,15 @@ async def show_ai_budget_planning(query, context):
         # Отримуємо історію за останні 3 місяці для аналізу
         end_date = datetime.now()
         start_date = end_date - timedelta(days=90)
-        transactions = get_user_transactions(user.id, start_date, end_date)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=end_date, from_replica=True)
         
         # Аналізуємо середні витрати по категоріях
         monthly_averages = {}
         total_months = 3
         
         for transaction in transactions:
-            if transaction.type == TransactionType.EXPENSE and transaction.category:
-                cat_name = transaction.category.name
+            if transaction.type == TransactionType.EXPENSE and transaction.category_name:
+                cat_name = transaction.category_name
                 if cat_name not in monthly_averages:
                     monthly_averages[cat_name] = 0
                 monthly_averages[cat_name] += transaction.amount
@@ -1328,7 +1295,7 @@ async def show_analytics_visualizations(query, context):
 async def show_spending_heatmap(query, context):
     """Показує теплову карту витрат"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1336,17 +1303,8 @@ async def show_spending_heatmap(query, context):
         # Отримуємо транзакції за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-        
-        # Підготовка даних для теплової карти
-        transaction_data = [
-            {
-                'transaction_date': t.transaction_date,
-                'amount': t.amount,
-                'type': t.type.value
-            }
-            for t in transactions
-        ]
+        # Транзакції колонками з кешу кадрів (database/frame_cache.py)
+        transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
         
         # Створюємо теплову карту
         heatmap_buffer = advanced_analytics.create_spending_heatmap(transaction_data)
@@ -1372,7 +1330,7 @@ async def show_spending_heatmap(query, context):
 async def show_cash_flow_chart(query, context):
     """Показує графік грошового потоку"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1380,17 +1338,8 @@ async def show_cash_flow_chart(query, context):
         # Отримуємо транзакції за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-        
-        # Підготовка даних
-        transaction_data = [
-            {
-                'transaction_date': t.transaction_date,
-                'amount': t.amount,
-                'type': t.type.value
-            }
-            for t in transactions
-        ]
+        # Транзакції колонками з кешу кадрів (database/frame_cache.py)
+        transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
         
         if not transaction_data:
             await query.edit_message_text(
@@ -1465,7 +1414,7 @@ async def show_analytics_trends(query, context):
 async def show_trends_analysis(query, context):
     """Показує детальний аналіз трендів"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1473,18 +1422,8 @@ async def show_trends_analysis(query, context):
         # Отримуємо транзакції за останні 60 днів для аналізу
         now = datetime.now()
         start_date = now - timedelta(days=60)
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-        
-        # Підготовка даних
-        transaction_data = [
-            {
-                'transaction_date': t.transaction_date,
-                'amount': t.amount,
-                'type': t.type.value,
-                'category_name': t.category.name if t.category else 'Без категорії'
-            }
-            for t in transactions
-        ]
+        # Транзакції колонками з кешу кадрів (database/frame_cache.py)
+        transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
         
         # Аналізуємо тренди
         trends_result = trend_analyzer.analyze_spending_trends(transaction_data)
@@ -1574,7 +1513,7 @@ async def show_trends_analysis(query, context):
 async def show_financial_health_score(query, context):
     """Показує оцінку фінансового здоров'я"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1582,24 +1521,20 @@ async def show_financial_health_score(query, context):
         # Отримуємо транзакції за останній місяць
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
+        frame = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
+        incomes = frame.of_type(TransactionType.INCOME)
+        expenses = frame.of_type(TransactionType.EXPENSE)
         
         # Підготовка даних для аналізу
-        total_income = sum(t.amount for t in transactions if t.type == TransactionType.INCOME)
-        total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
+        total_income = float(incomes.amounts.sum())
+        total_expenses = float(expenses.amounts.sum())
         
         # Щоденні витрати для аналізу стабільності
-        daily_expenses = {}
-        for t in transactions:
-            if t.type == TransactionType.EXPENSE:
-                date_key = t.transaction_date.strftime("%Y-%m-%d")
-                daily_expenses[date_key] = daily_expenses.get(date_key, 0) + t.amount
+        days, day_index = np.unique(expenses.dates.astype('datetime64[D]'), return_inverse=True)
+        daily_expenses = np.bincount(day_index, weights=expenses.amounts, minlength=len(days))
         
         # Джерела доходів
-        income_sources = []
-        for t in transactions:
-            if t.type == TransactionType.INCOME and t.category:
-                income_sources.append(t.category.name)
+        income_sources = incomes.category_labels()[incomes.categories >= 0].tolist()
         
         user_data = {
             "total_income": total_income,
@@ -1607,7 +1542,7 @@ async def show_financial_health_score(query, context):
             "monthly_income": total_income,
             "monthly_expenses": total_expenses,
             "monthly_budget": user.monthly_budget,
-            "daily_expenses": list(daily_expenses.values()),
+            "daily_expenses": daily_expenses.tolist(),
             "income_sources": income_sources
         }
         
@@ -1686,7 +1621,7 @@ async def show_financial_health_score(query, context):
 async def show_personal_insights(query, context):
     """Показує персональні інсайти"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1694,18 +1629,8 @@ async def show_personal_insights(query, context):
         # Отримуємо транзакції за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date, now)
-        
-        # Підготовка даних
-        transaction_data = [
-            {
-                'transaction_date': t.transaction_date,
-                'amount': t.amount,
-                'type': t.type.value,
-                'category_name': t.category.name if t.category else 'Без категорії'
-            }
-            for t in transactions
-        ]
+        # Транзакції колонками з кешу кадрів (database/frame_cache.py)
+        transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
         
         # Генеруємо інсайти
         insights = insights_engine.generate_spending_insights(transaction_data, period_days=30)
@@ -1767,7 +1692,7 @@ async def show_personal_insights(query, context):
 async def show_analytics_detailed(query, context):
     """Показує корисну статистику з висновками та порадами"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1775,7 +1700,7 @@ async def show_analytics_detailed(query, context):
         # Аналіз за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         # Базова статистика
         total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
@@ -1785,8 +1710,8 @@ async def show_analytics_detailed(query, context):
         # Аналіз категорій
         category_expenses = {}
         for t in transactions:
-            if t.type == TransactionType.EXPENSE and t.category:
-                cat_name = t.category.name
+            if t.type == TransactionType.EXPENSE and t.category_name:
+                cat_name = t.category_name
                 category_expenses[cat_name] = category_expenses.get(cat_name, 0) + t.amount
         
         # Топ категорія
@@ -1799,7 +1724,7 @@ async def show_analytics_detailed(query, context):
         # Аналіз тенденцій (порівняння з попередніми 30 днями)
         prev_start = start_date - timedelta(days=30)
         prev_end = start_date
-        prev_transactions = get_user_transactions(user.id, start_date=prev_start, end_date=prev_end)
+        prev_transactions = await get_transaction_rows(user.id, start_date=prev_start, end_date=prev_end, from_replica=True)
         prev_expenses = sum(t.amount for t in prev_transactions if t.type == TransactionType.EXPENSE)
         
         # Розрахунок тренду
@@ -1970,7 +1895,7 @@ async def show_analytics_charts(query, context):
 async def show_analytics_insights_simple(query, context):
     """Показує прості та корисні поради на основі аналізу"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -1978,7 +1903,7 @@ async def show_analytics_insights_simple(query, context):
         # Отримуємо дані за останній місяць
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date, now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         if not transactions:
             await query.edit_message_text(
@@ -1994,8 +1919,8 @@ async def show_analytics_insights_simple(query, context):
         # Аналіз категорій
         category_totals = {}
         for t in transactions:
-            if t.type == TransactionType.EXPENSE and t.category:
-                cat_name = t.category.name
+            if t.type == TransactionType.EXPENSE and t.category_name:
+                cat_name = t.category_name
                 category_totals[cat_name] = category_totals.get(cat_name, 0) + t.amount
         
         insights = []
@@ -2071,7 +1996,7 @@ async def show_analytics_insights_simple(query, context):
 async def show_analytics_forecast(query, context):
     """Показує простий прогноз витрат"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -2079,7 +2004,7 @@ async def show_analytics_forecast(query, context):
         # Отримуємо дані за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date, now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         expense_transactions = [t for t in transactions if t.type == TransactionType.EXPENSE]
         
@@ -2317,7 +2242,7 @@ async def show_chart_period_selection(query, context, chart_type, data_type):
 async def generate_simple_chart(query, context, chart_type, data_type, period):
     """Генерує простий та зрозумілий графік"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             try:
                 await query.edit_message_text("❌ Користувач не знайдений")
@@ -2338,7 +2263,7 @@ async def generate_simple_chart(query, context, chart_type, data_type, period):
             period_name = "Останні 30 днів"
         
         # Отримуємо транзакції
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         if not transactions:
             try:
@@ -2420,7 +2345,7 @@ async def generate_simple_chart(query, context, chart_type, data_type, period):
             if chart_type == "pie":
                 # Розрахуємо деякі цікаві факти для кругової діаграми
                 total_amount = sum(abs(t.amount) for t in filtered_transactions)
-                num_categories = len(set(t.category.name if t.category else "Без категорії" for t in filtered_transactions))
+                num_categories = len(set(t.category_name or "Без категорії" for t in filtered_transactions))
                 
                 if data_type == "expenses":
                     caption_text = (
@@ -2504,7 +2429,7 @@ async def create_pie_chart(transactions, data_type, title):
     category_totals = {}
     
     for transaction in transactions:
-        category_name = transaction.category.name if transaction.category else "Без категорії"
+        category_name = transaction.category_name or "Без категорії"
         category_totals[category_name] = category_totals.get(category_name, 0) + abs(transaction.amount)
     
     if not category_totals:
@@ -2713,7 +2638,7 @@ async def create_bar_chart(transactions, data_type, title, period):
         category_totals = {}
         
         for transaction in transactions:
-            category_name = transaction.category.name if transaction.category else "Без категорії"
+            category_name = transaction.category_name or "Без категорії"
             category_totals[category_name] = category_totals.get(category_name, 0) + abs(transaction.amount)
         
         if not category_totals:
@@ -2793,7 +2718,7 @@ async def create_bar_chart(transactions, data_type, title, period):
 async def generate_pdf_report(query, context):
     """Генерує повний PDF звіт з фінансовою аналітикою"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -2811,7 +2736,7 @@ async def generate_pdf_report(query, context):
         # Збираємо дані за останні 30 днів
         now = datetime.now()
         start_date = now - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
+        transactions = await get_transaction_rows(user.id, start_date=start_date, end_date=now, from_replica=True)
         
         # Базова статистика
         total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
@@ -2821,8 +2746,8 @@ async def generate_pdf_report(query, context):
         # Аналіз категорій
         category_expenses = {}
         for t in transactions:
-            if t.type == TransactionType.EXPENSE and t.category:
-                cat_name = t.category.name
+            if t.type == TransactionType.EXPENSE and t.category_name:
+                cat_name = t.category_name
                 category_expenses[cat_name] = category_expenses.get(cat_name, 0) + t.amount
         
         # Створюємо PDF документ
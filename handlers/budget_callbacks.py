@@ -1,9 +1,12 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import datetime
+import asyncio
 import calendar
 import logging
 
-from database.db_operations import get_or_create_user
+from database.async_db_operations import get_or_create_user, update_user_settings, run_blocking, get_alert_recipients
+from database.budget_alerts import take_pending_alerts, restore_pending_alerts
+from database.config import BUDGET_ALERT_INTERVAL
 from services.report_generator import FinancialReport
 
 logger = logging.getLogger(__name__)
@@ -27,7 +30,7 @@ async def create_budget_from_recommendations(query, context):
     
     # Отримуємо дані користувача
     telegram_id = query.from_user.id
-    user = get_or_create_user(telegram_id)
+    user = await get_or_create_user(telegram_id)
     
     # Отримуємо рекомендації
     recommendations = context.user_data['budget_recommendations']
@@ -55,7 +58,7 @@ async def create_budget_from_recommendations(query, context):
             category_allocations[cat['category_id']] = cat['recommended_budget']
         
         # Створюємо бюджет
-        budget = budget_manager.create_monthly_budget(
+        budget = await run_blocking(budget_manager.create_monthly_budget,
             name=f"Бюджет на {month_name} {year}",
             total_budget=recommendations['total_recommended_budget'],
             year=year,
@@ -112,27 +115,21 @@ async def show_budget_total_input(query, context):
 async def show_my_budget_overview(query, context):
     """Відображає детальний огляд фінансового стану користувача на одному екрані"""
     from services.budget_manager import BudgetManager
-    from database.db_operations import get_transactions
+    from database.async_db_operations import get_transactions
     
     telegram_id = query.from_user.id
-    user = get_or_create_user(telegram_id)
+    user = await get_or_create_user(telegram_id)
     
     # Якщо бюджет не встановлений, створюємо базовий
     if user.monthly_budget is None or user.monthly_budget <= 0:
-        user.monthly_budget = 10000
-        from database.session import Session
-        session = Session()
-        try:
-            session.merge(user)
-            session.commit()
-        finally:
-            session.close()
+        user = await update_user_settings(telegram_id, monthly_budget=10000)
     
     budget_manager = BudgetManager(user.id)
     
-    # Отримуємо фінансову інформацію
-    financial_status = budget_manager.get_user_financial_status()
-    comprehensive_status = budget_manager.get_comprehensive_budget_status()
+    # Отримуємо фінансову інформацію (спільні суми рахуються один раз)
+    with budget_manager.memoized():
+        financial_status = await run_blocking(budget_manager.get_user_financial_status)
+        comprehensive_status = await run_blocking(budget_manager.get_comprehensive_budget_status)
     
     if not financial_status:
         await query.edit_message_text(
@@ -194,7 +191,7 @@ async def show_my_budget_overview(query, context):
     message += "📋 *ОСТАННІ ОПЕРАЦІЇ*\n"
     
     # Отримуємо останні 7 транзакцій
-    recent_transactions = get_transactions(user.id, limit=7)
+    recent_transactions = await get_transactions(user.id, limit=7)
     
     if recent_transactions:
         message += f"_Показано {len(recent_transactions)} останніх операцій:_\n\n"
@@ -272,11 +269,12 @@ async def show_budget_detailed_view(query, context):
     from services.budget_manager import BudgetManager
     
     telegram_id = query.from_user.id
-    user = get_or_create_user(telegram_id)
+    user = await get_or_create_user(telegram_id)
     budget_manager = BudgetManager(user.id)
     
-    comprehensive_status = budget_manager.get_comprehensive_budget_status()
-    alerts = budget_manager.get_category_spending_alerts()
+    with budget_manager.memoized():
+        comprehensive_status = await run_blocking(budget_manager.get_comprehensive_budget_status)
+        alerts = await run_blocking(budget_manager.get_category_spending_alerts)
     
     if not comprehensive_status:
         await query.edit_message_text("❌ Помилка отримання даних", 
@@ -329,10 +327,10 @@ async def show_budget_settings(query, context):
     from services.budget_manager import BudgetManager
     
     telegram_id = query.from_user.id
-    user = get_or_create_user(telegram_id)
+    user = await get_or_create_user(telegram_id)
     budget_manager = BudgetManager(user.id)
     
-    comprehensive_status = budget_manager.get_comprehensive_budget_status()
+    comprehensive_status = await run_blocking(budget_manager.get_comprehensive_budget_status)
     currency = comprehensive_status['user_info']['currency'] if comprehensive_status else 'UAH'
     
     current_budget = comprehensive_status['budget_limits']['total_monthly_budget'] if comprehensive_status else 0
@@ -360,13 +358,14 @@ async def show_budget_statistics(query, context):
     from services.budget_manager import BudgetManager
     
     telegram_id = query.from_user.id
-    user = get_or_create_user(telegram_id)
+    user = await get_or_create_user(telegram_id)
     budget_manager = BudgetManager(user.id)
     
-    # Отримуємо статистику
-    month_comparison = budget_manager.get_month_comparison(3)
-    daily_stats = budget_manager.get_daily_spending_stats(7)
-    performance_metrics = budget_manager.get_budget_performance_metrics()
+    # Отримуємо статистику; метрики беруть ряди за тиждень і місяці з уже обчислених
+    with budget_manager.memoized():
+        month_comparison = await run_blocking(budget_manager.get_month_comparison, 3)
+        daily_stats = await run_blocking(budget_manager.get_daily_spending_stats, 7)
+        performance_metrics = await run_blocking(budget_manager.get_budget_performance_metrics)
     
     currency = 'UAH'  # Можна отримати з comprehensive_status
     
@@ -436,11 +435,11 @@ async def execute_budget_reset(query, context):
     from services.budget_manager import BudgetManager
     
     telegram_id = query.from_user.id
-    user = get_or_create_user(telegram_id)
+    user = await get_or_create_user(telegram_id)
     budget_manager = BudgetManager(user.id)
     
     # Виконуємо скидання
-    result = budget_manager.reset_monthly_budget(confirm=True)
+    result = await run_blocking(budget_manager.reset_monthly_budget, confirm=True)
     
     if result['status'] == 'success':
         message = "✅ *Бюджет успішно скинуто*\n\n"
@@ -473,7 +472,7 @@ async def execute_budget_reset(query, context):
 async def show_expense_pie_chart(query, context):
     """Показує кругову діаграму витрат по категоріях з огляду фінансів"""
     try:
-        user = get_or_create_user(query.from_user.id)
+        user = await get_or_create_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -482,7 +481,7 @@ async def show_expense_pie_chart(query, context):
         financial_report = FinancialReport(user.id)
         
         # Генеруємо кругову діаграму за поточний місяць
-        chart_buffer, error = financial_report.generate_expense_pie_chart()
+        chart_buffer, error = await run_blocking(financial_report.generate_expense_pie_chart)
         
         if error or not chart_buffer:
             await query.edit_message_text(
@@ -527,13 +526,13 @@ async def show_expense_pie_chart(query, context):
 async def show_income_pie_chart(query, context):
     """Показує кругову діаграму доходів по категоріях"""
     try:
-        user = get_or_create_user(query.from_user.id)
+        user = await get_or_create_user(query.from_user.id)
         
         # Створюємо звіт для генерації діаграми
         financial_report = FinancialReport(user.id)
         
         # Генеруємо кругову діаграму доходів за поточний місяць
-        chart_buffer, error = financial_report.generate_income_pie_chart()
+        chart_buffer, error = await run_blocking(financial_report.generate_income_pie_chart)
         
         if error or not chart_buffer:
             await query.edit_message_text(
@@ -590,3 +589,65 @@ def create_progress_bar(percentage, width=10):
         bar = "🟢" * filled + "⚪" * empty
     
     return bar
+
+# ==================== СПОВІЩЕННЯ ПРО ПОРОГИ БЮДЖЕТУ ====================
+
+def format_budget_alert(alert):
+    """Текст сповіщення про досягнутий поріг бюджету категорії"""
+    icon = alert.category_icon or "📂"
+    percent = alert.spent / alert.allocated * 100 if alert.allocated else 0
+    if alert.level >= 100:
+        return (
+            f"🔴 *Перевищено бюджет категорії* {icon} {alert.category_name}\n\n"
+            f"Витрачено `{alert.spent:.2f}` з `{alert.allocated:.2f}` грн ({percent:.0f}%)\n"
+            f"Перевитрата: `{alert.spent - alert.allocated:.2f}` грн"
+        )
+    return (
+        f"🟡 *Бюджет категорії* {icon} {alert.category_name} *використано на {percent:.0f}%*\n\n"
+        f"Витрачено `{alert.spent:.2f}` з `{alert.allocated:.2f}` грн\n"
+        f"Залишилось: `{alert.allocated - alert.spent:.2f}` грн"
+    )
+
+async def send_budget_alerts(bot):
+    """Надсилає накопичені сповіщення про пороги бюджетів; повертає кількість надісланих"""
+    alerts = take_pending_alerts()
+    if not alerts:
+        return 0
+
+    # За один інтервал категорія могла пройти обидва пороги — надсилаємо лише найвищий
+    latest = {}
+    for alert in alerts:
+        key = (alert.user_id, alert.category_id)
+        if key not in latest or alert.level >= latest[key].level:
+            latest[key] = alert
+
+    try:
+        recipients = await get_alert_recipients({alert.user_id for alert in latest.values()})
+    except Exception:
+        # Без отримувачів нічого не надіслано — повертаємо сповіщення до наступного інтервалу
+        restore_pending_alerts(list(latest.values()))
+        raise
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("💼 Мій бюджет", callback_data="my_budget_overview")
+    ]])
+    sent = 0
+    for alert in latest.values():
+        chat_id = recipients.get(alert.user_id)
+        if chat_id is None:
+            continue
+        try:
+            await bot.send_message(chat_id=chat_id, text=format_budget_alert(alert),
+                                   reply_markup=keyboard, parse_mode="Markdown")
+            sent += 1
+        except Exception as e:
+            logger.error(f"Не вдалося надіслати сповіщення про бюджет користувачу {alert.user_id}: {e}")
+    return sent
+
+async def send_budget_alerts_periodically(bot, interval=BUDGET_ALERT_INTERVAL):
+    """Фонова задача: надсилає сповіщення про пороги бюджетів кожні interval секунд"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await send_budget_alerts(bot)
+        except Exception as e:
+            logger.error(f"Не вдалося надіслати сповіщення про бюджети: {e}")
@@ -11,7 +11,7 @@ import uuid
 import logging
 import re
 
-from database.db_operations import get_or_create_user, get_monthly_stats, get_user_categories, get_user, get_user_transactions, add_transaction
+from database.async_db_operations import get_user, add_transaction, get_transaction_frame
 from database.models import TransactionType
 from handlers.setup_callbacks import show_currency_selection, complete_setup
 from services.financial_advisor import get_financial_advice
@@ -91,7 +91,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()  # Відповідаємо на колбек, щоб прибрати "годинник" з кнопки
         
         # Отримуємо дані користувача
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await query.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -249,23 +249,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await show_cash_flow_chart(query, context)
         elif callback_data == "viz_category_trends":
             # Створюємо графік трендів категорій
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.advanced_analytics import advanced_analytics
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=30)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value,
-                        'category_name': t.category.name if t.category else 'Без категорії'
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 chart_buffer = advanced_analytics.create_category_trends_chart(transaction_data)
                 
@@ -280,22 +270,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         elif callback_data == "viz_spending_patterns":
             # Створюємо графік паттернів витрат
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.advanced_analytics import advanced_analytics
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=60)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 chart_buffer = advanced_analytics.create_spending_patterns_chart(transaction_data)
                 
@@ -310,23 +291,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         elif callback_data == "viz_expense_donut":
             # Створюємо пончикову діаграму
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.advanced_analytics import advanced_analytics
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=30)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value,
-                        'category_name': t.category.name if t.category else 'Без категорії'
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 chart_buffer = advanced_analytics.create_expense_distribution_donut(transaction_data)
                 
@@ -341,22 +312,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         elif callback_data == "viz_budget_vs_actual":
             # Створюємо порівняння бюджету з фактом
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.advanced_analytics import advanced_analytics
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=90)  # 3 місяці для порівняння
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 chart_buffer = advanced_analytics.create_budget_vs_actual_chart(
                     transaction_data, 
@@ -378,23 +340,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await show_trends_analysis(query, context)
         elif callback_data == "trends_forecast":
             # Показуємо прогноз витрат
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.trend_analyzer import trend_analyzer
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=60)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value,
-                        'category_name': t.category.name if t.category else 'Без категорії'
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 trends_result = trend_analyzer.analyze_spending_trends(transaction_data)
                 forecast = trends_result.get("forecast", {})
@@ -433,23 +385,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         elif callback_data == "trends_anomalies":
             # Показуємо аномалії у витратах
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.trend_analyzer import trend_analyzer
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=60)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value,
-                        'category_name': t.category.name if t.category else 'Без категорії'
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 trends_result = trend_analyzer.analyze_spending_trends(transaction_data)
                 anomalies = trends_result.get("anomalies", [])
@@ -478,23 +420,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         elif callback_data == "trends_seasonality":
             # Показуємо сезонні паттерни
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.trend_analyzer import trend_analyzer
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=60)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value,
-                        'category_name': t.category.name if t.category else 'Без категорії'
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 trends_result = trend_analyzer.analyze_spending_trends(transaction_data)
                 seasonality = trends_result.get("seasonality", {})
@@ -548,23 +480,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         elif callback_data == "trends_insights":
             # Показуємо інсайти тенденцій
-            user = get_user(query.from_user.id)
+            user = await get_user(query.from_user.id)
             if user:
                 from services.trend_analyzer import trend_analyzer
                 from datetime import datetime, timedelta
                 now = datetime.now()
                 start_date = now - timedelta(days=60)
-                transactions = get_user_transactions(user.id, start_date=start_date, end_date=now)
-                
-                transaction_data = [
-                    {
-                        'transaction_date': t.transaction_date,
-                        'amount': t.amount,
-                        'type': t.type.value,
-                        'category_name': t.category.name if t.category else 'Без категорії'
-                    }
-                    for t in transactions
-                ]
+                transaction_data = await get_transaction_frame(user.id, start_date=start_date, end_date=now)
                 
                 insights = trend_analyzer.get_spending_insights(transaction_data)
                 
@@ -1268,7 +1190,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_confirm_receipt_add(query, context):
     """Обробляє підтвердження додавання транзакції з чека"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1285,7 +1207,7 @@ async def handle_confirm_receipt_add(query, context):
             return
 
         # Додаємо транзакцію до бази даних
-        add_transaction(
+        await add_transaction(
             user_id=user.id,
             amount=pending_receipt['amount'],
             description=pending_receipt['description'],
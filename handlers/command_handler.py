@@ -1,8 +1,10 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, MessageHandler, CallbackQueryHandler, filters
-from database.models import User, Transaction, Category, TransactionType
-from database.session import Session
-from datetime import datetime
+from database.models import TransactionType
+from database.async_db_operations import (
+    get_user, get_or_create_user, update_user_settings, add_transaction, create_or_update_budget, get_period_summary
+)
+from datetime import datetime, timedelta
 from .setup_handler import (
     start_setup, setup_balance, setup_budget, setup_notifications,
     cancel_setup, SETUP_START, SETUP_BALANCE, SETUP_BUDGET, SETUP_NOTIFICATIONS
@@ -19,22 +21,10 @@ async def setup_initial_balance(update: Update, context: ContextTypes.DEFAULT_TY
     """Обробник введення початкового балансу"""
     try:
         balance = float(update.message.text)
-        session = Session()
-        user = session.query(User).filter_by(telegram_id=update.effective_user.id).first()
-        
-        user.initial_balance = balance
-        session.commit()
+        user = await update_user_settings(update.effective_user.id, initial_balance=balance)
         
         # Створюємо початкову транзакцію
-        transaction = Transaction(
-            user_id=user.id,
-            amount=balance,
-            type=TransactionType.INCOME,
-            description="Початковий баланс",
-            transaction_date=datetime.utcnow()
-        )
-        session.add(transaction)
-        session.commit()
+        await add_transaction(user.id, balance, "Початковий баланс", None, TransactionType.INCOME)
         
         await update.message.reply_text(
             f"✅ Початковий баланс встановлено: {balance} грн\n\n"
@@ -52,23 +42,16 @@ async def setup_monthly_budget(update: Update, context: ContextTypes.DEFAULT_TYP
     """Обробник введення місячного бюджету"""
     try:
         budget = float(update.message.text)
-        session = Session()
-        user = session.query(User).filter_by(telegram_id=update.effective_user.id).first()
-        
-        user.monthly_budget = budget
-        session.commit()
+        user = await update_user_settings(update.effective_user.id, monthly_budget=budget)
         
         # Створюємо бюджетний план
-        from database.models import BudgetPlan
-        budget_plan = BudgetPlan(
-            user_id=user.id,
-            name="Місячний бюджет",
-            start_date=datetime.utcnow(),
-            end_date=datetime.utcnow().replace(day=28) + datetime.timedelta(days=4),
-            total_budget=budget
+        await create_or_update_budget(
+            user.id,
+            "Місячний бюджет",
+            budget,
+            datetime.utcnow(),
+            datetime.utcnow().replace(day=28) + timedelta(days=4)
         )
-        session.add(budget_plan)
-        session.commit()
         
         await update.message.reply_text(
             f"✅ Місячний бюджет встановлено: {budget} грн\n\n"
@@ -90,15 +73,12 @@ async def setup_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
     notifications_enabled = query.data == "notifications_on"
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        user.notification_enabled = notifications_enabled
-        user.setup_step = 'completed'
-        user.is_setup_completed = True
-        initial_balance = user.initial_balance
-        currency = user.currency
-        monthly_budget = user.monthly_budget
-        session.commit()
+    user = await update_user_settings(
+        user_id, notification_enabled=notifications_enabled, setup_step='completed', is_setup_completed=True
+    )
+    initial_balance = user.initial_balance
+    currency = user.currency
+    monthly_budget = user.monthly_budget
     
     await query.edit_message_text(
         f"Налаштування завершено! 🎉\n\n"
@@ -117,18 +97,15 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /help зі стислим описом функцій"""
     user_id = update.effective_user.id
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
-            user = User(
-                telegram_id=user_id,
-                username=update.effective_user.username,
-                first_name=update.effective_user.first_name,
-                last_name=update.effective_user.last_name,
-                is_setup_completed=True
-            )
-            session.add(user)
-            session.commit()
+    user = await get_user(user_id)
+    if not user:
+        await get_or_create_user(
+            user_id,
+            username=update.effective_user.username,
+            first_name=update.effective_user.first_name,
+            last_name=update.effective_user.last_name
+        )
+        await update_user_settings(user_id, is_setup_completed=True)
     
     help_text = (
         "*FinAssist - Команди*\n\n"
@@ -152,13 +129,12 @@ async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /settings"""
     user_id = update.effective_user.id
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        if not user or not user.is_setup_completed:
-            await update.message.reply_text(
-                "Будь ласка, спочатку завершіть налаштування бота командою /start"
-            )
-            return
+    user = await get_user(user_id)
+    if not user or not user.is_setup_completed:
+        await update.message.reply_text(
+            "Будь ласка, спочатку завершіть налаштування бота командою /start"
+        )
+        return
     
     settings_text = (
         f"⚙️ Ваші поточні налаштування:\n\n"
@@ -176,20 +152,18 @@ async def notifications_command(update: Update, context: ContextTypes.DEFAULT_TY
     """Обробка команди /notifications"""
     user_id = update.effective_user.id
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        if not user or not user.is_setup_completed:
-            await update.message.reply_text(
-                "Будь ласка, спочатку завершіть налаштування бота командою /start"
-            )
-            return
-        
-        # Змінюємо стан сповіщень на протилежний
-        user.notification_enabled = not user.notification_enabled
-        session.commit()
-        
-        status = "увімкнено" if user.notification_enabled else "вимкнено"
-        await update.message.reply_text(f"✅ Сповіщення {status}")
+    user = await get_user(user_id)
+    if not user or not user.is_setup_completed:
+        await update.message.reply_text(
+            "Будь ласка, спочатку завершіть налаштування бота командою /start"
+        )
+        return
+    
+    # Змінюємо стан сповіщень на протилежний
+    user = await update_user_settings(user_id, notification_enabled=not user.notification_enabled)
+    
+    status = "увімкнено" if user.notification_enabled else "вимкнено"
+    await update.message.reply_text(f"✅ Сповіщення {status}")
 
 async def add_transaction_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /add"""
@@ -204,28 +178,19 @@ async def add_transaction_command(update: Update, context: ContextTypes.DEFAULT_
         amount = float(context.args[0])
         description = " ".join(context.args[1:])
         
-        with Session() as session:
-            user = session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-            
-            if not user:
-                await update.message.reply_text("❌ Помилка: користувач не знайдений")
-                return
-            
-            transaction = Transaction(
-                user_id=user.id,
-                amount=amount,
-                type=TransactionType.EXPENSE,
-                description=description
-            )
-            
-            session.add(transaction)
-            session.commit()
-            
-            await update.message.reply_text(
-                f"✅ Транзакцію додано!\n"
-                f"Сума: {amount} грн\n"
-                f"Опис: {description}"
-            )
+        user = await get_user(update.effective_user.id)
+        
+        if not user:
+            await update.message.reply_text("❌ Помилка: користувач не знайдений")
+            return
+        
+        await add_transaction(user.id, amount, description, None, TransactionType.EXPENSE)
+        
+        await update.message.reply_text(
+            f"✅ Транзакцію додано!\n"
+            f"Сума: {amount} грн\n"
+            f"Опис: {description}"
+        )
             
     except ValueError:
         await update.message.reply_text("❌ Помилка: некоректна сума")
@@ -234,32 +199,27 @@ async def add_transaction_command(update: Update, context: ContextTypes.DEFAULT_
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /stats"""
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        
-        if not user:
-            await update.message.reply_text("❌ Помилка: користувач не знайдений")
-            return
-        
-        # Отримуємо транзакції за останній місяць
-        month_ago = datetime.utcnow().replace(day=1)
-        transactions = session.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date >= month_ago
-        ).all()
-        
-        total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
-        total_income = sum(t.amount for t in transactions if t.type == TransactionType.INCOME)
-        
-        stats_message = (
-            f"📊 Статистика за поточний місяць:\n\n"
-            f"💰 Доходи: {total_income:.2f} грн\n"
-            f"💸 Витрати: {total_expenses:.2f} грн\n"
-            f"💵 Баланс: {total_income - total_expenses:.2f} грн\n\n"
-            f"Кількість транзакцій: {len(transactions)}"
-        )
-        
-        await update.message.reply_text(stats_message)
+    user = await get_user(update.effective_user.id)
+    
+    if not user:
+        await update.message.reply_text("❌ Помилка: користувач не знайдений")
+        return
+    
+    # Підсумки за поточний місяць з денних агрегатів
+    now = datetime.utcnow()
+    summary = await get_period_summary(user.id, now.replace(day=1), now, from_replica=True)
+    total_expenses = summary['expenses']
+    total_income = summary['income']
+    
+    stats_message = (
+        f"📊 Статистика за поточний місяць:\n\n"
+        f"💰 Доходи: {total_income:.2f} грн\n"
+        f"💸 Витрати: {total_expenses:.2f} грн\n"
+        f"💵 Баланс: {total_income - total_expenses:.2f} грн\n\n"
+        f"Кількість транзакцій: {summary['transactions_count']}"
+    )
+    
+    await update.message.reply_text(stats_message)
 
 async def budget_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /budget"""
@@ -283,14 +243,11 @@ async def budget_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.args[0] == "встановити" and len(context.args) > 1:
         try:
             amount = float(context.args[1])
-            with Session() as session:
-                user = session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-                if user:
-                    user.monthly_budget = amount
-                    session.commit()
-                    await update.message.reply_text(f"✅ Бюджет встановлено: {amount} грн")
-                else:
-                    await update.message.reply_text("❌ Помилка: користувач не знайдений")
+            user = await update_user_settings(update.effective_user.id, monthly_budget=amount)
+            if user:
+                await update.message.reply_text(f"✅ Бюджет встановлено: {amount} грн")
+            else:
+                await update.message.reply_text("❌ Помилка: користувач не знайдений")
         except ValueError:
             await update.message.reply_text("❌ Помилка: некоректна сума")
     else:
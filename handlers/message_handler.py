@@ -6,13 +6,13 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from datetime import datetime, timedelta
 from database.models import User, Transaction, TransactionType
-from database.session import Session
-from database.db_operations import (
+from database.async_db_operations import (
     get_user,
     add_transaction,
     get_user_transactions,
     update_user_settings,
-    get_user_categories
+    get_user_categories,
+    get_transaction_frame
 )
 from services.statement_parser import statement_parser, receipt_processor
 from services.ml_categorizer import transaction_categorizer
@@ -163,7 +163,7 @@ async def send_demo_receipt_summary(update: Update, receipt_data: Dict, user):
             message_parts.append("")  # Порожній рядок для розділення
             
             # Знаходимо або створюємо категорію
-            user_categories = get_user_categories(user.id)
+            user_categories = await get_user_categories(user.id)
             category_id = None
             for cat in user_categories:
                 if cat.name.lower() == category.lower():
@@ -175,7 +175,7 @@ async def send_demo_receipt_summary(update: Update, receipt_data: Dict, user):
                 category_id = user_categories[0].id
             
             # Додаємо транзакцію для кожної категорії
-            add_transaction(
+            await add_transaction(
                 user_id=user.id,
                 amount=category_total,
                 description=f"ТАВРІЯ В - {category} ({item_count} товарів)",
@@ -234,7 +234,7 @@ async def send_demo_receipt_summary(update: Update, receipt_data: Dict, user):
 async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка текстових повідомлень"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -329,7 +329,7 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
                 ttype = context.user_data.get('transaction_type', 'expense').upper()
                 if ttype not in ('EXPENSE', 'INCOME'):
                     ttype = 'EXPENSE'
-                add_transaction(
+                await add_transaction(
                     user_id=user.id,
                     amount=amount,
                     description="",
@@ -363,7 +363,7 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
             amount = float(match.group(1))
             description = match.group(2)
             
-            add_transaction(
+            await add_transaction(
                 user_id=user.id,
                 amount=amount,
                 description=description,
@@ -470,7 +470,7 @@ async def handle_advice_request(update: Update, context: ContextTypes.DEFAULT_TY
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """ДЕМОНСТРАЦІЙНА версія обробки фотографій чеків з ідеальним результатом"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -541,7 +541,7 @@ async def send_mida_receipt_summary(update: Update, receipt_data: Dict, user):
                 message_parts.append("")  # Порожній рядок для розділення
                 
                 # Знаходимо або створюємо категорію
-                user_categories = get_user_categories(user.id)
+                user_categories = await get_user_categories(user.id)
                 category_id = None
                 for cat in user_categories:
                     if cat.name.lower() == category.lower():
@@ -553,7 +553,7 @@ async def send_mida_receipt_summary(update: Update, receipt_data: Dict, user):
                     category_id = user_categories[0].id
                 
                 # Додаємо транзакцію для кожної категорії
-                add_transaction(
+                await add_transaction(
                     user_id=user.id,
                     amount=category_total,
                     description=f"MIDA - {category} ({item_count} товарів)",
@@ -642,7 +642,7 @@ async def send_tavria_receipt_summary(update: Update, receipt_data: Dict, user):
                 message_parts.append("")  # Порожній рядок для розділення
                 
                 # Знаходимо або створюємо категорію
-                user_categories = get_user_categories(user.id)
+                user_categories = await get_user_categories(user.id)
                 category_id = None
                 category_mapping = {
                     'напої': ['напої', 'drinks', 'beverages'],
@@ -669,7 +669,7 @@ async def send_tavria_receipt_summary(update: Update, receipt_data: Dict, user):
                     category_id = user_categories[0].id
                 
                 # Додаємо транзакцію для кожної категорії
-                add_transaction(
+                await add_transaction(
                     user_id=user.id,
                     amount=category_total,
                     description=f"Таврія В - {category} ({item_count} товарів)",
@@ -718,7 +718,7 @@ async def send_tavria_receipt_summary(update: Update, receipt_data: Dict, user):
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка банківських виписок"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -760,7 +760,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 'source': 'bank_statement'
             }
             
-            add_transaction(transaction_data)
+            await add_transaction(transaction_data)
             added_count += 1
         
         await update.message.reply_text(
@@ -774,7 +774,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /report"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -782,7 +782,7 @@ async def handle_report_command(update: Update, context: ContextTypes.DEFAULT_TY
         # Отримуємо транзакції за останній місяць
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30)
-        transactions = get_user_transactions(user.id, start_date, end_date)
+        transactions = await get_transaction_frame(user.id, start_date, end_date)
         
         # Генеруємо звіт
         report = analytics_service.generate_monthly_report(transactions)
@@ -811,7 +811,7 @@ async def handle_report_command(update: Update, context: ContextTypes.DEFAULT_TY
 async def handle_advice_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /advice"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -819,7 +819,7 @@ async def handle_advice_command(update: Update, context: ContextTypes.DEFAULT_TY
         # Отримуємо транзакції за останні 3 місяці
         end_date = datetime.now()
         start_date = end_date - timedelta(days=90)
-        transactions = get_user_transactions(user.id, start_date, end_date)
+        transactions = await get_user_transactions(user.id, start_date, end_date)
         
         # Генеруємо поради
         advice = openai_service.generate_financial_advice(transactions)
@@ -845,7 +845,7 @@ async def handle_advice_command(update: Update, context: ContextTypes.DEFAULT_TY
 async def handle_analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка команди /analyze"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -874,7 +874,7 @@ async def handle_analyze_command(update: Update, context: ContextTypes.DEFAULT_T
 async def handle_document_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка документів (виписок)"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1228,7 +1228,7 @@ async def handle_transaction_edit_input(update: Update, context: ContextTypes.DE
             await update.message.reply_text("Помилка: не знайдені дані для редагування.")
             return
         
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Користувач не знайдений.")
             return
@@ -1365,7 +1365,7 @@ async def handle_transaction_edit_input(update: Update, context: ContextTypes.DE
 async def handle_transaction_amount_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка введення суми транзакції"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1392,7 +1392,7 @@ async def handle_transaction_amount_input(update: Update, context: ContextTypes.
 async def handle_transaction_description_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка введення опису транзакції"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1411,7 +1411,7 @@ async def handle_transaction_description_input(update: Update, context: ContextT
             description=description
         )
         
-        add_transaction(transaction)
+        await add_transaction(transaction)
         
         await update.message.reply_text(
             f"✅ Транзакцію додано!\n"
@@ -1428,7 +1428,7 @@ async def handle_transaction_description_input(update: Update, context: ContextT
 async def handle_category_creation_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка введення нової категорії"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1451,7 +1451,7 @@ async def handle_category_creation_input(update: Update, context: ContextTypes.D
 async def handle_category_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка вибору категорії з кнопок"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1484,7 +1484,7 @@ async def handle_category_selection(update: Update, context: ContextTypes.DEFAUL
 async def handle_transaction_amount_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка введення суми транзакції"""
     try:
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Будь ласка, спочатку налаштуйте бота командою /start")
             return
@@ -1507,7 +1507,7 @@ async def handle_transaction_amount_input(update: Update, context: ContextTypes.
             type=context.user_data.get('transaction_type', 'expense'),
             category_id=int(context.user_data.get('category_id')) if context.user_data.get('category_id') else None
         )
-        add_transaction(transaction)
+        await add_transaction(transaction)
         await update.message.reply_text(f"✅ Транзакцію додано!\nСума: {amount} грн")
         # Очищаємо user_data
         context.user_data.pop('transaction_type', None)
@@ -11,11 +11,13 @@ import tempfile
 import os
 import logging
 
-from database.db_operations import (
-    get_user, get_user_categories, get_user_transactions,
-    update_user_settings
+from database.async_db_operations import (
+    get_user, get_user_categories, get_transaction_rows, count_transactions,
+    update_user_settings, clear_user_transactions, get_category_by_id, delete_category,
+    rename_category as rename_category_record, create_category as create_category_record, run_blocking
 )
-from database.models import Session, User, Category, Transaction, TransactionType
+from database.models import TransactionType
+from database.archive import count_archived, delete_user_archive
 
 logger = logging.getLogger(__name__)
 
@@ -68,7 +70,7 @@ async def show_categories_management(query, context):
 async def show_categories_management(query, context):
     """Показує меню управління категоріями з пагінацією"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -87,8 +89,8 @@ async def show_categories_management(query, context):
         show_type = view_params.get('show_type', 'all')
         
         # Отримуємо всі категорії
-        expense_categories = get_user_categories(user.id, TransactionType.EXPENSE.value)
-        income_categories = get_user_categories(user.id, TransactionType.INCOME.value)
+        expense_categories = await get_user_categories(user.id, TransactionType.EXPENSE.value)
+        income_categories = await get_user_categories(user.id, TransactionType.INCOME.value)
         
         # Фільтруємо категорії за типом
         if show_type == 'expense':
@@ -218,13 +220,13 @@ async def show_add_category_menu(query, context):
 async def show_delete_category_select(query, context):
     """Показує список категорій для видалення"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
         
         # Отримуємо всі категорії користувача
-        all_categories = get_user_categories(user.id)
+        all_categories = await get_user_categories(user.id)
         user_categories = [cat for cat in all_categories if not cat.is_default]
         
         if not user_categories:
@@ -263,16 +265,15 @@ async def show_delete_category_select(query, context):
 async def confirm_delete_category(query, context, category_id):
     """Підтвердження видалення категорії"""
     try:
-        session = Session()
-        category = session.query(Category).filter(Category.id == category_id).first()
+        user = await get_user(query.from_user.id)
+        category = await get_category_by_id(category_id)
         
-        if not category:
+        if not user or not category:
             await query.edit_message_text("❌ Категорія не знайдена")
-            session.close()
             return
         
         # Перевіряємо, чи є транзакції з цією категорією
-        transactions_count = session.query(Transaction).filter(Transaction.category_id == category_id).count()
+        transactions_count = await count_transactions(user.id, category_id=category_id)
         
         text = (
             f"⚠️ **Підтвердження видалення**\n\n"
@@ -298,8 +299,6 @@ async def confirm_delete_category(query, context, category_id):
             parse_mode="Markdown"
         )
         
-        session.close()
-        
     except Exception as e:
         logger.error(f"Error in confirm_delete_category: {str(e)}")
         await query.edit_message_text(
@@ -310,21 +309,13 @@ async def confirm_delete_category(query, context, category_id):
 async def delete_category_confirmed(query, context, category_id):
     """Виконує видалення категорії"""
     try:
-        session = Session()
-        category = session.query(Category).filter(Category.id == category_id).first()
+        # Видаляємо категорію
+        category_name = await delete_category(category_id)
         
-        if not category:
+        if category_name is None:
             await query.edit_message_text("❌ Категорія не знайдена")
-            session.close()
             return
         
-        category_name = category.name
-        
-        # Видаляємо категорію
-        session.delete(category)
-        session.commit()
-        session.close()
-        
         text = (
             f"✅ **Категорію видалено**\n\n"
             f"**{category_name}** більше не існує"
@@ -355,7 +346,7 @@ async def delete_category_confirmed(query, context, category_id):
 async def show_currency_settings(query, context):
     """Показує налаштування валюти"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         current_currency = getattr(user, 'currency', 'UAH') if user else 'UAH'
         
         currencies = [
@@ -396,13 +387,13 @@ async def show_currency_settings(query, context):
 async def set_currency(query, context, currency_code):
     """Встановлює нову валюту"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
         
         # Оновлюємо валюту користувача
-        update_user_settings(query.from_user.id, currency=currency_code)
+        await update_user_settings(query.from_user.id, currency=currency_code)
         
         currencies_map = {
             'UAH': ('🇺🇦', 'Українська гривня'),
@@ -448,14 +439,13 @@ async def set_currency(query, context, currency_code):
 async def show_export_menu(query, context):
     """Показує меню експорту даних"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
         
         # Підраховуємо кількість транзакцій
-        transactions = get_user_transactions(user.id, limit=None)
-        transactions_count = len(transactions) if transactions else 0
+        transactions_count = await count_transactions(user.id)
         
         text = (
             f"📤 **Експорт даних**\n\n"
@@ -497,7 +487,7 @@ async def show_export_menu(query, context):
 async def export_csv(query, context):
     """Експортує дані в CSV формат"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -506,7 +496,7 @@ async def export_csv(query, context):
         await query.edit_message_text("⏳ Підготовка файлу для завантаження...")
         
         # Отримуємо всі транзакції
-        transactions = get_user_transactions(user.id, limit=None)
+        transactions = await get_transaction_rows(user.id, from_replica=True)
         
         if not transactions:
             await query.edit_message_text(
@@ -530,7 +520,7 @@ async def export_csv(query, context):
             time_str = transaction.transaction_date.strftime('%H:%M:%S')
             type_str = 'Дохід' if transaction.type == TransactionType.INCOME else 'Витрата'
             currency = getattr(user, 'currency', 'UAH')
-            category_name = transaction.category.name if transaction.category else 'Без категорії'
+            category_name = transaction.category_name or 'Без категорії'
             source = transaction.source or 'manual'
             
             writer.writerow([
@@ -591,14 +581,13 @@ async def export_csv(query, context):
 async def show_clear_data_menu(query, context):
     """Показує меню очищення даних"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
         
         # Підраховуємо кількість транзакцій
-        transactions = get_user_transactions(user.id, limit=None)
-        transactions_count = len(transactions) if transactions else 0
+        transactions_count = await count_transactions(user.id)
         
         text = (
             f"🗑️ **Очищення даних**\n\n"
@@ -645,9 +634,8 @@ async def show_clear_data_menu(query, context):
 async def confirm_clear_data(query, context):
     """Підтвердження очищення даних"""
     try:
-        user = get_user(query.from_user.id)
-        transactions = get_user_transactions(user.id, limit=None)
-        transactions_count = len(transactions) if transactions else 0
+        user = await get_user(query.from_user.id)
+        transactions_count = await count_transactions(user.id)
         
         text = (
             f"⚠️ **ОСТАННЄ ПІДТВЕРДЖЕННЯ**\n\n"
@@ -685,7 +673,7 @@ async def confirm_clear_data(query, context):
 async def clear_data_confirmed(query, context):
     """Виконує очищення всіх транзакцій"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -693,11 +681,10 @@ async def clear_data_confirmed(query, context):
         # Показуємо повідомлення про обробку
         await query.edit_message_text("⏳ Видалення транзакцій...")
         
-        # Видаляємо всі транзакції користувача
-        session = Session()
-        deleted_count = session.query(Transaction).filter(Transaction.user_id == user.id).delete()
-        session.commit()
-        session.close()
+        # Видаляємо всі транзакції користувача (агрегати й лічильники бюджетів — у тій самій транзакції)
+        deleted_count = await clear_user_transactions(user.id)
+        deleted_count += await run_blocking(count_archived, user.id)
+        await run_blocking(delete_user_archive, user.id)
         
         text = (
             f"✅ **Дані очищено**\n\n"
@@ -734,13 +721,13 @@ async def clear_data_confirmed(query, context):
 async def create_category(query, context, category_type, category_name):
     """Створює нову категорію"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
         
         # Перевіряємо, чи не існує категорія з такою назвою
-        existing_categories = get_user_categories(user.id, category_type)
+        existing_categories = await get_user_categories(user.id, category_type)
         if any(cat.name.lower() == category_name.lower() for cat in existing_categories):
             await query.edit_message_text(
                 f"❌ Категорія **{category_name}** вже існує",
@@ -750,17 +737,10 @@ async def create_category(query, context, category_type, category_name):
             return
         
         # Створюємо нову категорію
-        session = Session()
-        new_category = Category(
-            user_id=user.id,
-            name=category_name,
-            type=category_type,
-            icon='💸' if category_type == TransactionType.EXPENSE else '💰',
-            is_default=False
+        await create_category_record(
+            user.id, category_name, category_type,
+            icon='💸' if category_type == TransactionType.EXPENSE else '💰'
         )
-        session.add(new_category)
-        session.commit()
-        session.close()
         
         type_text = "витрат" if category_type == TransactionType.EXPENSE else "доходів"
         
@@ -887,7 +867,7 @@ async def handle_add_category_type(query, context, category_type):
 async def show_all_categories(query, context):
     """Показує всі категорії користувача з пагінацією"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
@@ -906,8 +886,8 @@ async def show_all_categories(query, context):
         show_type = view_params.get('show_type', 'all')
         
         # Отримуємо всі категорії
-        expense_categories = get_user_categories(user.id, TransactionType.EXPENSE.value)
-        income_categories = get_user_categories(user.id, TransactionType.INCOME.value)
+        expense_categories = await get_user_categories(user.id, TransactionType.EXPENSE.value)
+        income_categories = await get_user_categories(user.id, TransactionType.INCOME.value)
         
         # Фільтруємо категорії за типом
         if show_type == 'expense':
@@ -1011,19 +991,16 @@ async def show_all_categories(query, context):
 async def show_category_edit_menu(query, context, category_id):
     """Показує меню редагування конкретної категорії"""
     try:
-        session = Session()
-        category = session.query(Category).filter(Category.id == category_id).first()
+        category = await get_category_by_id(category_id)
         
         if not category:
             await query.edit_message_text("❌ Категорія не знайдена")
-            session.close()
             return
         
         # Перевіряємо, чи це категорія користувача
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user or category.user_id != user.id:
             await query.edit_message_text("❌ Немає доступу до цієї категорії")
-            session.close()
             return
         
         icon = getattr(category, 'icon', '🏷️')
@@ -1031,7 +1008,7 @@ async def show_category_edit_menu(query, context, category_id):
         type_text = "витрат" if category.type == TransactionType.EXPENSE else "доходів"
         
         # Підраховуємо кількість транзакцій з цією категорією
-        transactions_count = session.query(Transaction).filter(Transaction.category_id == category_id).count()
+        transactions_count = await count_transactions(user.id, category_id=category_id)
         
         text = (
             f"✏️ **Редагування категорії**\n\n"
@@ -1062,8 +1039,6 @@ async def show_category_edit_menu(query, context, category_id):
             parse_mode="Markdown"
         )
         
-        session.close()
-        
     except Exception as e:
         logger.error(f"Error in show_category_edit_menu: {str(e)}")
         await query.edit_message_text(
@@ -1074,12 +1049,10 @@ async def show_category_edit_menu(query, context, category_id):
 async def show_rename_category_form(query, context, category_id):
     """Показує форму для перейменування категорії"""
     try:
-        session = Session()
-        category = session.query(Category).filter(Category.id == category_id).first()
+        category = await get_category_by_id(category_id)
         
         if not category or category.is_default:
             await query.edit_message_text("❌ Категорію неможливо перейменувати")
-            session.close()
             return
         
         # Зберігаємо ID категорії для перейменування
@@ -1107,8 +1080,6 @@ async def show_rename_category_form(query, context, category_id):
             parse_mode="Markdown"
         )
         
-        session.close()
-        
     except Exception as e:
         logger.error(f"Error in show_rename_category_form: {str(e)}")
         await query.edit_message_text(
@@ -1159,42 +1130,35 @@ async def handle_category_rename_input(update, context):
 async def rename_category(query, context, category_id, new_name):
     """Перейменовує категорію"""
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("❌ Користувач не знайдений")
             return
         
-        session = Session()
-        category = session.query(Category).filter(
-            Category.id == category_id,
-            Category.user_id == user.id
-        ).first()
+        category = await get_category_by_id(category_id)
         
-        if not category:
+        if not category or category.user_id != user.id:
             await query.edit_message_text("❌ Категорія не знайдена")
-            session.close()
             return
         
         if category.is_default:
             await query.edit_message_text("❌ Системну категорію неможливо перейменувати")
-            session.close()
             return
         
         # Перевіряємо, чи не існує категорія з такою назвою
-        existing_categories = get_user_categories(user.id, category.type)
+        existing_categories = await get_user_categories(user.id, category.type)
         if any(cat.name.lower() == new_name.lower() and cat.id != category_id for cat in existing_categories):
             await query.edit_message_text(
                 f"❌ Категорія **{new_name}** вже існує",
                 reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("◀️ Назад", callback_data=f"edit_category_{category_id}")]]),
                 parse_mode="Markdown"
             )
-            session.close()
             return
         
-        old_name = category.name
-        category.name = new_name
-        session.commit()
-        session.close()
+        old_name = await rename_category_record(category_id, user.id, new_name)
+        if old_name is None:
+            await query.edit_message_text("❌ Категорія не знайдена")
+            return
         
         text = (
             f"✅ **Категорію перейменовано**\n\n"
@@ -1,9 +1,9 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from database.db_operations import get_user, get_or_create_user, get_user_categories
-from database.session import Session
-from database.models import User, Category, TransactionType, Transaction
-from datetime import datetime
+from database.async_db_operations import (
+    get_or_create_user, get_user_categories, update_user_settings, create_account, add_transaction, create_categories
+)
+from database.models import TransactionType
 
 # Стани для ConversationHandler
 WAITING_CURRENCY_SELECTION = 1
@@ -76,10 +76,7 @@ async def process_currency_selection(update_or_query, context):
     currency_code = query.data.split("_")[1]
     user_id = query.from_user.id
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        user.currency = currency_code
-        session.commit()
+    await update_user_settings(user_id, currency=currency_code)
     
     # Тепер переходимо до кроку введення балансу
     keyboard = [[InlineKeyboardButton("« Назад", callback_data="back_to_currency")]]
@@ -136,26 +133,17 @@ async def process_initial_balance(update: Update, context: ContextTypes.DEFAULT_
         balance = float(update.message.text.replace(',', '.'))
         user_id = update.effective_user.id
         
-        with Session() as session:
-            user = session.query(User).filter(User.telegram_id == user_id).first()
-            
-            # Зберігаємо валюту користувача перед закриттям сесії
-            currency_code = user.currency
-            user_db_id = user.id
-            
-            user.initial_balance = balance
-            
-            # Встановлюємо, що налаштування завершено
-            user.setup_step = 'completed'
-            user.is_setup_completed = True
-            
-            session.commit()
+        # Встановлюємо, що налаштування завершено
+        user = await update_user_settings(
+            user_id, initial_balance=balance, setup_step='completed', is_setup_completed=True
+        )
+        currency_code = user.currency
+        user_db_id = user.id
         
         # Створюємо головний рахунок з початковим балансом
-        from database.db_operations import create_account
         from database.models import AccountType
         
-        main_account = create_account(
+        main_account = await create_account(
             user_id=user_db_id,
             name="Головний рахунок",
             account_type=AccountType.CASH,
@@ -167,22 +155,14 @@ async def process_initial_balance(update: Update, context: ContextTypes.DEFAULT_
         )
         
         # Створюємо початкову транзакцію прив'язану до рахунку
-        with Session() as session:
-            transaction = Transaction(
-                user_id=user_db_id,
-                account_id=main_account.id,
-                amount=balance,
-                type=TransactionType.INCOME,
-                description="Початковий баланс головного рахунку",
-                transaction_date=datetime.utcnow()
-            )
-            session.add(transaction)
-            session.commit()
+        await add_transaction(
+            user_db_id, balance, "Початковий баланс головного рахунку", None, TransactionType.INCOME,
+            account_id=main_account.id
+        )
         
         # Створюємо стандартні категорії для користувача
         await setup_default_categories(user_id)
         
-        # Використовуємо збережений currency_code поза сесією
         currency_symbols = {
             "UAH": "₴",
             "USD": "$",
@@ -234,11 +214,7 @@ async def complete_setup(query, context):
     user_id = query.from_user.id
     
     # Встановлюємо, що налаштування бота завершено
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        user.is_setup_completed = True
-        user.setup_step = 'completed'
-        session.commit()
+    await update_user_settings(user_id, is_setup_completed=True, setup_step='completed')
     
     # Створюємо стандартні категорії
     await setup_default_categories(user_id)
@@ -267,9 +243,9 @@ async def complete_setup(query, context):
 
 async def setup_default_categories(user_id):
     """Створює стандартні категорії витрат та доходів для користувача"""
-    user = get_or_create_user(user_id)
+    user = await get_or_create_user(user_id)
     
-    categories = get_user_categories(user.id)
+    categories = await get_user_categories(user.id)
     expense_categories = [c for c in categories if c.type == TransactionType.EXPENSE.value]
     income_categories = [c for c in categories if c.type == TransactionType.INCOME.value]
     
@@ -304,26 +280,11 @@ async def setup_default_categories(user_id):
         ("Інше", "💸")
     ]
     
-    # Додаємо стандартні категорії для користувача
-    with Session() as session:
-        if not expense_categories:
-            for name, emoji in standard_expense_categories:
-                category = Category(
-                    user_id=user.id,
-                    name=name,
-                    type=TransactionType.EXPENSE.value,
-                    icon=emoji
-                )
-                session.add(category)
-            
-        if not income_categories:
-            for name, emoji in standard_income_categories:
-                category = Category(
-                    user_id=user.id,
-                    name=name,
-                    type=TransactionType.INCOME.value,
-                    icon=emoji
-                )
-                session.add(category)
-        
-        session.commit()
+    # Додаємо стандартні категорії для користувача однією транзакцією
+    missing = []
+    if not expense_categories:
+        missing += [(name, TransactionType.EXPENSE.value, emoji) for name, emoji in standard_expense_categories]
+    if not income_categories:
+        missing += [(name, TransactionType.INCOME.value, emoji) for name, emoji in standard_income_categories]
+    if missing:
+        await create_categories(user.id, missing)
@@ -1,8 +1,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from database.session import Session
-from database.models import User, Transaction, TransactionType
-from datetime import datetime
+from database.models import TransactionType
+from database.async_db_operations import get_user, get_or_create_user, update_user_settings, add_transaction
 
 # Стани розмови
 SETUP_START, SETUP_BALANCE, SETUP_BUDGET, SETUP_NOTIFICATIONS = range(4)
@@ -11,30 +10,23 @@ async def start_setup(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Початок процесу налаштування з вітанням для нових користувачів"""
     user_id = update.effective_user.id
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
-            user = User(
-                telegram_id=user_id,
-                username=update.effective_user.username,
-                first_name=update.effective_user.first_name,
-                last_name=update.effective_user.last_name
-            )
-            session.add(user)
-            session.commit()
-            
-            # Для нового користувача не встановлюємо налаштування як завершені
-            user.setup_step = 'start'
-            user.is_setup_completed = False
-            session.commit()
+    user = await get_user(user_id)
+    if not user:
+        await get_or_create_user(
+            user_id,
+            username=update.effective_user.username,
+            first_name=update.effective_user.first_name,
+            last_name=update.effective_user.last_name
+        )
+        
+        # Для нового користувача не встановлюємо налаштування як завершені
+        user = await update_user_settings(user_id, setup_step='start', is_setup_completed=False)
     
     # Отримуємо ім'я користувача
     first_name = update.effective_user.first_name or "друже"
     
     # Перевіряємо, чи користувач налаштував бота
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        is_setup_complete = user and user.is_setup_completed
+    is_setup_complete = user and user.is_setup_completed
     
     # Якщо налаштування не завершено, показуємо привітання з єдиною кнопкою
     if not is_setup_complete:
@@ -92,22 +84,11 @@ async def setup_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         balance = float(update.message.text.replace(',', '.'))
         user_id = update.effective_user.id
         
-        with Session() as session:
-            user = session.query(User).filter(User.telegram_id == user_id).first()
-            user.initial_balance = balance
-            user.setup_step = 'balance'
-            currency = user.currency
-            
-            # Створюємо початкову транзакцію
-            transaction = Transaction(
-                user_id=user.id,
-                amount=balance,
-                type=TransactionType.INCOME,
-                description="Початковий баланс",
-                transaction_date=datetime.utcnow()
-            )
-            session.add(transaction)
-            session.commit()
+        user = await update_user_settings(user_id, initial_balance=balance, setup_step='balance')
+        currency = user.currency
+        
+        # Створюємо початкову транзакцію
+        await add_transaction(user.id, balance, "Початковий баланс", None, TransactionType.INCOME)
         
         await update.message.reply_text(
             f"Чудово! Ваш початковий баланс встановлено: {balance} {currency}\n\n"
@@ -127,12 +108,8 @@ async def setup_budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
         budget = float(update.message.text.replace(',', '.'))
         user_id = update.effective_user.id
         
-        with Session() as session:
-            user = session.query(User).filter(User.telegram_id == user_id).first()
-            user.monthly_budget = budget
-            user.setup_step = 'budget'
-            currency = user.currency
-            session.commit()
+        user = await update_user_settings(user_id, monthly_budget=budget, setup_step='budget')
+        currency = user.currency
         
         keyboard = [
             [
@@ -163,12 +140,9 @@ async def setup_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
     notifications_enabled = query.data == "notifications_on"
     
-    with Session() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
-        user.notification_enabled = notifications_enabled
-        user.setup_step = 'completed'
-        user.is_setup_completed = True
-        session.commit()
+    user = await update_user_settings(
+        user_id, notification_enabled=notifications_enabled, setup_step='completed', is_setup_completed=True
+    )
     
     await query.edit_message_text(
         f"Налаштування завершено! 🎉\n\n"
@@ -9,7 +9,7 @@ import os
 import calendar
 from copy import copy
 from datetime import datetime
-from database.db_operations import get_user, get_user_categories
+from database.async_db_operations import get_user, get_user_categories
 from services.statement_parser import StatementParser
 from services.vision_parser import VisionReceiptParser
 
@@ -489,18 +489,18 @@ async def show_edit_transaction_form(query, context, transaction_data):
 
 async def handle_edit_single_transaction(query, context):
     """Показує меню редагування конкретної транзакції"""
-    from database.db_operations import get_user, get_transaction_by_id
+    from database.async_db_operations import get_user, get_transaction_by_id
     
     try:
         # Витягуємо ID транзакції з callback_data
         transaction_id = int(query.data.split('_')[-1])
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
         
-        transaction = get_transaction_by_id(transaction_id, user.id)
+        transaction = await get_transaction_by_id(transaction_id, user.id)
         if not transaction:
             await query.answer("Транзакція не знайдена.", show_alert=True)
             return
@@ -607,18 +607,18 @@ async def handle_edit_description(query, context):
 
 async def handle_edit_category(query, context):
     """Показує список категорій для вибору нової категорії"""
-    from database.db_operations import get_user, get_user_categories, get_transaction_by_id
+    from database.async_db_operations import get_user, get_user_categories, get_transaction_by_id
     
     try:
         # Парсимо transaction_id з нового формату change_category_{id}
         transaction_id = int(query.data.replace("change_category_", ""))
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
         
-        transaction = get_transaction_by_id(transaction_id, user.id)
+        transaction = await get_transaction_by_id(transaction_id, user.id)
         if not transaction:
             await query.answer("Транзакція не знайдена.", show_alert=True)
             return
@@ -626,12 +626,12 @@ async def handle_edit_category(query, context):
         # Отримуємо категорії відповідного типу
         transaction_type_str = transaction.type.value if hasattr(transaction.type, 'value') else str(transaction.type)
         logger.info(f"Looking for categories with type: {transaction_type_str} for user: {user.id}")
-        categories = get_user_categories(user.id, category_type=transaction_type_str)
+        categories = await get_user_categories(user.id, category_type=transaction_type_str)
         logger.info(f"Found {len(categories)} categories")
         
         if not categories:
             # Спробуємо отримати всі категорії користувача для діагностики
-            all_categories = get_user_categories(user.id)
+            all_categories = await get_user_categories(user.id)
             logger.info(f"User has {len(all_categories)} total categories: {[f'{cat.name}({cat.type})' for cat in all_categories]}")
             
             # Якщо у користувача є категорії, але не цього типу, показуємо всі
@@ -674,7 +674,7 @@ async def handle_edit_category(query, context):
 
 async def handle_set_category(query, context):
     """Зберігає нову категорію для транзакції"""
-    from database.db_operations import update_transaction, get_user
+    from database.async_db_operations import update_transaction, get_user
     
     try:
         parts = query.data.split('_')
@@ -687,7 +687,7 @@ async def handle_set_category(query, context):
         category_id = int(parts[3])
         
         # Отримуємо користувача по Telegram ID
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.answer("❌ Користувач не знайдений.", show_alert=True)
             return
@@ -695,7 +695,7 @@ async def handle_set_category(query, context):
         logger.info(f"Setting category {category_id} for transaction {transaction_id}, user_id={user.id}")
         
         # Використовуємо внутрішній user_id з бази даних
-        result = update_transaction(transaction_id, user.id, category_id=category_id)
+        result = await update_transaction(transaction_id, user.id, category_id=category_id)
         
         if result:
             await query.answer("✅ Категорія оновлена!", show_alert=False)
@@ -729,7 +729,7 @@ async def handle_set_category(query, context):
 
 async def handle_delete_transaction(query, context):
     """Обробляє видалення транзакції"""
-    from database.db_operations import delete_transaction
+    from database.async_db_operations import delete_transaction
     
     try:
         transaction_id = int(query.data.split('_')[-1])
@@ -756,17 +756,17 @@ async def handle_delete_transaction(query, context):
 
 async def handle_confirm_delete(query, context):
     """Підтверджує видалення транзакції"""
-    from database.db_operations import get_user, delete_transaction
+    from database.async_db_operations import get_user, delete_transaction
     
     try:
         transaction_id = int(query.data.split('_')[-1])
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
         
-        success = delete_transaction(transaction_id, user.id)
+        success = await delete_transaction(transaction_id, user.id)
         
         if success:
             await query.answer("✅ Транзакція видалена!", show_alert=True)
@@ -805,7 +805,7 @@ async def handle_receipt_photo_soon(query, context):
 
 async def show_all_transactions(query, context):
     """Показує всі транзакції користувача з пагінацією та фільтрацією"""
-    from database.db_operations import get_transactions, get_user_categories
+    from database.async_db_operations import get_transactions, count_transactions, get_user_categories
     from database.models import TransactionType
     
     # Отримуємо параметри пагінації з контексту користувача
@@ -902,14 +902,22 @@ async def show_all_transactions(query, context):
     
     # Отримуємо користувача
     telegram_id = query.from_user.id
-    from database.db_operations import get_or_create_user
-    user = get_or_create_user(telegram_id)
+    from database.async_db_operations import get_or_create_user
+    user = await get_or_create_user(telegram_id)
     
     # Визначаємо валюту
     currency = user.currency or "UAH"
     currency_symbol = {"UAH": "₴", "USD": "$", "EUR": "€", "GBP": "£"}.get(currency, currency)
     
-    # Отримуємо загальну кількість транзакцій (для пагінації)
+    # Курсори keyset-пагінації: для кожної сторінки зберігаємо (дата, id) останньої
+    # транзакції попередньої сторінки. При зміні фільтрів курсори стають недійсними.
+    filter_key = (user.id, category_id, transaction_type, period)
+    if view_params.get('cursor_key') != filter_key:
+        view_params['cursor_key'] = filter_key
+        view_params['cursors'] = {}
+    cursors = view_params['cursors']
+    after = cursors.get(page) if page > 1 else None
+    # Якщо курсора немає (наприклад, після перезапуску), падаємо назад на OFFSET
     offset = (page - 1) * per_page
     
     # Отримуємо транзакції з бази даних з урахуванням фільтрів
@@ -919,38 +927,35 @@ async def show_all_transactions(query, context):
         if start_date and end_date:
             logger.info(f"Date range: {start_date} to {end_date}")
         
-        transactions = get_transactions(
+        transactions = await get_transactions(
             user_id=user.id,
             limit=per_page,
             offset=offset,
             category_id=category_id,
             transaction_type=transaction_type,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            after=after
         )
         logger.info(f"Got {len(transactions)} transactions with filters: category_id={category_id}, type={transaction_type}, period={period}")
     except Exception as e:
         logger.error(f"Error getting transactions: {str(e)}")
         transactions = []
     
-    # Отримуємо загальну кількість транзакцій для пагінації
-    # Для цього виконуємо додатковий запит без ліміту, але з тими ж фільтрами
+    if transactions:
+        last = transactions[-1]
+        cursors[page + 1] = (last.transaction_date, last.id)
+    
+    # Загальна кількість транзакцій для пагінації — один COUNT(*) з тими ж фільтрами
     try:
-        total_transactions = len(get_transactions(
+        total_transactions = await count_transactions(
             user_id=user.id,
-            limit=1000,  # Високе значення, щоб отримати всі
             category_id=category_id,
             transaction_type=transaction_type,
             start_date=start_date,
             end_date=end_date
-        ))
-        
-        # Додаємо також загальну кількість транзакцій без фільтрів для діагностики
-        total_all_transactions = len(get_transactions(
-            user_id=user.id,
-            limit=1000
-        ))
-        logger.info(f"Total transactions with filters: {total_transactions}, Total all transactions: {total_all_transactions}")
+        )
+        logger.info(f"Total transactions with filters: {total_transactions}")
     except Exception as e:
         logger.error(f"Error getting total transaction count: {str(e)}")
         total_transactions = 0
@@ -960,7 +965,7 @@ async def show_all_transactions(query, context):
     # Формуємо заголовок
     filter_info = []
     if category_id:
-        categories = get_user_categories(user.id)
+        categories = await get_user_categories(user.id)
         category_name = next((c.name for c in categories if c.id == category_id), "Невідома")
         filter_info.append(f"категорія: {category_name}")
         
@@ -1097,24 +1102,29 @@ async def handle_import_all_transactions(query, context):
         
         # Отримуємо користувача
         telegram_id = query.from_user.id
-        from database.db_operations import get_or_create_user
-        user = get_or_create_user(telegram_id)
+        from database.async_db_operations import get_or_create_user
+        user = await get_or_create_user(telegram_id)
         
         # Імпортуємо потрібні класи та функції для збереження транзакцій
-        from database.models import Transaction, TransactionType
-        from database.session import Session
-        from database.db_operations import get_category_by_name, create_category
+        from database.models import TransactionType
+        from database.async_db_operations import bulk_insert_transactions, get_user_accounts
         from datetime import datetime
-        import uuid
         
-        session = Session()
-        imported_count = 0
+        rows = []
         total_amount = 0
         
+        # Визначаємо рахунок для всіх транзакцій імпорту один раз
+        account_id = None
+        user_accounts = await get_user_accounts(user.id)
+        if user_accounts:
+            # Використовуємо перший доступний рахунок або основний рахунок
+            default_account = next((acc for acc in user_accounts if 'основн' in acc.name.lower() or 'карт' in acc.name.lower()), user_accounts[0])
+            account_id = default_account.id
+        
         # Отримуємо категорії користувача для автоматичної категоризації
-        from database.db_operations import get_user_categories
+        from database.async_db_operations import get_user_categories
         from services.ml_categorizer import TransactionCategorizer
-        user_categories = get_user_categories(user.id)
+        user_categories = await get_user_categories(user.id)
         categorizer = TransactionCategorizer()
         
         # Готуємо категорії для ML категоризатора
@@ -1127,7 +1137,7 @@ async def handle_import_all_transactions(query, context):
                 'type': category.type
             })
         
-        # Зберігаємо кожну транзакцію в базу даних
+        # Готуємо рядки для збереження (без запитів до БД всередині циклу)
         for trans in transactions:
             try:
                 # Отримуємо дані транзакції
@@ -1157,6 +1167,8 @@ async def handle_import_all_transactions(query, context):
                                 break
                             except ValueError:
                                 continue
+                        if isinstance(date, str):
+                            date = datetime.now().date()
                     except Exception:
                         date = datetime.now().date()
                 elif not date:
@@ -1229,41 +1241,31 @@ async def handle_import_all_transactions(query, context):
                 
                 logger.info(f"Final category_id: {category_id}")
                 
-                # Визначаємо рахунок для транзакції
-                account_id = None
-                from database.db_operations import get_user_accounts
-                user_accounts = get_user_accounts(user.id)
-                if user_accounts:
-                    # Використовуємо перший доступний рахунок або основний рахунок
-                    default_account = next((acc for acc in user_accounts if 'основн' in acc.name.lower() or 'карт' in acc.name.lower()), user_accounts[0])
-                    account_id = default_account.id
-                
-                # Створюємо транзакцію
-                transaction = Transaction(
-                    user_id=user.id,
-                    amount=amount,
-                    type=transaction_type,
-                    description=description,
-                    transaction_date=date,
-                    category_id=category_id,
-                    account_id=account_id,  # Додаємо рахунок
-                    created_at=datetime.now(),
-                    source='import'
-                )
-                
-                logger.info(f"Created transaction object: amount={amount}, type={transaction_type}, description={description[:30]}")
-                
-                # Зберігаємо в базу даних
-                session.add(transaction)
-                imported_count += 1
+                rows.append({
+                    'amount': amount,
+                    'type': transaction_type,
+                    'description': description,
+                    'transaction_date': date,
+                    'category_id': category_id,
+                    'source': 'import'
+                })
                 
             except Exception as e:
                 logger.error(f"Помилка імпорту окремої транзакції: {e}")
                 continue
         
-        # Застосовуємо всі зміни
-        session.commit()
-        session.close()
+        async def report_progress(done, total):
+            # Оновлюємо повідомлення після кожної збереженої пачки
+            if done < total:
+                try:
+                    await query.edit_message_text(f"⏳ Імпорт транзакцій: {done} з {total}...")
+                except Exception as e:
+                    logger.debug(f"Не вдалося оновити прогрес імпорту: {e}")
+        
+        # Зберігаємо всі транзакції пачками (рахунок і категорії вже визначені)
+        imported_count = await bulk_insert_transactions(
+            user.id, rows, account_id=account_id, progress=report_progress
+        )
         
         # Показуємо повідомлення про успіх
         keyboard = [
@@ -1303,16 +1305,16 @@ async def handle_import_all_transactions(query, context):
 
 async def handle_edit_transactions(query, context):
     """Обробляє показ списку транзакцій для редагування"""
-    from database.db_operations import get_user, get_transactions
+    from database.async_db_operations import get_user, get_transactions
     
     try:
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
         
         # Отримуємо останні 10 транзакцій користувача
-        transactions = get_transactions(user.id, limit=10, offset=0)
+        transactions = await get_transactions(user.id, limit=10, offset=0)
         
         if not transactions:
             keyboard = [
@@ -1596,10 +1598,10 @@ async def show_receipt_photo_soon(query, context):
 
 async def notify_receipt_ready(query, context):
     """Обробляє запит на повідомлення про готовність функції фото чеку"""
-    from database.db_operations import update_user_settings
+    from database.async_db_operations import update_user_settings
     
     user_id = query.from_user.id
-    update_user_settings(user_id, {"notify_receipt_ready": True})
+    await update_user_settings(user_id, {"notify_receipt_ready": True})
     
     await query.answer("✅ Ми повідомимо вас, коли ця функція буде готова!")
     await show_receipt_photo_soon(query, context)
@@ -1770,9 +1772,9 @@ async def show_transaction_filters(query, context):
         
         # Отримуємо назву категорії
         if category != 'all' and isinstance(category, int):
-            from database.db_operations import get_user, get_user_categories
-            user = get_user(query.from_user.id)
-            categories = get_user_categories(user.id)
+            from database.async_db_operations import get_user, get_user_categories
+            user = await get_user(query.from_user.id)
+            categories = await get_user_categories(user.id)
             category_obj = next((c for c in categories if c.id == category), None)
             category_text = category_obj.name if category_obj else 'Невідома категорія'
         else:
@@ -2077,18 +2079,18 @@ async def show_type_filter_menu(query, context):
 
 async def handle_view_single_transaction(query, context):
     """Показує детальну інформацію про транзакцію"""
-    from database.db_operations import get_user, get_transaction_by_id
+    from database.async_db_operations import get_user, get_transaction_by_id
     
     try:
         # Витягуємо ID транзакції з callback_data
         transaction_id = int(query.data.split('_')[-1])
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
         
-        transaction = get_transaction_by_id(transaction_id, user.id)
+        transaction = await get_transaction_by_id(transaction_id, user.id)
         if not transaction:
             await query.answer("Транзакція не знайдена.", show_alert=True)
             return
@@ -2169,7 +2171,7 @@ async def handle_monobank_excel_upload(query, context):
             total_amount = summary.get('total_amount', 0)
             
             # Визначаємо валюту
-            user = get_user(user_id)
+            user = await get_user(user_id)
             currency = user.currency or "UAH"
             currency_symbol = {"UAH": "₴", "USD": "$", "EUR": "€", "GBP": "£"}.get(currency, currency)
             
@@ -2325,10 +2327,10 @@ async def process_transaction_input(update, context):
 async def perform_auto_categorization(update, context):
     """Виконує автоматичну категоризацію транзакції використовуючи тільки існуючі категорії користувача"""
     try:
-        from database.db_operations import get_user, get_user_categories, get_category_by_id
+        from database.async_db_operations import get_user, get_user_categories, get_category_by_id
         from services.ml_categorizer import TransactionCategorizer
         
-        user = get_user(update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if not user:
             await update.message.reply_text("Користувач не знайдений.")
             return
@@ -2339,7 +2341,7 @@ async def perform_auto_categorization(update, context):
             return
         
         # Отримуємо категорії користувача відповідного типу
-        user_categories = get_user_categories(user.id, category_type=transaction_data['type'])
+        user_categories = await get_user_categories(user.id, category_type=transaction_data['type'])
         
         if not user_categories:
             # Якщо у користувача немає категорій відповідного типу, пропонуємо створити їх
@@ -2368,8 +2370,8 @@ async def perform_auto_categorization(update, context):
         
         # Тренуємо категоризатор на історії транзакцій користувача (якщо є)
         try:
-            from database.db_operations import get_transactions
-            user_transactions = get_transactions(user.id, limit=100)  # Останні 100 транзакцій
+            from database.async_db_operations import get_transactions
+            user_transactions = await get_transactions(user.id, limit=100)  # Останні 100 транзакцій
             if user_transactions:
                 formatted_transactions = []
                 for trans in user_transactions:
@@ -2461,15 +2463,15 @@ async def handle_change_category(query, context):
             await query.answer("Дані транзакції втрачено.", show_alert=True)
             return
         
-        from database.db_operations import get_user, get_user_categories
+        from database.async_db_operations import get_user, get_user_categories
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
         
         # Отримуємо категорії відповідного типу
-        categories = get_user_categories(user.id, category_type=transaction_data['type'])
+        categories = await get_user_categories(user.id, category_type=transaction_data['type'])
         
         if not categories:
             await query.edit_message_text(
@@ -2545,11 +2547,11 @@ async def handle_manual_category_selection(query, context):
 async def save_transaction_to_db(query, context, category_id):
     """Зберігає транзакцію в базу даних та навчає ML категоризатор"""
     try:
-        from database.db_operations import get_user, add_transaction, get_category_by_id
+        from database.async_db_operations import get_user, add_transaction, get_category_by_id
         from database.models import TransactionType
         from services.ml_categorizer import TransactionCategorizer
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         transaction_data = context.user_data.get('pending_transaction')
         
         if not user or not transaction_data:
@@ -2566,7 +2568,7 @@ async def save_transaction_to_db(query, context, category_id):
         selected_account_id = context.user_data.get('selected_account_id')
         
         # Зберігаємо транзакцію
-        transaction = add_transaction(
+        transaction = await add_transaction(
             user_id=user.id,
             amount=transaction_data['amount'],
             description=transaction_data['description'],
@@ -2579,7 +2581,7 @@ async def save_transaction_to_db(query, context, category_id):
         if transaction:
             # Навчаємо ML категоризатор на цій транзакції
             try:
-                category = get_category_by_id(category_id)
+                category = await get_category_by_id(category_id)
                 if category:
                     categorizer = TransactionCategorizer()
                     
@@ -2606,13 +2608,13 @@ async def save_transaction_to_db(query, context, category_id):
                 # Не критична помилка, продовжуємо
             
             # Отримуємо інформацію про категорію та рахунок для відображення
-            category = get_category_by_id(category_id)
+            category = await get_category_by_id(category_id)
             
             # Отримуємо інформацію про рахунок
             account_info = ""
             if selected_account_id:
-                from database.db_operations import get_user_accounts
-                accounts = get_user_accounts(user.id)
+                from database.async_db_operations import get_user_accounts
+                accounts = await get_user_accounts(user.id)
                 selected_account = next((acc for acc in accounts if acc.id == selected_account_id), None)
                 if selected_account:
                     account_info = f"\n💳 {selected_account.icon or '💳'} {selected_account.name}"
@@ -2691,9 +2693,9 @@ async def handle_cancel_transaction(query, context):
 async def show_category_filter_menu(query, context, page=1):
     """Показує меню вибору категорії з пагінацією"""
     try:
-        from database.db_operations import get_user, get_user_categories
+        from database.async_db_operations import get_user, get_user_categories
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.edit_message_text("Користувач не знайдений.")
             return
@@ -2703,7 +2705,7 @@ async def show_category_filter_menu(query, context, page=1):
         current_category = filters.get('category', 'all')
         
         # Отримуємо категорії користувача
-        categories = get_user_categories(user.id)
+        categories = await get_user_categories(user.id)
         
         if not categories:
             await query.edit_message_text(
@@ -2945,7 +2947,7 @@ async def handle_edit_type(query, context):
 
 async def handle_set_type(query, context):
     """Обробляє встановлення нового типу для транзакції"""
-    from database.db_operations import get_user, get_transaction_by_id, update_transaction, get_user_categories
+    from database.async_db_operations import get_user, get_transaction_by_id, update_transaction, get_user_categories
     from database.models import TransactionType
     
     try:
@@ -2956,12 +2958,12 @@ async def handle_set_type(query, context):
         new_type = parts[3]  # 'income' або 'expense'
         
         # Отримуємо транзакцію
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.answer("Користувач не знайдений.", show_alert=True)
             return
             
-        transaction = get_transaction_by_id(transaction_id, user.id)
+        transaction = await get_transaction_by_id(transaction_id, user.id)
         if not transaction:
             await query.answer("Транзакція не знайдена.", show_alert=True)
             return
@@ -3007,7 +3009,7 @@ async def handle_set_type(query, context):
             return
         
         # Отримуємо категорії нового типу
-        categories = get_user_categories(user.id, category_type=new_type)
+        categories = await get_user_categories(user.id, category_type=new_type)
         
         if not categories:
             # Якщо немає категорій відповідного типу, попереджаємо користувача
@@ -3064,7 +3066,7 @@ async def handle_set_type(query, context):
 
 async def handle_confirm_type_change(query, context):
     """Підтверджує зміну типу та категорії транзакції"""
-    from database.db_operations import update_transaction, get_transaction_by_id, get_user
+    from database.async_db_operations import update_transaction, get_transaction_by_id, get_user
     from database.models import TransactionType
     
     try:
@@ -3081,13 +3083,13 @@ async def handle_confirm_type_change(query, context):
         logger.info(f"Transaction ID: {transaction_id}, New type: {new_type}, Category ID: {category_id}")
         
         # Отримуємо поточну транзакцію для перевірки типу
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             logger.error("User not found")
             await query.answer("Користувач не знайдений.", show_alert=True)
             return
             
-        transaction = get_transaction_by_id(transaction_id, user.id)
+        transaction = await get_transaction_by_id(transaction_id, user.id)
         if not transaction:
             logger.error("Transaction not found")
             await query.answer("Транзакція не знайдена.", show_alert=True)
@@ -3119,7 +3121,7 @@ async def handle_confirm_type_change(query, context):
         # Оновлюємо транзакцію з новим типом, категорією та сумою
         logger.info(f"Calling update_transaction with params: transaction_id={transaction_id}, user_id={user.id}, type={new_transaction_type}, category_id={category_id}, amount={new_amount}")
         
-        success = update_transaction(
+        success = await update_transaction(
             transaction_id, 
             user.id,  # Використовуємо внутрішній ID користувача
             type=new_transaction_type,
@@ -3169,20 +3171,20 @@ async def improve_categorization_on_feedback(user_id: int, description: str, cor
     Покращує категоризацію на основі зворотного зв'язку користувача
     """
     try:
-        from database.db_operations import get_user, get_user_categories, get_category_by_id
+        from database.async_db_operations import get_user, get_user_categories, get_category_by_id
         from services.ml_categorizer import TransactionCategorizer
         
-        user = get_user(user_id)
+        user = await get_user(user_id)
         if not user:
             return False
         
         # Отримуємо правильну категорію
-        correct_category = get_category_by_id(correct_category_id)
+        correct_category = await get_category_by_id(correct_category_id)
         if not correct_category:
             return False
         
         # Отримуємо всі категорії користувача цього типу
-        user_categories = get_user_categories(user.id, category_type=transaction_type)
+        user_categories = await get_user_categories(user.id, category_type=transaction_type)
         formatted_categories = []
         for category in user_categories:
             formatted_categories.append({
@@ -3232,10 +3234,10 @@ async def handle_account_selection(query, context):
         context.user_data['awaiting_transaction_input'] = True
         
         # Отримуємо інформацію про рахунок для відображення
-        from database.db_operations import get_user, get_user_accounts
-        user = get_user(query.from_user.id)
+        from database.async_db_operations import get_user, get_user_accounts
+        user = await get_user(query.from_user.id)
         if user:
-            accounts = get_user_accounts(user.id)
+            accounts = await get_user_accounts(user.id)
             selected_account = next((acc for acc in accounts if acc.id == account_id), None)
             
             if selected_account:
@@ -3277,9 +3279,9 @@ async def handle_account_selection(query, context):
 async def show_account_selection(query, context, transaction_type):
     """Показує список рахунків для вибору перед додаванням транзакції"""
     try:
-        from database.db_operations import get_user, get_user_accounts
+        from database.async_db_operations import get_user, get_user_accounts
         
-        user = get_user(query.from_user.id)
+        user = await get_user(query.from_user.id)
         if not user:
             await query.answer("Користувач не знайдений.", show_alert=True)
             return
@@ -3288,7 +3290,7 @@ async def show_account_selection(query, context, transaction_type):
         context.user_data['transaction_type'] = transaction_type
         
         # Отримуємо рахунки користувача
-        accounts = get_user_accounts(user.id)
+        accounts = await get_user_accounts(user.id)
         
         if not accounts:
             # Якщо рахунків немає, пропонуємо створити
@@ -16,6 +16,23 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
                 'message': 'Bot is running'
             }
             self.wfile.write(json.dumps(response).encode())
+        elif self.path == '/metrics':
+            # Метрики пулу з'єднань з БД (зайнятість, час очікування), кешу (влучання/промахи)
+            # та SQL-запитів (кількість і час за обробниками, повільні запити), стан репліки для читань
+            from database.engine import get_pool_stats
+            from database.cache import get_cache_stats
+            from database.query_stats import get_query_stats
+            from database.replica import get_replica_stats
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            response = {
+                'db_pool': get_pool_stats(),
+                'cache': get_cache_stats(),
+                'queries': get_query_stats(),
+                'read_replica': get_replica_stats()
+            }
+            self.wfile.write(json.dumps(response).encode())
         else:
             self.send_response(404)
             self.end_headers()
@@ -12,8 +12,10 @@ from datetime import datetime, timedelta
 import calendar
 import io
 import logging
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 from collections import defaultdict, Counter
+
+from database.frame_cache import TransactionFrame, as_dataframe
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -42,18 +44,21 @@ class AdvancedAnalytics:
             'Інше': '#95A5A6'
         }
     
-    def create_spending_heatmap(self, transactions: List[Dict]) -> io.BytesIO:
+    def _expenses(self, transactions: Union[List[Dict], TransactionFrame]) -> pd.DataFrame:
+        """Витрати з колонками date, amount, category"""
+        df = as_dataframe(transactions)
+        return df[df['type'] == 'expense']
+    
+    def create_spending_heatmap(self, transactions: Union[List[Dict], TransactionFrame]) -> io.BytesIO:
         """Створює теплову карту витрат по днях тижня та годинах"""
         try:
             # Підготовка даних
-            df = pd.DataFrame([
-                {
-                    'hour': t['transaction_date'].hour,
-                    'weekday': t['transaction_date'].weekday(),
-                    'amount': t['amount'] if t['type'] == 'expense' else 0
-                }
-                for t in transactions if t['type'] == 'expense'
-            ])
+            expenses = self._expenses(transactions)
+            df = pd.DataFrame({
+                'hour': expenses['date'].dt.hour,
+                'weekday': expenses['date'].dt.weekday,
+                'amount': expenses['amount']
+            })
             
             if df.empty:
                 return self._create_no_data_chart("Немає даних про витрати")
@@ -94,12 +99,14 @@ class AdvancedAnalytics:
             logger.error(f"Error creating spending heatmap: {e}")
             return self._create_error_chart("Помилка створення теплової карти")
     
-    def create_cash_flow_chart(self, transactions: List[Dict]) -> io.BytesIO:
+    def create_cash_flow_chart(self, transactions: Union[List[Dict], TransactionFrame]) -> io.BytesIO:
         """Створює графік грошового потоку (доходи vs витрати)"""
         try:
             # Підготовка даних
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['transaction_date']).dt.date
+            df = as_dataframe(transactions)
+            if df.empty:
+                return self._create_no_data_chart("Немає транзакцій")
+            df = df.assign(date=df['date'].dt.date)
             
             # Групування по датах
             daily_data = df.groupby(['date', 'type'])['amount'].sum().unstack(fill_value=0)
@@ -157,18 +164,16 @@ class AdvancedAnalytics:
             logger.error(f"Error creating cash flow chart: {e}")
             return self._create_error_chart("Помилка створення графіку грошового потоку")
     
-    def create_category_trends_chart(self, transactions: List[Dict]) -> io.BytesIO:
+    def create_category_trends_chart(self, transactions: Union[List[Dict], TransactionFrame]) -> io.BytesIO:
         """Створює графік трендів по категоріях"""
         try:
             # Підготовка даних
-            df = pd.DataFrame([
-                {
-                    'date': t['transaction_date'].date(),
-                    'category': t.get('category_name', 'Без категорії'),
-                    'amount': t['amount']
-                }
-                for t in transactions if t['type'] == 'expense'
-            ])
+            expenses = self._expenses(transactions)
+            df = pd.DataFrame({
+                'date': expenses['date'].dt.date,
+                'category': expenses['category'],
+                'amount': expenses['amount']
+            })
             
             if df.empty:
                 return self._create_no_data_chart("Немає даних про витрати по категоріях")
@@ -210,18 +215,16 @@ class AdvancedAnalytics:
             logger.error(f"Error creating category trends chart: {e}")
             return self._create_error_chart("Помилка створення графіку трендів")
     
-    def create_spending_patterns_chart(self, transactions: List[Dict]) -> io.BytesIO:
+    def create_spending_patterns_chart(self, transactions: Union[List[Dict], TransactionFrame]) -> io.BytesIO:
         """Створює графік паттернів витрат (по днях тижня та місяцях)"""
         try:
             # Підготовка даних
-            df = pd.DataFrame([
-                {
-                    'weekday': t['transaction_date'].weekday(),
-                    'month': t['transaction_date'].month,
-                    'amount': t['amount']
-                }
-                for t in transactions if t['type'] == 'expense'
-            ])
+            expenses = self._expenses(transactions)
+            df = pd.DataFrame({
+                'weekday': expenses['date'].dt.weekday,
+                'month': expenses['date'].dt.month,
+                'amount': expenses['amount']
+            })
             
             if df.empty:
                 return self._create_no_data_chart("Немає даних про витрати")
@@ -280,7 +283,7 @@ class AdvancedAnalytics:
             logger.error(f"Error creating spending patterns chart: {e}")
             return self._create_error_chart("Помилка створення графіку паттернів")
     
-    def create_budget_vs_actual_chart(self, transactions: List[Dict], 
+    def create_budget_vs_actual_chart(self, transactions: Union[List[Dict], TransactionFrame], 
                                      monthly_budget: float = None) -> io.BytesIO:
         """Створює порівняння бюджету з фактичними витратами"""
         try:
@@ -288,14 +291,7 @@ class AdvancedAnalytics:
                 return self._create_no_data_chart("Бюджет не встановлено")
             
             # Підготовка даних
-            df = pd.DataFrame([
-                {
-                    'date': t['transaction_date'],
-                    'amount': t['amount'],
-                    'category': t.get('category_name', 'Без категорії')
-                }
-                for t in transactions if t['type'] == 'expense'
-            ])
+            df = self._expenses(transactions)[['date', 'amount', 'category']]
             
             if df.empty:
                 return self._create_no_data_chart("Немає даних про витрати")
@@ -348,15 +344,12 @@ class AdvancedAnalytics:
             logger.error(f"Error creating budget vs actual chart: {e}")
             return self._create_error_chart("Помилка створення графіку бюджету")
     
-    def create_expense_distribution_donut(self, transactions: List[Dict]) -> io.BytesIO:
+    def create_expense_distribution_donut(self, transactions: Union[List[Dict], TransactionFrame]) -> io.BytesIO:
         """Створює пончикову діаграму розподілу витрат"""
         try:
             # Підготовка даних
-            category_totals = defaultdict(float)
-            for t in transactions:
-                if t['type'] == 'expense':
-                    category = t.get('category_name', 'Без категорії')
-                    category_totals[category] += t['amount']
+            expenses = self._expenses(transactions)
+            category_totals = expenses.groupby('category', sort=False)['amount'].sum().to_dict()
             
             if not category_totals:
                 return self._create_no_data_chart("Немає даних про витрати")
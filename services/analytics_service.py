@@ -2,13 +2,15 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
 import logging
 from datetime import datetime, timedelta
 import io
 import base64
 from pathlib import Path
 
+from database.frame_cache import TransactionFrame
+
 logger = logging.getLogger(__name__)
 
 class AnalyticsService:
@@ -23,14 +25,21 @@ class AnalyticsService:
             # Fallback to default style
             plt.style.use('default')
         
-    def generate_monthly_report(self, transactions: List[Dict]) -> Dict:
+    def _to_dataframe(self, transactions: Union[List[Dict], TransactionFrame]) -> pd.DataFrame:
+        """DataFrame with date, amount, type and category columns"""
+        if isinstance(transactions, TransactionFrame):
+            return transactions.to_dataframe()
+        df = pd.DataFrame(transactions)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def generate_monthly_report(self, transactions: Union[List[Dict], TransactionFrame]) -> Dict:
         """
         Generate a comprehensive monthly financial report
         """
         try:
             # Convert transactions to DataFrame
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['date'])
+            df = self._to_dataframe(transactions)
             
             # Calculate basic metrics
             total_income = df[df['type'] == 'income']['amount'].sum()
@@ -180,15 +189,14 @@ class AnalyticsService:
             return {}
 
     def generate_custom_report(self, 
-                             transactions: List[Dict],
+                             transactions: Union[List[Dict], TransactionFrame],
                              report_type: str,
                              time_period: str = 'monthly') -> Dict:
         """
         Generate a custom financial report based on specified parameters
         """
         try:
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['date'])
+            df = self._to_dataframe(transactions)
             
             if report_type == 'category_analysis':
                 return self._generate_category_analysis(df)
@@ -1,111 +1,177 @@
+import copy
+import functools
 import logging
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 import calendar
 from database.models import Session, BudgetPlan, CategoryBudget, Transaction, Category, User, TransactionType
-from database.db_operations import create_or_update_budget, get_user_categories, get_transactions
+from database.unit_of_work import session_scope, commit_session
+from database.db_operations import create_or_update_budget, get_user_categories, get_transactions, compare_periods
 from sqlalchemy import func
 
 logger = logging.getLogger(__name__)
 
+def _memoized(method):
+    """Кешує результат методу читання в межах BudgetManager.memoized().
+
+    Поза блоком кеш живе лише на час зовнішнього виклику, тож вкладені виклики
+    (get_budget_performance_metrics → get_comprehensive_budget_status →
+    get_active_budget) не повторюють запити. Кожен виклик отримує власну
+    копію результату, тож зміни в ній не потрапляють у кеш.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.memoized():
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            if key not in self._memo:
+                self._memo[key] = method(self, *args, **kwargs)
+            return copy.deepcopy(self._memo[key])
+    return wrapper
+
+def _invalidates(method):
+    """Метод запису: після нього кешовані результати скидаються"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.invalidate()
+    return wrapper
+
 class BudgetManager:
     """Клас для управління бюджетами користувача"""
     
     def __init__(self, user_id):
         self.user_id = user_id
+        self._memo = None
+    
+    @contextmanager
+    def memoized(self):
+        """Спільні проміжні результати для всіх викликів у блоці (наприклад, одного оновлення).
+
+        Активний бюджет, суми, денні й місячні ряди рахуються один раз; методи
+        запису (bulk_update_category_limits, reset_monthly_budget тощо) їх скидають.
+        """
+        if self._memo is not None:
+            yield self
+            return
+        self._memo = {}
+        try:
+            yield self
+        finally:
+            self._memo = None
+    
+    def invalidate(self):
+        """Скидає кешовані в memoized() результати"""
+        if self._memo is not None:
+            self._memo.clear()
     
+    @_memoized
     def get_active_budget(self):
         """Отримує активний бюджет користувача (що включає поточну дату)"""
-        session = Session()
-        today = datetime.utcnow().date()
-        
-        budget = session.query(BudgetPlan) \
-            .filter(BudgetPlan.user_id == self.user_id,
-                    BudgetPlan.start_date <= today,
-                    BudgetPlan.end_date >= today) \
-            .order_by(BudgetPlan.created_at.desc()) \
-            .first()
-        
-        if budget:
-            # Завантажуємо бюджети по категоріям
-            category_budgets = session.query(CategoryBudget, Category.name, Category.icon) \
-                .join(Category, CategoryBudget.category_id == Category.id) \
-                .filter(CategoryBudget.budget_plan_id == budget.id) \
-                .all()
-                
-            # Створюємо копію budget як словник, щоб уникнути проблем з сесією
-            budget_dict = {
-                'id': budget.id,
-                'user_id': budget.user_id,
-                'name': budget.name,
-                'total_budget': budget.total_budget,
-                'start_date': budget.start_date,
-                'end_date': budget.end_date,
-                'created_at': budget.created_at
-            }
-                
-            # Обчислюємо фактичні витрати по категоріям
-            result = {
-                'budget': budget_dict,
-                'category_budgets': []
-            }
+        with session_scope(Session) as session:
+            today = datetime.utcnow().date()
+        
+            budget = session.query(BudgetPlan) \
+                .filter(BudgetPlan.user_id == self.user_id,
+                        BudgetPlan.start_date <= today,
+                        BudgetPlan.end_date >= today) \
+                .order_by(BudgetPlan.created_at.desc()) \
+                .first()
+        
+            if budget:
+                # Створюємо копію budget як словник, щоб уникнути проблем з сесією
+                budget_dict = {
+                    'id': budget.id,
+                    'user_id': budget.user_id,
+                    'name': budget.name,
+                    'total_budget': budget.total_budget,
+                    'start_date': budget.start_date,
+                    'end_date': budget.end_date,
+                    'created_at': budget.created_at
+                }
             
-            for cat_budget, cat_name, cat_icon in category_budgets:
-                # Отримуємо суму фактичних витрат по категорії
-                actual_spending = session.query(func.sum(Transaction.amount)) \
+                # Фактичні витрати одним запитом: суми по категоріях (GROUP BY category_id),
+                # приєднані до бюджетів категорій, і загальна сума по всіх категоріях.
+                # Період бюджету — цілі дні від start_date до end_date включно
+                period_end = datetime.combine(budget.end_date.date() + timedelta(days=1), datetime.min.time())
+                spent = session.query(
+                        Transaction.category_id.label('category_id'),
+                        func.sum(Transaction.amount).label('amount')
+                    ) \
                     .filter(Transaction.user_id == self.user_id,
-                            Transaction.category_id == cat_budget.category_id,
-                            Transaction.transaction_date >= budget_dict['start_date'],
-                            Transaction.transaction_date <= budget_dict['end_date'],
+                            Transaction.transaction_date >= budget.start_date,
+                            Transaction.transaction_date < period_end,
                             Transaction.type == TransactionType.EXPENSE) \
-                    .scalar() or 0
-                
-                # Розраховуємо відсоток використання бюджету
-                if cat_budget.allocated_amount > 0:
-                    usage_percent = (actual_spending / cat_budget.allocated_amount) * 100
-                else:
-                    usage_percent = 0
-                
-                result['category_budgets'].append({
-                    'id': cat_budget.id,
-                    'category_id': cat_budget.category_id,
-                    'category_name': cat_name,
-                    'category_icon': cat_icon,
-                    'allocated_amount': cat_budget.allocated_amount,
-                    'actual_spending': actual_spending,
-                    'remaining': cat_budget.allocated_amount - actual_spending,
-                    'usage_percent': usage_percent
-                })
+                    .group_by(Transaction.category_id) \
+                    .cte('spent')
+                total = session.query(func.sum(spent.c.amount)).scalar_subquery()
+            
+                # Рядок плану є завжди, тож загальна сума приходить і без бюджетів категорій
+                rows = session.query(
+                        CategoryBudget.id,
+                        CategoryBudget.category_id,
+                        CategoryBudget.allocated_amount,
+                        Category.name,
+                        Category.icon,
+                        spent.c.amount,
+                        total.label('total')
+                    ) \
+                    .select_from(BudgetPlan) \
+                    .outerjoin(CategoryBudget, CategoryBudget.budget_plan_id == BudgetPlan.id) \
+                    .outerjoin(Category, CategoryBudget.category_id == Category.id) \
+                    .outerjoin(spent, spent.c.category_id == CategoryBudget.category_id) \
+                    .filter(BudgetPlan.id == budget.id) \
+                    .order_by(CategoryBudget.id) \
+                    .all()
+            
+                result = {
+                    'budget': budget_dict,
+                    'category_budgets': []
+                }
+            
+                for cat_budget_id, category_id, allocated_amount, cat_name, cat_icon, actual_spending, _ in rows:
+                    if cat_budget_id is None or cat_name is None:
+                        continue
+                    actual_spending = actual_spending or 0
                 
-            # Обчислюємо загальні витрати
-            total_spending = session.query(func.sum(Transaction.amount)) \
-                .filter(Transaction.user_id == self.user_id,
-                        Transaction.transaction_date >= budget_dict['start_date'],
-                        Transaction.transaction_date <= budget_dict['end_date'],
-                        Transaction.type == TransactionType.EXPENSE) \
-                .scalar() or 0
+                    # Розраховуємо відсоток використання бюджету
+                    if allocated_amount > 0:
+                        usage_percent = (actual_spending / allocated_amount) * 100
+                    else:
+                        usage_percent = 0
                 
-            result['total_spending'] = total_spending
-            result['total_remaining'] = budget_dict['total_budget'] - total_spending
-            result['usage_percent'] = (total_spending / budget_dict['total_budget']) * 100 if budget_dict['total_budget'] > 0 else 0
+                    result['category_budgets'].append({
+                        'id': cat_budget_id,
+                        'category_id': category_id,
+                        'category_name': cat_name,
+                        'category_icon': cat_icon,
+                        'allocated_amount': allocated_amount,
+                        'actual_spending': actual_spending,
+                        'remaining': allocated_amount - actual_spending,
+                        'usage_percent': usage_percent
+                    })
             
-            session.close()
-            return result
-        else:
-            session.close()
-            return None
+                total_spending = (rows[0].total if rows else 0) or 0
+                result['total_spending'] = total_spending
+                result['total_remaining'] = budget_dict['total_budget'] - total_spending
+                result['usage_percent'] = (total_spending / budget_dict['total_budget']) * 100 if budget_dict['total_budget'] > 0 else 0
+            
+                return result
+            else:
+                return None
     
     def get_all_budgets(self):
         """Отримує всі бюджети користувача"""
-        session = Session()
-        
-        budgets = session.query(BudgetPlan) \
-            .filter(BudgetPlan.user_id == self.user_id) \
-            .order_by(BudgetPlan.start_date.desc()) \
-            .all()
+        with session_scope(Session) as session:
+            budgets = session.query(BudgetPlan) \
+                .filter(BudgetPlan.user_id == self.user_id) \
+                .order_by(BudgetPlan.start_date.desc()) \
+                .all()
             
-        session.close()
         return budgets
     
+    @_invalidates
     def create_monthly_budget(self, name, total_budget, year=None, month=None, category_allocations=None):
         """Створює місячний бюджет"""
         if not year or not month:
@@ -138,117 +204,113 @@ class BudgetManager:
         
         return budget
     
+    @_invalidates
     def update_category_budget(self, budget_id, category_id, new_amount):
         """Оновлює бюджет для конкретної категорії"""
-        session = Session()
-        
-        category_budget = session.query(CategoryBudget) \
-            .join(BudgetPlan, CategoryBudget.budget_plan_id == BudgetPlan.id) \
-            .filter(BudgetPlan.id == budget_id,
-                    CategoryBudget.category_id == category_id,
-                    BudgetPlan.user_id == self.user_id) \
-            .first()
-        
-        if category_budget:
-            category_budget.allocated_amount = new_amount
-            session.commit()
-            session.close()
-            return True
-        else:
-            session.close()
-            return False
+        with session_scope(Session) as session:
+            category_budget = session.query(CategoryBudget) \
+                .join(BudgetPlan, CategoryBudget.budget_plan_id == BudgetPlan.id) \
+                .filter(BudgetPlan.id == budget_id,
+                        CategoryBudget.category_id == category_id,
+                        BudgetPlan.user_id == self.user_id) \
+                .first()
+        
+            if category_budget:
+                category_budget.allocated_amount = new_amount
+                commit_session(session)
+                return True
+            else:
+                return False
     
+    @_memoized
     def get_previous_period_comparison(self):
         """Отримує порівняння з попереднім періодом"""
         active_budget = self.get_active_budget()
         if not active_budget:
             return None
             
-        session = Session()
-        
-        # Визначаємо попередній період (місяць)
-        current_budget = active_budget['budget']
-        current_start = current_budget['start_date']
-        current_end = current_budget['end_date']
-        
-        # Розраховуємо попередній період
-        if current_start.month == 1:
-            prev_year = current_start.year - 1
-            prev_month = 12
-        else:
-            prev_year = current_start.year
-            prev_month = current_start.month - 1
+        with session_scope(Session) as session:
+            # Визначаємо попередній період (місяць)
+            current_budget = active_budget['budget']
+            current_start = current_budget['start_date']
+            current_end = current_budget['end_date']
+        
+            # Розраховуємо попередній період
+            if current_start.month == 1:
+                prev_year = current_start.year - 1
+                prev_month = 12
+            else:
+                prev_year = current_start.year
+                prev_month = current_start.month - 1
             
-        prev_start = date(prev_year, prev_month, 1)
-        prev_end = date(prev_year, prev_month, calendar.monthrange(prev_year, prev_month)[1])
-        
-        # Отримуємо витрати поточного періоду
-        current_expenses = session.query(
-            Transaction.category_id,
-            Category.name,
-            Category.icon,
-            func.sum(Transaction.amount).label('amount')
-        ).join(Category, Transaction.category_id == Category.id) \
-         .filter(Transaction.user_id == self.user_id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.transaction_date >= datetime.combine(current_start, datetime.min.time()),
-                Transaction.transaction_date <= datetime.combine(current_end, datetime.max.time())) \
-         .group_by(Transaction.category_id, Category.name, Category.icon) \
-         .all()
+            prev_start = date(prev_year, prev_month, 1)
+            prev_end = date(prev_year, prev_month, calendar.monthrange(prev_year, prev_month)[1])
+        
+            # Отримуємо витрати поточного періоду
+            current_expenses = session.query(
+                Transaction.category_id,
+                Category.name,
+                Category.icon,
+                func.sum(Transaction.amount).label('amount')
+            ).join(Category, Transaction.category_id == Category.id) \
+             .filter(Transaction.user_id == self.user_id,
+                    Transaction.type == TransactionType.EXPENSE,
+                    Transaction.transaction_date >= datetime.combine(current_start, datetime.min.time()),
+                    Transaction.transaction_date <= datetime.combine(current_end, datetime.max.time())) \
+             .group_by(Transaction.category_id, Category.name, Category.icon) \
+             .all()
          
-        # Отримуємо витрати попереднього періоду
-        previous_expenses = session.query(
-            Transaction.category_id,
-            Category.name,
-            Category.icon,
-            func.sum(Transaction.amount).label('amount')
-        ).join(Category, Transaction.category_id == Category.id) \
-         .filter(Transaction.user_id == self.user_id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.transaction_date >= datetime.combine(prev_start, datetime.min.time()),
-                Transaction.transaction_date <= datetime.combine(prev_end, datetime.max.time())) \
-         .group_by(Transaction.category_id, Category.name, Category.icon) \
-         .all()
+            # Отримуємо витрати попереднього періоду
+            previous_expenses = session.query(
+                Transaction.category_id,
+                Category.name,
+                Category.icon,
+                func.sum(Transaction.amount).label('amount')
+            ).join(Category, Transaction.category_id == Category.id) \
+             .filter(Transaction.user_id == self.user_id,
+                    Transaction.type == TransactionType.EXPENSE,
+                    Transaction.transaction_date >= datetime.combine(prev_start, datetime.min.time()),
+                    Transaction.transaction_date <= datetime.combine(prev_end, datetime.max.time())) \
+             .group_by(Transaction.category_id, Category.name, Category.icon) \
+             .all()
          
-        # Створюємо словники для зручного порівняння
-        current_dict = {expense.category_id: expense.amount for expense in current_expenses}
-        previous_dict = {expense.category_id: expense.amount for expense in previous_expenses}
+            # Створюємо словники для зручного порівняння
+            current_dict = {expense.category_id: expense.amount for expense in current_expenses}
+            previous_dict = {expense.category_id: expense.amount for expense in previous_expenses}
         
-        # Загальні суми
-        current_total = sum(current_dict.values())
-        previous_total = sum(previous_dict.values())
+            # Загальні суми
+            current_total = sum(current_dict.values())
+            previous_total = sum(previous_dict.values())
         
-        # Розраховуємо зміни
-        total_change = current_total - previous_total
-        total_change_percent = ((current_total - previous_total) / previous_total * 100) if previous_total > 0 else 0
+            # Розраховуємо зміни
+            total_change = current_total - previous_total
+            total_change_percent = ((current_total - previous_total) / previous_total * 100) if previous_total > 0 else 0
         
-        # Порівняння по категоріям
-        category_comparisons = []
-        all_categories = set(current_dict.keys()) | set(previous_dict.keys())
+            # Порівняння по категоріям
+            category_comparisons = []
+            all_categories = set(current_dict.keys()) | set(previous_dict.keys())
         
-        for category_id in all_categories:
-            current_amount = current_dict.get(category_id, 0)
-            previous_amount = previous_dict.get(category_id, 0)
+            for category_id in all_categories:
+                current_amount = current_dict.get(category_id, 0)
+                previous_amount = previous_dict.get(category_id, 0)
             
-            # Знаходимо назву та іконку категорії
-            category_info = session.query(Category.name, Category.icon) \
-                .filter(Category.id == category_id).first()
+                # Знаходимо назву та іконку категорії
+                category_info = session.query(Category.name, Category.icon) \
+                    .filter(Category.id == category_id).first()
                 
-            if category_info:
-                change = current_amount - previous_amount
-                change_percent = ((current_amount - previous_amount) / previous_amount * 100) if previous_amount > 0 else 0
+                if category_info:
+                    change = current_amount - previous_amount
+                    change_percent = ((current_amount - previous_amount) / previous_amount * 100) if previous_amount > 0 else 0
                 
-                category_comparisons.append({
-                    'category_id': category_id,
-                    'name': category_info.name,
-                    'icon': category_info.icon,
-                    'current_amount': current_amount,
-                    'previous_amount': previous_amount,
-                    'change': change,
-                    'change_percent': change_percent
-                })
-        
-        session.close()
+                    category_comparisons.append({
+                        'category_id': category_id,
+                        'name': category_info.name,
+                        'icon': category_info.icon,
+                        'current_amount': current_amount,
+                        'previous_amount': previous_amount,
+                        'change': change,
+                        'change_percent': change_percent
+                    })
         
         return {
             'current_period': {
@@ -266,63 +328,66 @@ class BudgetManager:
             'category_comparisons': category_comparisons
         }
     
+    @_memoized
+    def _get_all_time_totals(self):
+        """Суми всіх доходів і витрат користувача (income, expenses)"""
+        with session_scope(Session) as session:
+            total_income = session.query(func.sum(Transaction.amount)) \
+                .filter(Transaction.user_id == self.user_id,
+                       Transaction.type == TransactionType.INCOME) \
+                .scalar() or 0
+            
+            total_expenses = session.query(func.sum(Transaction.amount)) \
+                .filter(Transaction.user_id == self.user_id,
+                       Transaction.type == TransactionType.EXPENSE) \
+                .scalar() or 0
+        
+        return total_income, total_expenses
+    
+    @_memoized
     def get_user_financial_status(self):
         """Отримує поточний фінансовий стан користувача"""
-        session = Session()
-        
-        # Отримуємо дані користувача
-        user = session.query(User).filter(User.id == self.user_id).first()
-        if not user:
-            session.close()
-            return None
-            
-        # Розраховуємо поточний баланс
-        # Сума всіх доходів
-        total_income = session.query(func.sum(Transaction.amount)) \
-            .filter(Transaction.user_id == self.user_id,
-                   Transaction.type == TransactionType.INCOME) \
-            .scalar() or 0
+        with session_scope(Session) as session:
+            # Отримуємо дані користувача
+            user = session.query(User).filter(User.id == self.user_id).first()
+            if not user:
+                return None
             
-        # Сума всіх витрат
-        total_expenses = session.query(func.sum(Transaction.amount)) \
-            .filter(Transaction.user_id == self.user_id,
-                   Transaction.type == TransactionType.EXPENSE) \
-            .scalar() or 0
+            # Розраховуємо поточний баланс
+            total_income, total_expenses = self._get_all_time_totals()
             
-        # Поточний баланс = початковий баланс + доходи - витрати
-        current_balance = (user.initial_balance or 0) + total_income - total_expenses
+            # Поточний баланс = початковий баланс + доходи - витрати
+            current_balance = (user.initial_balance or 0) + total_income - total_expenses
         
-        # Отримуємо баланс по категоріях (тільки витрати за поточний місяць)
-        today = datetime.utcnow()
-        first_day = date(today.year, today.month, 1)
-        last_day = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
-        
-        category_balances = session.query(
-            Category.id,
-            Category.name,
-            Category.icon,
-            func.sum(Transaction.amount).label('spent_amount')
-        ).join(Transaction, Category.id == Transaction.category_id) \
-         .filter(Transaction.user_id == self.user_id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.transaction_date >= datetime.combine(first_day, datetime.min.time()),
-                Transaction.transaction_date <= datetime.combine(last_day, datetime.max.time())) \
-         .group_by(Category.id, Category.name, Category.icon) \
-         .order_by(func.sum(Transaction.amount).desc()) \
-         .all()
-        
-        # Конвертуємо результати в простий список, щоб уникнути проблем з сесією
-        category_list = [
-            {
-                'category_id': cat.id,
-                'name': cat.name,
-                'icon': cat.icon,
-                'spent_amount': cat.spent_amount
-            }
-            for cat in category_balances
-        ]
+            # Отримуємо баланс по категоріях (тільки витрати за поточний місяць)
+            today = datetime.utcnow()
+            first_day = date(today.year, today.month, 1)
+            last_day = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
         
-        session.close()
+            category_balances = session.query(
+                Category.id,
+                Category.name,
+                Category.icon,
+                func.sum(Transaction.amount).label('spent_amount')
+            ).join(Transaction, Category.id == Transaction.category_id) \
+             .filter(Transaction.user_id == self.user_id,
+                    Transaction.type == TransactionType.EXPENSE,
+                    Transaction.transaction_date >= datetime.combine(first_day, datetime.min.time()),
+                    Transaction.transaction_date <= datetime.combine(last_day, datetime.max.time())) \
+             .group_by(Category.id, Category.name, Category.icon) \
+             .order_by(func.sum(Transaction.amount).desc()) \
+             .all()
+        
+            # Конвертуємо результати в простий список, щоб уникнути проблем з сесією
+            category_list = [
+                {
+                    'category_id': cat.id,
+                    'name': cat.name,
+                    'icon': cat.icon,
+                    'spent_amount': cat.spent_amount
+                }
+                for cat in category_balances
+            ]
         
         return {
             'current_balance': current_balance,
@@ -333,6 +398,7 @@ class BudgetManager:
             'category_balances': category_list
         }
 
+    @_memoized
     def get_budget_status(self):
         """Отримує статус бюджету"""
         active_budget = self.get_active_budget()
@@ -382,87 +448,76 @@ class BudgetManager:
             'financial_status': financial_status
         }
     
+    @_memoized
     def get_comprehensive_budget_status(self):
         """
         Основна функція для отримання повного стану бюджету
         Повертає всю інформацію необхідну для вкладки "Мій бюджет"
         """
-        session = Session()
+        with session_scope(Session) as session:
+            # Отримуємо користувача
+            user = session.query(User).filter(User.id == self.user_id).first()
+            if not user:
+                return None
         
-        # Отримуємо користувача
-        user = session.query(User).filter(User.id == self.user_id).first()
-        if not user:
-            session.close()
-            return None
+            # Поточний період (місяць)
+            today = datetime.utcnow()
+            current_month_start = date(today.year, today.month, 1)
+            days_in_month = calendar.monthrange(today.year, today.month)[1]
+            current_month_end = date(today.year, today.month, days_in_month)
         
-        # Поточний період (місяць)
-        today = datetime.utcnow()
-        current_month_start = date(today.year, today.month, 1)
-        days_in_month = calendar.monthrange(today.year, today.month)[1]
-        current_month_end = date(today.year, today.month, days_in_month)
+            # Дні що залишились до кінця місяця
+            days_remaining = (current_month_end - today.date()).days + 1
+            days_passed = (today.date() - current_month_start).days + 1
         
-        # Дні що залишились до кінця місяця
-        days_remaining = (current_month_end - today.date()).days + 1
-        days_passed = (today.date() - current_month_start).days + 1
+            # Отримуємо активний бюджет
+            active_budget = self.get_active_budget()
         
-        # Отримуємо активний бюджет
-        active_budget = self.get_active_budget()
+            # Обчислюємо доходи за поточний місяць
+            monthly_income = session.query(func.sum(Transaction.amount)) \
+                .filter(Transaction.user_id == self.user_id,
+                       Transaction.type == TransactionType.INCOME,
+                       Transaction.transaction_date >= datetime.combine(current_month_start, datetime.min.time()),
+                       Transaction.transaction_date <= datetime.combine(current_month_end, datetime.max.time())) \
+                .scalar() or 0
         
-        # Обчислюємо доходи за поточний місяць
-        monthly_income = session.query(func.sum(Transaction.amount)) \
-            .filter(Transaction.user_id == self.user_id,
-                   Transaction.type == TransactionType.INCOME,
-                   Transaction.transaction_date >= datetime.combine(current_month_start, datetime.min.time()),
-                   Transaction.transaction_date <= datetime.combine(current_month_end, datetime.max.time())) \
-            .scalar() or 0
-        
-        # Обчислюємо витрати за поточний місяць
-        monthly_expenses = session.query(func.sum(Transaction.amount)) \
-            .filter(Transaction.user_id == self.user_id,
-                   Transaction.type == TransactionType.EXPENSE,
-                   Transaction.transaction_date >= datetime.combine(current_month_start, datetime.min.time()),
-                   Transaction.transaction_date <= datetime.combine(current_month_end, datetime.max.time())) \
-            .scalar() or 0
-        
-        # Загальний баланс користувача
-        total_income = session.query(func.sum(Transaction.amount)) \
-            .filter(Transaction.user_id == self.user_id,
-                   Transaction.type == TransactionType.INCOME) \
-            .scalar() or 0
-            
-        total_expenses = session.query(func.sum(Transaction.amount)) \
-            .filter(Transaction.user_id == self.user_id,
-                   Transaction.type == TransactionType.EXPENSE) \
-            .scalar() or 0
+            # Обчислюємо витрати за поточний місяць
+            monthly_expenses = session.query(func.sum(Transaction.amount)) \
+                .filter(Transaction.user_id == self.user_id,
+                       Transaction.type == TransactionType.EXPENSE,
+                       Transaction.transaction_date >= datetime.combine(current_month_start, datetime.min.time()),
+                       Transaction.transaction_date <= datetime.combine(current_month_end, datetime.max.time())) \
+                .scalar() or 0
+        
+            # Загальний баланс користувача
+            total_income, total_expenses = self._get_all_time_totals()
             
-        current_balance = (user.initial_balance or 0) + total_income - total_expenses
+            current_balance = (user.initial_balance or 0) + total_income - total_expenses
         
-        # Залишок до кінця місяця
-        budget_total = user.monthly_budget or (active_budget['budget']['total_budget'] if active_budget else 0)
-        remaining_budget = budget_total - monthly_expenses
+            # Залишок до кінця місяця
+            budget_total = user.monthly_budget or (active_budget['budget']['total_budget'] if active_budget else 0)
+            remaining_budget = budget_total - monthly_expenses
         
-        # Прогрес використання бюджету
-        if budget_total > 0:
-            budget_usage_percent = (monthly_expenses / budget_total) * 100
-        else:
-            budget_usage_percent = 0
-        
-        # Рекомендований денний ліміт (що залишився)
-        if days_remaining > 0 and remaining_budget > 0:
-            recommended_daily_limit = remaining_budget / days_remaining
-        else:
-            recommended_daily_limit = 0
+            # Прогрес використання бюджету
+            if budget_total > 0:
+                budget_usage_percent = (monthly_expenses / budget_total) * 100
+            else:
+                budget_usage_percent = 0
         
-        # Середні витрати за день поточного місяця
-        if days_passed > 0:
-            average_daily_spending = monthly_expenses / days_passed
-        else:
-            average_daily_spending = 0
+            # Рекомендований денний ліміт (що залишився)
+            if days_remaining > 0 and remaining_budget > 0:
+                recommended_daily_limit = remaining_budget / days_remaining
+            else:
+                recommended_daily_limit = 0
         
-        # Прогноз витрат до кінця місяця
-        projected_monthly_expenses = average_daily_spending * days_in_month
+            # Середні витрати за день поточного місяця
+            if days_passed > 0:
+                average_daily_spending = monthly_expenses / days_passed
+            else:
+                average_daily_spending = 0
         
-        session.close()
+            # Прогноз витрат до кінця місяця
+            projected_monthly_expenses = average_daily_spending * days_in_month
         
         return {
             # 1. Поточний стан бюджету
@@ -503,46 +558,49 @@ class BudgetManager:
             'active_budget': active_budget
         }
     
+    @_invalidates
     def set_daily_spending_limit(self, daily_limit):
         """Встановлює денний ліміт витрат для користувача"""
-        session = Session()
-        
-        user = session.query(User).filter(User.id == self.user_id).first()
-        if user:
-            # Обчислюємо місячний бюджет на основі денного ліміту
-            today = datetime.utcnow()
-            days_in_month = calendar.monthrange(today.year, today.month)[1]
-            monthly_budget = daily_limit * days_in_month
+        with session_scope(Session) as session:
+            user = session.query(User).filter(User.id == self.user_id).first()
+            if user:
+                # Обчислюємо місячний бюджет на основі денного ліміту
+                today = datetime.utcnow()
+                days_in_month = calendar.monthrange(today.year, today.month)[1]
+                monthly_budget = daily_limit * days_in_month
             
-            user.monthly_budget = monthly_budget
-            session.commit()
-            session.close()
-            return True
+                user.monthly_budget = monthly_budget
+                commit_session(session)
+                return True
         
-        session.close()
         return False
     
     def get_daily_spending_stats(self, days_count=7):
         """Отримує статистику витрат за останні N днів"""
-        session = Session()
-        
-        today = datetime.utcnow().date()
-        start_date = today - timedelta(days=days_count-1)
-        
-        # Отримуємо витрати по днях
-        daily_expenses = session.query(
-            func.date(Transaction.transaction_date).label('date'),
-            func.sum(Transaction.amount).label('total_amount')
-        ).filter(
-            Transaction.user_id == self.user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.transaction_date >= datetime.combine(start_date, datetime.min.time()),
-            Transaction.transaction_date <= datetime.combine(today, datetime.max.time())
-        ).group_by(func.date(Transaction.transaction_date)) \
-         .order_by(func.date(Transaction.transaction_date)) \
-         .all()
-        
-        session.close()
+        with self.memoized():
+            # Коротший ряд — хвіст уже обчисленого довшого
+            series = self._memo.get('daily_spending_stats')
+            if series is None or len(series) < days_count:
+                series = self._memo['daily_spending_stats'] = self._get_daily_spending_stats(days_count)
+            return copy.deepcopy(series[-days_count:]) if days_count > 0 else []
+    
+    def _get_daily_spending_stats(self, days_count):
+        with session_scope(Session) as session:
+            today = datetime.utcnow().date()
+            start_date = today - timedelta(days=days_count-1)
+        
+            # Отримуємо витрати по днях
+            daily_expenses = session.query(
+                func.date(Transaction.transaction_date).label('date'),
+                func.sum(Transaction.amount).label('total_amount')
+            ).filter(
+                Transaction.user_id == self.user_id,
+                Transaction.type == TransactionType.EXPENSE,
+                Transaction.transaction_date >= datetime.combine(start_date, datetime.min.time()),
+                Transaction.transaction_date <= datetime.combine(today, datetime.max.time())
+            ).group_by(func.date(Transaction.transaction_date)) \
+             .order_by(func.date(Transaction.transaction_date)) \
+             .all()
         
         # Формуємо результат з заповненням пропущених днів
         result = []
@@ -558,34 +616,34 @@ class BudgetManager:
         
         return result
     
+    @_invalidates
     def reset_monthly_budget(self, confirm=False):
         """Скидає поточний місячний бюджет"""
         if not confirm:
             return {'status': 'confirmation_required', 'message': 'Потрібне підтвердження для скидання бюджету'}
         
-        session = Session()
-        
-        # Скидаємо місячний бюджет у користувача
-        user = session.query(User).filter(User.id == self.user_id).first()
-        if user:
-            user.monthly_budget = None
+        with session_scope(Session) as session:
+            # Скидаємо місячний бюджет у користувача
+            user = session.query(User).filter(User.id == self.user_id).first()
+            if user:
+                user.monthly_budget = None
             
-        # Деактивуємо поточні бюджетні плани
-        today = datetime.utcnow().date()
-        active_budgets = session.query(BudgetPlan) \
-            .filter(BudgetPlan.user_id == self.user_id,
-                    BudgetPlan.start_date <= today,
-                    BudgetPlan.end_date >= today) \
-            .all()
+            # Деактивуємо поточні бюджетні плани
+            today = datetime.utcnow().date()
+            active_budgets = session.query(BudgetPlan) \
+                .filter(BudgetPlan.user_id == self.user_id,
+                        BudgetPlan.start_date <= today,
+                        BudgetPlan.end_date >= today) \
+                .all()
         
-        for budget in active_budgets:
-            budget.end_date = today - timedelta(days=1)  # Завершуємо вчора
+            for budget in active_budgets:
+                budget.end_date = today - timedelta(days=1)  # Завершуємо вчора
         
-        session.commit()
-        session.close()
+            commit_session(session)
         
         return {'status': 'success', 'message': 'Бюджет успішно скинуто'}
     
+    @_invalidates
     def create_smart_monthly_budget(self, total_budget, distribution_strategy='balanced'):
         """
         Створює розумний місячний бюджет з автоматичним розподілом по категоріях
@@ -594,64 +652,60 @@ class BudgetManager:
             total_budget: Загальна сума бюджету
             distribution_strategy: Стратегія розподілу ('balanced', 'historical', 'conservative')
         """
-        session = Session()
-        
-        # Отримуємо категорії користувача
-        categories = session.query(Category).filter(
-            Category.user_id == self.user_id,
-            Category.type == TransactionType.EXPENSE
-        ).all()
-        
-        if not categories:
-            session.close()
-            return None
-        
-        category_allocations = {}
-        
-        if distribution_strategy == 'historical':
-            # Розподіл на основі історичних витрат
-            prev_month_stats = self._get_previous_month_spending()
-            total_prev_spending = sum(prev_month_stats.values())
+        with session_scope(Session) as session:
+            # Отримуємо категорії користувача
+            categories = session.query(Category).filter(
+                Category.user_id == self.user_id,
+                Category.type == TransactionType.EXPENSE
+            ).all()
+        
+            if not categories:
+                return None
+        
+            category_allocations = {}
+        
+            if distribution_strategy == 'historical':
+                # Розподіл на основі історичних витрат
+                prev_month_stats = self._get_previous_month_spending()
+                total_prev_spending = sum(prev_month_stats.values())
             
-            if total_prev_spending > 0:
-                for category in categories:
-                    historical_amount = prev_month_stats.get(category.id, 0)
-                    percentage = historical_amount / total_prev_spending
-                    category_allocations[category.id] = total_budget * percentage
-            else:
-                # Якщо немає історії, використовуємо рівномірний розподіл
-                amount_per_category = total_budget / len(categories)
-                for category in categories:
-                    category_allocations[category.id] = amount_per_category
+                if total_prev_spending > 0:
+                    for category in categories:
+                        historical_amount = prev_month_stats.get(category.id, 0)
+                        percentage = historical_amount / total_prev_spending
+                        category_allocations[category.id] = total_budget * percentage
+                else:
+                    # Якщо немає історії, використовуємо рівномірний розподіл
+                    amount_per_category = total_budget / len(categories)
+                    for category in categories:
+                        category_allocations[category.id] = amount_per_category
                     
-        elif distribution_strategy == 'conservative':
-            # Консервативний розподіл: більше на основні потреби
-            essential_categories = ['Продукти', 'Житло', 'Транспорт', 'Комунальні послуги']
-            essential_percent = 0.7  # 70% на основні потреби
-            other_percent = 0.3     # 30% на інше
+            elif distribution_strategy == 'conservative':
+                # Консервативний розподіл: більше на основні потреби
+                essential_categories = ['Продукти', 'Житло', 'Транспорт', 'Комунальні послуги']
+                essential_percent = 0.7  # 70% на основні потреби
+                other_percent = 0.3     # 30% на інше
             
-            essential_cats = [cat for cat in categories if cat.name in essential_categories]
-            other_cats = [cat for cat in categories if cat.name not in essential_categories]
+                essential_cats = [cat for cat in categories if cat.name in essential_categories]
+                other_cats = [cat for cat in categories if cat.name not in essential_categories]
             
-            if essential_cats:
-                essential_budget = total_budget * essential_percent
-                amount_per_essential = essential_budget / len(essential_cats)
-                for cat in essential_cats:
-                    category_allocations[cat.id] = amount_per_essential
+                if essential_cats:
+                    essential_budget = total_budget * essential_percent
+                    amount_per_essential = essential_budget / len(essential_cats)
+                    for cat in essential_cats:
+                        category_allocations[cat.id] = amount_per_essential
             
-            if other_cats:
-                other_budget = total_budget * other_percent
-                amount_per_other = other_budget / len(other_cats)
-                for cat in other_cats:
-                    category_allocations[cat.id] = amount_per_other
+                if other_cats:
+                    other_budget = total_budget * other_percent
+                    amount_per_other = other_budget / len(other_cats)
+                    for cat in other_cats:
+                        category_allocations[cat.id] = amount_per_other
                     
-        else:  # balanced (default)
-            # Рівномірний розподіл
-            amount_per_category = total_budget / len(categories)
-            for category in categories:
-                category_allocations[category.id] = amount_per_category
-        
-        session.close()
+            else:  # balanced (default)
+                # Рівномірний розподіл
+                amount_per_category = total_budget / len(categories)
+                for category in categories:
+                    category_allocations[category.id] = amount_per_category
         
         # Створюємо бюджет
         today = datetime.utcnow()
@@ -663,35 +717,34 @@ class BudgetManager:
             category_allocations=category_allocations
         )
     
+    @_memoized
     def _get_previous_month_spending(self):
         """Допоміжний метод для отримання витрат за попередній місяць"""
-        session = Session()
-        
-        today = datetime.utcnow()
-        if today.month == 1:
-            prev_year = today.year - 1
-            prev_month = 12
-        else:
-            prev_year = today.year
-            prev_month = today.month - 1
-        
-        prev_start = date(prev_year, prev_month, 1)
-        prev_end = date(prev_year, prev_month, calendar.monthrange(prev_year, prev_month)[1])
+        with session_scope(Session) as session:
+            today = datetime.utcnow()
+            if today.month == 1:
+                prev_year = today.year - 1
+                prev_month = 12
+            else:
+                prev_year = today.year
+                prev_month = today.month - 1
         
-        spending_by_category = session.query(
-            Transaction.category_id,
-            func.sum(Transaction.amount).label('amount')
-        ).filter(
-            Transaction.user_id == self.user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.transaction_date >= datetime.combine(prev_start, datetime.min.time()),
-            Transaction.transaction_date <= datetime.combine(prev_end, datetime.max.time())
-        ).group_by(Transaction.category_id).all()
+            prev_start = date(prev_year, prev_month, 1)
+            prev_end = date(prev_year, prev_month, calendar.monthrange(prev_year, prev_month)[1])
         
-        session.close()
+            spending_by_category = session.query(
+                Transaction.category_id,
+                func.sum(Transaction.amount).label('amount')
+            ).filter(
+                Transaction.user_id == self.user_id,
+                Transaction.type == TransactionType.EXPENSE,
+                Transaction.transaction_date >= datetime.combine(prev_start, datetime.min.time()),
+                Transaction.transaction_date <= datetime.combine(prev_end, datetime.max.time())
+            ).group_by(Transaction.category_id).all()
         
         return {spending.category_id: spending.amount for spending in spending_by_category}
     
+    @_memoized
     def get_budget_recommendations(self):
         """Генерує рекомендації щодо бюджету на основі аналізу витрат"""
         comprehensive_status = self.get_comprehensive_budget_status()
@@ -740,32 +793,31 @@ class BudgetManager:
         
         return recommendations
     
+    @_invalidates
     def update_monthly_budget_total(self, new_budget):
         """Оновлює загальний місячний бюджет користувача"""
-        session = Session()
-        
-        user = session.query(User).filter(User.id == self.user_id).first()
-        if user:
-            user.monthly_budget = new_budget
+        with session_scope(Session) as session:
+            user = session.query(User).filter(User.id == self.user_id).first()
+            if user:
+                user.monthly_budget = new_budget
             
-            # Оновлюємо також активний бюджетний план, якщо є
-            today = datetime.utcnow().date()
-            active_budget = session.query(BudgetPlan) \
-                .filter(BudgetPlan.user_id == self.user_id,
-                        BudgetPlan.start_date <= today,
-                        BudgetPlan.end_date >= today) \
-                .first()
+                # Оновлюємо також активний бюджетний план, якщо є
+                today = datetime.utcnow().date()
+                active_budget = session.query(BudgetPlan) \
+                    .filter(BudgetPlan.user_id == self.user_id,
+                            BudgetPlan.start_date <= today,
+                            BudgetPlan.end_date >= today) \
+                    .first()
             
-            if active_budget:
-                active_budget.total_budget = new_budget
+                if active_budget:
+                    active_budget.total_budget = new_budget
             
-            session.commit()
-            session.close()
-            return True
+                commit_session(session)
+                return True
         
-        session.close()
         return False
     
+    @_invalidates
     def bulk_update_category_limits(self, category_limits):
         """
         Масове оновлення лімітів для категорій
@@ -773,44 +825,42 @@ class BudgetManager:
         Args:
             category_limits: dict {category_id: amount}
         """
-        session = Session()
-        
-        today = datetime.utcnow().date()
-        active_budget = session.query(BudgetPlan) \
-            .filter(BudgetPlan.user_id == self.user_id,
-                    BudgetPlan.start_date <= today,
-                    BudgetPlan.end_date >= today) \
-            .first()
+        with session_scope(Session) as session:
+            today = datetime.utcnow().date()
+            active_budget = session.query(BudgetPlan) \
+                .filter(BudgetPlan.user_id == self.user_id,
+                        BudgetPlan.start_date <= today,
+                        BudgetPlan.end_date >= today) \
+                .first()
         
-        if not active_budget:
-            session.close()
-            return False
+            if not active_budget:
+                return False
         
-        success_count = 0
-        for category_id, amount in category_limits.items():
-            category_budget = session.query(CategoryBudget) \
-                .filter(CategoryBudget.budget_plan_id == active_budget.id,
-                        CategoryBudget.category_id == category_id) \
-                .first()
+            success_count = 0
+            for category_id, amount in category_limits.items():
+                category_budget = session.query(CategoryBudget) \
+                    .filter(CategoryBudget.budget_plan_id == active_budget.id,
+                            CategoryBudget.category_id == category_id) \
+                    .first()
             
-            if category_budget:
-                category_budget.allocated_amount = amount
-                success_count += 1
-            else:
-                # Створюємо новий запис, якщо не існує
-                new_category_budget = CategoryBudget(
-                    budget_plan_id=active_budget.id,
-                    category_id=category_id,
-                    allocated_amount=amount
-                )
-                session.add(new_category_budget)
-                success_count += 1
-        
-        session.commit()
-        session.close()
+                if category_budget:
+                    category_budget.allocated_amount = amount
+                    success_count += 1
+                else:
+                    # Створюємо новий запис, якщо не існує
+                    new_category_budget = CategoryBudget(
+                        budget_plan_id=active_budget.id,
+                        category_id=category_id,
+                        allocated_amount=amount
+                    )
+                    session.add(new_category_budget)
+                    success_count += 1
+        
+            commit_session(session)
         
         return success_count
     
+    @_memoized
     def get_category_spending_alerts(self, alert_threshold=0.8):
         """
         Отримує оповіщення про наближення до лімітів категорій
@@ -818,95 +868,90 @@ class BudgetManager:
         Args:
             alert_threshold: Поріг для оповіщення (0.8 = 80% використання)
         """
-        active_budget = self.get_active_budget()
-        if not active_budget:
-            return []
+        with session_scope(Session) as session:
+            today = datetime.utcnow().date()
+        
+            # Лічильники витрат категорій підтримуються при кожному записі транзакцій
+            # (database/budget_alerts.py), тож екран лише читає їх одним запитом
+            active_plan = session.query(BudgetPlan.id) \
+                .filter(BudgetPlan.user_id == self.user_id,
+                        BudgetPlan.start_date <= today,
+                        BudgetPlan.end_date >= today) \
+                .order_by(BudgetPlan.created_at.desc()) \
+                .limit(1) \
+                .scalar_subquery()
+            rows = session.query(
+                    CategoryBudget.allocated_amount,
+                    CategoryBudget.spent_amount,
+                    Category.name,
+                    Category.icon
+                ) \
+                .join(Category, CategoryBudget.category_id == Category.id) \
+                .filter(CategoryBudget.budget_plan_id == active_plan) \
+                .all()
         
         alerts = []
-        for cat_budget in active_budget['category_budgets']:
-            usage_percent = cat_budget['usage_percent'] / 100
+        for allocated, spent, name, icon in rows:
+            if not allocated or allocated <= 0:
+                continue
+            usage_percent = spent / allocated
             
             if usage_percent >= 1.0:  # Перевищення ліміту
                 alerts.append({
                     'type': 'exceeded',
-                    'category': cat_budget['category_name'],
-                    'icon': cat_budget['category_icon'],
-                    'usage_percent': cat_budget['usage_percent'],
-                    'overspend': cat_budget['actual_spending'] - cat_budget['allocated_amount'],
-                    'message': f"Перевищено ліміт категорії {cat_budget['category_name']} на {cat_budget['actual_spending'] - cat_budget['allocated_amount']:.2f} грн"
+                    'category': name,
+                    'icon': icon,
+                    'usage_percent': usage_percent * 100,
+                    'overspend': spent - allocated,
+                    'message': f"Перевищено ліміт категорії {name} на {spent - allocated:.2f} грн"
                 })
             elif usage_percent >= alert_threshold:  # Наближення до ліміту
                 alerts.append({
                     'type': 'warning',
-                    'category': cat_budget['category_name'],
-                    'icon': cat_budget['category_icon'],
-                    'usage_percent': cat_budget['usage_percent'],
-                    'remaining': cat_budget['remaining'],
-                    'message': f"Залишилось {cat_budget['remaining']:.2f} грн в категорії {cat_budget['category_name']}"
+                    'category': name,
+                    'icon': icon,
+                    'usage_percent': usage_percent * 100,
+                    'remaining': allocated - spent,
+                    'message': f"Залишилось {allocated - spent:.2f} грн в категорії {name}"
                 })
         
         return alerts
     
     def get_month_comparison(self, compare_months=3):
         """Порівняння витрат за останні N місяців"""
-        session = Session()
-        
+        with self.memoized():
+            # Місяці йдуть від поточного, тож менше N — початок уже обчисленого ряду
+            months = self._memo.get('month_comparison')
+            if months is None or len(months) < compare_months:
+                months = self._memo['month_comparison'] = self._get_month_comparison(compare_months)
+            return copy.deepcopy(months[:max(compare_months, 0)])
+    
+    def _get_month_comparison(self, compare_months):
         today = datetime.utcnow()
-        comparisons = []
-        
-        for i in range(compare_months):
-            # Обчислюємо місяць для порівняння
-            if today.month - i <= 0:
-                year = today.year - 1
-                month = 12 + (today.month - i)
-            else:
-                year = today.year
-                month = today.month - i
-            
-            start_date = date(year, month, 1)
-            end_date = date(year, month, calendar.monthrange(year, month)[1])
-            
-            # Загальні витрати за місяць
-            total_expenses = session.query(func.sum(Transaction.amount)) \
-                .filter(Transaction.user_id == self.user_id,
-                       Transaction.type == TransactionType.EXPENSE,
-                       Transaction.transaction_date >= datetime.combine(start_date, datetime.min.time()),
-                       Transaction.transaction_date <= datetime.combine(end_date, datetime.max.time())) \
-                .scalar() or 0
-            
-            # Витрати по категоріях
-            category_expenses = session.query(
-                Category.name,
-                Category.icon,
-                func.sum(Transaction.amount).label('amount')
-            ).join(Transaction, Category.id == Transaction.category_id) \
-             .filter(Transaction.user_id == self.user_id,
-                    Transaction.type == TransactionType.EXPENSE,
-                    Transaction.transaction_date >= datetime.combine(start_date, datetime.min.time()),
-                    Transaction.transaction_date <= datetime.combine(end_date, datetime.max.time())) \
-             .group_by(Category.name, Category.icon) \
-             .order_by(func.sum(Transaction.amount).desc()) \
-             .limit(5) \
-             .all()
-            
-            comparisons.append({
+        year, month = today.year, today.month
+        months = []
+        for _ in range(compare_months):
+            months.append((year, month))
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        
+        # Усі місяці одним запитом: суми й топ-5 категорій витрат з денних агрегатів
+        periods = compare_periods(self.user_id, [
+            (datetime(year, month, 1), datetime(year, month, calendar.monthrange(year, month)[1]))
+            for year, month in months
+        ], top=5)
+        
+        return [
+            {
                 'period': f"{month:02d}/{year}",
                 'year': year,
                 'month': month,
-                'total_expenses': total_expenses,
-                'top_categories': [
-                    {
-                        'name': cat.name,
-                        'icon': cat.icon,
-                        'amount': cat.amount
-                    }
-                    for cat in category_expenses
-                ]
-            })
-        
-        session.close()
-        return comparisons
+                'total_expenses': period['expenses'],
+                'top_categories': period['top_categories']
+            }
+            for (year, month), period in zip(months, periods)
+        ]
     
+    @_memoized
     def export_budget_data(self, format_type='dict'):
         """
         Експортує дані бюджету для аналізу або резервного копіювання
@@ -935,6 +980,7 @@ class BudgetManager:
         
         return export_data
     
+    @_memoized
     def get_budget_performance_metrics(self):
         """Обчислює метрики ефективності бюджету"""
         comprehensive_status = self.get_comprehensive_budget_status()
@@ -20,16 +20,16 @@ class FinancialAdvisor:
         """Створення профілю користувача на основі його фінансових даних"""
         try:
             # Отримуємо статистику за поточний місяць
-            current_stats = get_monthly_stats(self.user_id)
+            current_stats = get_monthly_stats(self.user_id, from_replica=True)
             
             # Отримуємо статистику за попередній місяць
             now = datetime.utcnow()
             prev_month = now.month - 1 if now.month > 1 else 12
             prev_year = now.year if now.month > 1 else now.year - 1
-            prev_stats = get_monthly_stats(self.user_id, prev_year, prev_month)
+            prev_stats = get_monthly_stats(self.user_id, prev_year, prev_month, from_replica=True)
             
             # Отримуємо останні транзакції
-            recent_transactions = get_transactions(self.user_id, limit=30)
+            recent_transactions = get_transactions(self.user_id, limit=30, from_replica=True)
             
             # Формуємо транзакції у читабельному вигляді
             transaction_texts = []
@@ -4,12 +4,15 @@
 """
 
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 import logging
 import calendar
 from collections import defaultdict, Counter
 
+from database.frame_cache import TransactionFrame, as_dataframe
+
 logger = logging.getLogger(__name__)
 
 class FinancialInsightsEngine:
@@ -268,37 +271,36 @@ class FinancialInsightsEngine:
         
         return recommendations
     
-    def generate_spending_insights(self, transactions: List[Dict], period_days: int = 30) -> List[str]:
+    def generate_spending_insights(self, transactions: Union[List[Dict], TransactionFrame], period_days: int = 30) -> List[str]:
         """Генерує персоналізовані інсайти про витрати"""
         try:
             insights = []
             
-            # Підготовка даних
+            # Підготовка даних: лише витрати, колонки date, amount, category
+            expenses = as_dataframe(transactions)
+            expenses = expenses[expenses['type'] == 'expense']
+            
             now = datetime.now()
             start_date = now - timedelta(days=period_days)
+            recent_expenses = expenses[expenses['date'] >= start_date]
             
-            recent_transactions = [
-                t for t in transactions 
-                if t['transaction_date'] >= start_date and t['type'] == 'expense'
-            ]
-            
-            if not recent_transactions:
+            if recent_expenses.empty:
                 return ["Немає даних про витрати за вказаний період"]
             
             # Аналіз категорій
-            category_analysis = self._analyze_categories(recent_transactions)
+            category_analysis = self._analyze_categories(recent_expenses)
             insights.extend(category_analysis)
             
             # Аналіз часових паттернів
-            time_analysis = self._analyze_time_patterns(recent_transactions)
+            time_analysis = self._analyze_time_patterns(recent_expenses)
             insights.extend(time_analysis)
             
             # Аналіз сум
-            amount_analysis = self._analyze_amounts(recent_transactions)
+            amount_analysis = self._analyze_amounts(recent_expenses)
             insights.extend(amount_analysis)
             
             # Порівняння з попереднім періодом
-            comparison_insights = self._compare_periods(transactions, period_days)
+            comparison_insights = self._compare_periods(expenses, period_days)
             insights.extend(comparison_insights)
             
             return insights[:8]  # Обмежуємо кількість інсайтів
@@ -307,51 +309,44 @@ class FinancialInsightsEngine:
             logger.error(f"Error generating spending insights: {e}")
             return ["Помилка генерації інсайтів"]
     
-    def _analyze_categories(self, transactions: List[Dict]) -> List[str]:
+    def _analyze_categories(self, expenses: pd.DataFrame) -> List[str]:
         """Аналізує витрати по категоріях"""
         insights = []
         
         # Підраховуємо суми по категоріях
-        category_totals = defaultdict(float)
-        for t in transactions:
-            category = t.get('category_name', 'Без категорії')
-            category_totals[category] += t['amount']
+        category_totals = expenses.groupby('category', sort=False)['amount'].sum()
         
-        if not category_totals:
+        if category_totals.empty:
             return []
         
         # Знаходимо топ категорію
-        top_category = max(category_totals.items(), key=lambda x: x[1])
-        total_expenses = sum(category_totals.values())
-        top_percentage = (top_category[1] / total_expenses) * 100
+        top_category = category_totals.idxmax()
+        total_expenses = category_totals.sum()
+        top_percentage = (category_totals[top_category] / total_expenses) * 100
         
-        insights.append(f"🏆 Найбільша категорія витрат: {top_category[0]} ({top_percentage:.1f}%)")
+        insights.append(f"🏆 Найбільша категорія витрат: {top_category} ({top_percentage:.1f}%)")
         
         # Знаходимо категорії з великим відсотком
         if top_percentage > 40:
-            insights.append(f"⚠️ {top_category[0]} займає {top_percentage:.1f}% всіх витрат - варто диверсифікувати")
+            insights.append(f"⚠️ {top_category} займає {top_percentage:.1f}% всіх витрат - варто диверсифікувати")
         
         return insights
     
-    def _analyze_time_patterns(self, transactions: List[Dict]) -> List[str]:
+    def _analyze_time_patterns(self, expenses: pd.DataFrame) -> List[str]:
         """Аналізує часові паттерни витрат"""
         insights = []
         
         # Аналіз по днях тижня
-        weekday_totals = defaultdict(float)
-        for t in transactions:
-            weekday = t['transaction_date'].weekday()
-            weekday_totals[weekday] += t['amount']
+        weekday_totals = expenses.groupby(expenses['date'].dt.weekday)['amount'].sum()
         
-        if weekday_totals:
-            max_weekday = max(weekday_totals.items(), key=lambda x: x[1])
+        if not weekday_totals.empty:
             weekday_names = ['понеділок', 'вівторок', 'середу', 'четвер', "п'ятницю", 'суботу', 'неділю']
             
-            insights.append(f"📅 Найбільше витрачаєте в {weekday_names[max_weekday[0]]}")
+            insights.append(f"📅 Найбільше витрачаєте в {weekday_names[weekday_totals.idxmax()]}")
         
         # Аналіз вихідних vs робочих днів
-        weekend_total = weekday_totals.get(5, 0) + weekday_totals.get(6, 0)
-        weekday_total = sum(weekday_totals[i] for i in range(5))
+        weekend_total = weekday_totals[weekday_totals.index >= 5].sum()
+        weekday_total = weekday_totals[weekday_totals.index < 5].sum()
         
         if weekend_total > 0 and weekday_total > 0:
             if weekend_total > weekday_total * 0.4:  # Вихідні > 40% від робочих днів
@@ -359,29 +354,27 @@ class FinancialInsightsEngine:
         
         return insights
     
-    def _analyze_amounts(self, transactions: List[Dict]) -> List[str]:
+    def _analyze_amounts(self, expenses: pd.DataFrame) -> List[str]:
         """Аналізує суми транзакцій"""
         insights = []
         
-        amounts = [t['amount'] for t in transactions]
-        if not amounts:
+        amounts = expenses['amount'].to_numpy()
+        if not len(amounts):
             return []
         
         avg_amount = np.mean(amounts)
-        median_amount = np.median(amounts)
-        max_amount = max(amounts)
         
         # Аналіз великих витрат
-        large_expenses = [a for a in amounts if a > avg_amount * 2]
+        large_expenses = np.count_nonzero(amounts > avg_amount * 2)
         if large_expenses:
-            insights.append(f"💸 {len(large_expenses)} великих витрат (>{avg_amount*2:.0f} грн)")
+            insights.append(f"💸 {large_expenses} великих витрат (>{avg_amount*2:.0f} грн)")
         
         # Аналіз середньої суми
         insights.append(f"📊 Середня витрата: {avg_amount:.2f} грн")
         
         return insights
     
-    def _compare_periods(self, transactions: List[Dict], period_days: int) -> List[str]:
+    def _compare_periods(self, expenses: pd.DataFrame, period_days: int) -> List[str]:
         """Порівнює поточний період з попереднім"""
         insights = []
         
@@ -391,21 +384,13 @@ class FinancialInsightsEngine:
             prev_start = now - timedelta(days=period_days * 2)
             prev_end = current_start
             
-            # Поточний період
-            current_expenses = [
-                t for t in transactions 
-                if current_start <= t['transaction_date'] <= now and t['type'] == 'expense'
-            ]
-            
-            # Попередній період
-            prev_expenses = [
-                t for t in transactions 
-                if prev_start <= t['transaction_date'] <= prev_end and t['type'] == 'expense'
-            ]
-            
-            if current_expenses and prev_expenses:
-                current_total = sum(t['amount'] for t in current_expenses)
-                prev_total = sum(t['amount'] for t in prev_expenses)
+            # Поточний і попередній період
+            current_expenses = expenses['amount'][(expenses['date'] >= current_start) & (expenses['date'] <= now)]
+            prev_expenses = expenses['amount'][(expenses['date'] >= prev_start) & (expenses['date'] <= prev_end)]
+            
+            if not current_expenses.empty and not prev_expenses.empty:
+                current_total = current_expenses.sum()
+                prev_total = prev_expenses.sum()
                 
                 change_percent = ((current_total - prev_total) / prev_total) * 100 if prev_total > 0 else 0
                 
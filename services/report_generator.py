@@ -6,13 +6,17 @@ import numpy as np
 import io
 import os
 import logging
+import functools
+from contextlib import closing
 import seaborn as sns
 from datetime import datetime, timedelta
 import calendar
 from sqlalchemy import func, extract
 from pathlib import Path
 from database.models import Session, Transaction, Category, User, TransactionType
-from database.db_operations import get_monthly_stats, get_transactions
+from database.db_operations import get_monthly_stats, get_transactions, get_transaction_rows
+from database.unit_of_work import session_scope
+from database.replica import open_replica_session
 
 # Настроюємо логування
 logger = logging.getLogger(__name__)
@@ -27,17 +31,35 @@ matplotlib.rcParams['font.size'] = 10
 # Налаштування стилю seaborn для красивіших графіків
 sns.set_style("whitegrid")
 
+def _with_session(method):
+    """Метод звіту: сесія відкривається на час виклику і звільняється після нього.
+
+    Звіти лише читають: якщо задано репліку (database.replica), вони читають з неї,
+    інакше — в сесії оновлення (database.unit_of_work) або новій сесії. Вкладені
+    виклики (generate_monthly_report → діаграми) читають у тій самій сесії.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.session is not None:
+            return method(self, *args, **kwargs)
+        replica_session = open_replica_session()
+        scope = closing(replica_session) if replica_session is not None else session_scope(Session)
+        with scope as session:
+            self.session = session
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.session = None
+    return wrapper
+
 class FinancialReport:
     """Клас для генерації фінансових звітів та візуалізацій"""
     
     def __init__(self, user_id):
         self.user_id = user_id
-        self.session = Session()
-    
-    def __del__(self):
-        """Закриваємо сесію при видаленні об'єкта"""
-        if self.session:
-            self.session.close()
+        # Сесія існує лише під час виклику методу звіту (_with_session), тож з'єднання
+        # не тримається, поки обробник надсилає результат
+        self.session = None
     
     def _get_user_name(self):
         """Отримання імені користувача для звітів"""
@@ -51,6 +73,7 @@ class FinancialReport:
                 return user.username
         return "Користувач"
     
+    @_with_session
     def generate_expense_pie_chart(self, year=None, month=None, save_path=None):
         """Генерація сучасної кругової діаграми витрат за категоріями"""
         try:
@@ -189,6 +212,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні кругової діаграми: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_income_pie_chart(self, year=None, month=None, save_path=None):
         """Генерація сучасної кругової діаграми доходів за категоріями"""
         try:
@@ -327,6 +351,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні кругової діаграми доходів: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_income_expense_bar_chart(self, months=6, save_path=None):
         """Генерація стовпчикової діаграми доходів і витрат за кілька місяців"""
         try:
@@ -346,7 +371,7 @@ class FinancialReport:
                     target_year -= 1
                 
                 # Отримуємо дані за цей місяць
-                stats = get_monthly_stats(self.user_id, target_year, target_month)
+                stats = get_monthly_stats(self.user_id, target_year, target_month, from_replica=True)
                 
                 # Додаємо до списків
                 month_names = {
@@ -402,6 +427,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні стовпчикової діаграми: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_expense_trend_chart(self, category_id=None, months=6, save_path=None):
         """Генерація графіка тренду витрат за категорією або всіх витрат"""
         try:
@@ -488,6 +514,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні графіка тренду: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_weekly_expense_heatmap(self, weeks=4, save_path=None):
         """Генерація теплової карти витрат по днях тижня і тижнях"""
         try:
@@ -555,6 +582,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні теплової карти: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_spending_patterns_chart(self, days=30, save_path=None):
         """Генерація діаграми патернів витрат за часом дня"""
         try:
@@ -616,6 +644,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні графіка патернів витрат: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_budget_usage_chart(self, year=None, month=None, save_path=None):
         """Генерація діаграми використання бюджету за категоріями"""
         try:
@@ -727,6 +756,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні діаграми використання бюджету: {e}")
             return None, str(e)
     
+    @_with_session
     def generate_monthly_report(self, year=None, month=None):
         """Генерація повного місячного звіту з усіма діаграмами"""
         try:
@@ -739,7 +769,7 @@ class FinancialReport:
             user_name = self._get_user_name()
             
             # Отримуємо статистику за місяць
-            stats = get_monthly_stats(self.user_id, year, month)
+            stats = get_monthly_stats(self.user_id, year, month, from_replica=True)
             
             # Створюємо директорію для звіту
             report_date = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1005,6 +1035,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні місячного звіту: {e}")
             return None
     
+    @_with_session
     def generate_pdf_report(self, year=None, month=None):
         """Генерація PDF звіту"""
         try:
@@ -1038,6 +1069,7 @@ class FinancialReport:
             logger.error(f"Помилка при створенні PDF звіту: {e}")
             return {'error': str(e)}
     
+    @_with_session
     def export_transactions_csv(self, year=None, month=None):
         """Експорт транзакцій в CSV файл"""
         try:
@@ -1052,18 +1084,7 @@ class FinancialReport:
             end_date = datetime(year, month, last_day, 23, 59, 59)
             
             # Отримуємо транзакції
-            transactions = self.session.query(
-                Transaction.transaction_date,
-                Transaction.description,
-                Transaction.amount,
-                Transaction.type,
-                Category.name.label('category_name'),
-                Category.icon.label('category_icon')
-            ).join(Category, Transaction.category_id == Category.id
-            ).filter(
-                Transaction.user_id == self.user_id,
-                Transaction.transaction_date.between(start_date, end_date)
-            ).order_by(Transaction.transaction_date.desc()).all()
+            transactions = get_transaction_rows(self.user_id, start_date=start_date, end_date=end_date, from_replica=True)
             
             if not transactions:
                 return None, "Немає транзакцій за вказаний період"
@@ -1076,7 +1097,7 @@ class FinancialReport:
                     'Опис': t.description,
                     'Сума': t.amount,
                     'Тип': 'Витрата' if t.type == TransactionType.EXPENSE else 'Дохід',
-                    'Категорія': f"{t.category_name} {t.category_icon}"
+                    'Категорія': f"{t.category_name} {t.category_icon}" if t.category_name else 'Без категорії'
                 })
             
             df = pd.DataFrame(data)
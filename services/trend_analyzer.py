@@ -6,13 +6,15 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 import logging
 from collections import defaultdict
 from scipy import stats
 import matplotlib.pyplot as plt
 import io
 
+from database.frame_cache import TransactionFrame, as_dataframe
+
 logger = logging.getLogger(__name__)
 
 class TrendAnalyzer:
@@ -21,19 +23,11 @@ class TrendAnalyzer:
     def __init__(self):
         self.min_data_points = 7  # Мінімум точок для аналізу
     
-    def analyze_spending_trends(self, transactions: List[Dict]) -> Dict:
+    def analyze_spending_trends(self, transactions: Union[List[Dict], TransactionFrame]) -> Dict:
         """Аналізує тенденції витрат користувача"""
         try:
-            # Підготовка даних
-            df = pd.DataFrame([
-                {
-                    'date': t['transaction_date'],
-                    'amount': t['amount'],
-                    'type': t['type'],
-                    'category': t.get('category_name', 'Без категорії')
-                }
-                for t in transactions
-            ])
+            # Підготовка даних: колонки date, amount, type, category
+            df = as_dataframe(transactions)
             
             if df.empty:
                 return {"error": "Немає даних для аналізу"}
@@ -298,7 +292,7 @@ class TrendAnalyzer:
             logger.error(f"Error in simple forecast: {e}")
             return {"error": f"Помилка прогнозування: {str(e)}"}
     
-    def get_spending_insights(self, transactions: List[Dict]) -> List[str]:
+    def get_spending_insights(self, transactions: Union[List[Dict], TransactionFrame]) -> List[str]:
         """Генерує корисні інсайти про витрати користувача"""
         try:
             insights = []
@@ -0,0 +1,69 @@
+"""Спільна підготовка тестової бази: тимчасова SQLite зі схемою і підмінені фабрики сесій"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from database.models import Base
+from database import db_operations, async_db_operations
+from database.cache import clear_caches
+from database.engine import to_async_url
+
+class DatabaseTestMixin:
+    """Створює self.engine і self.Session та підміняє Session у db_operations.
+
+    session_modules — інші модулі, чий Session теж має вказувати на тестову базу.
+    З use_test_database_url=True тест бере TEST_DATABASE_URL (якщо задано) замість
+    тимчасового файлу; таблиці в такій базі створюються і видаляються тестом.
+    Все прибирається через addCleanup, тож tearDown підкласу не потрібен.
+    """
+
+    session_modules = ()
+    use_test_database_url = False
+
+    def setUp(self):
+        super().setUp()
+        self.db_path = None
+        self.database_url = os.getenv('TEST_DATABASE_URL') if self.use_test_database_url else None
+        if not self.database_url:
+            fd, self.db_path = tempfile.mkstemp(suffix='.db')
+            os.close(fd)
+            self.addCleanup(os.remove, self.db_path)
+            self.database_url = f"sqlite:///{self.db_path}"
+
+        self.engine = create_engine(self.database_url)
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        if not self.db_path:
+            self.addCleanup(Base.metadata.drop_all, self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+        clear_caches()
+        self.addCleanup(clear_caches)
+        for module in (db_operations,) + tuple(self.session_modules):
+            self.start_patch(module, 'Session', self.Session)
+
+    def start_patch(self, target, attribute, value):
+        """patch.object, що діє до кінця тесту"""
+        patcher = patch.object(target, attribute, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return value
+
+class DatabaseTestCase(DatabaseTestMixin, unittest.TestCase):
+    """Синхронні тести на тимчасовій базі"""
+
+class AsyncDatabaseTestCase(DatabaseTestMixin, unittest.IsolatedAsyncioTestCase):
+    """Те саме плюс self.async_engine на тій самій базі для async_db_operations"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.async_engine = create_async_engine(to_async_url(self.database_url))
+        self.addAsyncCleanup(self.async_engine.dispose)
+        self.start_patch(async_db_operations, 'AsyncSession',
+                         async_sessionmaker(self.async_engine, expire_on_commit=False))
@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from database.models import User, Category, Transaction, TransactionType, Account, AccountType
+from database import db_operations
+from tests.helpers import DatabaseTestCase
+
+class TestAggregateStats(DatabaseTestCase):
+    """get_monthly_stats та get_accounts_statistics рахуються одним запитом"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        user = User(telegram_id=444)
+        session.add(user)
+        session.flush()
+        self.user_id = user.id
+
+        categories = [Category(user_id=user.id, name=f"Кат{i}", type="expense", icon=str(i)) for i in range(7)]
+        salary = Category(user_id=user.id, name="Зарплата", type="income", icon="💰")
+        session.add_all(categories + [salary])
+        session.flush()
+
+        date = datetime(2024, 3, 10)
+        for i, category in enumerate(categories):
+            session.add(Transaction(user_id=user.id, category_id=category.id, amount=100.0 * (i + 1),
+                                    type=TransactionType.EXPENSE, transaction_date=date))
+        session.add_all([
+            Transaction(user_id=user.id, category_id=salary.id, amount=5000.0,
+                        type=TransactionType.INCOME, transaction_date=date),
+            # Витрата без категорії враховується в сумі, але не в топі
+            Transaction(user_id=user.id, category_id=None, amount=10000.0,
+                        type=TransactionType.EXPENSE, transaction_date=date),
+            # Інший місяць
+            Transaction(user_id=user.id, category_id=categories[0].id, amount=999.0,
+                        type=TransactionType.EXPENSE, transaction_date=datetime(2024, 4, 1)),
+        ])
+
+        session.add_all([
+            Account(user_id=user.id, name="Готівка", account_type=AccountType.CASH, icon="💵", balance=100.0),
+            Account(user_id=user.id, name="Картка 1", account_type=AccountType.BANK_CARD, icon="💳", balance=200.0),
+            Account(user_id=user.id, name="Картка 2", account_type=AccountType.BANK_CARD, icon="🏦", balance=300.0),
+            Account(user_id=user.id, name="Закритий", account_type=AccountType.CASH, balance=50.0, is_active=False),
+        ])
+        now = datetime.utcnow()
+        session.add_all([
+            Transaction(user_id=user.id, amount=700.0, type=TransactionType.INCOME, transaction_date=now - timedelta(days=1)),
+            Transaction(user_id=user.id, amount=200.0, type=TransactionType.EXPENSE, transaction_date=now - timedelta(days=2)),
+        ])
+        session.commit()
+        session.close()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record_statement)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self._record_statement)
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_monthly_stats_single_query(self):
+        stats = db_operations.get_monthly_stats(self.user_id, 2024, 3)
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(stats['expenses'], 2800.0 + 10000.0)
+        self.assertEqual(stats['income'], 5000.0)
+        self.assertEqual(stats['balance'], 5000.0 - 12800.0)
+        self.assertEqual(
+            stats['top_categories'],
+            [("Кат6", "6", 700.0), ("Кат5", "5", 600.0), ("Кат4", "4", 500.0),
+             ("Кат3", "3", 400.0), ("Кат2", "2", 300.0)]
+        )
+
+    def test_monthly_stats_empty_month(self):
+        stats = db_operations.get_monthly_stats(self.user_id, 2023, 1)
+        self.assertEqual((stats['expenses'], stats['income'], stats['top_categories']), (0, 0, []))
+
+    def test_accounts_statistics_single_query(self):
+        stats = db_operations.get_accounts_statistics(self.user_id)
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(stats['total_accounts'], 3)
+        self.assertEqual(stats['total_balance'], 600.0)
+        # Іконка першого рахунку типу, а не найменша за алфавітом
+        self.assertEqual(stats['by_type']['Bank Card'], {'count': 2, 'balance': 500.0, 'icon': "💳"})
+        self.assertEqual(stats['by_type']['Cash']['count'], 1)
+        self.assertEqual(stats['monthly_transactions'], 2)
+        self.assertEqual(stats['monthly_growth'], 500.0)
+
+    def test_accounts_statistics_without_accounts(self):
+        stats = db_operations.get_accounts_statistics(self.user_id + 100)
+        self.assertEqual(stats['total_accounts'], 0)
+        self.assertEqual(stats['by_type'], {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+import database.models
+from database.models import User, Category, Transaction, TransactionType, BudgetPlan, CategoryBudget
+from database import db_operations, archive
+from database.rollup import rebuild_daily_rollup
+from tests.helpers import DatabaseTestCase
+
+TODAY = date(2025, 6, 15)
+
+class TestArchive(DatabaseTestCase):
+    """Перенесення старих транзакцій в архів і прозоре читання разом з БД"""
+
+    session_modules = (database.models,)
+
+    def setUp(self):
+        super().setUp()
+        self.archive_dir = tempfile.mkdtemp()
+        self.start_patch(archive, 'ARCHIVE_DIR', self.archive_dir)
+
+        session = self.Session()
+        user = User(telegram_id=616)
+        category = Category(name="Продукти", type="expense", icon="🛒")
+        session.add_all([user, category])
+        session.flush()
+        self.user_id = user.id
+        self.category_id = category.id
+
+        # Два роки історії: по транзакції кожні 10 днів
+        start = datetime(2023, 7, 1, 9, 30)
+        for i in range(72):
+            session.add(Transaction(
+                user_id=user.id,
+                category_id=category.id if i % 3 else None,
+                amount=10.0 + i,
+                description=f"t{i}" if i % 5 else None,
+                type=TransactionType.EXPENSE if i % 4 else TransactionType.INCOME,
+                transaction_date=start + timedelta(days=10 * i),
+            ))
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.archive_dir)
+
+    def _archive(self):
+        return archive.archive_old_transactions(days=365, today=TODAY)
+
+    def _db_count(self):
+        session = self.Session()
+        try:
+            return session.query(Transaction).count()
+        finally:
+            session.close()
+
+    def test_old_months_move_to_files(self):
+        before = db_operations.count_transactions(self.user_id)
+
+        moved = self._archive()
+
+        self.assertGreater(moved, 0)
+        self.assertEqual(self._db_count(), before - moved)
+        self.assertEqual(archive.archive_boundary(self.user_id), datetime(2024, 6, 1))
+        self.assertEqual(archive.archived_months(self.user_id)[0], date(2023, 7, 1))
+        self.assertEqual(db_operations.count_transactions(self.user_id), before)
+
+    def test_unfinished_write_is_ignored(self):
+        before = db_operations.count_transactions(self.user_id)
+        self._archive()
+        # Залишок перерваного запису (або запис, що саме триває у фоновій задачі)
+        for name in ("2024-06.npz.part", "2023-01.tmp.npz", "notes.npz"):
+            open(os.path.join(archive._user_dir(self.user_id), name), 'wb').close()
+
+        self.assertEqual(archive.archived_months(self.user_id)[-1], date(2024, 5, 1))
+        self.assertEqual(db_operations.count_transactions(self.user_id), before)
+        self.assertFalse(any(name.endswith('.part') and name != "2024-06.npz.part"
+                             for name in os.listdir(archive._user_dir(self.user_id))))
+
+    def test_reader_merges_archive_with_live_rows(self):
+        rows_before = db_operations.get_transaction_rows(self.user_id)
+        orm_before = db_operations.get_transactions(self.user_id, limit=20, offset=30)
+        self._archive()
+
+        rows = db_operations.get_transaction_rows(self.user_id)
+        self.assertEqual(rows, rows_before)
+
+        page = db_operations.get_transactions(self.user_id, limit=20, offset=30)
+        self.assertEqual([t.id for t in page], [t.id for t in orm_before])
+        self.assertEqual([t.category_name for t in page], [t.category_name for t in orm_before])
+
+        old = db_operations.get_transactions(
+            self.user_id, limit=5, category_id=self.category_id,
+            start_date=datetime(2023, 9, 1), end_date=datetime(2023, 9, 30, 23, 59)
+        )
+        self.assertTrue(old and all(t.category.name == "Продукти" for t in old))
+
+    def test_recent_queries_do_not_open_archive(self):
+        self._archive()
+
+        with patch.object(archive, 'read_archived') as read_archived:
+            db_operations.get_transactions(self.user_id, limit=10)
+            db_operations.get_transaction_rows(self.user_id, start_date=datetime(2025, 1, 1))
+        read_archived.assert_not_called()
+
+    def test_rollup_keeps_archived_totals(self):
+        summary_before = db_operations.get_period_summary(self.user_id, datetime(2023, 7, 1), datetime(2024, 5, 31))
+        self._archive()
+
+        self.assertEqual(
+            db_operations.get_period_summary(self.user_id, datetime(2023, 7, 1), datetime(2024, 5, 31)),
+            summary_before
+        )
+        with self.engine.begin() as connection:
+            rebuild_daily_rollup(connection, self.user_id)
+        self.assertEqual(
+            db_operations.get_period_summary(self.user_id, datetime(2023, 7, 1), datetime(2024, 5, 31)),
+            summary_before
+        )
+
+    def test_budget_counters_survive_archiving(self):
+        session = self.Session()
+        plan = BudgetPlan(user_id=self.user_id, name="Рік", total_budget=5000.0,
+                          start_date=datetime(2023, 7, 1), end_date=datetime(2024, 6, 30))
+        session.add(plan)
+        session.flush()
+        session.add(CategoryBudget(budget_plan_id=plan.id, category_id=self.category_id, allocated_amount=1000.0))
+        session.commit()
+        counters = lambda: session.query(CategoryBudget.spent_amount, CategoryBudget.alert_level).one()
+        before = tuple(counters())
+        session.close()
+        self.assertGreater(before[0], 0)
+
+        self._archive()
+
+        # Архів не змінює агрегати, з яких рахуються лічильники бюджетів
+        self.assertEqual(tuple(counters()), before)
+        session.close()
+
+    def test_period_top_includes_archived_rows(self):
+        period = (datetime(2023, 7, 1), datetime(2024, 6, 30))
+        before = db_operations.get_period_summary(self.user_id, *period, top=5)
+        self._archive()
+
+        after = db_operations.get_period_summary(self.user_id, *period, top=5)
+        self.assertEqual(after, before)
+        self.assertEqual(len(after['top_expenses']), 5)
+        self.assertTrue(any(row.transaction_date < datetime(2024, 6, 1) for row in after['top_expenses']))
+
+    def test_delete_in_chunks(self):
+        before = self._db_count()
+        deletes = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith('DELETE'):
+                deletes.append(statement)
+
+        event.listen(self.engine, 'before_cursor_execute', record)
+        try:
+            with patch.object(archive, 'IMPORT_CHUNK_SIZE', 10):
+                moved = self._archive()
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', record)
+
+        self.assertGreater(moved, 20)
+        self.assertEqual(len(deletes), -(-moved // 10))
+        self.assertEqual(self._db_count(), before - moved)
+
+    def test_rearchiving_month_merges_new_rows(self):
+        self._archive()
+        session = self.Session()
+        session.add(Transaction(user_id=self.user_id, amount=5.0, type=TransactionType.EXPENSE,
+                                transaction_date=datetime(2023, 8, 15)))
+        session.commit()
+        session.close()
+
+        self.assertEqual(self._archive(), 1)
+        august = archive.read_archived(self.user_id, start_date=datetime(2023, 8, 1), end_date=datetime(2023, 8, 31))
+        self.assertIn(5.0, [row.amount for row in august])
+        self.assertEqual(len({row.id for row in august}), len(august))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.models import Category, TransactionType
+from database import db_operations, async_db_operations
+from database import engine as engine_module
+from database.engine import to_async_url, dispose_async_engine, get_pool_stats
+from tests.helpers import AsyncDatabaseTestCase
+
+# Спільна фабрика сесій модуля (у тестах нижче AsyncSession підмінено)
+shared_async_session = async_db_operations.AsyncSession
+
+class TestAsyncDbOperations(AsyncDatabaseTestCase):
+    """Асинхронні функції працюють з тією ж базою, що й синхронні"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+
+        session = self.Session()
+        session.add_all([
+            Category(name="Продукти", type="expense", icon="🛒", is_default=True),
+            Category(name="Зарплата", type="income", icon="💰", is_default=True),
+        ])
+        session.commit()
+        session.close()
+
+    async def test_user_gets_default_categories(self):
+        user = await async_db_operations.get_or_create_user(111, username="async_user")
+
+        categories = await async_db_operations.get_user_categories(user.id)
+        self.assertEqual({c.name for c in categories}, {"Продукти", "Зарплата"})
+
+        # Синхронна обгортка бачить того ж користувача
+        self.assertEqual(db_operations.get_user(111).id, user.id)
+
+    async def test_add_and_read_transactions(self):
+        user = await async_db_operations.get_or_create_user(222)
+        expense_category = (await async_db_operations.get_user_categories(user.id, 'expense'))[0]
+
+        await async_db_operations.add_transaction(
+            user.id, 150.0, "Сільпо", expense_category.id, TransactionType.EXPENSE
+        )
+        await async_db_operations.add_transaction(
+            user.id, 1000.0, "Аванс", None, TransactionType.INCOME
+        )
+
+        transactions = await async_db_operations.get_transactions(user.id, limit=10)
+        self.assertEqual(len(transactions), 2)
+        expense = next(t for t in transactions if t.type == TransactionType.EXPENSE)
+        self.assertEqual(expense.category_name, "Продукти")
+
+        stats = await async_db_operations.get_monthly_stats(user.id)
+        self.assertEqual(stats['expenses'], 150.0)
+        self.assertEqual(stats['income'], 1000.0)
+        self.assertEqual(stats['top_categories'][0][0], "Продукти")
+
+    async def test_run_blocking_returns_result(self):
+        result = await async_db_operations.run_blocking(sum, [1, 2, 3])
+        self.assertEqual(result, 6)
+
+    async def test_sessions_follow_recreated_engine(self):
+        url = f"sqlite+aiosqlite:///{self.db_path}"
+        engines = [create_async_engine(url), create_async_engine(url)]
+        with patch.object(engine_module, '_async_engine', None), \
+                patch.object(engine_module, 'create_async_db_engine', side_effect=engines):
+            async with shared_async_session() as session:
+                self.assertIs(session.bind, engines[0])
+            await dispose_async_engine()
+
+            async with shared_async_session() as session:
+                self.assertIs(session.bind, engines[1])
+            self.assertIs(engine_module.get_async_engine(), engines[1])
+            self.assertIn('async', get_pool_stats())
+            await dispose_async_engine()
+
+    def test_to_async_url(self):
+        self.assertEqual(
+            to_async_url("postgresql://u:p@localhost:5432/db").drivername,
+            "postgresql+asyncpg"
+        )
+        self.assertEqual(
+            to_async_url("sqlite:///local.db").drivername,
+            "sqlite+aiosqlite"
+        )
+
+if __name__ == '__main__':
+    unittest.main()
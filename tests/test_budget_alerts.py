@@ -0,0 +1,194 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import event
+
+from database.models import User, Category, BudgetPlan, CategoryBudget, Transaction, TransactionType
+from database import db_operations
+from database.budget_alerts import take_pending_alerts
+from handlers import budget_callbacks
+from services import budget_manager
+from services.budget_manager import BudgetManager
+from tests.helpers import DatabaseTestCase
+
+class TestBudgetAlerts(DatabaseTestCase):
+    """Лічильники витрат бюджетів категорій оновлюються при записі, пороги 80/100 % дають сповіщення"""
+
+    session_modules = (budget_manager,)
+
+    def setUp(self):
+        super().setUp()
+
+        today = datetime.utcnow().date()
+        self.start = datetime(today.year, today.month, 1)
+        self.end = datetime.combine(today, datetime.min.time()) + timedelta(days=2)
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+        session = self.Session()
+        user = User(telegram_id=2500)
+        session.add(user)
+        session.flush()
+        food = Category(user_id=user.id, name="Продукти", type="expense", icon="🛒")
+        cafe = Category(user_id=user.id, name="Кафе", type="expense", icon="☕")
+        salary = Category(user_id=user.id, name="Зарплата", type="income")
+        session.add_all([food, cafe, salary])
+        session.flush()
+        plan = BudgetPlan(user_id=user.id, name="Місяць", total_budget=500.0,
+                          start_date=self.start, end_date=self.end)
+        session.add(plan)
+        session.flush()
+        session.add(CategoryBudget(budget_plan_id=plan.id, category_id=food.id, allocated_amount=100.0))
+        session.commit()
+        self.user_id, self.food_id, self.cafe_id, self.salary_id = user.id, food.id, cafe.id, salary.id
+        session.close()
+        take_pending_alerts()
+
+    def tearDown(self):
+        take_pending_alerts()
+
+    def _spend(self, amount, category_id=None, when=None, transaction_type=TransactionType.EXPENSE):
+        return db_operations.add_transaction(
+            self.user_id, amount, "", category_id or self.food_id, transaction_type,
+            transaction_date=when or self.now
+        )
+
+    def _counter(self, category_id=None):
+        session = self.Session()
+        try:
+            return session.query(CategoryBudget.spent_amount, CategoryBudget.alert_level)\
+                .filter(CategoryBudget.category_id == (category_id or self.food_id))\
+                .order_by(CategoryBudget.id.desc())\
+                .first()
+        finally:
+            session.close()
+
+    def _levels(self):
+        return [alert.level for alert in take_pending_alerts()]
+
+    def test_counters_follow_add_update_delete(self):
+        first = self._spend(50.0)
+        self._spend(999.0, when=self.start - timedelta(seconds=1))
+        self._spend(999.0, category_id=self.salary_id, transaction_type=TransactionType.INCOME)
+        self.assertEqual(tuple(self._counter()), (50.0, 0))
+        self.assertEqual(self._levels(), [])
+
+        second = self._spend(35.0)
+        self.assertEqual(tuple(self._counter()), (85.0, 80))
+        self.assertEqual(self._levels(), [80])
+
+        db_operations.update_transaction(second.id, self.user_id, amount=60.0)
+        self.assertEqual(tuple(self._counter()), (110.0, 100))
+        self.assertEqual(self._levels(), [100])
+
+        # Повернення нижче порогу знижує рівень без сповіщення, повторний перехід сповіщає знову
+        db_operations.delete_transaction(first.id, self.user_id)
+        self.assertEqual(tuple(self._counter()), (60.0, 0))
+        self.assertEqual(self._levels(), [])
+
+        self._spend(25.0)
+        self.assertEqual(self._levels(), [80])
+
+        # Перенесення в іншу категорію знімає суму з лічильника
+        db_operations.update_transaction(second.id, self.user_id, category_id=self.cafe_id)
+        self.assertEqual(tuple(self._counter()), (25.0, 0))
+
+    def test_bulk_import_updates_counters(self):
+        db_operations.bulk_insert_transactions(self.user_id, [
+            {'amount': 40.0, 'type': 'expense', 'category_id': self.food_id, 'transaction_date': self.now},
+            {'amount': 70.0, 'type': 'expense', 'category_id': self.food_id, 'transaction_date': self.now},
+            {'amount': 500.0, 'type': 'expense', 'category_id': self.food_id,
+             'transaction_date': self.start - timedelta(days=3)},
+        ])
+
+        self.assertEqual(tuple(self._counter()), (110.0, 100))
+        self.assertEqual(self._levels(), [100])
+
+    def test_clearing_transactions_resets_counters(self):
+        self._spend(120.0)
+        self.assertEqual(tuple(self._counter()), (120.0, 100))
+
+        self.assertEqual(db_operations.clear_user_transactions(self.user_id), 1)
+
+        self.assertEqual(tuple(self._counter()), (0.0, 0))
+        take_pending_alerts()
+        self._spend(85.0)
+        self.assertEqual(self._levels(), [80])
+
+    def test_rollback_leaves_counter_and_alerts(self):
+        session = self.Session()
+        session.add(Transaction(user_id=self.user_id, amount=150.0, category_id=self.food_id,
+                                type=TransactionType.EXPENSE, transaction_date=self.now))
+        session.flush()
+        session.rollback()
+        session.close()
+
+        self.assertEqual(tuple(self._counter()), (0.0, 0))
+        self.assertEqual(self._levels(), [])
+
+    def test_new_budget_counted_from_history_without_alert(self):
+        self._spend(30.0, category_id=self.cafe_id)
+        self._spend(20.0, category_id=self.cafe_id)
+        take_pending_alerts()
+
+        db_operations.create_or_update_budget(
+            self.user_id, "Новий", 300.0, self.start, self.end,
+            category_budgets=[{'category_id': self.cafe_id, 'amount': 50.0}]
+        )
+
+        self.assertEqual(tuple(self._counter(self.cafe_id)), (50.0, 100))
+        self.assertEqual(self._levels(), [])
+
+    def test_spending_alerts_read_counters_in_one_query(self):
+        self._spend(90.0)
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.engine, 'before_cursor_execute', record)
+        try:
+            alerts = BudgetManager(self.user_id).get_category_spending_alerts()
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', record)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual([(a['type'], a['category'], round(a['remaining'], 2)) for a in alerts],
+                         [('warning', "Продукти", 10.0)])
+
+    def test_send_only_highest_crossing(self):
+        self._spend(85.0)
+        self._spend(20.0)
+        bot = AsyncMock()
+
+        with patch.object(budget_callbacks, 'get_alert_recipients', AsyncMock(return_value={self.user_id: 2500})):
+            sent = asyncio.run(budget_callbacks.send_budget_alerts(bot))
+
+        self.assertEqual(sent, 1)
+        kwargs = bot.send_message.call_args.kwargs
+        self.assertEqual(kwargs['chat_id'], 2500)
+        self.assertIn("Перевищено", kwargs['text'])
+        self.assertEqual(asyncio.run(budget_callbacks.send_budget_alerts(bot)), 0)
+
+    def test_alerts_kept_when_recipients_fail(self):
+        self._spend(85.0)
+        bot = AsyncMock()
+
+        failing = AsyncMock(side_effect=RuntimeError("db down"))
+        with patch.object(budget_callbacks, 'get_alert_recipients', failing):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(budget_callbacks.send_budget_alerts(bot))
+        bot.send_message.assert_not_called()
+
+        with patch.object(budget_callbacks, 'get_alert_recipients', AsyncMock(return_value={self.user_id: 2500})):
+            self.assertEqual(asyncio.run(budget_callbacks.send_budget_alerts(bot)), 1)
+
+    def test_recipients_respect_notification_setting(self):
+        session = self.Session()
+        session.add(User(telegram_id=2501, notification_enabled=False))
+        session.commit()
+        muted = session.query(User.id).filter(User.telegram_id == 2501).scalar()
+        session.close()
+
+        self.assertEqual(db_operations.get_alert_recipients([self.user_id, muted]), {self.user_id: 2500})
+
+if __name__ == '__main__':
+    unittest.main()
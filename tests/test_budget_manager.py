@@ -2,7 +2,13 @@ import unittest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta
 
+from sqlalchemy import event
+
+from database.models import User, Category, BudgetPlan, CategoryBudget, TransactionType
+from database import db_operations
+from services import budget_manager
 from services.budget_manager import BudgetManager
+from tests.helpers import DatabaseTestCase
 
 class TestBudgetManager(unittest.TestCase):
     
@@ -47,5 +53,132 @@ class TestBudgetManager(unittest.TestCase):
         self.assertEqual(status['status'], 'no_active_budget')
         self.assertIn('message', status)
 
+    def test_session_closed_when_query_fails(self):
+        session = MagicMock()
+        session.query.side_effect = RuntimeError("з'єднання втрачено")
+
+        with patch.object(budget_manager, 'Session', MagicMock(return_value=session)):
+            with self.assertRaises(RuntimeError):
+                BudgetManager(1).get_user_financial_status()
+
+        session.close.assert_called_once()
+
+class TestActiveBudgetSpending(DatabaseTestCase):
+    """Фактичні витрати активного бюджету рахуються одним запитом"""
+
+    session_modules = (budget_manager,)
+
+    def setUp(self):
+        super().setUp()
+
+        today = datetime.utcnow().date()
+        self.start = datetime(today.year, today.month, 1)
+        self.end = datetime.combine(today, datetime.min.time()) + timedelta(days=2)
+
+        session = self.Session()
+        user = User(telegram_id=2200)
+        session.add(user)
+        session.flush()
+        food = Category(user_id=user.id, name="Продукти", type="expense", icon="🛒")
+        cafe = Category(user_id=user.id, name="Кафе", type="expense", icon="☕")
+        taxi = Category(user_id=user.id, name="Таксі", type="expense", icon="🚕")
+        session.add_all([food, cafe, taxi])
+        session.flush()
+        plan = BudgetPlan(user_id=user.id, name="Місяць", total_budget=1000.0,
+                          start_date=self.start, end_date=self.end)
+        session.add(plan)
+        session.flush()
+        session.add_all([
+            CategoryBudget(budget_plan_id=plan.id, category_id=food.id, allocated_amount=400.0),
+            CategoryBudget(budget_plan_id=plan.id, category_id=cafe.id, allocated_amount=0.0),
+        ])
+        session.commit()
+        self.user_id, self.food_id, self.cafe_id, self.taxi_id = user.id, food.id, cafe.id, taxi.id
+        session.close()
+
+        for amount, category_id, when in [
+            (100.0, self.food_id, self.start),
+            (50.0, self.food_id, self.end + timedelta(hours=20)),
+            (70.0, self.taxi_id, self.start + timedelta(hours=1)),
+            (30.0, None, self.start + timedelta(hours=2)),
+            (999.0, self.food_id, self.start - timedelta(seconds=1)),
+            (999.0, self.food_id, self.end + timedelta(days=1)),
+        ]:
+            db_operations.add_transaction(self.user_id, amount, "", category_id,
+                                          TransactionType.EXPENSE, transaction_date=when)
+        db_operations.add_transaction(self.user_id, 500.0, "", None, TransactionType.INCOME,
+                                      transaction_date=self.start)
+
+    def _count_statements(self, call, *args):
+        statements = []
+        record = lambda conn, cursor, statement, *rest: statements.append(statement)
+        event.listen(self.engine, 'before_cursor_execute', record)
+        try:
+            return call(*args), len(statements)
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', record)
+
+    def test_category_and_total_spending(self):
+        active, statements = self._count_statements(BudgetManager(self.user_id).get_active_budget)
+
+        self.assertEqual(statements, 2)
+        self.assertEqual(
+            [(c['category_name'], c['actual_spending'], c['remaining'], c['usage_percent'])
+             for c in active['category_budgets']],
+            [("Продукти", 150.0, 250.0, 37.5), ("Кафе", 0, 0.0, 0)]
+        )
+        self.assertEqual(active['total_spending'], 250.0)
+        self.assertEqual(active['total_remaining'], 750.0)
+        self.assertEqual(active['usage_percent'], 25.0)
+        self.assertEqual(active['budget']['total_budget'], 1000.0)
+
+    def test_plan_without_category_budgets(self):
+        session = self.Session()
+        session.query(CategoryBudget).delete()
+        session.commit()
+        session.close()
+
+        active = BudgetManager(self.user_id).get_active_budget()
+
+        self.assertEqual(active['category_budgets'], [])
+        self.assertEqual(active['total_spending'], 250.0)
+
+    def test_memoized_shares_results_until_write(self):
+        manager = BudgetManager(self.user_id)
+        with manager.memoized():
+            daily, _ = self._count_statements(manager.get_daily_spending_stats, 7)
+            manager.get_month_comparison(3)
+            metrics, first = self._count_statements(manager.get_budget_performance_metrics)
+            again, repeated = self._count_statements(manager.get_budget_performance_metrics)
+            week_tail, tail_queries = self._count_statements(manager.get_daily_spending_stats, 3)
+
+            self.assertEqual(again, metrics)
+            self.assertEqual(repeated, 0)
+            self.assertEqual(tail_queries, 0)
+            self.assertEqual(week_tail, daily[-3:])
+            self.assertEqual(manager.get_month_comparison(2), manager.get_month_comparison(3)[:2])
+
+            manager.bulk_update_category_limits({self.food_id: 150.0})
+            food = manager.get_active_budget()['category_budgets'][0]
+            self.assertEqual(food['usage_percent'], 100.0)
+
+        # Без memoized() кеш живе лише на час зовнішнього виклику
+        _, uncached = self._count_statements(manager.get_budget_performance_metrics)
+        self.assertLess(first, uncached)
+        self.assertEqual(self._count_statements(manager.get_budget_performance_metrics)[1], uncached)
+
+    def test_memoized_results_are_copies(self):
+        manager = BudgetManager(self.user_id)
+        with manager.memoized():
+            active = manager.get_active_budget()
+            active['category_budgets'].clear()
+            active['budget']['total_budget'] = 0
+            manager.get_daily_spending_stats(7)[0]['amount'] = -1
+
+            cached = manager.get_active_budget()
+            self.assertEqual(len(cached['category_budgets']), 2)
+            self.assertEqual(cached['budget']['total_budget'], 1000.0)
+            self.assertNotEqual(manager.get_daily_spending_stats(7)[0]['amount'], -1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import event, func
+
+from database.models import User, Category, Transaction, TransactionType, TransactionDailyRollup, Account
+from database import db_operations
+from database import async_db_operations
+from tests.helpers import AsyncDatabaseTestCase
+
+class TestBulkImport(AsyncDatabaseTestCase):
+    """Масовий імпорт транзакцій пачками з одноразовим пошуком рахунку і категорій"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+
+        session = self.Session()
+        user = User(telegram_id=777)
+        session.add(user)
+        session.flush()
+        food = Category(user_id=user.id, name="Продукти", type="expense", icon="🛒")
+        salary = Category(user_id=user.id, name="Зарплата", type="income", icon="💰")
+        account = Account(user_id=user.id, name="Основна картка", is_main=True)
+        session.add_all([food, salary, account])
+        session.commit()
+        self.user_id, self.food_id, self.salary_id, self.account_id = user.id, food.id, salary.id, account.id
+        session.close()
+
+    def _rows(self, count):
+        return [
+            {
+                'amount': 10.0,
+                'type': 'expense' if i % 2 else TransactionType.INCOME,
+                'description': f"Рядок {i}",
+                'transaction_date': date(2024, 2, 1 + i % 28),
+                'category_name': "продукти" if i % 2 else "Зарплата",
+            }
+            for i in range(count)
+        ]
+
+    def test_sync_chunks_and_progress(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, "before_cursor_execute", listener)
+        progress = []
+        try:
+            inserted = db_operations.bulk_insert_transactions(
+                self.user_id, self._rows(250), chunk_size=100,
+                progress=lambda done, total: progress.append((done, total))
+            )
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(inserted, 250)
+        self.assertEqual(progress, [(100, 250), (200, 250), (250, 250)])
+        # Пошук рахунку і категорій — один раз, а не на кожен рядок
+        self.assertEqual(sum('FROM categories' in s for s in statements), 1)
+        self.assertEqual(sum(s.startswith('INSERT INTO transactions') for s in statements), 3)
+
+        session = self.Session()
+        try:
+            rows = session.query(Transaction).filter(Transaction.user_id == self.user_id).all()
+            self.assertEqual(len(rows), 250)
+            self.assertTrue(all(t.account_id == self.account_id for t in rows))
+            self.assertTrue(all(t.source == 'import' for t in rows))
+            expenses = [t for t in rows if t.type == TransactionType.EXPENSE]
+            self.assertTrue(all(t.category_id == self.food_id for t in expenses))
+            self.assertIsInstance(rows[0].transaction_date, datetime)
+
+            # Денні агрегати оновлені разом з імпортом
+            rollup_total = session.query(func.sum(TransactionDailyRollup.total))\
+                .filter(TransactionDailyRollup.user_id == self.user_id).scalar()
+            rollup_count = session.query(func.sum(TransactionDailyRollup.count))\
+                .filter(TransactionDailyRollup.user_id == self.user_id).scalar()
+            self.assertEqual((rollup_total, rollup_count), (2500.0, 250))
+        finally:
+            session.close()
+
+    async def test_async_progress_is_awaited(self):
+        progress = []
+
+        async def report(done, total):
+            progress.append((done, total))
+
+        inserted = await async_db_operations.bulk_insert_transactions(
+            self.user_id, self._rows(5), chunk_size=2, progress=report
+        )
+
+        self.assertEqual(inserted, 5)
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual(db_operations.count_transactions(self.user_id), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import time
+import unittest
+
+from database.models import User, Category
+from database import db_operations
+from database.cache import TTLCache, MISSING, UserRecord, CategoryRecord, user_cache, category_cache
+from tests.helpers import DatabaseTestCase
+
+class TestTTLCache(unittest.TestCase):
+    """LRU-обмеження, TTL та лічильники кешу"""
+
+    def test_lru_and_ttl(self):
+        cache = TTLCache('test', maxsize=2, ttl=0.05)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)  # витісняє найдавніше використаний 'b'
+
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertEqual(cache.get('c'), 3)
+        time.sleep(0.06)
+        self.assertIs(cache.get('a'), MISSING)
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+        self.assertEqual(stats['size'], 1)
+
+class TestUserCategoryCache(DatabaseTestCase):
+    """Кешовані користувачі та категорії інвалідуються після commit змін"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        user = User(telegram_id=1001, currency='UAH')
+        session.add(user)
+        session.flush()
+        session.add(Category(user_id=user.id, name="Продукти", type="expense", icon="🛒"))
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+    def test_user_served_from_cache_as_record(self):
+        first = db_operations.get_user(1001)
+        second = db_operations.get_or_create_user(1001)
+
+        self.assertIsInstance(first, UserRecord)
+        self.assertIs(first, second)
+        self.assertEqual(user_cache.stats()['hits'], 1)
+        with self.assertRaises(AttributeError):
+            first.currency = 'USD'
+
+    def test_update_user_settings_invalidates(self):
+        self.assertEqual(db_operations.get_user(1001).currency, 'UAH')
+
+        updated = db_operations.update_user_settings(1001, currency='USD')
+
+        self.assertIsInstance(updated, UserRecord)
+        self.assertEqual(db_operations.get_user(1001).currency, 'USD')
+
+    def test_direct_session_writes_invalidate(self):
+        self.assertEqual(len(db_operations.get_user_categories(self.user_id)), 1)
+        self.assertEqual(db_operations.get_user(1001).currency, 'UAH')
+
+        # Так працюють перейменування/видалення категорій і вибір валюти в обробниках
+        session = self.Session()
+        category = session.query(Category).filter(Category.user_id == self.user_id).first()
+        category.name = "Їжа"
+        session.query(User).filter(User.telegram_id == 1001).first().currency = 'EUR'
+        session.commit()
+        session.close()
+
+        self.assertEqual(db_operations.get_user_categories(self.user_id)[0].name, "Їжа")
+        self.assertEqual(db_operations.get_user(1001).currency, 'EUR')
+
+        session = self.Session()
+        session.delete(session.query(Category).filter(Category.user_id == self.user_id).first())
+        session.commit()
+        session.close()
+
+        self.assertEqual(db_operations.get_user_categories(self.user_id), [])
+
+    def test_create_category_invalidates_and_filters_by_type(self):
+        self.assertEqual(db_operations.get_user_categories(self.user_id, 'income'), [])
+
+        db_operations.create_category(self.user_id, "Зарплата", "income", "💰")
+
+        income = db_operations.get_user_categories(self.user_id, 'income')
+        self.assertEqual([c.name for c in income], ["Зарплата"])
+        self.assertIsInstance(income[0], CategoryRecord)
+        self.assertEqual(len(db_operations.get_user_categories(self.user_id)), 2)
+
+    def test_create_categories_invalidates(self):
+        db_operations.get_user_categories(self.user_id)
+
+        created = db_operations.create_categories(self.user_id, [
+            ("Зарплата", "income", "💰"),
+            ("Фріланс", "income", "💻"),
+        ])
+
+        self.assertEqual(created, 2)
+        income = db_operations.get_user_categories(self.user_id, 'income')
+        self.assertEqual(sorted(c.name for c in income), ["Зарплата", "Фріланс"])
+
+    def test_rollback_keeps_cache(self):
+        db_operations.get_user_categories(self.user_id)
+
+        session = self.Session()
+        category = session.query(Category).filter(Category.user_id == self.user_id).first()
+        category.name = "Не збережено"
+        session.flush()
+        session.rollback()
+        session.close()
+
+        self.assertIsNot(category_cache.get(self.user_id), MISSING)
+
+if __name__ == '__main__':
+    unittest.main()
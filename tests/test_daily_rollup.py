@@ -0,0 +1,192 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event, func
+
+from database.models import User, Category, Transaction, TransactionType, TransactionDailyRollup, Account
+from database.rollup import rebuild_daily_rollup
+from database import db_operations
+from tests.helpers import DatabaseTestCase
+
+class TestDailyRollup(DatabaseTestCase):
+    """Денні агрегати оновлюються разом з транзакціями і збігаються з перебудовою"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        user = User(telegram_id=555)
+        session.add(user)
+        session.flush()
+        food = Category(user_id=user.id, name="Продукти", type="expense", icon="🛒")
+        cafe = Category(user_id=user.id, name="Кафе", type="expense", icon="☕")
+        card = Account(user_id=user.id, name="Картка", balance=1000.0, is_main=True)
+        cash = Account(user_id=user.id, name="Готівка", balance=100.0)
+        session.add_all([food, cafe, card, cash])
+        session.commit()
+        self.user_id, self.food_id, self.cafe_id = user.id, food.id, cafe.id
+        self.card_id, self.cash_id = card.id, cash.id
+        session.close()
+
+    def _rollup(self):
+        """Агрегати, згруповані за ключем (дублікати ключів підсумовуються)"""
+        R = TransactionDailyRollup
+        session = self.Session()
+        try:
+            rows = session.query(
+                R.user_id, R.day, R.type, R.category_id, R.account_id,
+                func.sum(R.total), func.sum(R.count)
+            ).group_by(R.user_id, R.day, R.type, R.category_id, R.account_id).all()
+        finally:
+            session.close()
+        return {tuple(row[:5]): (round(row[5], 2), row[6]) for row in rows if row[6]}
+
+    def _assert_matches_rebuild(self):
+        incremental = self._rollup()
+        with self.engine.begin() as connection:
+            rebuild_daily_rollup(connection)
+        self.assertEqual(incremental, self._rollup())
+
+    def test_add_update_delete_keep_rollup(self):
+        day = datetime(2024, 6, 1, 10, 0)
+        first = db_operations.add_transaction(self.user_id, 100.0, "Сільпо", self.food_id,
+                                              TransactionType.EXPENSE, transaction_date=day)
+        second = db_operations.add_transaction(self.user_id, 40.0, "Кава", self.cafe_id,
+                                               TransactionType.EXPENSE, transaction_date=day)
+        db_operations.add_transaction(self.user_id, 2000.0, "Зарплата", None,
+                                      TransactionType.INCOME, transaction_date=day)
+        self.assertEqual(self._rollup()[(self.user_id, day.date(), TransactionType.EXPENSE, self.food_id, self.card_id)],
+                         (100.0, 1))
+
+        db_operations.update_transaction(first.id, self.user_id, amount=150.0, category_id=self.cafe_id,
+                                         transaction_date=datetime(2024, 6, 2, 9, 0))
+        db_operations.delete_transaction(second.id, self.user_id)
+
+        rollup = self._rollup()
+        self.assertNotIn((self.user_id, day.date(), TransactionType.EXPENSE, self.food_id, self.card_id), rollup)
+        self.assertEqual(rollup[(self.user_id, datetime(2024, 6, 2).date(), TransactionType.EXPENSE,
+                                 self.cafe_id, self.card_id)], (150.0, 1))
+        self._assert_matches_rebuild()
+
+    def test_transfer_and_direct_orm_writes(self):
+        db_operations.transfer_between_accounts(self.card_id, self.cash_id, 300.0)
+
+        # Запис транзакцій напряму через сесію (як в імпорті виписок)
+        session = self.Session()
+        session.add_all([
+            Transaction(user_id=self.user_id, category_id=self.food_id, amount=25.5,
+                        type=TransactionType.EXPENSE, transaction_date=datetime(2024, 1, 5)),
+            Transaction(user_id=self.user_id, category_id=self.food_id, amount=74.5,
+                        type=TransactionType.EXPENSE, transaction_date=datetime(2024, 1, 5, 18)),
+        ])
+        session.commit()
+        session.close()
+
+        rollup = self._rollup()
+        self.assertEqual(rollup[(self.user_id, datetime(2024, 1, 5).date(), TransactionType.EXPENSE,
+                                 self.food_id, None)], (100.0, 2))
+        self.assertEqual(sum(count for _, count in rollup.values()), 4)
+        self._assert_matches_rebuild()
+
+    def test_deleted_category_moves_to_uncategorized(self):
+        # Зовнішні ключі перевіряються, як на PostgreSQL
+        event.listen(self.engine, 'connect', lambda dbapi, _: dbapi.execute("PRAGMA foreign_keys=ON"))
+        self.engine.dispose()
+        day = datetime(2024, 6, 1, 10, 0)
+        for amount, category_id in [(100.0, self.food_id), (40.0, self.food_id), (15.0, None)]:
+            db_operations.add_transaction(self.user_id, amount, "", category_id,
+                                          TransactionType.EXPENSE, transaction_date=day)
+
+        # Як delete_category_confirmed: транзакції лишаються без категорії
+        session = self.Session()
+        session.delete(session.get(Category, self.food_id))
+        session.commit()
+        session.close()
+
+        self.assertEqual(self._rollup(), {
+            (self.user_id, day.date(), TransactionType.EXPENSE, None, self.card_id): (155.0, 3)
+        })
+        self._assert_matches_rebuild()
+
+    def test_period_summary_reads_rollup(self):
+        for amount, category_id, date in [
+            (100.0, self.food_id, datetime(2024, 6, 1)),
+            (50.0, self.cafe_id, datetime(2024, 6, 3)),
+            (30.0, self.food_id, datetime(2024, 6, 30, 23, 0)),
+            (999.0, self.food_id, datetime(2024, 7, 1)),
+        ]:
+            db_operations.add_transaction(self.user_id, amount, "", category_id,
+                                          TransactionType.EXPENSE, transaction_date=date)
+        db_operations.add_transaction(self.user_id, 500.0, "", None, TransactionType.INCOME,
+                                      transaction_date=datetime(2024, 6, 15))
+
+        summary = db_operations.get_period_summary(self.user_id, datetime(2024, 6, 1, 12), datetime(2024, 6, 30))
+
+        self.assertEqual(summary['income'], 500.0)
+        self.assertEqual(summary['expenses'], 180.0)
+        self.assertEqual(summary['balance'], 320.0)
+        self.assertEqual(summary['transactions_count'], 4)
+        self.assertEqual(
+            [(c['name'], c['amount'], c['count']) for c in summary['expense_categories']],
+            [("Продукти", 130.0, 2), ("Кафе", 50.0, 1)]
+        )
+
+    def test_period_summary_top_transactions(self):
+        for amount, transaction_type, date in [
+            (40.0, TransactionType.EXPENSE, datetime(2024, 6, 2, 9)),
+            (70.0, TransactionType.EXPENSE, datetime(2024, 6, 2, 18)),
+            (20.0, TransactionType.EXPENSE, datetime(2024, 6, 2, 20)),
+            (90.0, TransactionType.EXPENSE, datetime(2024, 6, 5)),
+            (800.0, TransactionType.INCOME, datetime(2024, 6, 5)),
+            (5000.0, TransactionType.EXPENSE, datetime(2024, 7, 1)),
+        ]:
+            db_operations.add_transaction(self.user_id, amount, "Покупка", self.food_id,
+                                          transaction_type, transaction_date=date)
+
+        summary = db_operations.get_period_summary(self.user_id, datetime(2024, 6, 1, 12), datetime(2024, 6, 30), top=2)
+
+        self.assertEqual([row.amount for row in summary['top_expenses']], [90.0, 70.0])
+        self.assertEqual([row.amount for row in summary['top_incomes']], [800.0])
+        self.assertEqual(summary['top_expenses'][0].category_name, "Продукти")
+        self.assertEqual(summary['busiest_days'], [(datetime(2024, 6, 2).date(), 3), (datetime(2024, 6, 5).date(), 2)])
+        self.assertNotIn('top_expenses', db_operations.get_period_summary(self.user_id, datetime(2024, 6, 1), datetime(2024, 6, 30)))
+
+    def test_compare_periods_in_one_query(self):
+        for amount, category_id, transaction_type, date in [
+            (100.0, self.food_id, TransactionType.EXPENSE, datetime(2024, 5, 10)),
+            (60.0, self.cafe_id, TransactionType.EXPENSE, datetime(2024, 5, 31, 23, 30)),
+            (500.0, None, TransactionType.EXPENSE, datetime(2024, 6, 2)),
+            (20.0, self.cafe_id, TransactionType.EXPENSE, datetime(2024, 6, 3)),
+            (10.0, self.food_id, TransactionType.EXPENSE, datetime(2024, 6, 4)),
+            (900.0, None, TransactionType.INCOME, datetime(2024, 6, 5)),
+        ]:
+            db_operations.add_transaction(self.user_id, amount, "", category_id,
+                                          transaction_type, transaction_date=date)
+        periods = [
+            (datetime(2024, 6, 1), datetime(2024, 6, 30, 18)),
+            (datetime(2024, 5, 1), datetime(2024, 5, 31)),
+            (datetime(2024, 5, 1), datetime(2024, 6, 30)),
+            (datetime(2023, 1, 1), datetime(2023, 1, 31)),
+        ]
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.engine, 'before_cursor_execute', record)
+        try:
+            june, may, both, empty = db_operations.compare_periods(self.user_id, periods, top=1)
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', record)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual((june['income'], june['expenses'], june['balance']), (900.0, 530.0, 370.0))
+        self.assertEqual(june['transactions_count'], 4)
+        # Операції без категорії в топ не потрапляють
+        self.assertEqual(june['top_categories'], [{'name': "Кафе", 'icon': "☕", 'amount': 20.0}])
+        self.assertEqual((may['expenses'], may['top_categories'][0]['name']), (160.0, "Продукти"))
+        self.assertEqual(both['expenses'], 690.0)
+        self.assertEqual(both['top_categories'], [{'name': "Продукти", 'icon': "🛒", 'amount': 110.0}])
+        self.assertEqual((empty['expenses'], empty['top_categories']), (0, []))
+        self.assertEqual(empty['start'], datetime(2023, 1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
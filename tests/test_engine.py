@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from database import engine as engine_module
+from database.engine import create_db_engine, is_sqlite_memory, InstrumentedQueuePool, _describe_pool
+from database import models, session, migrations
+
+class TestEngineFactory(unittest.TestCase):
+    """Усі модулі використовують один двигун, пул веде метрики"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_modules_share_one_engine(self):
+        self.assertIs(models.engine, engine_module.engine)
+        self.assertIs(session.engine, engine_module.engine)
+        self.assertIs(migrations.engine, engine_module.engine)
+        self.assertIs(session.Session, models.Session)
+
+    def test_pool_settings_and_overrides(self):
+        engine = create_db_engine(f"sqlite:///{self.db_path}", pool_size=2, max_overflow=1)
+        try:
+            self.assertIsInstance(engine.pool, InstrumentedQueuePool)
+            self.assertEqual(engine.pool.size(), 2)
+            self.assertEqual(engine.pool._max_overflow, 1)
+        finally:
+            engine.dispose()
+
+    def test_pool_stats_track_checkouts(self):
+        engine = create_db_engine(f"sqlite:///{self.db_path}", pool_size=2, max_overflow=0)
+        try:
+            first = engine.connect()
+            second = engine.connect()
+            first.execute(text("SELECT 1"))
+
+            stats = _describe_pool(engine.pool)
+            self.assertEqual(stats['checked_out'], 2)
+            self.assertEqual(stats['checkouts'], 2)
+            self.assertEqual(stats['peak_checked_out'], 2)
+            self.assertGreaterEqual(stats['max_wait_ms'], 0)
+
+            first.close()
+            second.close()
+            self.assertEqual(_describe_pool(engine.pool)['checked_out'], 0)
+        finally:
+            engine.dispose()
+
+    def test_in_memory_sqlite_is_one_shared_database(self):
+        engine = create_db_engine("sqlite://")
+        try:
+            self.assertIsInstance(engine.pool, InstrumentedQueuePool)
+            self.assertTrue(is_sqlite_memory(engine.url))
+            self.assertEqual(engine.url.query['vfs'], 'memdb')
+        finally:
+            engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import event, insert
+
+from database.models import User, Category, Account, AccountType, Transaction, TransactionType
+from database import db_operations
+from database.frame_cache import FrameCache, TransactionFrame, frame_cache
+from services.trend_analyzer import trend_analyzer
+from services.financial_insights import insights_engine
+from tests.helpers import DatabaseTestCase
+
+class TestTransactionFrame(unittest.TestCase):
+    """Колонковий кадр: зрізи за датою, дописування, обмеження кешу за пам'яттю"""
+
+    def _frame(self, days):
+        return TransactionFrame.from_rows([
+            (i + 1, datetime(2025, 1, day, 12), float(day), TransactionType.EXPENSE, None, None)
+            for i, day in enumerate(days)
+        ])
+
+    def test_between_is_inclusive_and_sorted(self):
+        frame = self._frame([5, 1, 3])
+
+        self.assertEqual(frame.amounts.tolist(), [1.0, 3.0, 5.0])
+        self.assertEqual(frame.between(datetime(2025, 1, 3, 12), datetime(2025, 1, 5, 12)).amounts.tolist(), [3.0, 5.0])
+        self.assertEqual(len(frame.between(datetime(2025, 1, 6))), 0)
+
+    def test_appended_keeps_order_and_skips_known_rows(self):
+        frame = self._frame([1, 5]).appended([
+            (3, datetime(2025, 1, 3), 3.0, TransactionType.INCOME, None),
+            (2, datetime(2025, 1, 5, 12), 5.0, TransactionType.EXPENSE, None),
+        ])
+
+        self.assertEqual(frame.ids.tolist(), [1, 3, 2])
+        self.assertEqual(frame.to_dataframe()['type'].tolist(), ['expense', 'income', 'expense'])
+
+    def test_rows_without_date_are_skipped(self):
+        frame = TransactionFrame.from_rows([
+            (1, datetime(2025, 1, 2), 2.0, TransactionType.EXPENSE, None, None),
+            (2, None, 5.0, TransactionType.EXPENSE, None, None),
+        ]).appended([(3, None, 7.0, TransactionType.INCOME, None)])
+
+        self.assertEqual(frame.ids.tolist(), [1])
+
+    def test_lru_memory_budget(self):
+        frame = self._frame([1, 2, 3])
+        cache = FrameCache(max_bytes=frame.nbytes * 2)
+        for user_id in (1, 2, 3):
+            cache.set(user_id, cache.version(user_id), frame)
+
+        self.assertIsNone(cache.get(1))
+        self.assertIs(cache.get(3), frame)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes)
+
+    def test_frame_loaded_during_change_is_not_stored(self):
+        cache = FrameCache()
+        version = cache.version(1)
+        cache.invalidate(1)
+        cache.set(1, version, self._frame([1]))
+
+        self.assertIsNone(cache.get(1))
+
+class TestFrameCache(DatabaseTestCase):
+    """Кадр читається одним запитом і оновлюється разом із транзакціями користувача"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        user = User(telegram_id=2020)
+        session.add(user)
+        session.flush()
+        food = Category(user_id=user.id, name="Продукти", type="expense")
+        salary = Category(user_id=user.id, name="Зарплата", type="income")
+        account = Account(user_id=user.id, name="Картка", account_type=AccountType.BANK_CARD, balance=500.0)
+        second = Account(user_id=user.id, name="Готівка", account_type=AccountType.CASH, balance=0.0)
+        session.add_all([food, salary, account, second])
+        session.commit()
+        self.user_id, self.food_id, self.salary_id = user.id, food.id, salary.id
+        self.account_ids = (account.id, second.id)
+        session.close()
+
+        self.now = datetime.now().replace(microsecond=0)
+        for day in range(20):
+            db_operations.add_transaction(
+                self.user_id, 10.0 + day, "Покупка", self.food_id, TransactionType.EXPENSE,
+                transaction_date=self.now - timedelta(days=day, hours=day % 5)
+            )
+        db_operations.add_transaction(
+            self.user_id, 1000.0, "Зарплата", self.salary_id, TransactionType.INCOME,
+            transaction_date=self.now - timedelta(days=3)
+        )
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append(statement)
+
+    def test_loaded_once_and_served_from_cache(self):
+        frame = db_operations.get_transaction_frame(self.user_id)
+        self.assertEqual(len(frame), 21)
+        self.assertEqual(len(self.statements), 1)
+
+        week = db_operations.get_transaction_frame(self.user_id, start_date=self.now - timedelta(days=7))
+        self.assertEqual(len(self.statements), 1)
+        self.assertTrue((week.dates >= np.datetime64(self.now - timedelta(days=7))).all())
+
+    def test_added_transaction_appended_without_reload(self):
+        db_operations.get_transaction_frame(self.user_id)
+        self.statements.clear()
+
+        db_operations.add_transaction(self.user_id, 7.0, "Кава", self.food_id, TransactionType.EXPENSE,
+                                      transaction_date=self.now - timedelta(days=2))
+        self.statements.clear()
+        frame = db_operations.get_transaction_frame(self.user_id)
+
+        self.assertEqual(self.statements, [])
+        self.assertEqual(len(frame), 22)
+        self.assertEqual(frame_cache.stats()['appends'], 1)
+        self.assertTrue((np.diff(frame.dates.astype(np.int64)) >= 0).all())
+
+    def test_update_bulk_import_and_transfer_invalidate(self):
+        first = db_operations.get_transaction_frame(self.user_id)
+        transaction_id = int(first.ids[0])
+
+        db_operations.update_transaction(transaction_id, self.user_id, amount=99.0)
+        frame = db_operations.get_transaction_frame(self.user_id)
+        self.assertEqual(float(frame.amounts[frame.ids == transaction_id][0]), 99.0)
+
+        db_operations.bulk_insert_transactions(self.user_id, [
+            {'amount': 5.0, 'type': 'expense', 'category_id': self.food_id, 'transaction_date': self.now}
+        ])
+        self.assertEqual(len(db_operations.get_transaction_frame(self.user_id)), 22)
+
+        db_operations.transfer_between_accounts(*self.account_ids, 50.0)
+        self.assertEqual(len(db_operations.get_transaction_frame(self.user_id)), 24)
+
+        db_operations.delete_transaction(transaction_id, self.user_id)
+        self.assertEqual(len(db_operations.get_transaction_frame(self.user_id)), 23)
+
+    def test_transaction_without_date_does_not_break_frame(self):
+        session = self.Session()
+        # Явний NULL в обхід ORM-значення за замовчуванням (старі записи, ручні вставки)
+        session.execute(insert(Transaction).values(user_id=self.user_id, amount=3.0, type=TransactionType.EXPENSE,
+                                                   category_id=self.food_id, transaction_date=None))
+        session.commit()
+        session.close()
+
+        frame = db_operations.get_transaction_frame(self.user_id)
+        self.assertEqual(len(frame), 21)
+        self.assertNotIn("error", trend_analyzer.analyze_spending_trends(frame))
+
+    def test_services_accept_frame(self):
+        start = self.now - timedelta(days=60)
+        frame = db_operations.get_transaction_frame(self.user_id, start_date=start, end_date=self.now)
+        dicts = [
+            {
+                'transaction_date': t.transaction_date,
+                'amount': t.amount,
+                'type': t.type.value,
+                'category_name': t.category_name or 'Без категорії'
+            }
+            for t in db_operations.get_transaction_rows(self.user_id, start_date=start, end_date=self.now)
+        ]
+
+        from_frame = trend_analyzer.analyze_spending_trends(frame)
+        self.assertNotIn("error", from_frame)
+        self.assertEqual(from_frame, trend_analyzer.analyze_spending_trends(dicts))
+        self.assertEqual(
+            insights_engine.generate_spending_insights(frame, period_days=30),
+            insights_engine.generate_spending_insights(dicts, period_days=30)
+        )
+
+if __name__ == '__main__':
+    unittest.main()
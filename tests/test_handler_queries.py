@@ -0,0 +1,193 @@
+import os
+import random
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import database.models
+from database.models import User, Category, TransactionType
+from database import db_operations, async_db_operations, activity
+from database.cache import clear_caches
+from database.query_stats import instrument_engine, track_update, reset_query_stats
+from database.unit_of_work import unit_of_work
+import generate_test_data
+import services.budget_manager
+import services.report_generator
+from tests.helpers import AsyncDatabaseTestCase
+
+# Обробники створюють клієнт OpenAI під час імпорту; запити до нього тут не виконуються
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from handlers.analytics_handler import show_period_statistics, show_detailed_categories, show_top_transactions, show_period_comparison_detail
+from handlers.transaction_handler import show_all_transactions, handle_import_all_transactions
+from handlers.budget_callbacks import show_my_budget_overview
+from handlers.settings_handler import (
+    export_csv, create_category, show_category_edit_menu, rename_category, delete_category_confirmed
+)
+
+TELEGRAM_ID = 424242
+
+# Верхня межа SQL-запитів на один виклик обробника (кеш користувачів і
+# категорій порожній, тож враховуються і їхні запити). Межа не повинна
+# залежати від кількості транзакцій чи категорій — новий N+1 її перевищить.
+QUERY_BUDGETS = {
+    'show_period_statistics': 2,
+    'show_detailed_categories': 2,
+    'show_top_transactions': 4,
+    'show_period_comparison_detail': 2,
+    'show_all_transactions': 3,
+    'show_my_budget_overview': 11,
+    'export_csv': 2,
+    'handle_import_all_transactions': 9,  # + лічильники бюджетів: SELECT і пакетний UPDATE на пачку
+}
+
+class FakeCallbackQuery:
+    """Мінімальний CallbackQuery: записує відповіді бота замість надсилання"""
+
+    def __init__(self, data):
+        self.data = data
+        self.from_user = SimpleNamespace(id=TELEGRAM_ID, username="tester", first_name="Test", last_name=None)
+        self.message = SimpleNamespace(chat_id=TELEGRAM_ID, message_id=1, text="menu")
+        self.edit_message_text = AsyncMock()
+        self.answer = AsyncMock()
+
+    def texts(self):
+        return [call.kwargs.get('text', call.args[0] if call.args else '')
+                for call in self.edit_message_text.await_args_list]
+
+class HandlerQueryTestCase(AsyncDatabaseTestCase):
+    """Справжні обробники на локальній SQLite з даними в стилі generate_test_data"""
+
+    # TEST_DATABASE_URL — окрема локальна PostgreSQL для тих самих перевірок
+    use_test_database_url = True
+    session_modules = (database.models, services.budget_manager, services.report_generator)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        random.seed(7)
+        self._seed()
+
+        instrument_engine(self.engine)
+        instrument_engine(self.async_engine)
+
+    async def asyncTearDown(self):
+        activity.take_pending()
+        reset_query_stats()
+
+    def _seed(self):
+        session = self.Session()
+        user = User(telegram_id=TELEGRAM_ID, currency='UAH', monthly_budget=15000.0)
+        session.add(user)
+        session.commit()
+        categories = generate_test_data.add_categories_to_user(session, user)
+        accounts = generate_test_data.add_accounts_to_user(session, user)
+        generate_test_data.add_transactions_to_user(session, user, categories, accounts, num_transactions=150)
+        generate_test_data.create_budget_for_user(session, user, categories)
+        self.user_id = user.id
+        session.close()
+
+    def _add_more_data(self, categories=5, transactions=100):
+        """Додає категорії й транзакції, щоб перевірити, що кількість запитів не зростає"""
+        session = self.Session()
+        user = session.get(User, self.user_id)
+        new_categories = [
+            Category(user_id=user.id, name=f"Додаткова {i}", type="expense", icon="📦")
+            for i in range(categories)
+        ]
+        session.add_all(new_categories)
+        session.commit()
+        accounts = generate_test_data.add_accounts_to_user(session, user)
+        generate_test_data.add_transactions_to_user(session, user, new_categories, accounts, transactions)
+        session.close()
+
+    async def run_handler(self, handler, *args, data="test", user_data=None):
+        """Виконує обробник як одне оновлення і повертає (кількість запитів, query)"""
+        clear_caches()
+        query = FakeCallbackQuery(data)
+        context = SimpleNamespace(user_data=dict(user_data or {}), bot=AsyncMock(), bot_data={})
+        with track_update(data) as stats:
+            async with unit_of_work():
+                await handler(query, context, *args)
+
+        errors = [text for text in query.texts() if text.startswith("❌")]
+        self.assertEqual(errors, [], f"{handler.__name__} завершився помилкою")
+        return stats.total.queries, query
+
+    async def assertQueryBudget(self, handler, *args, scales_with_data=False, **kwargs):
+        """Перевіряє межу запитів; для обробників без N+1 — і незалежність від обсягу даних"""
+        budget = QUERY_BUDGETS[handler.__name__]
+        queries, query = await self.run_handler(handler, *args, **kwargs)
+        self.assertLessEqual(queries, budget, f"{handler.__name__}: {queries} SQL-запитів (межа {budget})")
+        if not scales_with_data:
+            self._add_more_data()
+            again, _ = await self.run_handler(handler, *args, **kwargs)
+            self.assertEqual(again, queries, f"{handler.__name__}: кількість запитів залежить від обсягу даних")
+        return queries, query
+
+class TestHandlerQueryBudgets(HandlerQueryTestCase):
+
+    async def test_show_period_statistics(self):
+        await self.assertQueryBudget(show_period_statistics, "month")
+
+    async def test_show_detailed_categories(self):
+        await self.assertQueryBudget(show_detailed_categories, "month")
+
+    async def test_show_top_transactions(self):
+        _, query = await self.assertQueryBudget(show_top_transactions, "month")
+        self.assertIn("5 найбільших витрат", query.texts()[-1])
+
+    async def test_show_period_comparison_detail(self):
+        for period_type in ("week", "month", "quarter", "year", "30days"):
+            await self.assertQueryBudget(show_period_comparison_detail, period_type)
+
+    async def test_show_all_transactions(self):
+        filters = {'transaction_filters': {'period': 'all', 'type': 'all', 'category': 'all'}}
+        await self.assertQueryBudget(show_all_transactions, user_data=filters)
+
+    async def test_show_my_budget_overview(self):
+        await self.assertQueryBudget(show_my_budget_overview)
+
+    async def test_export_csv(self):
+        await self.assertQueryBudget(export_csv)
+
+    async def test_handle_import_all_transactions(self):
+        today = datetime.now()
+        parsed = [
+            {
+                'amount': 100 + i,
+                'type': 'expense' if i % 4 else 'income',
+                'description': f"Покупка {i}",
+                'date': (today - timedelta(days=i % 20)).strftime('%d.%m.%Y'),
+                'category': 'Транспорт' if i % 2 else '',
+            }
+            for i in range(60)
+        ]
+        queries, query = await self.assertQueryBudget(
+            handle_import_all_transactions,
+            user_data={'parsed_transactions': parsed},
+            scales_with_data=True,
+        )
+        self.assertIn("Імпортовано 60 транзакцій", query.texts()[-1])
+
+class TestSettingsHandlersAsync(HandlerQueryTestCase):
+    """Обробники налаштувань категорій працюють через асинхронний шар, без синхронних сесій"""
+
+    async def test_category_lifecycle(self):
+        blocked = MagicMock(side_effect=AssertionError("синхронна сесія в асинхронному обробнику"))
+        with patch.object(database.models, 'Session', blocked), patch.object(db_operations, 'Session', blocked):
+            await self.run_handler(create_category, "expense", "Хобі")
+            category = await async_db_operations.get_category_by_name(self.user_id, "Хобі")
+            await async_db_operations.add_transaction(self.user_id, 50.0, "Фарби", category.id, TransactionType.EXPENSE)
+
+            _, query = await self.run_handler(show_category_edit_menu, category.id)
+            self.assertIn("Транзакцій: 1", query.texts()[-1])
+            _, query = await self.run_handler(rename_category, category.id, "Творчість")
+            self.assertIn("**Хобі** → **Творчість**", query.texts()[-1])
+            _, query = await self.run_handler(delete_category_confirmed, category.id)
+            self.assertIn("**Творчість** більше не існує", query.texts()[-1])
+
+        self.assertIsNone(await async_db_operations.get_category_by_id(category.id))
+
+if __name__ == '__main__':
+    unittest.main()
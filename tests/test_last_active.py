@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from database.models import User
+from database import db_operations, activity
+from tests.helpers import DatabaseTestCase
+
+class TestLastActiveWriteBehind(DatabaseTestCase):
+    """last_active накопичується в буфері і записується одним пакетним UPDATE"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        self.users = [User(telegram_id=900 + i, last_active=datetime(2024, 1, 1)) for i in range(3)]
+        session.add_all(self.users)
+        session.commit()
+        self.user_ids = [user.id for user in self.users]
+        session.close()
+
+        activity.take_pending()
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record_statement)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self._record_statement)
+        activity.take_pending()
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _last_active(self, user_id):
+        session = self.Session()
+        try:
+            return session.get(User, user_id).last_active
+        finally:
+            session.close()
+
+    def test_existing_user_is_read_only(self):
+        for _ in range(5):
+            user = db_operations.get_or_create_user(900)
+
+        self.assertEqual(user.id, self.user_ids[0])
+        self.assertFalse([s for s in self.statements if not s.lstrip().upper().startswith('SELECT')])
+        self.assertEqual(activity.pending_count(), 1)
+        self.assertEqual(self._last_active(user.id), datetime(2024, 1, 1))
+
+    def test_flush_writes_all_users_in_one_update(self):
+        for telegram_id in (900, 901, 902, 900):
+            db_operations.get_or_create_user(telegram_id)
+        self.statements.clear()
+
+        self.assertEqual(db_operations.flush_last_active(), 3)
+
+        updates = [s for s in self.statements if s.lstrip().upper().startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(activity.pending_count(), 0)
+        for user_id in self.user_ids:
+            self.assertGreater(self._last_active(user_id), datetime(2024, 1, 1))
+        self.assertEqual(db_operations.flush_last_active(), 0)
+
+    def test_failed_flush_keeps_pending_values(self):
+        activity.touch_user(self.user_ids[0], datetime(2024, 5, 1))
+
+        with patch.object(db_operations, '_flush_last_active', side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                db_operations.flush_last_active()
+
+        # Новіше значення не перезаписується старішим при поверненні в буфер
+        activity.touch_user(self.user_ids[0], datetime(2024, 4, 1))
+        self.assertEqual(activity.take_pending(), {self.user_ids[0]: datetime(2024, 5, 1)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, inspect, text
+
+from database.models import Base
+from database import migrations
+from database.migrations import (
+    MIGRATIONS, TRANSACTION_INDEXES, SKIPPED, Migration,
+    run_migrations, get_applied_versions, get_schema_version, get_migration_statuses
+)
+
+# Секціонування transactions (версія 4) на SQLite пропускається і записується як пропущене
+SQLITE_MIGRATIONS = {m.version for m in MIGRATIONS} - {4}
+
+class TestMigrations(unittest.TestCase):
+    """Версіонований запуск міграцій на локальній SQLite базі"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.db_path)
+
+    def _transaction_indexes(self):
+        return {index['name'] for index in inspect(self.engine).get_indexes('transactions')}
+
+    def test_all_migrations_recorded_once(self):
+        Base.metadata.create_all(self.engine)
+
+        latest = max(SQLITE_MIGRATIONS)
+        self.assertEqual(run_migrations(self.engine), latest)
+        self.assertEqual(get_applied_versions(self.engine), SQLITE_MIGRATIONS)
+
+        # Повторний запуск нічого не застосовує
+        self.assertEqual(run_migrations(self.engine), latest)
+        with self.engine.connect() as connection:
+            count = connection.execute(text("SELECT COUNT(*) FROM schema_version")).scalar()
+        self.assertEqual(count, len(MIGRATIONS))
+
+    def test_skipped_migration_recorded_and_applied_later(self):
+        applied = []
+        available = [False]
+        def optional(connection):
+            if not available[0]:
+                return SKIPPED
+            applied.append(2)
+        steps = [
+            Migration(1, "Перша", lambda connection: applied.append(1), online=False),
+            Migration(2, "Необов'язкова", optional, online=False),
+            Migration(3, "Третя", lambda connection: applied.append(3), online=False),
+        ]
+
+        with patch.object(migrations, 'MIGRATIONS', steps):
+            self.assertEqual(run_migrations(self.engine), 3)
+            self.assertEqual(get_migration_statuses(self.engine), {1: 'applied', 2: 'skipped', 3: 'applied'})
+            self.assertEqual(get_applied_versions(self.engine), {1, 3})
+
+            # Пропущена міграція перевіряється знову і після застосування змінює статус
+            available[0] = True
+            run_migrations(self.engine)
+            run_migrations(self.engine)
+
+        self.assertEqual(applied, [1, 3, 2])
+        self.assertEqual(get_migration_statuses(self.engine), {1: 'applied', 2: 'applied', 3: 'applied'})
+
+    def test_legacy_schema_version_table_gets_status(self):
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE schema_version (version INTEGER PRIMARY KEY, description VARCHAR(255), "
+                "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            connection.execute(text("INSERT INTO schema_version (version, description) VALUES (1, 'Колонки')"))
+
+        self.assertEqual(get_migration_statuses(self.engine), {1: 'applied'})
+
+    def test_indexes_created_on_existing_table(self):
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            for name in TRANSACTION_INDEXES:
+                connection.execute(text(f"DROP INDEX {name}"))
+        self.assertFalse(set(TRANSACTION_INDEXES) & self._transaction_indexes())
+
+        run_migrations(self.engine)
+
+        self.assertTrue(set(TRANSACTION_INDEXES) <= self._transaction_indexes())
+
+    def test_legacy_users_table_gets_settings_columns(self):
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP TABLE users"))
+            connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, telegram_id INTEGER)"))
+        self.assertEqual(get_schema_version(self.engine), 0)
+
+        run_migrations(self.engine)
+
+        columns = {column['name'] for column in inspect(self.engine).get_columns('users')}
+        self.assertTrue({'initial_balance', 'currency', 'monthly_budget', 'setup_step'} <= columns)
+
+    def test_legacy_category_budgets_get_counters(self):
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP TABLE category_budgets"))
+            connection.execute(text(
+                "CREATE TABLE category_budgets (id INTEGER PRIMARY KEY, budget_plan_id INTEGER, "
+                "category_id INTEGER, allocated_amount FLOAT NOT NULL)"
+            ))
+            connection.execute(text("INSERT INTO users (id, telegram_id) VALUES (1, 100)"))
+            connection.execute(text("INSERT INTO categories (id, user_id, name, type) VALUES (1, 1, 'Їжа', 'expense')"))
+            connection.execute(text(
+                "INSERT INTO budget_plans (id, user_id, name, start_date, end_date, total_budget) "
+                "VALUES (1, 1, 'Травень', '2025-05-01 00:00:00', '2025-05-31 00:00:00', 500)"
+            ))
+            connection.execute(text(
+                "INSERT INTO category_budgets (id, budget_plan_id, category_id, allocated_amount) VALUES (1, 1, 1, 100)"
+            ))
+            for amount, when in [(60, '2025-05-31 21:00:00'), (25, '2025-05-02 09:00:00'), (99, '2025-06-01 00:00:00')]:
+                connection.execute(text(
+                    "INSERT INTO transactions (user_id, category_id, amount, transaction_date, type) "
+                    "VALUES (1, 1, :amount, :when, 'EXPENSE')"
+                ), {'amount': amount, 'when': when})
+
+        run_migrations(self.engine)
+
+        with self.engine.connect() as connection:
+            counters = connection.execute(text("SELECT spent_amount, alert_level FROM category_budgets")).one()
+        self.assertEqual(tuple(counters), (85.0, 80))
+
+if __name__ == '__main__':
+    unittest.main()
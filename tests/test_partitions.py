@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, User, Transaction, TransactionType
+from database import partitions, db_operations
+from database.migrations import run_migrations, get_applied_versions, get_migration_statuses
+from database.partitions import (
+    partition_name, add_months, month_range, ensure_transaction_partitions, scanned_partitions
+)
+
+class TestPartitionHelpers(unittest.TestCase):
+
+    def test_partition_names_and_months(self):
+        self.assertEqual(partition_name(date(2024, 5, 17)), 'transactions_y2024m05')
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(
+            list(month_range(datetime(2024, 12, 31, 23, 59), date(2025, 2, 3))),
+            [date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+        )
+
+class TestPartitioningOnSqlite(unittest.TestCase):
+    """На SQLite секціонування вимкнене, навіть якщо прапорець увімкнено"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.db_path)
+
+    def test_migration_recorded_as_skipped(self):
+        with patch.object(partitions, 'TRANSACTIONS_PARTITIONING', True):
+            run_migrations(self.engine)
+            self.assertNotIn(4, get_applied_versions(self.engine))
+            self.assertEqual(get_migration_statuses(self.engine)[4], 'skipped')
+            self.assertEqual(ensure_transaction_partitions(self.engine), [])
+
+@unittest.skipUnless(os.getenv('TEST_DATABASE_URL', '').startswith('postgresql'),
+                     "потрібна PostgreSQL у TEST_DATABASE_URL")
+class TestPartitioningOnPostgres(unittest.TestCase):
+    """Перенесення даних у секції та pruning на справжній PostgreSQL"""
+
+    def setUp(self):
+        self.engine = create_engine(os.environ['TEST_DATABASE_URL'])
+        Base.metadata.drop_all(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+        session = self.Session()
+        user = User(telegram_id=515)
+        session.add(user)
+        session.commit()
+        self.user_id = user.id
+        today = datetime.now()
+        session.add_all([
+            Transaction(user_id=user.id, amount=10 * (i + 1), type=TransactionType.EXPENSE,
+                        transaction_date=today - timedelta(days=31 * i))
+            for i in range(6)
+        ])
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS transactions CASCADE"))
+            connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def test_partitioned_migration_keeps_rows_and_prunes(self):
+        with patch.object(partitions, 'TRANSACTIONS_PARTITIONING', True):
+            run_migrations(self.engine)
+
+        self.assertIn(4, get_applied_versions(self.engine))
+        with self.engine.connect() as connection:
+            self.assertTrue(partitions.is_partitioned(connection))
+            self.assertEqual(connection.execute(text("SELECT count(*) FROM transactions")).scalar(), 6)
+            self.assertIn(partition_name(add_months(date.today(), 3)), partitions.existing_partitions(connection))
+
+        # Нова транзакція отримує наступний id із тієї ж послідовності
+        session = self.Session()
+        session.add(Transaction(user_id=self.user_id, amount=1, type=TransactionType.EXPENSE,
+                                transaction_date=datetime.now()))
+        session.commit()
+        session.close()
+
+        start = datetime.combine(date.today().replace(day=1), datetime.min.time())
+        with patch.object(db_operations, 'Session', self.Session):
+            scanned = scanned_partitions(self.engine, db_operations.get_transactions,
+                                         self.user_id, start_date=start, end_date=datetime.now())
+        self.assertEqual(scanned, [{partition_name(date.today())}])
+
+    def test_open_range_prunes_older_partitions(self):
+        with patch.object(partitions, 'TRANSACTIONS_PARTITIONING', True):
+            run_migrations(self.engine)
+
+        previous = add_months(date.today().replace(day=1), -1)
+        start = datetime.combine(previous, datetime.min.time())
+        with self.engine.connect() as connection:
+            plan = connection.execute(
+                text("EXPLAIN (FORMAT JSON) SELECT * FROM transactions "
+                     "WHERE user_id = :user_id AND transaction_date >= :start"),
+                {'user_id': self.user_id, 'start': start}
+            ).scalar()
+        relations = {name for name in partitions._relations(plan[0]['Plan']) if name.startswith('transactions_')}
+
+        # Секції до минулого місяця відсікаються; відкритий кінець діапазону лишає майбутні
+        self.assertTrue({partition_name(previous), partition_name(date.today())} <= relations)
+        self.assertNotIn(partition_name(add_months(previous, -1)), relations)
+
+    def test_new_partition_takes_rows_from_default(self):
+        with patch.object(partitions, 'TRANSACTIONS_PARTITIONING', True):
+            run_migrations(self.engine)
+        future = add_months(date.today(), 12)
+        session = self.Session()
+        session.add(Transaction(user_id=self.user_id, amount=5, type=TransactionType.EXPENSE,
+                                transaction_date=datetime.combine(future, datetime.min.time())))
+        session.commit()
+        session.close()
+
+        created = ensure_transaction_partitions(self.engine, months_ahead=12)
+
+        self.assertIn(partition_name(future), created)
+        with self.engine.connect() as connection:
+            rows = connection.execute(text(f"SELECT count(*) FROM {partition_name(future)}")).scalar()
+        self.assertEqual(rows, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from telegram.ext import CallbackQueryHandler, ConversationHandler
+
+from database.models import User
+from database import db_operations, async_db_operations, query_stats
+from database.query_stats import (
+    instrument_engine, track_update, track_handler, label_handlers, get_query_stats, reset_query_stats, parameter_shape
+)
+from tests.helpers import AsyncDatabaseTestCase
+
+# Обробники-заглушки з модулем у пакеті handlers, як у справжніх обробників
+_HANDLERS = {'__name__': 'handlers.fake_handler'}
+exec(
+    "async def show_report(ops, user_id):\n"
+    "    ops.get_transaction_rows(user_id)\n"
+    "    ops.count_transactions(user_id)\n"
+    "\n"
+    "async def show_async_report(ops, user_id):\n"
+    "    await ops.get_transaction_rows(user_id)\n",
+    _HANDLERS
+)
+show_report = track_handler(_HANDLERS['show_report'])
+show_async_report = track_handler(_HANDLERS['show_async_report'])
+
+class TestQueryStats(AsyncDatabaseTestCase):
+    """Кількість запитів за оновленнями та обробниками, лог повільних запитів"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+
+        session = self.Session()
+        user = User(telegram_id=777)
+        session.add(user)
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+        instrument_engine(self.engine)
+        instrument_engine(self.async_engine)
+        reset_query_stats()
+
+    async def asyncTearDown(self):
+        reset_query_stats()
+
+    async def test_counts_per_update_and_handler(self):
+        with track_update('callback:report') as update:
+            await show_report(db_operations, self.user_id)
+            await show_async_report(async_db_operations, self.user_id)
+
+        self.assertEqual(update.total.queries, 3)
+        self.assertEqual(set(update.handlers), {'fake_handler.show_report', 'fake_handler.show_async_report'})
+        self.assertEqual(update.handlers['fake_handler.show_report'].queries, 2)
+
+        stats = get_query_stats()
+        handler = stats['handlers']['fake_handler.show_report']
+        self.assertEqual((handler['updates'], handler['max_queries_per_update']), (1, 2))
+        self.assertEqual(stats['recent_updates'][-1]['update'], 'callback:report')
+        self.assertEqual(stats['recent_updates'][-1]['queries'], 3)
+
+    def test_queries_outside_handlers_are_background(self):
+        db_operations.count_transactions(self.user_id)
+
+        self.assertEqual(get_query_stats()['handlers'][query_stats.BACKGROUND]['queries'], 1)
+        self.assertEqual(get_query_stats()['recent_updates'], [])
+
+    def test_label_handlers_wraps_registered_callbacks(self):
+        callback, entry, state, fallback = (
+            _HANDLERS['show_report'], _HANDLERS['show_async_report'],
+            track_handler(_HANDLERS['show_report']), _HANDLERS['show_async_report'],
+        )
+        conversation = ConversationHandler(
+            entry_points=[CallbackQueryHandler(entry)],
+            states={1: [CallbackQueryHandler(state)]},
+            fallbacks=[CallbackQueryHandler(fallback)],
+        )
+        plain = CallbackQueryHandler(callback)
+        application = SimpleNamespace(handlers={0: [conversation, plain]})
+
+        label_handlers(application)
+        label_handlers(application)
+
+        self.assertEqual(plain.callback.tracked_handler, 'fake_handler.show_report')
+        self.assertEqual(conversation.entry_points[0].callback.tracked_handler, 'fake_handler.show_async_report')
+        self.assertIs(conversation.states[1][0].callback, state)
+        self.assertIs(conversation.fallbacks[0].callback.__wrapped__, fallback)
+
+    def test_slow_query_logged_with_parameter_shape(self):
+        with patch.object(query_stats, 'SLOW_QUERY_MS', 0):
+            with self.assertLogs('database.query_stats', level='WARNING') as logs:
+                db_operations.count_transactions(self.user_id)
+
+        self.assertIn("параметри: (int)", logs.output[0])
+        self.assertEqual(get_query_stats()['slow_queries'], 1)
+
+    def test_parameter_shape(self):
+        self.assertEqual(parameter_shape({'id': 1, 'name': 'x'}), "{id: int, name: str}")
+        self.assertEqual(parameter_shape([(1, 2.0), (2, 3.0)], executemany=True), "2 × (int, float)")
+
+if __name__ == '__main__':
+    unittest.main()
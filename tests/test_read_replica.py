@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from database.models import Base, User, Transaction, TransactionType
+from database import db_operations, async_db_operations, replica
+from database.engine import to_async_url
+
+class TestReadReplica(unittest.IsolatedAsyncioTestCase):
+    """Дві окремі бази: основна і репліка з навмисно іншими даними.
+
+    TEST_DATABASE_URL і TEST_READ_DATABASE_URL — дві локальні PostgreSQL замість SQLite.
+    """
+
+    async def asyncSetUp(self):
+        self.paths = []
+        primary_url = os.getenv('TEST_DATABASE_URL') or self._sqlite_url()
+        self.replica_url = os.getenv('TEST_READ_DATABASE_URL') or self._sqlite_url()
+
+        self.primary = create_engine(primary_url)
+        self.async_primary = create_async_engine(to_async_url(primary_url))
+        self.user_id = self._seed(self.primary, transactions=3)
+        replica_engine = create_engine(self.replica_url)
+        self._seed(replica_engine, transactions=1)
+        replica_engine.dispose()
+
+        self.router = replica.configure_replica(self.replica_url, max_lag=10)
+        self.patches = [
+            patch.object(db_operations, 'Session', sessionmaker(bind=self.primary)),
+            patch.object(async_db_operations, 'AsyncSession',
+                         async_sessionmaker(self.async_primary, expire_on_commit=False)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        await self.router.dispose_async()
+        replica.configure_replica(None)
+        await self.async_primary.dispose()
+        for url in (self.primary.url, self.replica_url):
+            engine = create_engine(url)
+            Base.metadata.drop_all(engine)
+            engine.dispose()
+        self.primary.dispose()
+        for path in self.paths:
+            os.remove(path)
+
+    def _sqlite_url(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.paths.append(path)
+        return f"sqlite:///{path}"
+
+    def _seed(self, engine, transactions):
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        user = User(telegram_id=919)
+        session.add(user)
+        session.flush()
+        session.add_all([
+            Transaction(user_id=user.id, amount=10.0, type=TransactionType.EXPENSE, transaction_date=datetime(2025, 1, 5))
+            for _ in range(transactions)
+        ])
+        session.commit()
+        user_id = user.id
+        session.close()
+        return user_id
+
+    def _analytics_count(self):
+        return db_operations.count_transactions(self.user_id, from_replica=True)
+
+    def test_only_explicit_reads_use_replica(self):
+        self.assertEqual(self._analytics_count(), 1)
+        self.assertEqual(db_operations.count_transactions(self.user_id), 3)
+        self.assertEqual((self.router.reads, self.router.fallbacks), (1, 0))
+
+    async def test_async_reads_use_replica_when_asked(self):
+        self.assertEqual(await async_db_operations.count_transactions(self.user_id, from_replica=True), 1)
+        self.assertEqual(await async_db_operations.count_transactions(self.user_id), 3)
+
+    def test_report_session_opened_on_replica(self):
+        session = replica.open_replica_session()
+        try:
+            self.assertEqual(str(session.get_bind().url), self.replica_url)
+        finally:
+            session.close()
+        replica.configure_replica(None)
+        self.assertIsNone(replica.open_replica_session())
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with patch.object(replica, '_measure_lag', return_value=60.0):
+            self.assertEqual(self._analytics_count(), 3)
+
+        self.assertEqual(self.router.fallbacks, 1)
+        self.assertEqual(self.router.stats()['lag_seconds'], 60.0)
+
+    def test_unreachable_replica_falls_back_and_backs_off(self):
+        router = replica.configure_replica("sqlite:////nonexistent-dir/replica.db", retry_interval=60)
+
+        self.assertEqual(self._analytics_count(), 3)
+        self.assertTrue(router.stats()['down'])
+        with patch.object(router, 'session') as session:
+            self.assertEqual(self._analytics_count(), 3)
+        session.assert_not_called()
+        self.assertEqual(router.fallbacks, 2)
+
+    def test_replica_query_error_retries_on_primary(self):
+        engine = create_engine(self.replica_url)
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+        self.assertEqual(self._analytics_count(), 3)
+        self.assertTrue(self.router.stats()['down'])
+
+if __name__ == '__main__':
+    unittest.main()
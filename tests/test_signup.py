@@ -0,0 +1,59 @@
+import unittest
+
+from sqlalchemy import event
+
+from database.models import Category
+from database import db_operations
+from tests.helpers import DatabaseTestCase
+
+DEFAULTS = [("Продукти", "expense", "🛒"), ("Транспорт", "expense", "🚗"), ("Зарплата", "income", "💰")]
+
+class TestSignup(DatabaseTestCase):
+    """Новий користувач отримує копію дефолтних категорій одним INSERT"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        session.add_all([Category(name=n, type=t, icon=i, is_default=True) for n, t, i in DEFAULTS])
+        session.commit()
+        session.close()
+
+        self.start_patch(db_operations, '_default_categories', None)
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_new_user_gets_defaults_in_one_insert(self):
+        db_operations.load_default_categories()
+        self.statements.clear()
+
+        user = db_operations.get_or_create_user(2002, username="new")
+
+        inserts = [s for s in self.statements if s.startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(len(self.statements), 3)  # + пошук користувача
+
+        categories = db_operations.get_user_categories(user.id)
+        self.assertEqual(len(self.statements), 3)  # категорії вже в кеші
+        self.assertEqual(sorted((c.name, c.type, c.icon) for c in categories), sorted(DEFAULTS))
+        self.assertTrue(all(c.user_id == user.id and not c.is_default for c in categories))
+
+        session = self.Session()
+        self.assertEqual(session.query(Category).filter(Category.user_id == user.id).count(), len(DEFAULTS))
+        session.close()
+
+    def test_defaults_loaded_lazily_without_startup(self):
+        user = db_operations.get_or_create_user(2003)
+
+        self.assertEqual(len(db_operations.get_user_categories(user.id)), len(DEFAULTS))
+        self.assertEqual(len(db_operations._default_categories), len(DEFAULTS))
+
+if __name__ == '__main__':
+    unittest.main()
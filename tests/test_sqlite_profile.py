@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import exc, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.engine import create_db_engine, create_async_db_engine
+from database.models import Base, User, Transaction, TransactionType
+from database.migrations import run_migrations
+from database.cleanup import clear_all_tables
+from database import db_operations, async_db_operations, cleanup
+from database.cache import clear_caches
+
+class TestSQLiteMemoryProfile(unittest.IsolatedAsyncioTestCase):
+    """Профіль SQLite в пам'яті: схема, міграції та операції без зовнішнього сервера"""
+
+    async def asyncSetUp(self):
+        self.engine = create_db_engine("sqlite://")
+        self.async_engine = create_async_db_engine("sqlite://")
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        run_migrations(self.engine)
+
+        self.patches = [
+            patch.object(db_operations, 'Session', sessionmaker(bind=self.engine)),
+            patch.object(async_db_operations, 'AsyncSession',
+                         async_sessionmaker(self.async_engine, expire_on_commit=False)),
+            patch.object(cleanup, 'engine', self.engine),
+        ]
+        for p in self.patches:
+            p.start()
+        clear_caches()
+        self.user_id = db_operations.get_or_create_user(1919).id
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        clear_caches()
+        await self.async_engine.dispose()
+        # База в пам'яті спільна для процесу — прибираємо за собою
+        Base.metadata.drop_all(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+        self.engine.dispose()
+
+    def _add_transactions(self, count):
+        session = db_operations.Session()
+        session.add_all([
+            Transaction(user_id=self.user_id, amount=10.0, type=TransactionType.EXPENSE,
+                        transaction_date=datetime(2025, 3, 1))
+            for _ in range(count)
+        ])
+        session.commit()
+        session.close()
+
+    async def test_threads_and_async_engine_see_same_data(self):
+        self._add_transactions(3)
+
+        counts = []
+        thread = threading.Thread(target=lambda: counts.append(db_operations.count_transactions(self.user_id)))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(counts, [3])
+        self.assertEqual(await async_db_operations.count_transactions(self.user_id), 3)
+
+    def test_data_survives_pool_dispose(self):
+        self._add_transactions(2)
+        self.engine.dispose()
+
+        self.assertEqual(db_operations.count_transactions(self.user_id), 2)
+
+    def test_foreign_keys_enforced(self):
+        with self.assertRaises(exc.IntegrityError):
+            with self.engine.begin() as connection:
+                connection.execute(
+                    Transaction.__table__.insert(),
+                    {'user_id': 999999, 'amount': 1.0, 'type': 'EXPENSE', 'transaction_date': datetime(2025, 3, 1)}
+                )
+
+    def test_dev_mode_cleanup(self):
+        self._add_transactions(2)
+
+        clear_all_tables()
+
+        session = db_operations.Session()
+        self.assertEqual(session.query(User).count(), 0)
+        self.assertEqual(session.query(Transaction).count(), 0)
+        session.close()
+
+class TestSQLiteFileProfile(unittest.TestCase):
+    """Файлова SQLite працює в режимі WAL"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.engine = create_db_engine(f"sqlite:///{self.db_path}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_wal_and_foreign_keys(self):
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("PRAGMA journal_mode")).scalar(), 'wal')
+            self.assertEqual(connection.execute(text("PRAGMA foreign_keys")).scalar(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta
+
+from database.models import User, Category, Transaction, TransactionType
+from database import db_operations
+from tests.helpers import DatabaseTestCase
+
+class TestTransactionPagination(DatabaseTestCase):
+    """COUNT(*) для загальної кількості та keyset-пагінація списку транзакцій"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        user = User(telegram_id=333)
+        category = Category(name="Продукти", type="expense", icon="🛒")
+        session.add_all([user, category])
+        session.flush()
+        self.user_id = user.id
+        self.category_id = category.id
+
+        # 12 транзакцій; кожні дві мають однакову дату, щоб перевірити розв'язку за id
+        base = datetime(2024, 5, 1, 12, 0)
+        for i in range(12):
+            session.add(Transaction(
+                user_id=user.id,
+                category_id=category.id if i % 3 else None,
+                amount=10.0 + i,
+                description=f"t{i}",
+                type=TransactionType.EXPENSE if i % 2 else TransactionType.INCOME,
+                transaction_date=base + timedelta(days=i // 2),
+            ))
+        session.commit()
+        session.close()
+
+    def test_count_matches_filters(self):
+        self.assertEqual(db_operations.count_transactions(self.user_id), 12)
+        self.assertEqual(
+            db_operations.count_transactions(self.user_id, transaction_type=TransactionType.EXPENSE), 6
+        )
+        self.assertEqual(db_operations.count_transactions(self.user_id, category_id=self.category_id), 8)
+        self.assertEqual(
+            db_operations.count_transactions(
+                self.user_id, start_date=datetime(2024, 5, 2), end_date=datetime(2024, 5, 3, 23, 59)
+            ), 4
+        )
+        self.assertEqual(db_operations.count_transactions(self.user_id + 100), 0)
+
+    def test_keyset_pages_match_offset_pages(self):
+        per_page = 5
+        expected = [t.id for t in db_operations.get_transactions(self.user_id, limit=100)]
+
+        seen = []
+        after = None
+        while True:
+            page = db_operations.get_transactions(self.user_id, limit=per_page, after=after)
+            if not page:
+                break
+            seen.extend(t.id for t in page)
+            after = (page[-1].transaction_date, page[-1].id)
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(
+            [t.id for t in db_operations.get_transactions(self.user_id, limit=per_page, offset=per_page)],
+            expected[per_page:2 * per_page]
+        )
+
+    def test_keyset_respects_filters(self):
+        first = db_operations.get_transactions(
+            self.user_id, limit=2, transaction_type=TransactionType.EXPENSE
+        )
+        rest = db_operations.get_transactions(
+            self.user_id, limit=10, transaction_type=TransactionType.EXPENSE,
+            after=(first[-1].transaction_date, first[-1].id)
+        )
+        self.assertEqual(len(first) + len(rest), 6)
+        self.assertTrue(all(t.type == TransactionType.EXPENSE for t in rest))
+
+if __name__ == '__main__':
+    unittest.main()
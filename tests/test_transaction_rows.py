@@ -0,0 +1,67 @@
+import unittest
+from datetime import datetime, timedelta
+
+from database.models import User, Category, Transaction, TransactionType
+from database import db_operations
+from tests.helpers import DatabaseTestCase
+from database.db_operations import TransactionRow
+
+class TestTransactionRows(DatabaseTestCase):
+    """Легкі записи транзакцій для читання замість ORM-об'єктів"""
+
+    def setUp(self):
+        super().setUp()
+
+        session = self.Session()
+        user = User(telegram_id=444)
+        category = Category(name="Продукти", type="expense", icon="🛒")
+        session.add_all([user, category])
+        session.flush()
+        self.user_id = user.id
+        self.category_id = category.id
+
+        base = datetime(2024, 5, 1, 12, 0)
+        for i in range(6):
+            session.add(Transaction(
+                user_id=user.id,
+                category_id=category.id if i % 2 else None,
+                amount=100.0 + i,
+                description=f"t{i}",
+                type=TransactionType.EXPENSE if i % 2 else TransactionType.INCOME,
+                transaction_date=base + timedelta(days=i),
+            ))
+        session.commit()
+        session.close()
+
+    def test_rows_match_orm_listing(self):
+        rows = db_operations.get_transaction_rows(self.user_id)
+        transactions = db_operations.get_transactions(self.user_id, limit=100)
+
+        self.assertTrue(all(isinstance(row, TransactionRow) for row in rows))
+        self.assertEqual([row.id for row in rows], [t.id for t in transactions])
+        for row, transaction in zip(rows, transactions):
+            self.assertEqual(row.amount, transaction.amount)
+            self.assertEqual(row.type, transaction.type)
+            self.assertEqual(row.category_name, transaction.category.name if transaction.category else None)
+
+    def test_uncategorised_rows_have_no_category(self):
+        rows = db_operations.get_transaction_rows(self.user_id, transaction_type=TransactionType.INCOME)
+
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(row.category_id is None and row.category_name is None for row in rows))
+
+    def test_filters_limit_and_offset(self):
+        rows = db_operations.get_transaction_rows(
+            self.user_id,
+            category_id=self.category_id,
+            start_date=datetime(2024, 5, 2),
+            end_date=datetime(2024, 5, 5),
+        )
+        self.assertEqual([row.description for row in rows], ["t3", "t1"])
+        self.assertEqual(rows[0].category_icon, "🛒")
+
+        page = db_operations.get_transaction_rows(self.user_id, limit=2, offset=2)
+        self.assertEqual([row.description for row in page], ["t3", "t2"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, User, Account, AccountType, Transaction, TransactionType, TransactionDailyRollup
+from database import db_operations
+
+THREADS = 8
+
+class TestConcurrentTransfers(unittest.TestCase):
+    """Паралельні перекази між однією парою рахунків не гублять оновлень балансу"""
+
+    def setUp(self):
+        # TEST_DATABASE_URL — перевірка на PostgreSQL з реальними блокуваннями рядків
+        database_url = os.getenv('TEST_DATABASE_URL')
+        self.db_path = None
+        connect_args = {}
+        if not database_url:
+            fd, self.db_path = tempfile.mkstemp(suffix='.db')
+            os.close(fd)
+            database_url = f"sqlite:///{self.db_path}"
+            connect_args = {'timeout': 30}
+        self.engine = create_engine(database_url, connect_args=connect_args, pool_size=THREADS)
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+        session = self.Session()
+        user = User(telegram_id=818)
+        session.add(user)
+        session.flush()
+        self.first = Account(user_id=user.id, name="Картка", account_type=AccountType.BANK_CARD, balance=1000.0)
+        self.second = Account(user_id=user.id, name="Готівка", account_type=AccountType.CASH, balance=1000.0)
+        session.add_all([self.first, self.second])
+        session.commit()
+        self.first_id, self.second_id = self.first.id, self.second.id
+        session.close()
+
+        self.patch = patch.object(db_operations, 'Session', self.Session)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        if self.db_path:
+            self.engine.dispose()
+            os.remove(self.db_path)
+        else:
+            Base.metadata.drop_all(self.engine)
+            self.engine.dispose()
+
+    def _balances(self):
+        session = self.Session()
+        try:
+            return (session.get(Account, self.first_id).balance, session.get(Account, self.second_id).balance)
+        finally:
+            session.close()
+
+    def _run_parallel(self, transfers):
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            return list(pool.map(lambda args: db_operations.transfer_between_accounts(*args), transfers))
+
+    def test_parallel_transfers_keep_balances_exact(self):
+        forward = [(self.first_id, self.second_id, 5.0)] * 100
+        backward = [(self.second_id, self.first_id, 3.0)] * 100
+        transfers = [t for pair in zip(forward, backward) for t in pair]
+
+        results = self._run_parallel(transfers)
+
+        self.assertTrue(all(ok for ok, _ in results), [m for ok, m in results if not ok][:3])
+        self.assertEqual(self._balances(), (1000.0 - 500.0 + 300.0, 1000.0 + 500.0 - 300.0))
+
+        session = self.Session()
+        self.assertEqual(session.query(Transaction).count(), 2 * len(transfers))
+        rollup = dict(session.query(TransactionDailyRollup.type, func.sum(TransactionDailyRollup.count))
+                      .group_by(TransactionDailyRollup.type).all())
+        session.close()
+        self.assertEqual(rollup, {TransactionType.EXPENSE: len(transfers), TransactionType.INCOME: len(transfers)})
+
+    def test_parallel_overdraft_never_goes_negative(self):
+        results = self._run_parallel([(self.first_id, self.second_id, 60.0)] * 30)
+
+        succeeded = sum(1 for ok, _ in results if ok)
+        self.assertEqual(succeeded, 16)  # 16 × 60 = 960 ≤ 1000 < 17 × 60
+        self.assertEqual(self._balances(), (1000.0 - 960.0, 1000.0 + 960.0))
+        self.assertTrue(all(message == "Недостатньо коштів на рахунку" for ok, message in results if not ok))
+
+    def test_parallel_balance_adjustments(self):
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            list(pool.map(lambda _: db_operations.adjust_account_balance(self.first_id, -2.5), range(80)))
+
+        self.assertEqual(self._balances()[0], 1000.0 - 200.0)
+
+    def test_missing_account(self):
+        self.assertEqual(
+            db_operations.transfer_between_accounts(self.first_id, 999999, 10.0),
+            (False, "Рахунок не знайдено")
+        )
+        self.assertEqual(self._balances(), (1000.0, 1000.0))
+
+if __name__ == '__main__':
+    unittest.main()
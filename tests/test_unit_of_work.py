@@ -0,0 +1,162 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from database.models import User, Category, TransactionType
+from database import db_operations, async_db_operations
+from database.unit_of_work import (
+    unit_of_work, current_unit_of_work, acquire_session, release_session, session_scope, commit_session,
+    UnitOfWorkUpdateProcessor
+)
+from tests.helpers import AsyncDatabaseTestCase
+
+class TestUnitOfWork(AsyncDatabaseTestCase):
+    """Одна сесія на оновлення: спільна для всіх викликів db_operations"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+
+        session = self.Session()
+        user = User(telegram_id=555)
+        session.add(user)
+        session.flush()
+        session.add(Category(user_id=user.id, name="Продукти", type="expense", icon="🛒"))
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+        self.checkouts = 0
+        event.listen(self.engine, "checkout", self._count_checkout)
+
+    async def asyncTearDown(self):
+        event.remove(self.engine, "checkout", self._count_checkout)
+
+    def _count_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _handler_reads(self):
+        db_operations.get_user(555)
+        db_operations.get_user_categories(self.user_id)
+        db_operations.count_transactions(self.user_id)
+        db_operations.get_transaction_rows(self.user_id)
+
+    async def test_sync_operations_share_one_session_and_release_connection(self):
+        created = []
+
+        def counting_factory():
+            created.append(self.Session())
+            return created[-1]
+
+        held = []
+        with patch.object(db_operations, 'Session', counting_factory):
+            async with unit_of_work():
+                for read in (lambda: db_operations.get_user(555),
+                             lambda: db_operations.get_user_categories(self.user_id),
+                             lambda: db_operations.count_transactions(self.user_id),
+                             lambda: db_operations.get_transaction_rows(self.user_id)):
+                    read()
+                    # Між операціями (коли обробник чекає на Telegram) з'єднання в пулі
+                    held.append(self.engine.pool.checkedout())
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(held, [0, 0, 0, 0])
+        self.assertIsNone(current_unit_of_work())
+
+    async def test_operations_flush_and_unit_of_work_commits(self):
+        def names():
+            with self.engine.connect() as connection:
+                return {row[0] for row in connection.exec_driver_sql("SELECT name FROM categories")}
+
+        async with unit_of_work():
+            with session_scope(self.Session) as outer:
+                outer.add(Category(user_id=self.user_id, name="Зовнішня", type="expense"))
+                commit_session(outer)
+                with session_scope(self.Session) as inner:
+                    self.assertIs(inner, outer)
+                    inner.add(Category(user_id=self.user_id, name="Вкладена", type="expense"))
+                    commit_session(inner)
+                # Вкладена операція лише робить flush — фіксує зовнішня
+                self.assertNotIn("Вкладена", names())
+            self.assertTrue({"Зовнішня", "Вкладена"} <= names())
+
+            with self.assertRaises(RuntimeError):
+                with session_scope(self.Session) as session:
+                    session.add(Category(user_id=self.user_id, name="Невдала", type="expense"))
+                    commit_session(session)
+                    raise RuntimeError("обробник впав")
+        self.assertNotIn("Невдала", names())
+
+    async def test_async_operation_releases_connection(self):
+        held = [0]
+        sync_engine = self.async_engine.sync_engine
+        event.listen(sync_engine, 'checkout', lambda *args: held.__setitem__(0, held[0] + 1))
+        event.listen(sync_engine, 'checkin', lambda *args: held.__setitem__(0, held[0] - 1))
+        async with unit_of_work():
+            await async_db_operations.add_transaction(
+                self.user_id, 10.0, "Чай", None, TransactionType.EXPENSE)
+            self.assertEqual(held[0], 0)
+            # Зміни вже зафіксовані — їх бачить інше з'єднання
+            self.assertEqual(db_operations.count_transactions(self.user_id), 1)
+
+    async def test_async_operations_share_one_session_and_commit(self):
+        processor = UnitOfWorkUpdateProcessor()
+        created = []
+        factory = async_db_operations.AsyncSession
+
+        def counting_factory():
+            created.append(factory())
+            return created[-1]
+
+        async def handler():
+            await async_db_operations.add_transaction(
+                self.user_id, 42.0, "Кава", None, TransactionType.EXPENSE)
+            await async_db_operations.count_transactions(self.user_id)
+
+        with patch.object(async_db_operations, 'AsyncSession', counting_factory):
+            await processor.do_process_update(object(), handler())
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(db_operations.count_transactions(self.user_id), 1)
+
+    async def test_rollback_only_discards_uncommitted_changes(self):
+        async with unit_of_work() as uow:
+            session = acquire_session(self.Session)
+            session.add(Category(user_id=self.user_id, name="Чернетка", type="expense"))
+            release_session(session)
+            uow.rollback_only = True
+
+        async with unit_of_work():
+            session = acquire_session(self.Session)
+            session.add(Category(user_id=self.user_id, name="Збережено", type="expense"))
+            release_session(session)
+
+        names = {c.name for c in db_operations.get_user_categories(self.user_id)}
+        self.assertEqual(names, {"Продукти", "Збережено"})
+
+    async def test_sync_commit_runs_off_event_loop(self):
+        threads = []
+        async with unit_of_work():
+            session = acquire_session(self.Session)
+            session.add(Category(user_id=self.user_id, name="Нова", type="expense"))
+            event.listen(session, 'after_commit', lambda _: threads.append(threading.get_ident()))
+            release_session(session)
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+        self.assertIn("Нова", {c.name for c in db_operations.get_user_categories(self.user_id)})
+
+    async def test_failed_operation_does_not_poison_shared_session(self):
+        def broken(session):
+            session.add(Category(user_id=self.user_id, name=None, type="expense"))
+            session.flush()
+
+        async with unit_of_work():
+            with self.assertRaises(IntegrityError):
+                db_operations._run_in_session(broken)
+            self.assertEqual(db_operations.count_transactions(self.user_id), 0)
+
+if __name__ == '__main__':
+    unittest.main()